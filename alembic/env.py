@@ -19,6 +19,14 @@ if config.config_file_name is not None:
 from app.models import Base
 target_metadata = Base.metadata
 
+# The full-text search index is raw DDL, not part of the metadata
+from app.search import include_name
+
+# Migrate the database the app is configured for (DATABASE_URL),
+# escaping % for configparser interpolation
+from app.config import settings
+config.set_main_option("sqlalchemy.url", settings.database_url.replace("%", "%%"))
+
 # other values from the config, defined by the needs of env.py,
 # can be acquired:
 # my_important_option = config.get_main_option("my_important_option")
@@ -41,6 +49,7 @@ def run_migrations_offline() -> None:
     context.configure(
         url=url,
         target_metadata=target_metadata,
+        include_name=include_name,
         literal_binds=True,
         dialect_opts={"paramstyle": "named"},
     )
@@ -64,7 +73,7 @@ def run_migrations_online() -> None:
 
     with connectable.connect() as connection:
         context.configure(
-            connection=connection, target_metadata=target_metadata
+            connection=connection, target_metadata=target_metadata, include_name=include_name
         )
 
         with context.begin_transaction():
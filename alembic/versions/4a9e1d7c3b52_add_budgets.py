@@ -0,0 +1,74 @@
+"""add budgets and budget_spend tables
+
+Revision ID: 4a9e1d7c3b52
+Revises: 7c3d9e4f2b61
+Create Date: 2026-10-18 23:05:47.310218
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '4a9e1d7c3b52'
+down_revision: Union[str, Sequence[str], None] = '7c3d9e4f2b61'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table(
+        "budgets",
+        sa.Column("id", sa.Integer(), nullable=False),
+        sa.Column("user_id", sa.Integer(), nullable=False),
+        sa.Column("category", sa.String(), nullable=False),
+        sa.Column("period", sa.String(), nullable=False),
+        sa.Column("amount", sa.Float(), nullable=False),
+        sa.Column("created_at", sa.DateTime(), nullable=True),
+        sa.ForeignKeyConstraint(["user_id"], ["users.id"]),
+        sa.PrimaryKeyConstraint("id"),
+        sa.UniqueConstraint("user_id", "category", "period", name="uq_budgets_user_category_period"),
+    )
+    op.create_table(
+        "budget_spend",
+        sa.Column("id", sa.Integer(), nullable=False),
+        sa.Column("user_id", sa.Integer(), nullable=False),
+        sa.Column("category", sa.String(), nullable=False),
+        sa.Column("period", sa.String(), nullable=False),
+        sa.Column("period_start", sa.Date(), nullable=False),
+        sa.Column("spent", sa.Float(), nullable=False),
+        sa.Column("count", sa.Integer(), nullable=False),
+        sa.ForeignKeyConstraint(["user_id"], ["users.id"]),
+        sa.PrimaryKeyConstraint("id"),
+        sa.UniqueConstraint("user_id", "category", "period", "period_start", name="uq_budget_spend_key"),
+    )
+    # Fill the counters from the expenses that already exist, as
+    # app.services.budgets.compute() would: weeks start on Monday, and
+    # uncategorized rows count under ''
+    dialect = op.get_bind().dialect.name
+    if dialect == "sqlite":
+        starts = {
+            "weekly": "date(date, '-' || ((CAST(strftime('%w', date) AS INTEGER) + 6) % 7) || ' days')",
+            "monthly": "date(date, 'start of month')",
+        }
+    else:
+        starts = {
+            "weekly": "CAST(date_trunc('week', date) AS date)",
+            "monthly": "CAST(date_trunc('month', date) AS date)",
+        }
+    for period, start in starts.items():
+        op.execute(
+            "INSERT INTO budget_spend (user_id, category, period, period_start, spent, count) "
+            f"SELECT user_id, coalesce(category, ''), '{period}', {start}, sum(amount), count(id) "
+            "FROM transactions WHERE date IS NOT NULL AND lower(type) = 'expense' "
+            f"GROUP BY user_id, coalesce(category, ''), {start}"
+        )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_table("budget_spend")
+    op.drop_table("budgets")
@@ -0,0 +1,28 @@
+"""add users.data_version
+
+Revision ID: 5d2c8f1a7e93
+Revises: b81f5d3e9a27
+Create Date: 2026-10-19 00:41:26.118903
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '5d2c8f1a7e93'
+down_revision: Union[str, Sequence[str], None] = 'b81f5d3e9a27'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.add_column("users", sa.Column("data_version", sa.Integer(), nullable=False, server_default="0"))
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_column("users", "data_version")
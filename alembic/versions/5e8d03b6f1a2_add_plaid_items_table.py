@@ -0,0 +1,44 @@
+"""add plaid_items table
+
+Revision ID: 5e8d03b6f1a2
+Revises: c47e2a91d5b8
+Create Date: 2026-10-18 22:15:03.640157
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '5e8d03b6f1a2'
+down_revision: Union[str, Sequence[str], None] = 'c47e2a91d5b8'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table(
+        "plaid_items",
+        sa.Column("id", sa.Integer(), nullable=False),
+        sa.Column("user_id", sa.Integer(), nullable=False),
+        sa.Column("plaid_item_id", sa.String(), nullable=False),
+        sa.Column("access_token", sa.String(), nullable=False),
+        sa.Column("cursor", sa.String(), nullable=True),
+        sa.Column("last_synced_at", sa.DateTime(), nullable=True),
+        sa.Column("created_at", sa.DateTime(), nullable=True),
+        sa.ForeignKeyConstraint(["user_id"], ["users.id"]),
+        sa.PrimaryKeyConstraint("id"),
+        sa.UniqueConstraint("plaid_item_id"),
+    )
+    op.create_index("ix_plaid_items_id", "plaid_items", ["id"])
+    op.create_index("ix_plaid_items_user_id", "plaid_items", ["user_id"])
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index("ix_plaid_items_user_id", table_name="plaid_items")
+    op.drop_index("ix_plaid_items_id", table_name="plaid_items")
+    op.drop_table("plaid_items")
@@ -0,0 +1,48 @@
+"""add category rules
+
+Revision ID: 7c3d9e4f2b61
+Revises: e2a7c5d91f04
+Create Date: 2026-10-18 22:31:09.557104
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '7c3d9e4f2b61'
+down_revision: Union[str, Sequence[str], None] = 'e2a7c5d91f04'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table(
+        "category_rules",
+        sa.Column("id", sa.Integer(), nullable=False),
+        sa.Column("user_id", sa.Integer(), nullable=True),
+        sa.Column("category", sa.String(), nullable=False),
+        sa.Column("merchant", sa.String(), nullable=True),
+        sa.Column("pattern", sa.String(), nullable=True),
+        sa.Column("min_amount", sa.Float(), nullable=True),
+        sa.Column("max_amount", sa.Float(), nullable=True),
+        sa.Column("priority", sa.Integer(), nullable=False),
+        sa.Column("created_at", sa.DateTime(), nullable=True),
+        sa.ForeignKeyConstraint(["user_id"], ["users.id"]),
+        sa.PrimaryKeyConstraint("id"),
+    )
+    op.create_index("ix_category_rules_id", "category_rules", ["id"])
+    op.create_index("ix_category_rules_user_id", "category_rules", ["user_id"])
+    op.add_column("transactions", sa.Column("category_rule_id", sa.Integer(), nullable=True))
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    # Not batch mode: rebuilding transactions on SQLite would drop the search triggers
+    op.drop_column("transactions", "category_rule_id")
+    op.drop_index("ix_category_rules_user_id", table_name="category_rules")
+    op.drop_index("ix_category_rules_id", table_name="category_rules")
+    op.drop_table("category_rules")
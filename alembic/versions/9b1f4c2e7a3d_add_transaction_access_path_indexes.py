@@ -0,0 +1,39 @@
+"""add transaction access path indexes
+
+Revision ID: 9b1f4c2e7a3d
+Revises: 3662287a8bc6
+Create Date: 2026-10-18 20:40:12.512904
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '9b1f4c2e7a3d'
+down_revision: Union[str, Sequence[str], None] = '3662287a8bc6'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_index("ix_accounts_user_id", "accounts", ["user_id"])
+    op.create_index("ix_transactions_user_id_date", "transactions", ["user_id", "date"])
+    op.create_index("ix_transactions_account_id_date", "transactions", ["account_id", "date"])
+    op.create_index(
+        "ix_transactions_plaid_transaction_id",
+        "transactions",
+        ["plaid_transaction_id"],
+        unique=True,
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index("ix_transactions_plaid_transaction_id", table_name="transactions")
+    op.drop_index("ix_transactions_account_id_date", table_name="transactions")
+    op.drop_index("ix_transactions_user_id_date", table_name="transactions")
+    op.drop_index("ix_accounts_user_id", table_name="accounts")
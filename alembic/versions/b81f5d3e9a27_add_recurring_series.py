@@ -0,0 +1,64 @@
+"""add recurring table and transactions.merchant_key
+
+Revision ID: b81f5d3e9a27
+Revises: 4a9e1d7c3b52
+Create Date: 2026-10-18 23:48:12.604533
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'b81f5d3e9a27'
+down_revision: Union[str, Sequence[str], None] = '4a9e1d7c3b52'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.add_column("transactions", sa.Column("merchant_key", sa.String(), nullable=True))
+    op.create_index(
+        "ix_transactions_user_id_merchant_key_date",
+        "transactions",
+        ["user_id", "merchant_key", "date"],
+    )
+    op.create_table(
+        "recurring",
+        sa.Column("id", sa.Integer(), nullable=False),
+        sa.Column("user_id", sa.Integer(), nullable=False),
+        sa.Column("merchant_key", sa.String(), nullable=False),
+        sa.Column("type", sa.String(), nullable=False),
+        sa.Column("period", sa.String(), nullable=False),
+        sa.Column("occurrences", sa.Integer(), nullable=False),
+        sa.Column("amount", sa.Float(), nullable=False),
+        sa.Column("average_amount", sa.Float(), nullable=False),
+        sa.Column("first_date", sa.Date(), nullable=False),
+        sa.Column("last_date", sa.Date(), nullable=False),
+        sa.Column("next_date", sa.Date(), nullable=False),
+        sa.Column("description", sa.String(), nullable=True),
+        sa.Column("category", sa.String(), nullable=True),
+        sa.Column("account_id", sa.Integer(), nullable=True),
+        sa.ForeignKeyConstraint(["user_id"], ["users.id"]),
+        sa.PrimaryKeyConstraint("id"),
+        sa.UniqueConstraint("user_id", "merchant_key", "type", name="uq_recurring_key"),
+    )
+    # Fill merchant keys and detect the series of the rows that already
+    # exist. The session joins the migration's transaction, and its
+    # commits leave that transaction to alembic
+    from sqlalchemy.orm import Session
+    from app.services import recurring
+
+    with Session(bind=op.get_bind()) as db:
+        recurring.rebuild(db)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_table("recurring")
+    op.drop_index("ix_transactions_user_id_merchant_key_date", table_name="transactions")
+    # Not batch mode: rebuilding transactions on SQLite would drop the search triggers
+    op.drop_column("transactions", "merchant_key")
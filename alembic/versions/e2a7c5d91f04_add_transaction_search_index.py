@@ -0,0 +1,71 @@
+"""add transaction search index
+
+Revision ID: e2a7c5d91f04
+Revises: 5e8d03b6f1a2
+Create Date: 2026-10-18 22:05:31.402716
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'e2a7c5d91f04'
+down_revision: Union[str, Sequence[str], None] = '5e8d03b6f1a2'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+# Contentless FTS5 table keyed by (user_id << 32) + id, kept in step with
+# transactions by triggers; see app/search.py
+SQLITE_VALUES = "({row}.user_id << 32) + {row}.id, {row}.description, {row}.category"
+SQLITE_INSERT = "INSERT INTO transactions_fts(rowid, description, category) VALUES ({values});"
+SQLITE_DELETE = (
+    "INSERT INTO transactions_fts(transactions_fts, rowid, description, category) "
+    "VALUES ('delete', {values});"
+)
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    dialect = op.get_bind().dialect.name
+    if dialect == "sqlite":
+        insert = SQLITE_INSERT.format(values=SQLITE_VALUES.format(row="new"))
+        delete = SQLITE_DELETE.format(values=SQLITE_VALUES.format(row="old"))
+        op.execute(
+            "CREATE VIRTUAL TABLE transactions_fts USING fts5("
+            "description, category, content='', columnsize=0, "
+            "prefix='1 2 3 4 5 6 7 8', tokenize='unicode61 remove_diacritics 2')"
+        )
+        op.execute(f"CREATE TRIGGER transactions_fts_insert AFTER INSERT ON transactions BEGIN {insert} END")
+        op.execute(f"CREATE TRIGGER transactions_fts_delete AFTER DELETE ON transactions BEGIN {delete} END")
+        op.execute(
+            "CREATE TRIGGER transactions_fts_update AFTER UPDATE OF user_id, description, category "
+            f"ON transactions BEGIN {delete} {insert} END"
+        )
+        # Index the rows that already exist
+        op.execute(
+            "INSERT INTO transactions_fts(rowid, description, category) "
+            "SELECT (user_id << 32) + id, description, category FROM transactions"
+        )
+    elif dialect == "postgresql":
+        op.execute(
+            "ALTER TABLE transactions ADD COLUMN search_vector tsvector GENERATED ALWAYS AS "
+            "(to_tsvector('simple', coalesce(description, '') || ' ' || coalesce(category, ''))) STORED"
+        )
+        op.create_index(
+            "ix_transactions_search_vector", "transactions", ["search_vector"], postgresql_using="gin"
+        )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    dialect = op.get_bind().dialect.name
+    if dialect == "sqlite":
+        for trigger in ("transactions_fts_update", "transactions_fts_delete", "transactions_fts_insert"):
+            op.execute(f"DROP TRIGGER {trigger}")
+        op.execute("DROP TABLE transactions_fts")
+    elif dialect == "postgresql":
+        op.drop_index("ix_transactions_search_vector", table_name="transactions")
+        op.drop_column("transactions", "search_vector")
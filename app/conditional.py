@@ -0,0 +1,85 @@
+"""Conditional GET for responses that depend only on a user's data version.
+
+respond() reads the version (one primary-key lookup), derives the ETag
+from it and answers a matching If-None-Match with 304 Not Modified
+without running the endpoint's queries. Otherwise it builds the body as
+usual and sends it with the ETag. The version is read before the body,
+so a write landing in between can only pair newer rows with an older
+tag, which costs the client one extra full response; never the reverse.
+
+Given a cache key and scopes, respond() goes through app.readcache
+instead: the entry holds the tag and the encoded body together, so both
+the 304 and the full response are answered without a query. A
+process-local backend cannot see the scope rotations of writes handled
+by other workers, so with one the version is still read, answers the
+304 itself and is part of the entry's key: a write anywhere moves the
+user to entries built after it.
+"""
+from typing import Callable, Optional
+from fastapi import Request, Response
+from fastapi.responses import ORJSONResponse
+from sqlalchemy.orm import Session
+from app import readcache
+from app.database import run_db
+from app.services import versions
+
+# Clients may keep the body but must revalidate; shared caches must not store it
+CACHE_CONTROL = "private, no-cache"
+
+
+def etag(user_id: int, version: int) -> str:
+    # Weak: equal versions give equivalent JSON, not a byte-for-byte promise
+    return f'W/"{user_id}-{version}"'
+
+
+def matches(if_none_match: Optional[str], tag: str) -> bool:
+    """If-None-Match uses weak comparison: W/ prefixes are ignored."""
+    if not if_none_match:
+        return False
+    if if_none_match.strip() == "*":
+        return True
+    opaque = tag.removeprefix("W/")
+    return any(candidate.strip().removeprefix("W/") == opaque for candidate in if_none_match.split(","))
+
+
+def _read(db: Session, user_id: int, if_none_match: Optional[str], build: Callable, args: tuple):
+    tag = etag(user_id, versions.current(db, user_id))
+    if matches(if_none_match, tag):
+        return tag, None
+    return tag, build(db, *args)
+
+
+async def respond(
+    request: Request, db, user_id: int, build: Callable, *args,
+    cache_key: Optional[str] = None, scopes: Optional[list] = None,
+) -> Response:
+    """ORJSONResponse of build(db, *args), or 304 if the client's copy is current.
+
+    The body goes out without response_model validation, so build must
+    return trusted, JSON-ready values. cache_key and scopes, when given,
+    are passed to readcache.ReadCache.fetch.
+    """
+    if_none_match = request.headers.get("if-none-match")
+    if cache_key is None or readcache.cache is None:
+        tag, body = await run_db(db, _read, user_id, if_none_match, build, args)
+        headers = {"ETag": tag, "Cache-Control": CACHE_CONTROL}
+        if body is None:
+            return Response(status_code=304, headers=headers)
+        return ORJSONResponse(body, headers=headers)
+
+    if not readcache.cache.backend.shared:
+        version = await run_db(db, versions.current, user_id)
+        tag = etag(user_id, version)
+        if matches(if_none_match, tag):
+            return Response(status_code=304, headers={"ETag": tag, "Cache-Control": CACHE_CONTROL})
+        cache_key = f"{cache_key}:v{version}"
+
+    async def fill() -> bytes:
+        tag, body = await run_db(db, _read, user_id, None, build, args)
+        return tag.encode() + b"\n" + ORJSONResponse(body).body
+
+    tag, body = (await readcache.cache.fetch(cache_key, scopes, fill)).split(b"\n", 1)
+    headers = {"ETag": tag.decode(), "Cache-Control": CACHE_CONTROL}
+    if matches(if_none_match, headers["ETag"]):
+        return Response(status_code=304, headers=headers)
+    return Response(body, media_type="application/json", headers=headers)
@@ -0,0 +1,111 @@
+import os
+from typing import Optional
+from dotenv import load_dotenv
+from pydantic import BaseModel
+
+load_dotenv()
+
+
+class Settings(BaseModel):
+    """Runtime settings. Each field is read from the upper-cased environment
+    variable of the same name (DATABASE_URL, DB_POOL_SIZE, ...)."""
+
+    database_url: str = "sqlite:///./budgeting_app.db"
+
+    # JWT signing for access tokens
+    secret_key: str = "secret123"
+    algorithm: str = "HS256"
+    access_token_expire_minutes: int = 30
+
+    # Refuse to start unless the database is at the newest Alembic revision
+    schema_check: bool = True
+
+    # Serve requests from an async engine (aiosqlite / asyncpg) instead of
+    # running the blocking engine on the threadpool
+    async_db: bool = False
+
+    # Connection pool (QueuePool for Postgres and file-backed SQLite)
+    db_pool_size: int = 5
+    db_max_overflow: int = 10
+    db_pool_timeout: float = 30.0
+    db_pool_pre_ping: bool = True
+    db_pool_recycle: int = 1800  # seconds; -1 never recycles
+
+    # Postgres: server-side statement_timeout. SQLite: how long a writer
+    # waits on a locked database before failing.
+    db_statement_timeout_ms: Optional[int] = None
+    sqlite_busy_timeout_ms: int = 5000
+
+    # SQLite pragmas applied to every new connection. WAL lets readers run
+    # concurrently with a writer; NORMAL sync is durable under WAL except
+    # against power loss.
+    sqlite_journal_mode: str = "WAL"
+    sqlite_synchronous: str = "NORMAL"
+    sqlite_mmap_size: int = 256 * 1024 * 1024
+    sqlite_cache_size: int = -64000  # negative means KiB, so ~64 MB
+
+    # Password hashing runs on a dedicated process pool; when more than
+    # password_hash_queue calls are waiting, auth endpoints answer 503
+    bcrypt_rounds: int = 12
+    password_hash_workers: int = 2
+    password_hash_queue: int = 64
+    password_hash_retry_after: int = 1  # seconds, sent as Retry-After
+
+    # Decoded bearer tokens kept by get_current_user; 0 disables the cache
+    token_cache_size: int = 10000
+
+    # Log statements at least this slow (with the issuing route) to the
+    # app.slow_query logger; unset disables the log
+    slow_query_ms: Optional[float] = None
+
+    # Seconds between passes recomputing budget spend counters from the
+    # transactions table to fix drift; 0 disables the background pass.
+    # Each pass scans every user's expenses, and every server process
+    # with this set runs its own, so set it on one process only, or
+    # schedule `python -m app.services.budgets` instead
+    budget_reconcile_seconds: float = 0
+
+    # Balance forecasts kept per user and data version
+    forecast_cache_size: int = 1000
+
+    # Read-through cache for the account and transaction read endpoints:
+    # "memory" (per process; entries are keyed on the user's data version,
+    # so any write, in any worker, moves the user past all of them),
+    # "redis" (shared, at read_cache_url; writes orphan only the entries
+    # they touch) or "none"
+    read_cache_backend: str = "memory"
+    read_cache_url: str = "redis://localhost:6379/0"
+    read_cache_size: int = 10000  # entries, memory backend
+    read_cache_ttl_seconds: float = 60
+    read_cache_lease_seconds: float = 2.0  # redis: how long other workers wait on a fill
+
+    # Background jobs (POST /jobs): jobs_threads jobs run at once in this
+    # process (0 runs none here), and their CPU-bound parts go to
+    # jobs_processes spawned worker processes (0 runs them on the job's
+    # thread). A running job not heard from for jobs_lease_seconds is
+    # taken over by another runner, at most jobs_max_attempts times.
+    jobs_threads: int = 2
+    jobs_processes: int = 1
+    jobs_poll_seconds: float = 1.0
+    jobs_lease_seconds: float = 60
+    jobs_max_attempts: int = 3
+    jobs_dir: str = "./job_files"  # export job output
+
+    # Plaid API credentials and transaction sync tuning
+    plaid_client_id: str = ""
+    plaid_secret: str = ""
+    plaid_host: str = "https://sandbox.plaid.com"
+    plaid_sync_page_size: int = 500  # Plaid's maximum per /transactions/sync call
+    plaid_sync_workers: int = 4  # items fetched concurrently
+
+    @classmethod
+    def from_env(cls) -> "Settings":
+        values = {
+            name: os.environ[name.upper()]
+            for name in cls.model_fields
+            if name.upper() in os.environ
+        }
+        return cls(**values)
+
+
+settings = Settings.from_env()
@@ -1,21 +1,143 @@
-from sqlalchemy import create_engine
+from pathlib import Path
+from typing import Union
+from sqlalchemy import create_engine, event
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.engine import make_url
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
 from sqlalchemy.ext.declarative import declarative_base
-from sqlalchemy.orm import sessionmaker
+from sqlalchemy.orm import Session, sessionmaker
+from starlette.concurrency import run_in_threadpool
+from app.config import Settings, settings
+from app.metrics import install_query_metrics
 
-DATABASE_URL = "sqlite:///./budgeting_app.db"
+DATABASE_URL = settings.database_url
 
-engine = create_engine(
-    DATABASE_URL, connect_args={"check_same_thread": False}
-)
+ASYNC_DRIVERS = {"sqlite": "aiosqlite", "postgresql": "asyncpg"}
+
+def async_url(url: str) -> str:
+    """Swap the blocking DBAPI in a database URL for its asyncio driver."""
+    parsed = make_url(url)
+    backend = parsed.get_backend_name()
+    return parsed.set(drivername=f"{backend}+{ASYNC_DRIVERS[backend]}").render_as_string(hide_password=False)
+
+def engine_options(url: str, settings: Settings, is_async: bool = False) -> dict:
+    """Keyword arguments for create_engine / create_async_engine."""
+    backend = make_url(url).get_backend_name()
+    options = {"pool_pre_ping": settings.db_pool_pre_ping}
+    connect_args = {}
+
+    if backend == "sqlite":
+        if not is_async:
+            connect_args["check_same_thread"] = False
+        connect_args["timeout"] = settings.sqlite_busy_timeout_ms / 1000
+        if make_url(url).database in (None, "", ":memory:"):
+            # In-memory databases use a single-connection pool
+            options["connect_args"] = connect_args
+            return options
+    elif backend == "postgresql" and settings.db_statement_timeout_ms is not None:
+        timeout = str(settings.db_statement_timeout_ms)
+        if is_async:
+            connect_args["server_settings"] = {"statement_timeout": timeout}
+        else:
+            connect_args["options"] = f"-c statement_timeout={timeout}"
+
+    options.update(
+        connect_args=connect_args,
+        pool_size=settings.db_pool_size,
+        max_overflow=settings.db_max_overflow,
+        pool_timeout=settings.db_pool_timeout,
+        pool_recycle=settings.db_pool_recycle,
+    )
+    return options
+
+def install_sqlite_pragmas(engine, settings: Settings) -> None:
+    """Apply the configured pragmas to each new SQLite connection."""
+    @event.listens_for(engine, "connect")
+    def set_sqlite_pragmas(dbapi_connection, connection_record):
+        cursor = dbapi_connection.cursor()
+        cursor.execute(f"PRAGMA journal_mode={settings.sqlite_journal_mode}")
+        cursor.execute(f"PRAGMA synchronous={settings.sqlite_synchronous}")
+        cursor.execute(f"PRAGMA mmap_size={int(settings.sqlite_mmap_size)}")
+        cursor.execute(f"PRAGMA cache_size={int(settings.sqlite_cache_size)}")
+        cursor.close()
+
+def make_engine(settings: Settings):
+    engine = create_engine(settings.database_url, **engine_options(settings.database_url, settings))
+    if engine.dialect.name == "sqlite":
+        install_sqlite_pragmas(engine, settings)
+    install_query_metrics(engine)
+    return engine
+
+def make_async_engine(settings: Settings):
+    url = async_url(settings.database_url)
+    engine = create_async_engine(url, **engine_options(url, settings, is_async=True))
+    if engine.dialect.name == "sqlite":
+        install_sqlite_pragmas(engine.sync_engine, settings)
+    install_query_metrics(engine.sync_engine)
+    return engine
+
+engine = make_engine(settings)
 
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 
+async_engine = None
+AsyncSessionLocal = None
+if settings.async_db:
+    async_engine = make_async_engine(settings)
+    AsyncSessionLocal = async_sessionmaker(async_engine, autoflush=False, expire_on_commit=False)
+
 Base = declarative_base()
 
-# --- Add this dependency function ---
-def get_db():
+# What get_db yields, depending on settings.async_db
+DBSession = Union[Session, AsyncSession]
+
+ALEMBIC_INI = Path(__file__).resolve().parent.parent / "alembic.ini"
+
+def check_schema(engine) -> None:
+    """Raise RuntimeError unless the database is at the newest Alembic revision.
+
+    Reads alembic_version and the migration headers only, so it is cheap
+    enough for every worker to run as it starts. Alembic is imported here
+    rather than at module level to keep it off the import path.
+    """
+    from alembic.config import Config
+    from alembic.runtime.migration import MigrationContext
+    from alembic.script import ScriptDirectory
+
+    expected = set(ScriptDirectory.from_config(Config(str(ALEMBIC_INI))).get_heads())
+    with engine.connect() as connection:
+        current = set(MigrationContext.configure(connection).get_current_heads())
+    if current != expected:
+        raise RuntimeError(
+            f"Database schema is at {', '.join(sorted(current)) or 'no revision'}, "
+            f"expected {', '.join(sorted(expected))}; run `alembic upgrade head`"
+        )
+
+async def get_db():
+    if AsyncSessionLocal is not None:
+        async with AsyncSessionLocal() as session:
+            yield session
+        return
+
     db = SessionLocal()
     try:
         yield db
     finally:
-        db.close()
\ No newline at end of file
+        db.close()
+
+def dialect_insert(db: Session, model):
+    """INSERT construct for the session's dialect, which supports on_conflict_do_update."""
+    if db.get_bind().dialect.name == "postgresql":
+        return postgresql.insert(model)
+    return sqlite.insert(model)
+
+async def run_db(db, fn, *args, **kwargs):
+    """Call fn(session, *args, **kwargs) without blocking the event loop.
+
+    Route handlers keep their queries in plain sync functions. On an
+    AsyncSession they run through run_sync, which drives the async driver;
+    on a blocking Session they run on the threadpool.
+    """
+    if isinstance(db, AsyncSession):
+        return await db.run_sync(fn, *args, **kwargs)
+    return await run_in_threadpool(fn, db, *args, **kwargs)
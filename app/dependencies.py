@@ -1,16 +1,55 @@
+import hashlib
 from fastapi import Depends, HTTPException, status
 from fastapi.security import OAuth2PasswordBearer
 from jose import jwt, JWTError
+from app import metrics
 from app.auth_utils import SECRET_KEY, ALGORITHM
+from app.cache import LRUCache
+from app.config import settings
 
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl="/auth/login")
 
-def get_current_user(token: str = Depends(oauth2_scheme)):
+# Subjects of tokens that already passed signature verification, keyed by
+# a digest of the full token. Any change to the token (including its
+# signature) changes the key, so a tampered token can never hit an entry,
+# and entries expire at the token's own exp claim.
+token_cache = LRUCache(settings.token_cache_size)
+
+def token_cache_stats() -> dict:
+    stats = token_cache.stats()
+    return {
+        "hits_total": stats["hits"],
+        "misses_total": stats["misses"],
+        "evictions_total": stats["evictions"],
+        "entries": stats["size"],
+    }
+
+metrics.REGISTRY.append(metrics.Stats("token_cache", token_cache_stats, {
+    "hits_total": ("counter", "Bearer tokens whose verified subject was found in the cache."),
+    "misses_total": ("counter", "Bearer tokens that had to be verified."),
+    "evictions_total": ("counter", "Verified tokens the cache dropped for space or expiry."),
+    "entries": ("gauge", "Verified tokens held by the cache."),
+}))
+
+async def get_current_user(token: str = Depends(oauth2_scheme)):
+    return authenticate(token)
+
+def authenticate(token: str) -> str:
+    """User id (the token's sub) for a valid bearer token; raises 401 otherwise."""
+    key = hashlib.sha256(token.encode()).digest()
+    user_id = token_cache.get(key)
+    if user_id is not None:
+        return user_id
+
     try:
         payload = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
         user_id: str = payload.get("sub")
         if user_id is None:
             raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Invalid token")
-        return user_id
     except JWTError:
-        raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Invalid token")
\ No newline at end of file
+        raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Invalid token")
+
+    # Tokens without an expiry are verified every time
+    if payload.get("exp") is not None:
+        token_cache.set(key, user_id, expires_at=float(payload["exp"]))
+    return user_id
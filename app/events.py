@@ -0,0 +1,136 @@
+"""In-process fan-out of change events to a user's live connections.
+
+Write handlers publish small JSON events after their commit; /ws relays
+them to every open socket of the same user. A subscriber is a bounded
+asyncio.Queue plus its connection coroutine, so idle connections cost no
+polling and no database work. Events only reach connections served by the
+same worker process.
+"""
+import asyncio
+import json
+from collections import defaultdict
+from app.schemas import TransactionRead
+
+RESYNC = json.dumps({"type": "resync"})
+
+
+class EventBroker:
+    """Per-user publish/subscribe; every method must run on the event loop."""
+
+    def __init__(self, queue_size: int = 100):
+        self.queue_size = queue_size
+        self._subscribers: dict = defaultdict(set)
+
+    def subscribe(self, user_id: str) -> asyncio.Queue:
+        queue = asyncio.Queue(self.queue_size)
+        self._subscribers[user_id].add(queue)
+        return queue
+
+    def unsubscribe(self, user_id: str, queue: asyncio.Queue) -> None:
+        queues = self._subscribers.get(user_id)
+        if queues is None:
+            return
+        queues.discard(queue)
+        if not queues:
+            del self._subscribers[user_id]
+
+    def listening(self, user_id: str) -> bool:
+        return user_id in self._subscribers
+
+    def connections(self) -> int:
+        return sum(len(queues) for queues in self._subscribers.values())
+
+    def publish(self, user_id: str, event: dict) -> int:
+        """Queue event for each of the user's connections without blocking.
+
+        The event is encoded once and shared. A connection that has fallen
+        queue_size events behind gets its backlog replaced by a single
+        "resync" event, telling the client to refetch instead.
+        """
+        queues = self._subscribers.get(user_id)
+        if not queues:
+            return 0
+        message = json.dumps(event)
+        for queue in queues:
+            try:
+                queue.put_nowait(message)
+            except asyncio.QueueFull:
+                while not queue.empty():
+                    queue.get_nowait()
+                queue.put_nowait(RESYNC)
+        return len(queues)
+
+
+broker = EventBroker()
+
+
+def account_state(account_id: int, balance: float) -> dict:
+    return {"id": account_id, "balance": balance}
+
+
+def transaction_changed(user_id: str, kind: str, transaction, balance: float) -> None:
+    """Publish transaction.<kind> with the row and its account's new balance."""
+    if not broker.listening(user_id):
+        return
+    broker.publish(user_id, {
+        "type": f"transaction.{kind}",
+        "transaction": TransactionRead.model_validate(transaction).model_dump(mode="json"),
+        "account": account_state(transaction.account_id, balance),
+    })
+
+
+def transaction_deleted(user_id: str, transaction_id: int, account_id: int, balance: float) -> None:
+    if not broker.listening(user_id):
+        return
+    broker.publish(user_id, {
+        "type": "transaction.deleted",
+        "transaction": {"id": transaction_id, "account_id": account_id},
+        "account": account_state(account_id, balance),
+    })
+
+
+def balances_changed(user_id: str, balances: dict) -> None:
+    """Publish account.balance for writes touching many rows at once (bulk, bank sync)."""
+    if not balances or not broker.listening(user_id):
+        return
+    broker.publish(user_id, {
+        "type": "account.balance",
+        "accounts": [account_state(account_id, balance) for account_id, balance in balances.items()],
+    })
+
+
+def transactions_synced(user_id: str, added: int, modified: int, removed: int) -> None:
+    """Bank sync changed many rows; clients refetch what they show."""
+    if not (added or modified or removed) or not broker.listening(user_id):
+        return
+    broker.publish(user_id, {
+        "type": "transactions.synced", "added": added, "modified": modified, "removed": removed,
+    })
+
+
+def transactions_recategorized(user_id: str, updated: int) -> None:
+    """Categories of many rows changed; clients refetch what they show."""
+    if not updated or not broker.listening(user_id):
+        return
+    broker.publish(user_id, {"type": "transactions.recategorized", "updated": updated})
+
+
+def account_created(user_id: str, account) -> None:
+    if not broker.listening(user_id):
+        return
+    broker.publish(user_id, {
+        "type": "account.created",
+        "account": {
+            "id": account.id,
+            "name": account.name,
+            "account_type": account.account_type,
+            "balance": account.balance,
+        },
+    })
+
+
+def job_finished(user_id: str, job_id: int, kind: str, status: str) -> None:
+    """A background job succeeded or failed; clients refetch what it changed."""
+    if not broker.listening(user_id):
+        return
+    broker.publish(user_id, {"type": "job.finished", "job": {"id": job_id, "kind": kind, "status": status}})
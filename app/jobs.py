@@ -0,0 +1,463 @@
+"""Background jobs: heavy work run outside the request cycle.
+
+POST /jobs stores a row in the jobs table; JobRunner, started in the app
+lifespan, runs it. Each kind is a step function that does one chunk of
+work in the session it is given and records how far it got in
+job.checkpoint. The runner commits every chunk together with the job's
+checkpoint and progress, so a worker that dies loses at most the chunk in
+flight, and whichever runner claims the job next carries on from the
+last commit.
+
+Claiming is a compare-and-set UPDATE, so runners in several server
+processes can share the table. Every commit refreshes the job's
+heartbeat_at; a running job whose heartbeat is older than lease_seconds
+belonged to a runner that died, and is claimed again up to max_attempts
+times. The commit is fenced on the job still being ours: if another
+runner took it over meanwhile, the chunk is rolled back. On shutdown the
+runner finishes the chunks in flight and puts its jobs back in the
+queue, so the next start resumes them at once; those runs do not count
+towards max_attempts.
+
+Concurrency is configured in two parts. Up to `threads` jobs run at once,
+each stepping on the threadpool. CPU-bound pure functions inside a step
+(row validation for imports) go through runner.cpu(), which runs them on
+`processes` spawned worker processes, or inline when that is 0.
+
+Queued jobs can also be run without the web server:
+
+    python -m app.jobs
+"""
+import argparse
+import asyncio
+import logging
+import multiprocessing
+import os
+import socket
+import sys
+import uuid
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass, field
+from datetime import datetime, timedelta
+from pathlib import Path
+from typing import Callable, Optional
+from sqlalchemy import and_, func, or_
+from sqlalchemy.orm import Session
+from starlette.concurrency import run_in_threadpool
+from app import events, readcache
+from app.config import settings
+from app.database import SessionLocal
+from app.models import Job, Transaction
+from app.pagination import after, oldest_first
+from app.serialization import EXPORT_COLUMNS, encode_export_batch, export_header
+from app.services import categorize, imports, rollups, versions
+
+log = logging.getLogger(__name__)
+
+# Jobs a runner tries per claim, in case others take the first ones
+CLAIM_CANDIDATES = 10
+
+IMPORT_CHUNK = 1000
+MAX_IMPORT_ROWS = 200_000
+MAX_REPORTED_ERRORS = 100
+EXPORT_CHUNK = 5000
+EXPORT_FORMATS = ("csv", "ndjson")
+
+
+class LeaseLost(Exception):
+    """Another runner took the job over; this runner's chunk was rolled back."""
+
+
+@dataclass
+class RunningJob:
+    """A claimed job as its step function sees it.
+
+    Steps read params and advance checkpoint, progress and total; they set
+    changed when they wrote the user's accounts or transactions. memo
+    keeps values between the chunks run by this runner; it is not saved.
+    """
+    id: int
+    user_id: int
+    kind: str
+    params: dict
+    checkpoint: Optional[dict]
+    progress: int
+    total: Optional[int]
+    changed: bool = False
+    memo: dict = field(default_factory=dict)
+
+
+@dataclass
+class Kind:
+    # step(runner, db, job) does one chunk; it returns the job's result
+    # once the work is complete, None while there is more to do
+    step: Callable
+    # Normalized params for a new job; raises ValueError if they are invalid
+    check: Callable[[dict], dict]
+
+
+KINDS: dict = {}
+
+
+def _no_params(params: dict) -> dict:
+    if params:
+        raise ValueError("This job kind takes no params")
+    return {}
+
+
+def kind(name: str, check: Callable[[dict], dict] = _no_params):
+    def register(step):
+        KINDS[name] = Kind(step, check)
+        return step
+    return register
+
+
+def check(kind_name: str, params: dict) -> dict:
+    """Validated params for a new job of kind_name; raises ValueError."""
+    if kind_name not in KINDS:
+        raise ValueError(f"Unknown job kind {kind_name!r}; expected one of {', '.join(sorted(KINDS))}")
+    return KINDS[kind_name].check(params)
+
+
+def _describe(exc: Exception) -> str:
+    detail = getattr(exc, "detail", None) or str(exc)
+    return f"{type(exc).__name__}: {detail}"[:500]
+
+
+class JobRunner:
+    def __init__(self, session_factory, threads: int, processes: int, poll_seconds: float = 1.0,
+                 lease_seconds: float = 60.0, max_attempts: int = 3):
+        self.session_factory = session_factory
+        self.threads = threads
+        self.processes = processes
+        self.poll_seconds = poll_seconds
+        self.lease_seconds = lease_seconds
+        self.max_attempts = max_attempts
+        # Names this runner in jobs.worker; unique across processes and restarts
+        self.name = f"{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:8]}"
+        self._tasks = []
+        self._executor = None
+        self._wakeup: Optional[asyncio.Event] = None
+        self._stopping = False
+
+    def start(self) -> None:
+        """Start the worker tasks; call from the event loop."""
+        if self.threads <= 0 or self._tasks:
+            return
+        self._start_pool()
+        self._stopping = False
+        self._wakeup = asyncio.Event()
+        self._tasks = [asyncio.create_task(self._work()) for _ in range(self.threads)]
+
+    def wake(self) -> None:
+        """Look for queued jobs now rather than at the next poll."""
+        if self._wakeup is not None:
+            self._wakeup.set()
+
+    async def stop(self) -> None:
+        """Finish the chunks in flight, requeue their jobs and stop the pool."""
+        self._stopping = True
+        self.wake()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+        self._wakeup = None
+        if self._executor is not None:
+            self._executor.shutdown(cancel_futures=True)
+            self._executor = None
+
+    async def drain(self) -> int:
+        """Run claimable jobs one at a time until none are left; returns how many ran."""
+        self._start_pool()
+        ran = 0
+        while (job := await run_in_threadpool(self._claim)) is not None:
+            await self.run(job)
+            ran += 1
+        return ran
+
+    def cpu(self, fn, *args):
+        """fn(*args) on the process pool, blocking the calling step's thread."""
+        if self._executor is None:
+            return fn(*args)
+        return self._executor.submit(fn, *args).result()
+
+    async def run(self, job: RunningJob) -> None:
+        """Step a claimed job until it finishes, fails or the runner stops."""
+        while True:
+            if self._stopping:
+                await run_in_threadpool(self._requeue, job)
+                return
+            try:
+                finished = await run_in_threadpool(self._step, job)
+            except LeaseLost:
+                log.warning("job %s was taken over by another runner", job.id)
+                return
+            except Exception as exc:
+                log.exception("job %s failed", job.id)
+                await run_in_threadpool(self._fail, job, exc)
+                events.job_finished(str(job.user_id), job.id, job.kind, "failed")
+                return
+            if job.changed:
+                job.changed = False
+                await readcache.invalidate(job.user_id)
+            if finished:
+                events.job_finished(str(job.user_id), job.id, job.kind, "succeeded")
+                return
+
+    def _start_pool(self) -> None:
+        if self.processes <= 0 or self._executor is not None:
+            return
+        # spawn, not fork: the server process has live threads
+        self._executor = ProcessPoolExecutor(
+            max_workers=self.processes,
+            mp_context=multiprocessing.get_context("spawn"),
+        )
+
+    async def _work(self) -> None:
+        while not self._stopping:
+            try:
+                job = await run_in_threadpool(self._claim)
+            except Exception:
+                log.exception("claiming a job failed")
+                job = None
+            if job is not None:
+                await self.run(job)
+                continue
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), self.poll_seconds)
+            except asyncio.TimeoutError:
+                pass
+            if not self._stopping:
+                self._wakeup.clear()
+
+    def _claim(self) -> Optional[RunningJob]:
+        now = datetime.utcnow()
+        claimable = or_(
+            Job.status == "queued",
+            and_(Job.status == "running", Job.heartbeat_at < now - timedelta(seconds=self.lease_seconds)),
+        )
+        with self.session_factory() as db:
+            candidates = db.query(Job.id).filter(claimable).order_by(Job.id).limit(CLAIM_CANDIDATES).all()
+            for (job_id,) in candidates:
+                claimed = db.query(Job).filter(Job.id == job_id, claimable).update({
+                    Job.status: "running",
+                    Job.worker: self.name,
+                    Job.heartbeat_at: now,
+                    Job.attempts: Job.attempts + 1,
+                    Job.started_at: func.coalesce(Job.started_at, now),
+                }, synchronize_session=False)
+                if not claimed:
+                    db.rollback()
+                    continue
+                job = db.get(Job, job_id)
+                error = None
+                if job.kind not in KINDS:
+                    error = f"Unknown job kind {job.kind!r}"
+                elif job.attempts > self.max_attempts:
+                    error = f"Gave up after {self.max_attempts} attempts"
+                if error is not None:
+                    job.status, job.error, job.worker, job.finished_at = "failed", error, None, now
+                    db.commit()
+                    continue
+                running = RunningJob(job.id, job.user_id, job.kind, job.params, job.checkpoint, job.progress, job.total)
+                db.commit()
+                return running
+        return None
+
+    def _ours(self, db: Session, job: RunningJob):
+        return db.query(Job).filter(Job.id == job.id, Job.worker == self.name, Job.status == "running")
+
+    def _step(self, job: RunningJob) -> bool:
+        with self.session_factory() as db:
+            result = KINDS[job.kind].step(self, db, job)
+            now = datetime.utcnow()
+            values = {
+                Job.checkpoint: job.checkpoint,
+                Job.progress: job.progress,
+                Job.total: job.total,
+                Job.heartbeat_at: now,
+            }
+            if result is not None:
+                values.update({Job.status: "succeeded", Job.result: result, Job.worker: None, Job.finished_at: now})
+            if not self._ours(db, job).update(values, synchronize_session=False):
+                db.rollback()
+                raise LeaseLost(job.id)
+            db.commit()
+        return result is not None
+
+    def _fail(self, job: RunningJob, exc: Exception) -> None:
+        with self.session_factory() as db:
+            self._ours(db, job).update({
+                Job.status: "failed",
+                Job.error: _describe(exc),
+                Job.worker: None,
+                Job.finished_at: datetime.utcnow(),
+            }, synchronize_session=False)
+            db.commit()
+
+    def _requeue(self, job: RunningJob) -> None:
+        # A clean shutdown is not a failed attempt: give back the attempt the claim counted
+        with self.session_factory() as db:
+            self._ours(db, job).update(
+                {Job.status: "queued", Job.worker: None, Job.attempts: Job.attempts - 1},
+                synchronize_session=False,
+            )
+            db.commit()
+
+
+runner = JobRunner(
+    SessionLocal,
+    threads=settings.jobs_threads,
+    processes=settings.jobs_processes,
+    poll_seconds=settings.jobs_poll_seconds,
+    lease_seconds=settings.jobs_lease_seconds,
+    max_attempts=settings.jobs_max_attempts,
+)
+
+
+# ----------------------------
+# Job kinds
+# ----------------------------
+def _check_import(params: dict) -> dict:
+    rows = params.get("rows")
+    if not isinstance(rows, list) or not rows:
+        raise ValueError("params.rows must be a non-empty list of transactions")
+    if len(rows) > MAX_IMPORT_ROWS:
+        raise ValueError(f"At most {MAX_IMPORT_ROWS} transactions per import")
+    return {"rows": rows}
+
+
+@kind("import", _check_import)
+def _import(runner: JobRunner, db: Session, job: RunningJob) -> Optional[dict]:
+    """Insert params["rows"] IMPORT_CHUNK at a time, validated like POST
+    /transactions/bulk. The checkpoint holds the offset reached, the rows
+    created and the first MAX_REPORTED_ERRORS errors."""
+    rows = job.params["rows"]
+    state = job.checkpoint or {"offset": 0, "created": 0, "errors": [], "error_count": 0}
+    offset = state["offset"]
+    chunk = rows[offset:offset + IMPORT_CHUNK]
+    valid, errors = runner.cpu(imports.validate_rows, chunk, offset)
+    created, _ = imports.insert_rows(db, job.user_id, valid, errors)
+    errors.sort(key=lambda error: error["index"])
+
+    job.checkpoint = {
+        "offset": offset + len(chunk),
+        "created": state["created"] + created,
+        "errors": (state["errors"] + errors)[:MAX_REPORTED_ERRORS],
+        "error_count": state["error_count"] + len(errors),
+    }
+    job.progress, job.total = job.checkpoint["offset"], len(rows)
+    job.changed = job.changed or created > 0
+    if job.progress < job.total:
+        return None
+    return {key: job.checkpoint[key] for key in ("created", "errors", "error_count")}
+
+
+@kind("recategorize")
+def _recategorize(runner: JobRunner, db: Session, job: RunningJob) -> Optional[dict]:
+    """categorize.recategorize, one chunk per step, resuming after the last id scanned."""
+    state = job.checkpoint or {"after_id": 0, "scanned": 0, "updated": 0}
+    if job.total is None:
+        job.total = categorize.candidates(db, job.user_id, func.count(Transaction.id)).scalar()
+    if "categorizer" not in job.memo:
+        job.memo["categorizer"] = categorize.load(db, job.user_id)
+
+    scanned, updated, last_id = categorize.recategorize_chunk(
+        db, job.user_id, job.memo["categorizer"], state["after_id"]
+    )
+    job.checkpoint = {
+        "after_id": last_id if last_id is not None else state["after_id"],
+        "scanned": state["scanned"] + scanned,
+        "updated": state["updated"] + updated,
+    }
+    job.progress = job.checkpoint["scanned"]
+    job.changed = job.changed or updated > 0
+    if scanned == categorize.RECATEGORIZE_CHUNK:
+        return None
+    return {"scanned": job.checkpoint["scanned"], "updated": job.checkpoint["updated"]}
+
+
+@kind("rebuild_rollups")
+def _rebuild_rollups(runner: JobRunner, db: Session, job: RunningJob) -> dict:
+    """rollups.rebuild for the user. One aggregate query, so a single chunk."""
+    count = rollups.recompute(db, job.user_id)
+    # Forecasts are cached per data version and read the rollups
+    versions.bump(db, job.user_id)
+    job.progress = job.total = 1
+    job.changed = True
+    return {"rollup_rows": count}
+
+
+def _check_export(params: dict) -> dict:
+    format = params.get("format", "csv")
+    if format not in EXPORT_FORMATS:
+        raise ValueError(f"params.format must be one of {', '.join(EXPORT_FORMATS)}")
+    return {"format": format}
+
+
+def export_path(job_id: int, format: str) -> Path:
+    return Path(settings.jobs_dir) / f"export-{job_id}.{format}"
+
+
+@kind("export", _check_export)
+def _export(runner: JobRunner, db: Session, job: RunningJob) -> Optional[dict]:
+    """Write the user's transactions oldest first (undated ones before the
+    rest) to export_path, like GET /transactions/export, EXPORT_CHUNK rows
+    per step. The checkpoint holds
+    the last (date, id) written and the file's length at that point; a
+    resumed job cuts off whatever a lost chunk appended after it."""
+    format = job.params["format"]
+    path = export_path(job.id, format)
+    fresh = {"after": None, "rows": 0, "bytes": 0}
+    state = job.checkpoint or fresh
+    if state["bytes"] and (not path.exists() or path.stat().st_size < state["bytes"]):
+        # Written on another host or removed; start over
+        state = fresh
+    if job.total is None:
+        job.total = db.query(func.count(Transaction.id)).filter(Transaction.user_id == job.user_id).scalar()
+
+    query = db.query(*EXPORT_COLUMNS).filter(Transaction.user_id == job.user_id)
+    if state["after"] is not None:
+        date, row_id = state["after"]
+        position = (datetime.fromisoformat(date) if date is not None else None, row_id)
+        query = query.filter(after(Transaction.date, Transaction.id, position))
+    rows = query.order_by(*oldest_first(Transaction.date, Transaction.id)).limit(EXPORT_CHUNK).all()
+
+    path.parent.mkdir(parents=True, exist_ok=True)
+    with open(path, "r+b" if state["bytes"] else "wb") as f:
+        f.seek(state["bytes"])
+        f.truncate()
+        if not state["bytes"]:
+            f.write(export_header(format).encode())
+        f.write(encode_export_batch(rows, format).encode())
+        size = f.tell()
+
+    last = state["after"]
+    if rows:
+        date = rows[-1].date
+        last = [date.isoformat() if date is not None else None, rows[-1].id]
+    job.checkpoint = {"after": last, "rows": state["rows"] + len(rows), "bytes": size}
+    job.progress = job.checkpoint["rows"]
+    if len(rows) == EXPORT_CHUNK:
+        return None
+    return {"format": format, "rows": job.checkpoint["rows"], "bytes": size}
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Run queued background jobs until none are left.")
+    parser.add_argument("--processes", type=int, default=settings.jobs_processes)
+    args = parser.parse_args(argv)
+
+    worker = JobRunner(SessionLocal, threads=1, processes=args.processes,
+                       lease_seconds=settings.jobs_lease_seconds, max_attempts=settings.jobs_max_attempts)
+
+    async def run() -> int:
+        try:
+            return await worker.drain()
+        finally:
+            await worker.stop()
+
+    print(f"ran {asyncio.run(run())} jobs")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,18 +1,56 @@
+import asyncio
+from contextlib import asynccontextmanager, suppress
 from fastapi import FastAPI
-from . import models
-from .database import engine
-from app.routers import auth, accounts, transactions
+from fastapi.responses import ORJSONResponse, PlainTextResponse
+from . import readcache
+from .config import settings
+from .database import SessionLocal, check_schema, engine
+from .jobs import runner as job_runner
+from .metrics import MetricsMiddleware, render as render_metrics
+from .security import password_hasher
+from app.routers import auth, accounts, transactions, reports, bank, live, rules, budgets, jobs
+from app.services.budgets import reconcile_periodically
 
-# Create tables
-models.Base.metadata.create_all(bind=engine)
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # The schema is managed by Alembic (`alembic upgrade head`), not created here
+    if settings.schema_check:
+        check_schema(engine)
+    password_hasher.start()
+    readcache.start()
+    job_runner.start()
+    reconciler = None
+    if settings.budget_reconcile_seconds > 0:
+        reconciler = asyncio.create_task(
+            reconcile_periodically(SessionLocal, settings.budget_reconcile_seconds)
+        )
+    yield
+    if reconciler is not None:
+        reconciler.cancel()
+        with suppress(asyncio.CancelledError):
+            await reconciler
+    await job_runner.stop()
+    password_hasher.shutdown()
+    await readcache.stop()
 
-app = FastAPI(title="Budgeting App Backend")
+app = FastAPI(title="Budgeting App Backend", lifespan=lifespan, default_response_class=ORJSONResponse)
+app.add_middleware(MetricsMiddleware)
 
 # Routers
 app.include_router(auth.router)
 app.include_router(accounts.router)
 app.include_router(transactions.router)
+app.include_router(rules.router)
+app.include_router(budgets.router)
+app.include_router(jobs.router)
+app.include_router(reports.router)
+app.include_router(bank.router)
+app.include_router(live.router)
 
 @app.get("/")
 def root():
-    return {"message": "Budgeting App API running"}
\ No newline at end of file
+    return {"message": "Budgeting App API running"}
+
+@app.get("/metrics", include_in_schema=False)
+def metrics():
+    return PlainTextResponse(render_metrics(), media_type="text/plain; version=0.0.4")
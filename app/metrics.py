@@ -0,0 +1,205 @@
+"""Request and SQL metrics, rendered in the Prometheus text format.
+
+MetricsMiddleware times every HTTP request and labels it with the route
+template (/transactions/{transaction_id}, not the raw path).
+install_query_metrics() hooks an engine's cursor events so each
+statement is timed and counted, both globally and against the request
+that issued it. The per-request counters live in a ContextVar; threadpool
+calls and AsyncSession.run_sync run in a copy of the request's context,
+so queries issued there are attributed to the request too.
+
+Statements slower than SLOW_QUERY_MS are logged to the app.slow_query
+logger together with the route that issued them.
+"""
+import logging
+import threading
+import time
+from bisect import bisect_left
+from contextvars import ContextVar
+from dataclasses import dataclass
+from typing import Optional
+from sqlalchemy import event
+from app.config import settings
+
+slow_query_log = logging.getLogger("app.slow_query")
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+QUERY_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 1.0)
+COUNT_BUCKETS = (0, 1, 2, 3, 5, 10, 20, 50, 100, 500)
+
+
+def _escape(value) -> str:
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _labels(names: tuple, values: tuple, extra: str = "") -> str:
+    pairs = [f'{name}="{_escape(value)}"' for name, value in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+class Histogram:
+    def __init__(self, name: str, documentation: str, buckets: tuple, labelnames: tuple = ()):
+        self.name = name
+        self.documentation = documentation
+        self.buckets = tuple(buckets)
+        self.labelnames = labelnames
+        self._series = {}  # label values -> [bucket counts..., sum, count]
+        self._lock = threading.Lock()
+
+    def observe(self, value: float, *labelvalues) -> None:
+        index = bisect_left(self.buckets, value)
+        with self._lock:
+            series = self._series.get(labelvalues)
+            if series is None:
+                series = self._series[labelvalues] = [0] * len(self.buckets) + [0.0, 0]
+            if index < len(self.buckets):
+                series[index] += 1
+            series[-2] += value
+            series[-1] += 1
+
+    def render(self) -> list:
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} histogram"]
+        with self._lock:
+            series = {labels: list(values) for labels, values in self._series.items()}
+        for labelvalues, values in sorted(series.items()):
+            cumulative = 0
+            for bound, count in zip(self.buckets, values):
+                cumulative += count
+                le = f'le="{bound}"'
+                lines.append(f"{self.name}_bucket{_labels(self.labelnames, labelvalues, le)} {cumulative}")
+            inf = 'le="+Inf"'
+            lines.append(f"{self.name}_bucket{_labels(self.labelnames, labelvalues, inf)} {values[-1]}")
+            lines.append(f"{self.name}_sum{_labels(self.labelnames, labelvalues)} {values[-2]}")
+            lines.append(f"{self.name}_count{_labels(self.labelnames, labelvalues)} {values[-1]}")
+        return lines
+
+    def clear(self) -> None:
+        with self._lock:
+            self._series.clear()
+
+
+class Stats:
+    """Counters and gauges read from a stats() dict at scrape time."""
+
+    def __init__(self, prefix: str, source, fields: dict):
+        self.prefix = prefix
+        self.source = source
+        self.fields = fields  # stats key -> (metric type, documentation)
+
+    def render(self) -> list:
+        values = self.source()
+        lines = []
+        for key, (kind, documentation) in self.fields.items():
+            if key in values:
+                name = f"{self.prefix}_{key}"
+                lines += [f"# HELP {name} {documentation}", f"# TYPE {name} {kind}", f"{name} {values[key]}"]
+        return lines
+
+    def clear(self) -> None:
+        # The values belong to the source, which resets them itself
+        pass
+
+
+request_duration = Histogram(
+    "http_request_duration_seconds", "HTTP request latency by route.",
+    LATENCY_BUCKETS, ("method", "route", "status"),
+)
+request_queries = Histogram(
+    "http_request_db_queries", "SQL statements issued per HTTP request.",
+    COUNT_BUCKETS, ("method", "route"),
+)
+request_db_time = Histogram(
+    "http_request_db_seconds", "Time spent in SQL statements per HTTP request.",
+    LATENCY_BUCKETS, ("method", "route"),
+)
+query_duration = Histogram(
+    "db_query_duration_seconds", "SQL statement latency by issuing route.",
+    QUERY_BUCKETS, ("route",),
+)
+REGISTRY = [request_duration, request_queries, request_db_time, query_duration]
+
+
+def render() -> str:
+    return "\n".join(line for metric in REGISTRY for line in metric.render()) + "\n"
+
+
+@dataclass
+class RequestStats:
+    scope: dict
+    queries: int = 0
+    db_seconds: float = 0.0
+
+    @property
+    def route(self) -> str:
+        # The router fills in scope["route"] once it has matched
+        return _route(self.scope)
+
+
+current_request: ContextVar[Optional[RequestStats]] = ContextVar("current_request", default=None)
+
+
+def _route(scope) -> str:
+    route = scope.get("route")
+    return getattr(route, "path", None) or "unmatched"
+
+
+class MetricsMiddleware:
+    """Pure ASGI middleware, so streaming responses are timed to their last byte."""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        stats = RequestStats(scope)
+        token = current_request.set(stats)
+        status = 500
+        started = time.perf_counter()
+
+        async def send_with_status(message):
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_status)
+        finally:
+            current_request.reset(token)
+            route = stats.route
+            method = scope["method"]
+            request_duration.observe(time.perf_counter() - started, method, route, str(status))
+            request_queries.observe(stats.queries, method, route)
+            request_db_time.observe(stats.db_seconds, method, route)
+
+
+def install_query_metrics(engine) -> None:
+    """Time and count every statement executed through engine (a sync Engine)."""
+
+    @event.listens_for(engine, "before_cursor_execute")
+    def start_timer(conn, cursor, statement, parameters, context, executemany):
+        conn.info.setdefault("query_started", []).append(time.perf_counter())
+
+    @event.listens_for(engine, "after_cursor_execute")
+    def stop_timer(conn, cursor, statement, parameters, context, executemany):
+        elapsed = time.perf_counter() - conn.info["query_started"].pop()
+        stats = current_request.get()
+        route = stats.route if stats is not None else "background"
+        if stats is not None:
+            stats.queries += 1
+            stats.db_seconds += elapsed
+        query_duration.observe(elapsed, route)
+        if settings.slow_query_ms is not None and elapsed * 1000 >= settings.slow_query_ms:
+            slow_query_log.warning("slow query %.1f ms on %s: %s", elapsed * 1000, route, statement)
+
+    @event.listens_for(engine, "handle_error")
+    def drop_timer(context):
+        # A failed statement never reaches after_cursor_execute
+        started = context.connection.info.get("query_started") if context.connection is not None else None
+        if started:
+            started.pop()
@@ -1,4 +1,5 @@
-from sqlalchemy import Column, Integer, String, Float, ForeignKey, DateTime
+import re
+from sqlalchemy import DDL, JSON, Column, Integer, String, Float, ForeignKey, Date, DateTime, Index, UniqueConstraint, event
 from sqlalchemy.orm import relationship
 from datetime import datetime
 from .database import Base
@@ -8,6 +9,9 @@ class User(Base):
     id = Column(Integer, primary_key=True, index=True)
     email = Column(String, unique=True, index=True)
     hashed_password = Column(String)
+    # Bumped in the same commit as every write to the user's accounts or
+    # transactions; ETags and cached forecasts are keyed on it
+    data_version = Column(Integer, nullable=False, default=0, server_default="0")
 
     accounts = relationship("Account", back_populates="user")
     
@@ -15,7 +19,7 @@ class Account(Base):
     __tablename__ = "accounts"
 
     id = Column(Integer, primary_key=True, index=True)
-    user_id = Column(Integer, ForeignKey("users.id"))
+    user_id = Column(Integer, ForeignKey("users.id"), index=True)
     plaid_account_id = Column(String, nullable=True)
     name = Column(String, nullable=False)
     account_type = Column(String, nullable=False)
@@ -26,8 +30,31 @@ class Account(Base):
     user = relationship("User", back_populates="accounts")
     transactions = relationship("Transaction", back_populates="account", cascade="all, delete-orphan")
 
+# Recurring-series detection (app/services/recurring.py) groups rows by
+# merchant_key: the description's words, lower-cased and without digits,
+# punctuation, single letters or card-processor noise, so
+# "POS 4821 NETFLIX.COM #17" and "Netflix.com" group together.
+MERCHANT_NOISE = frozenset({"pos", "debit", "purchase", "ach", "card", "www", "com", "inc", "llc", "ltd"})
+MERCHANT_KEY_LENGTH = 64
+
+def merchant_key(description):
+    words = [
+        word for word in re.findall(r"[^\W\d_]+", (description or "").lower())
+        if len(word) > 1 and word not in MERCHANT_NOISE
+    ]
+    return " ".join(words)[:MERCHANT_KEY_LENGTH] or None
+
+def _merchant_key_default(context):
+    return merchant_key(context.get_current_parameters().get("description"))
+
 class Transaction(Base):
     __tablename__ = "transactions"
+    __table_args__ = (
+        Index("ix_transactions_user_id_date", "user_id", "date"),
+        Index("ix_transactions_account_id_date", "account_id", "date"),
+        Index("ix_transactions_plaid_transaction_id", "plaid_transaction_id", unique=True),
+        Index("ix_transactions_user_id_merchant_key_date", "user_id", "merchant_key", "date"),
+    )
 
     id = Column(Integer, primary_key=True, index=True)
     account_id = Column(Integer, ForeignKey("accounts.id"))
@@ -38,7 +65,183 @@ class Transaction(Base):
     date = Column(DateTime, default=datetime.utcnow)
     description = Column(String)
     category = Column(String, nullable=True)
+    # The CategoryRule that set category; NULL when the client set it. Not a
+    # foreign key: a deleted rule's rows are still recategorized later.
+    category_rule_id = Column(Integer, nullable=True)
+    # Filled from description on insert; updates must set it themselves
+    merchant_key = Column(String, nullable=True, default=_merchant_key_default)
     created_at = Column(DateTime, default=datetime.utcnow)
     
 
-    account = relationship("Account", back_populates="transactions")
\ No newline at end of file
+    account = relationship("Account", back_populates="transactions")
+
+# Full-text search index over description and category (see app/search.py).
+# Neither dialect's index maps onto a model attribute, so create_all and
+# drop_all manage it through DDL events; migrations create it explicitly.
+# FTS5 rowids are (user_id << SEARCH_ROWID_SHIFT) + id, so every user's
+# entries form one contiguous rowid range.
+SEARCH_ROWID_SHIFT = 32
+
+def _search_values(row: str) -> str:
+    return f"({row}.user_id << {SEARCH_ROWID_SHIFT}) + {row}.id, {row}.description, {row}.category"
+
+_SEARCH_INSERT = f"INSERT INTO transactions_fts(rowid, description, category) VALUES ({_search_values('new')});"
+_SEARCH_DELETE = (
+    "INSERT INTO transactions_fts(transactions_fts, rowid, description, category) "
+    f"VALUES ('delete', {_search_values('old')});"
+)
+
+SEARCH_DDL = {
+    "sqlite": [
+        "CREATE VIRTUAL TABLE transactions_fts USING fts5("
+        "description, category, content='', columnsize=0, "
+        "prefix='1 2 3 4 5 6 7 8', tokenize='unicode61 remove_diacritics 2')",
+        f"CREATE TRIGGER transactions_fts_insert AFTER INSERT ON transactions BEGIN {_SEARCH_INSERT} END",
+        f"CREATE TRIGGER transactions_fts_delete AFTER DELETE ON transactions BEGIN {_SEARCH_DELETE} END",
+        "CREATE TRIGGER transactions_fts_update AFTER UPDATE OF user_id, description, category "
+        f"ON transactions BEGIN {_SEARCH_DELETE} {_SEARCH_INSERT} END",
+    ],
+    "postgresql": [
+        "ALTER TABLE transactions ADD COLUMN search_vector tsvector GENERATED ALWAYS AS "
+        "(to_tsvector('simple', coalesce(description, '') || ' ' || coalesce(category, ''))) STORED",
+        "CREATE INDEX ix_transactions_search_vector ON transactions USING gin (search_vector)",
+    ],
+}
+for _dialect, _statements in SEARCH_DDL.items():
+    for _statement in _statements:
+        event.listen(Transaction.__table__, "after_create", DDL(_statement).execute_if(dialect=_dialect))
+event.listen(
+    Transaction.__table__, "before_drop",
+    DDL("DROP TABLE IF EXISTS transactions_fts").execute_if(dialect="sqlite"),
+)
+
+class CategoryRule(Base):
+    """Fills in the category of uncategorized transactions whose description
+    and amount match (see app/services/categorize.py). Rules with no
+    user_id are global and apply to every user."""
+    __tablename__ = "category_rules"
+
+    id = Column(Integer, primary_key=True, index=True)
+    user_id = Column(Integer, ForeignKey("users.id"), nullable=True, index=True)
+    category = Column(String, nullable=False)
+    merchant = Column(String, nullable=True)  # case-insensitive substring of the description
+    pattern = Column(String, nullable=True)  # case-insensitive regex searched in the description
+    min_amount = Column(Float, nullable=True)
+    max_amount = Column(Float, nullable=True)
+    priority = Column(Integer, nullable=False, default=0)
+    created_at = Column(DateTime, default=datetime.utcnow)
+
+class PlaidItem(Base):
+    """A linked Plaid item and the /transactions/sync cursor reached so far."""
+    __tablename__ = "plaid_items"
+
+    id = Column(Integer, primary_key=True, index=True)
+    user_id = Column(Integer, ForeignKey("users.id"), nullable=False, index=True)
+    plaid_item_id = Column(String, unique=True, nullable=False)
+    access_token = Column(String, nullable=False)
+    cursor = Column(String, nullable=True)
+    last_synced_at = Column(DateTime, nullable=True)
+    created_at = Column(DateTime, default=datetime.utcnow)
+
+class MonthlyRollup(Base):
+    """Running totals per (user, account, month, category, type), kept in
+    step with the transactions table by every write path."""
+    __tablename__ = "monthly_rollups"
+    __table_args__ = (
+        UniqueConstraint("user_id", "account_id", "month", "category", "type", name="uq_monthly_rollups_key"),
+    )
+
+    id = Column(Integer, primary_key=True)
+    user_id = Column(Integer, ForeignKey("users.id"), nullable=False)
+    account_id = Column(Integer, ForeignKey("accounts.id"), nullable=False)
+    month = Column(Date, nullable=False)  # first day of the month
+    category = Column(String, nullable=False, default="")  # "" when uncategorized
+    type = Column(String, nullable=False)  # lower-cased transaction type
+    total = Column(Float, nullable=False, default=0.0)
+    count = Column(Integer, nullable=False, default=0)
+
+class Budget(Base):
+    """A spending limit for one category over each week or month."""
+    __tablename__ = "budgets"
+    __table_args__ = (
+        UniqueConstraint("user_id", "category", "period", name="uq_budgets_user_category_period"),
+    )
+
+    id = Column(Integer, primary_key=True)
+    user_id = Column(Integer, ForeignKey("users.id"), nullable=False)
+    category = Column(String, nullable=False)
+    period = Column(String, nullable=False)  # "weekly" or "monthly"
+    amount = Column(Float, nullable=False)
+    created_at = Column(DateTime, default=datetime.utcnow)
+
+class BudgetSpend(Base):
+    """Expense totals per (user, category, period, period start), kept in
+    step with the transactions table by every write path so a budget's
+    spend is a single key lookup. Maintained for every category, budgeted
+    or not, so a new budget starts with its period's spend already known."""
+    __tablename__ = "budget_spend"
+    __table_args__ = (
+        UniqueConstraint("user_id", "category", "period", "period_start", name="uq_budget_spend_key"),
+    )
+
+    id = Column(Integer, primary_key=True)
+    user_id = Column(Integer, ForeignKey("users.id"), nullable=False)
+    category = Column(String, nullable=False, default="")  # "" when uncategorized
+    period = Column(String, nullable=False)
+    period_start = Column(Date, nullable=False)  # Monday of the week, or first of the month
+    spent = Column(Float, nullable=False, default=0.0)
+    count = Column(Integer, nullable=False, default=0)
+
+class RecurringSeries(Base):
+    """A detected recurring series (subscription, bill, paycheck) among a
+    user's transactions with one merchant_key and type; see
+    app/services/recurring.py. Describes the run of occurrences ending at
+    the latest one."""
+    __tablename__ = "recurring"
+    __table_args__ = (
+        UniqueConstraint("user_id", "merchant_key", "type", name="uq_recurring_key"),
+    )
+
+    id = Column(Integer, primary_key=True)
+    user_id = Column(Integer, ForeignKey("users.id"), nullable=False)
+    merchant_key = Column(String, nullable=False)
+    type = Column(String, nullable=False)  # lower-cased transaction type
+    period = Column(String, nullable=False)  # "weekly", "biweekly", "monthly" or "annual"
+    occurrences = Column(Integer, nullable=False)
+    amount = Column(Float, nullable=False)  # latest occurrence
+    average_amount = Column(Float, nullable=False)
+    first_date = Column(Date, nullable=False)
+    last_date = Column(Date, nullable=False)
+    next_date = Column(Date, nullable=False)
+    # Copied from the latest occurrence
+    description = Column(String, nullable=True)
+    category = Column(String, nullable=True)
+    account_id = Column(Integer, nullable=True)
+
+class Job(Base):
+    """Background work queued by POST /jobs and run by app/jobs.py. The
+    checkpoint is committed together with each chunk of work, so a job
+    claimed again after a crash or restart continues where it stopped."""
+    __tablename__ = "jobs"
+    __table_args__ = (
+        # Workers look for the oldest claimable job
+        Index("ix_jobs_status_id", "status", "id"),
+    )
+
+    id = Column(Integer, primary_key=True)
+    user_id = Column(Integer, ForeignKey("users.id"), nullable=False, index=True)
+    kind = Column(String, nullable=False)  # "import", "recategorize", "rebuild_rollups" or "export"
+    params = Column(JSON, nullable=False)
+    status = Column(String, nullable=False, default="queued")  # "queued", "running", "succeeded" or "failed"
+    progress = Column(Integer, nullable=False, default=0)  # units done, out of total
+    total = Column(Integer, nullable=True)
+    checkpoint = Column(JSON, nullable=True)
+    result = Column(JSON, nullable=True)
+    error = Column(String, nullable=True)
+    attempts = Column(Integer, nullable=False, default=0)
+    # The runner holding a running job, and when it last committed a chunk
+    worker = Column(String, nullable=True)
+    heartbeat_at = Column(DateTime, nullable=True)
+    created_at = Column(DateTime, default=datetime.utcnow)
+    started_at = Column(DateTime, nullable=True)
+    finished_at = Column(DateTime, nullable=True)
@@ -0,0 +1,56 @@
+import base64
+import binascii
+import json
+from datetime import datetime
+from typing import Optional
+from sqlalchemy import and_, or_
+
+# Keyset order of transactions: (date, id), with undated legacy rows
+# (date IS NULL) after every dated one when newest first and so before
+# them when oldest first. Both match SQLite's own NULL placement, so the
+# (user_id, date) indexes still serve the ORDER BY; Postgres needs the
+# explicit NULLS clause to agree.
+
+
+def newest_first(date_column, id_column) -> tuple:
+    return date_column.desc().nulls_last(), id_column.desc()
+
+
+def oldest_first(date_column, id_column) -> tuple:
+    return date_column.asc().nulls_first(), id_column.asc()
+
+
+def before(date_column, id_column, position: tuple):
+    """Rows after position in newest_first order."""
+    date, row_id = position
+    if date is None:
+        return and_(date_column.is_(None), id_column < row_id)
+    return or_(
+        date_column < date,
+        and_(date_column == date, id_column < row_id),
+        date_column.is_(None),
+    )
+
+
+def after(date_column, id_column, position: tuple):
+    """Rows after position in oldest_first order."""
+    date, row_id = position
+    if date is None:
+        return or_(and_(date_column.is_(None), id_column > row_id), date_column.isnot(None))
+    return or_(date_column > date, and_(date_column == date, id_column > row_id))
+
+
+def encode_cursor(date: Optional[datetime], row_id: int) -> str:
+    """Encode the (date, id) keyset position of the last row on a page."""
+    raw = json.dumps([date.isoformat() if date is not None else None, row_id]).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str) -> tuple[Optional[datetime], int]:
+    """Decode a token produced by encode_cursor. Raises ValueError if malformed."""
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        date_str, row_id = json.loads(base64.urlsafe_b64decode(padded))
+        return (datetime.fromisoformat(date_str) if date_str is not None else None), int(row_id)
+    except (binascii.Error, TypeError, ValueError) as exc:
+        raise ValueError("Invalid cursor") from exc
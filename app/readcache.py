@@ -0,0 +1,382 @@
+"""Read-through cache for the account and transaction read endpoints.
+
+Entries hold encoded response bodies, so a hit costs no query and no
+serialization. Two backends share one interface: MemoryBackend keeps
+entries in this process (an LRUCache with a TTL), RedisBackend keeps them
+in Redis, or anything speaking its protocol, where every worker sees the
+same entries.
+
+Invalidation is by scope token rather than by deleting keys. Each scope
+has a random token stored in the backend, and every entry key embeds the
+tokens of the scopes it was built from:
+
+  user:<id>      rotated by every write of the user; keys user-wide reads
+                 (the account list, unfiltered transaction lists)
+  accounts:<id>  rotated by writes that may touch any of the user's
+                 accounts (recategorize, bank sync)
+  account:<id>   rotated by writes to that account; keys reads confined to
+                 it (lists filtered by account_id, single transactions),
+                 together with the owner's accounts token
+
+A write rotates the tokens it affects, which orphans exactly the entries
+built from the old ones; the TTL then reclaims them. MemoryBackend tokens
+live in one process and never see other workers' rotations, so callers
+using it also key entries on the user's data version (see
+app.services.versions), which every write path bumps in the database. Tokens are read
+before the fill, so an entry built while a write commits is stored under
+the tokens it saw and is never served after the rotation. A lost or
+evicted token just gets a fresh random value: it can only cost misses,
+never resurrect stale entries.
+
+Concurrent misses for one key are coalesced: the first request fills it
+and the others await its result. With Redis a short lease (SET NX) also
+coalesces misses across processes; requests that lose the lease poll for
+the entry until the lease runs out and then query themselves.
+
+Backend failures are logged and counted, and the request falls through
+to the database. Writes whose rotation failed, and writes made outside
+the request handlers such as the backfill scripts, show up once the TTL
+expires.
+"""
+import asyncio
+import logging
+import time
+import uuid
+from typing import Awaitable, Callable, Optional
+from app import metrics
+from app.cache import LRUCache
+from app.config import settings
+
+log = logging.getLogger(__name__)
+
+# How often a request that lost the fill lease looks for the entry
+LEASE_POLL_SECONDS = 0.01
+
+
+class MemoryBackend:
+    """Entries in this process only; other workers keep their own.
+
+    Its scope tokens are process-local too, so it cannot tell that
+    another worker committed a write: see the module docstring.
+    """
+
+    shared = False
+
+    def __init__(self, maxsize: int, clock: Callable[[], float] = time.time):
+        self.entries = LRUCache(maxsize, clock)
+        self.clock = clock
+
+    async def get_many(self, keys: list) -> list:
+        return [self.entries.get(key) for key in keys]
+
+    async def set(self, key: str, value: bytes, ttl: float) -> None:
+        self.entries.set(key, value, self.clock() + ttl)
+
+    async def add(self, key: str, value: bytes, ttl: float) -> bool:
+        # Runs on the event loop without awaiting, so check-and-set is atomic
+        if self.entries.get(key) is not None:
+            return False
+        self.entries.set(key, value, self.clock() + ttl)
+        return True
+
+    async def delete(self, key: str) -> None:
+        self.entries.delete(key)
+
+    def stats(self) -> dict:
+        return {"entries": len(self.entries), "evictions_total": self.entries.evictions}
+
+    async def close(self) -> None:
+        self.entries.clear()
+
+
+class RedisBackend:
+    """Entries in Redis, shared by every worker. Needs the redis package."""
+
+    shared = True
+
+    def __init__(self, url: str):
+        import redis.asyncio
+
+        self.client = redis.asyncio.Redis.from_url(url)
+
+    async def get_many(self, keys: list) -> list:
+        return await self.client.mget(keys)
+
+    async def set(self, key: str, value: bytes, ttl: float) -> None:
+        await self.client.set(key, value, px=int(ttl * 1000))
+
+    async def add(self, key: str, value: bytes, ttl: float) -> bool:
+        return bool(await self.client.set(key, value, px=int(ttl * 1000), nx=True))
+
+    async def delete(self, key: str) -> None:
+        await self.client.delete(key)
+
+    def stats(self) -> dict:
+        # Size and evictions are the server's; see INFO keyspace / stats
+        return {}
+
+    async def close(self) -> None:
+        await self.client.aclose()
+
+
+def user_scope(user_id: int) -> str:
+    return f"user:{user_id}"
+
+
+def accounts_scope(user_id: int) -> str:
+    return f"accounts:{user_id}"
+
+
+def account_scope(account_id: int) -> str:
+    return f"account:{account_id}"
+
+
+def _new_token() -> bytes:
+    return uuid.uuid4().hex.encode()
+
+
+class ReadCache:
+    def __init__(self, backend, ttl: float, lease_seconds: float):
+        self.backend = backend
+        self.ttl = ttl
+        self.lease_seconds = lease_seconds
+        self.hits = 0
+        self.misses = 0
+        self.coalesced = 0
+        self.errors = 0
+        self._inflight: dict = {}
+
+    async def tokens(self, scopes: list) -> list:
+        """Current token of each scope, creating the missing ones."""
+        keys = [f"rc:token:{scope}" for scope in scopes]
+        tokens = await self.backend.get_many(keys)
+        for index, token in enumerate(tokens):
+            if token is None:
+                token = _new_token()
+                # Tokens outlive the entries keyed on them
+                if not await self.backend.add(keys[index], token, self.ttl * 2):
+                    token = (await self.backend.get_many([keys[index]]))[0] or token
+                tokens[index] = token
+        return [token.decode() if isinstance(token, bytes) else token for token in tokens]
+
+    async def fetch(self, name: str, scopes: list, fill: Callable[[], Awaitable[bytes]]) -> bytes:
+        """The cached value for name under scopes, from fill() on a miss.
+
+        name must identify the read completely, user included: two reads
+        with equal names and scopes share an entry.
+        """
+        try:
+            tokens = await self.tokens(scopes)
+            key = f"rc:{name}:{':'.join(tokens)}"
+            value = (await self.backend.get_many([key]))[0]
+        except Exception:
+            self._failed("lookup")
+            return await fill()
+        if value is not None:
+            self.hits += 1
+            return value
+        self.misses += 1
+        return await self._single_flight(key, lambda: self._fill(key, fill))
+
+    async def fetch_guarded(self, name: str, guard_scope: str, fill: Callable) -> bytes:
+        """Like fetch, for reads whose scopes are only known from their result.
+
+        fill() returns (scopes, value). The entry records the tokens of
+        those scopes and is served while they are current. A fresh fill is
+        stored only if guard_scope, rotated by every write that could
+        change the value, kept its token throughout.
+        """
+        key = f"rc:{name}"
+        try:
+            entry = (await self.backend.get_many([key]))[0]
+            if entry is not None:
+                header, value = entry.split(b"\n", 1)
+                scopes, _, stamp = header.decode().rpartition(" ")
+                if ":".join(await self.tokens(scopes.split())) == stamp:
+                    self.hits += 1
+                    return value
+        except Exception:
+            self._failed("lookup")
+            return (await fill())[1]
+        self.misses += 1
+        return await self._single_flight(key, lambda: self._fill_guarded(key, guard_scope, fill))
+
+    async def invalidate(self, user_id: int, account_ids: Optional[list] = None) -> None:
+        """Orphan the entries a write of user_id may have changed.
+
+        account_ids names the accounts the write touched; None means any
+        of the user's accounts.
+        """
+        scopes = [user_scope(user_id)]
+        if account_ids is None:
+            scopes.append(accounts_scope(user_id))
+        else:
+            scopes.extend(account_scope(account_id) for account_id in sorted(set(account_ids)))
+        try:
+            for scope in scopes:
+                await self.backend.set(f"rc:token:{scope}", _new_token(), self.ttl * 2)
+        except Exception:
+            self._failed("invalidate")
+
+    def stats(self) -> dict:
+        lookups = self.hits + self.misses
+        return {
+            "hits_total": self.hits,
+            "misses_total": self.misses,
+            "coalesced_total": self.coalesced,
+            "errors_total": self.errors,
+            "hit_ratio": round(self.hits / lookups, 4) if lookups else 0.0,
+            **self.backend.stats(),
+        }
+
+    def _failed(self, operation: str) -> None:
+        self.errors += 1
+        log.warning("read cache %s failed; reading from the database", operation, exc_info=True)
+
+    async def _single_flight(self, key: str, fill: Callable[[], Awaitable[bytes]]) -> bytes:
+        pending = self._inflight.get(key)
+        if pending is not None:
+            self.coalesced += 1
+            try:
+                return await asyncio.shield(pending)
+            except asyncio.CancelledError:
+                if not pending.cancelled():
+                    raise
+                # The request filling it went away; fill it ourselves
+                return await fill()
+
+        pending = self._inflight[key] = asyncio.get_running_loop().create_future()
+        try:
+            value = await fill()
+        except asyncio.CancelledError:
+            pending.cancel()
+            raise
+        except BaseException as exc:
+            pending.set_exception(exc)
+            # Consumed here in case no one else was waiting
+            pending.exception()
+            raise
+        else:
+            pending.set_result(value)
+            return value
+        finally:
+            del self._inflight[key]
+
+    async def _fill(self, key: str, fill: Callable[[], Awaitable[bytes]]) -> bytes:
+        leased = await self._lease(key)
+        if leased is None:
+            value = await self._wait_for(key)
+            if value is not None:
+                return value
+        try:
+            value = await fill()
+            await self._store(key, value)
+            return value
+        finally:
+            if leased:
+                await self._release(key)
+
+    async def _fill_guarded(self, key: str, guard_scope: str, fill: Callable) -> bytes:
+        try:
+            guard = await self.tokens([guard_scope])
+        except Exception:
+            self._failed("lookup")
+            return (await fill())[1]
+        scopes, value = await fill()
+        try:
+            tokens = await self.tokens([guard_scope, *scopes])
+        except Exception:
+            self._failed("lookup")
+            return value
+        if tokens[0] == guard[0]:
+            header = f"{' '.join(scopes)} {':'.join(tokens[1:])}\n".encode()
+            await self._store(key, header + value)
+        return value
+
+    async def _lease(self, key: str) -> Optional[bool]:
+        """True if this process may fill key, None if another one is.
+
+        Only a shared backend needs the lease; in one process
+        _single_flight already lets a single request through.
+        """
+        if not self.backend.shared:
+            return False
+        try:
+            if await self.backend.add(f"{key}:lease", b"1", self.lease_seconds):
+                return True
+        except Exception:
+            self._failed("lease")
+            return False
+        return None
+
+    async def _wait_for(self, key: str) -> Optional[bytes]:
+        deadline = time.monotonic() + self.lease_seconds
+        while time.monotonic() < deadline:
+            await asyncio.sleep(LEASE_POLL_SECONDS)
+            try:
+                value = (await self.backend.get_many([key]))[0]
+            except Exception:
+                self._failed("lookup")
+                return None
+            if value is not None:
+                self.coalesced += 1
+                return value
+        return None
+
+    async def _store(self, key: str, value: bytes) -> None:
+        try:
+            await self.backend.set(key, value, self.ttl)
+        except Exception:
+            self._failed("store")
+
+    async def _release(self, key: str) -> None:
+        try:
+            await self.backend.delete(f"{key}:lease")
+        except Exception:
+            self._failed("lease")
+
+
+# Set for the application's lifetime by start(); None disables caching
+cache: Optional[ReadCache] = None
+
+
+def start() -> None:
+    global cache
+    if settings.read_cache_backend == "none":
+        cache = None
+        return
+    if settings.read_cache_backend == "redis":
+        backend = RedisBackend(settings.read_cache_url)
+    elif settings.read_cache_backend == "memory":
+        backend = MemoryBackend(settings.read_cache_size)
+    else:
+        raise ValueError(f"Unknown read cache backend {settings.read_cache_backend!r}")
+    cache = ReadCache(backend, settings.read_cache_ttl_seconds, settings.read_cache_lease_seconds)
+
+
+async def stop() -> None:
+    global cache
+    if cache is not None:
+        await cache.backend.close()
+        cache = None
+
+
+async def invalidate(user_id: int, account_ids: Optional[list] = None) -> None:
+    """ReadCache.invalidate on the running cache, if any. Call after the commit."""
+    if cache is not None:
+        await cache.invalidate(user_id, account_ids)
+
+
+def stats() -> dict:
+    return cache.stats() if cache is not None else {}
+
+
+metrics.REGISTRY.append(metrics.Stats("read_cache", stats, {
+    "hits_total": ("counter", "Read cache lookups answered from the cache."),
+    "misses_total": ("counter", "Read cache lookups that had to query the database."),
+    "coalesced_total": ("counter", "Misses served by another request's fill instead of a query."),
+    "errors_total": ("counter", "Read cache backend calls that failed."),
+    "hit_ratio": ("gauge", "Share of read cache lookups answered from the cache."),
+    "entries": ("gauge", "Entries held by the in-process read cache."),
+    "evictions_total": ("counter", "Entries the in-process read cache dropped for space or age."),
+}))
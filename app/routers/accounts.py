@@ -1,34 +1,126 @@
-from fastapi import APIRouter, Depends, HTTPException, status
-from sqlalchemy.orm import Session
-from app.database import get_db
+from datetime import date, datetime
+from typing import Optional
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, status
+from fastapi.responses import ORJSONResponse
+from sqlalchemy import func, select
+from sqlalchemy.orm import Session, selectinload
+from sqlalchemy.orm.attributes import set_committed_value
+from app import conditional, events, readcache
+from app.database import DBSession, get_db, run_db
 from app.models import Account, Transaction
-from app.schemas import AccountCreate, AccountRead
+from app.pagination import newest_first
+from app.schemas import AccountCreate, AccountRead, AccountSummary, Forecast
+from app.services import forecast, versions
+from app.serialization import transaction_dict
 from app.dependencies import get_current_user
 
 router = APIRouter(prefix="/accounts", tags=["Accounts"])
 
 @router.post("/", response_model=AccountRead)
-def create_account(
+async def create_account(
     account: AccountCreate,
-    db: Session = Depends(get_db),
+    db: DBSession = Depends(get_db),
     current_user: str = Depends(get_current_user)
 ):
+    new_account = await run_db(db, _create_account, int(current_user), account)
+    await readcache.invalidate(int(current_user), [new_account.id])
+    events.account_created(current_user, new_account)
+    return new_account
+
+def _create_account(db: Session, user_id: int, account: AccountCreate):
     new_account = Account(
-    user_id=int(current_user),
+    user_id=user_id,
     name=account.name,
     account_type=account.account_type,
     balance=account.balance,
     plaid_account_id=getattr(account, "plaid_account_id", None)
 )   
     db.add(new_account)
+    versions.bump(db, user_id)
     db.commit()
     db.refresh(new_account)
+    # A new account has no transactions; don't lazy-load them while serializing
+    set_committed_value(new_account, "transactions", [])
     return new_account
 
-@router.get("/", response_model=list[AccountRead])
-def get_accounts(
-    db: Session = Depends(get_db),
+@router.get("/", response_model=list[AccountSummary])
+async def get_accounts(
+    request: Request,
+    include: Optional[str] = Query(None, pattern="^transactions$"),
+    transactions_limit: int = Query(20, ge=1, le=100),
+    db: DBSession = Depends(get_db),
+    current_user: str = Depends(get_current_user)
+):
+    user_id = int(current_user)
+    # 304 when If-None-Match holds the current ETag; the summaries are built
+    # from trusted rows, so they skip response_model re-validation
+    return await conditional.respond(
+        request, db, user_id, _list_accounts, user_id, include, transactions_limit,
+        cache_key=f"accounts:{user_id}:{include}:{transactions_limit}", scopes=[readcache.user_scope(user_id)],
+    )
+
+def _list_accounts(db: Session, user_id: int, include: Optional[str], transactions_limit: int):
+    # Count and last activity per account in one aggregate query
+    query = (
+        db.query(Account, func.count(Transaction.id), func.max(Transaction.date))
+        .outerjoin(Transaction, Transaction.account_id == Account.id)
+        .filter(Account.user_id == user_id)
+        .group_by(Account.id)
+        .order_by(Account.id)
+    )
+
+    if include == "transactions":
+        # Newest N rows per account, loaded for all accounts in one extra query
+        ranked = (
+            select(
+                Transaction.id,
+                func.row_number().over(
+                    partition_by=Transaction.account_id,
+                    order_by=newest_first(Transaction.date, Transaction.id),
+                ).label("rank"),
+            )
+            .where(Transaction.user_id == user_id)
+            .subquery()
+        )
+        recent_ids = select(ranked.c.id).where(ranked.c.rank <= transactions_limit)
+        query = query.options(
+            selectinload(Account.transactions.and_(Transaction.id.in_(recent_ids)))
+        )
+
+    summaries = []
+    for account, transaction_count, last_activity in query.all():
+        summary = {
+            "id": account.id,
+            "name": account.name,
+            "account_type": account.account_type,
+            "balance": account.balance,
+            "plaid_account_id": account.plaid_account_id,
+            "created_at": account.created_at,
+            "transaction_count": transaction_count,
+            "last_activity": last_activity,
+            "transactions": None,
+        }
+        if include == "transactions":
+            summary["transactions"] = [
+                transaction_dict(t)
+                # Same order as the query's newest_first: undated rows last
+                for t in sorted(
+                    account.transactions, key=lambda t: (t.date is not None, t.date or datetime.min, t.id), reverse=True
+                )
+            ]
+        summaries.append(summary)
+    return summaries
+
+@router.get("/forecast", response_model=Forecast)
+async def get_forecast(
+    days: int = Query(90, ge=1, le=366),
+    as_of: Optional[date] = None,
+    db: DBSession = Depends(get_db),
     current_user: str = Depends(get_current_user)
 ):
-    accounts = db.query(Account).filter(Account.user_id == int(current_user)).all()
-    return accounts
\ No newline at end of file
+    """Each account's projected end-of-day balance for the days after
+    as_of (today by default), from its recurring series and recent
+    per-category averages."""
+    result = await run_db(db, forecast.forecast, int(current_user), as_of or datetime.utcnow().date(), days)
+    # Built from trusted values, so skip response_model re-validation
+    return ORJSONResponse(result)
@@ -2,37 +2,71 @@ from fastapi import APIRouter, Depends, HTTPException, status
 from fastapi.security import OAuth2PasswordRequestForm
 from sqlalchemy.orm import Session
 from app import models, database
-from app.security import hash_password, verify_password
+from app.config import settings
+from app.security import PasswordHasherBusy, password_hasher
 from app.auth_utils import create_access_token
 from pydantic import BaseModel
 from app.schemas import UserCreate, Token
-from app.database import get_db
+from app.database import DBSession, get_db, run_db
 
 router = APIRouter(prefix="/auth", tags=["auth"])
 
 
 
+def _find_user(db: Session, email: str):
+    return db.query(models.User).filter(models.User.email == email).first()
+
+def _add_user(db: Session, email: str, hashed_password: str) -> int:
+    new_user = models.User(email=email, hashed_password=hashed_password)
+    db.add(new_user)
+    db.commit()
+    db.refresh(new_user)
+    return new_user.id
+
+def _set_password_hash(db: Session, user_id: int, hashed_password: str):
+    db.query(models.User).filter(models.User.id == user_id).update(
+        {models.User.hashed_password: hashed_password}
+    )
+    db.commit()
+
+async def _hashing(call):
+    """Await a password_hasher call, shedding load with 503 when it is saturated."""
+    try:
+        return await call
+    except PasswordHasherBusy:
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail="Too many authentication requests, retry shortly",
+            headers={"Retry-After": str(settings.password_hash_retry_after)},
+        )
+
 @router.post("/signup", response_model=Token)
-def signup(user: UserCreate, db: Session = Depends(get_db)):
+async def signup(user: UserCreate, db: DBSession = Depends(get_db)):
     # Check if user already exists
-    existing_user = db.query(models.User).filter(models.User.email == user.email).first()
+    existing_user = await run_db(db, _find_user, user.email)
     if existing_user:
         raise HTTPException(status_code=400, detail="Email already registered")
 
-    hashed_pw = hash_password(user.password)
-    new_user = models.User(email=user.email, hashed_password=hashed_pw)
-    db.add(new_user)
-    db.commit()
-    db.refresh(new_user)
+    hashed_pw = await _hashing(password_hasher.hash(user.password))
+    user_id = await run_db(db, _add_user, user.email, hashed_pw)
 
-    token = create_access_token({"sub": str(new_user.id)})
+    token = create_access_token({"sub": str(user_id)})
     return {"access_token": token, "token_type": "bearer"}
 
 @router.post("/login", response_model=Token)
-def login(form_data: OAuth2PasswordRequestForm = Depends(), db: Session = Depends(get_db)):
-    db_user = db.query(models.User).filter(models.User.email == form_data.username).first()
-    if not db_user or not verify_password(form_data.password, db_user.hashed_password):
+async def login(form_data: OAuth2PasswordRequestForm = Depends(), db: DBSession = Depends(get_db)):
+    db_user = await run_db(db, _find_user, form_data.username)
+    if not db_user:
+        raise HTTPException(status_code=401, detail="Invalid credentials")
+
+    verified, new_hash = await _hashing(
+        password_hasher.verify_and_update(form_data.password, db_user.hashed_password)
+    )
+    if not verified:
         raise HTTPException(status_code=401, detail="Invalid credentials")
+    if new_hash:
+        # Stored hash uses an older cost factor; upgrade it transparently
+        await run_db(db, _set_password_hash, db_user.id, new_hash)
 
     token = create_access_token({"sub": str(db_user.id)})
     return {"access_token": token, "token_type": "bearer"}
\ No newline at end of file
@@ -0,0 +1,85 @@
+from fastapi import APIRouter, Depends, HTTPException, status
+from sqlalchemy.orm import Session
+from starlette.concurrency import run_in_threadpool
+from app import events, readcache
+from app.config import settings
+from app.database import DBSession, get_db, run_db
+from app.models import PlaidItem
+from app.schemas import PlaidItemCreate, PlaidItemRead, SyncResult
+from app.services import plaid_service
+from app.dependencies import get_current_user
+
+router = APIRouter(prefix="/bank", tags=["Bank"])
+
+_client = None
+
+def get_plaid_client():
+    global _client
+    if _client is None:
+        _client = plaid_service.make_client(settings)
+    return _client
+
+@router.post("/items", response_model=PlaidItemRead, status_code=status.HTTP_201_CREATED)
+async def link_item(
+    payload: PlaidItemCreate,
+    db: DBSession = Depends(get_db),
+    client=Depends(get_plaid_client),
+    current_user: str = Depends(get_current_user)
+):
+    try:
+        plaid_item_id, access_token = await run_in_threadpool(
+            plaid_service.exchange_public_token, client, payload.public_token
+        )
+    except plaid_service.PlaidSyncError as exc:
+        raise HTTPException(status_code=status.HTTP_502_BAD_GATEWAY, detail=str(exc))
+    return await run_db(db, _link_item, int(current_user), plaid_item_id, access_token)
+
+def _link_item(db: Session, user_id: int, plaid_item_id: str, access_token: str):
+    if db.query(PlaidItem.id).filter(PlaidItem.plaid_item_id == plaid_item_id).first():
+        raise HTTPException(status_code=status.HTTP_409_CONFLICT, detail="Item already linked")
+    item = PlaidItem(user_id=user_id, plaid_item_id=plaid_item_id, access_token=access_token)
+    db.add(item)
+    db.commit()
+    db.refresh(item)
+    return item
+
+@router.get("/items", response_model=list[PlaidItemRead])
+async def list_items(
+    db: DBSession = Depends(get_db),
+    current_user: str = Depends(get_current_user)
+):
+    return await run_db(db, _list_items, int(current_user))
+
+def _list_items(db: Session, user_id: int):
+    return db.query(PlaidItem).filter(PlaidItem.user_id == user_id).order_by(PlaidItem.id).all()
+
+@router.post("/sync", response_model=list[SyncResult])
+async def sync(
+    db: DBSession = Depends(get_db),
+    client=Depends(get_plaid_client),
+    current_user: str = Depends(get_current_user)
+):
+    items = await run_db(db, _list_items, int(current_user))
+    # Network fetches run off the event loop and outside any DB transaction
+    fetched = await run_in_threadpool(
+        plaid_service.fetch_all,
+        client,
+        [(item.id, item.access_token, item.cursor) for item in items],
+        settings.plaid_sync_page_size,
+        settings.plaid_sync_workers,
+    )
+    results = await run_db(db, _apply_all, items, fetched)
+    applied = [result for result in results if "error" not in result]
+    if applied:
+        await readcache.invalidate(int(current_user))
+    balances = {}
+    for result in applied:
+        balances.update(result.pop("balances"))
+    events.transactions_synced(
+        current_user, *(sum(result[kind] for result in applied) for kind in ("added", "modified", "removed"))
+    )
+    events.balances_changed(current_user, balances)
+    return results
+
+def _apply_all(db: Session, items: list, fetched: dict):
+    return [plaid_service.apply_outcome(db, item, fetched[item.id]) for item in items]
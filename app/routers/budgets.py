@@ -0,0 +1,95 @@
+from datetime import date, datetime
+from typing import Optional
+from fastapi import APIRouter, Depends, HTTPException, status
+from sqlalchemy.orm import Session
+from app.database import DBSession, get_db, run_db
+from app.models import Budget
+from app.schemas import BudgetCreate, BudgetRead
+from app.services import budgets
+from app.dependencies import get_current_user
+
+router = APIRouter(prefix="/budgets", tags=["Budgets"])
+
+def _validate(budget: BudgetCreate):
+    if not budget.category.strip():
+        raise HTTPException(status_code=400, detail="Budget category may not be blank")
+    if budget.period not in budgets.PERIODS:
+        raise HTTPException(status_code=400, detail="Invalid budget period")
+    if budget.amount <= 0:
+        raise HTTPException(status_code=400, detail="Budget amount must be positive")
+
+def _check_unique(db: Session, user_id: int, budget: BudgetCreate, budget_id: Optional[int] = None):
+    query = db.query(Budget.id).filter(
+        Budget.user_id == user_id,
+        Budget.category == budget.category,
+        Budget.period == budget.period,
+    )
+    if budget_id is not None:
+        query = query.filter(Budget.id != budget_id)
+    if query.first():
+        raise HTTPException(status_code=400, detail="A budget for this category and period already exists")
+
+@router.post("/", response_model=BudgetRead, status_code=status.HTTP_201_CREATED)
+async def create_budget(
+    budget: BudgetCreate,
+    db: DBSession = Depends(get_db),
+    current_user: str = Depends(get_current_user)
+):
+    _validate(budget)
+    return await run_db(db, _create_budget, int(current_user), budget)
+
+def _create_budget(db: Session, user_id: int, budget: BudgetCreate):
+    _check_unique(db, user_id, budget)
+    new_budget = Budget(user_id=user_id, **budget.model_dump())
+    db.add(new_budget)
+    db.commit()
+    return budgets.status(db, user_id, datetime.utcnow().date(), new_budget.id)[0]
+
+@router.get("/", response_model=list[BudgetRead])
+async def get_budgets(
+    as_of: Optional[date] = None,
+    db: DBSession = Depends(get_db),
+    current_user: str = Depends(get_current_user)
+):
+    """Each budget's spend and remaining amount in its current period, or
+    in the period containing as_of."""
+    return await run_db(db, budgets.status, int(current_user), as_of or datetime.utcnow().date())
+
+@router.put("/{budget_id}", response_model=BudgetRead)
+async def update_budget(
+    budget_id: int,
+    budget_update: BudgetCreate,
+    db: DBSession = Depends(get_db),
+    current_user: str = Depends(get_current_user)
+):
+    _validate(budget_update)
+    return await run_db(db, _update_budget, int(current_user), budget_id, budget_update)
+
+def _update_budget(db: Session, user_id: int, budget_id: int, budget_update: BudgetCreate):
+    budget = db.query(Budget).filter(Budget.id == budget_id, Budget.user_id == user_id).first()
+    if not budget:
+        raise HTTPException(status_code=404, detail="Budget not found")
+    _check_unique(db, user_id, budget_update, budget_id)
+    budget.category = budget_update.category
+    budget.period = budget_update.period
+    budget.amount = budget_update.amount
+    db.commit()
+    return budgets.status(db, user_id, datetime.utcnow().date(), budget_id)[0]
+
+@router.delete("/{budget_id}", status_code=status.HTTP_204_NO_CONTENT)
+async def delete_budget(
+    budget_id: int,
+    db: DBSession = Depends(get_db),
+    current_user: str = Depends(get_current_user)
+):
+    await run_db(db, _delete_budget, int(current_user), budget_id)
+
+def _delete_budget(db: Session, user_id: int, budget_id: int):
+    deleted = (
+        db.query(Budget)
+        .filter(Budget.id == budget_id, Budget.user_id == user_id)
+        .delete(synchronize_session=False)
+    )
+    if not deleted:
+        raise HTTPException(status_code=404, detail="Budget not found")
+    db.commit()
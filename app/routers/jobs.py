@@ -0,0 +1,82 @@
+from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi.responses import FileResponse
+from sqlalchemy.orm import Session, defer
+from app import jobs
+from app.database import DBSession, get_db, run_db
+from app.models import Job
+from app.schemas import JobCreate, JobRead
+from app.dependencies import get_current_user
+
+router = APIRouter(prefix="/jobs", tags=["Jobs"])
+
+RECENT_JOBS = 50
+
+@router.post("/", response_model=JobRead, status_code=status.HTTP_202_ACCEPTED)
+async def create_job(
+    job: JobCreate,
+    db: DBSession = Depends(get_db),
+    current_user: str = Depends(get_current_user)
+):
+    """Queue heavy work to run in the background; GET /jobs/{id} reports its progress."""
+    try:
+        params = jobs.check(job.kind, job.params)
+    except ValueError as exc:
+        raise HTTPException(status_code=400, detail=str(exc))
+    new_job = await run_db(db, _create_job, int(current_user), job.kind, params)
+    jobs.runner.wake()
+    return new_job
+
+def _create_job(db: Session, user_id: int, kind: str, params: dict):
+    new_job = Job(user_id=user_id, kind=kind, params=params)
+    db.add(new_job)
+    db.flush()
+    # Read before the commit expires it: reloading would parse params again
+    created = JobRead.model_validate(new_job)
+    db.commit()
+    return created
+
+@router.get("/", response_model=list[JobRead])
+async def list_jobs(
+    db: DBSession = Depends(get_db),
+    current_user: str = Depends(get_current_user)
+):
+    """The user's most recent jobs, newest first."""
+    return await run_db(db, _list_jobs, int(current_user))
+
+def _jobs(db: Session, user_id: int):
+    # params and checkpoint can be large and are not part of JobRead
+    return db.query(Job).options(defer(Job.params), defer(Job.checkpoint)).filter(Job.user_id == user_id)
+
+def _list_jobs(db: Session, user_id: int):
+    return _jobs(db, user_id).order_by(Job.id.desc()).limit(RECENT_JOBS).all()
+
+@router.get("/{job_id}", response_model=JobRead)
+async def get_job(
+    job_id: int,
+    db: DBSession = Depends(get_db),
+    current_user: str = Depends(get_current_user)
+):
+    return await run_db(db, _get_job, int(current_user), job_id)
+
+def _get_job(db: Session, user_id: int, job_id: int):
+    job = _jobs(db, user_id).filter(Job.id == job_id).first()
+    if not job:
+        raise HTTPException(status_code=404, detail="Job not found")
+    return job
+
+@router.get("/{job_id}/file")
+async def get_job_file(
+    job_id: int,
+    db: DBSession = Depends(get_db),
+    current_user: str = Depends(get_current_user)
+):
+    """The file a finished export job wrote."""
+    job = await run_db(db, _get_job, int(current_user), job_id)
+    if job.kind != "export" or job.status != "succeeded":
+        raise HTTPException(status_code=404, detail="Job has no file")
+    format = job.result["format"]
+    path = jobs.export_path(job.id, format)
+    if not path.exists():
+        raise HTTPException(status_code=404, detail="Job file was removed")
+    media_type = "text/csv" if format == "csv" else "application/x-ndjson"
+    return FileResponse(path, media_type=media_type, filename=f"transactions.{format}")
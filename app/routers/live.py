@@ -0,0 +1,51 @@
+import asyncio
+from typing import Optional
+from fastapi import APIRouter, HTTPException, WebSocket, WebSocketDisconnect, status
+from app.dependencies import authenticate
+from app.events import broker
+
+router = APIRouter(tags=["Live"])
+
+def _token(websocket: WebSocket, token: Optional[str]) -> Optional[str]:
+    # Browsers cannot set headers on a WebSocket, so ?token= is accepted too
+    if token:
+        return token
+    scheme, _, credentials = websocket.headers.get("authorization", "").partition(" ")
+    return credentials if scheme.lower() == "bearer" and credentials else None
+
+@router.websocket("/ws")
+async def live_events(websocket: WebSocket, token: Optional[str] = None):
+    """Push the user's change events as JSON text frames.
+
+    Messages sent by the client are ignored; the socket is only read so a
+    disconnect is noticed while no events are flowing.
+    """
+    bearer = _token(websocket, token)
+    try:
+        if bearer is None:
+            raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Not authenticated")
+        user_id = authenticate(bearer)
+    except HTTPException as exc:
+        await websocket.close(code=status.WS_1008_POLICY_VIOLATION, reason=exc.detail)
+        return
+
+    await websocket.accept()
+    queue = broker.subscribe(user_id)
+    receive = asyncio.ensure_future(websocket.receive())
+    try:
+        while True:
+            get = asyncio.ensure_future(queue.get())
+            done, _ = await asyncio.wait({get, receive}, return_when=asyncio.FIRST_COMPLETED)
+            if get in done:
+                await websocket.send_text(get.result())
+            else:
+                get.cancel()
+            if receive in done:
+                if receive.result()["type"] == "websocket.disconnect":
+                    break
+                receive = asyncio.ensure_future(websocket.receive())
+    except WebSocketDisconnect:
+        pass
+    finally:
+        receive.cancel()
+        broker.unsubscribe(user_id, queue)
@@ -0,0 +1,97 @@
+from datetime import date
+from typing import Optional
+from fastapi import APIRouter, Depends, Query
+from sqlalchemy import func
+from sqlalchemy.orm import Session
+from app.database import DBSession, get_db, run_db
+from app.models import MonthlyRollup
+from app.schemas import CategoryReport, MonthlyReport
+from app.services.rollups import UNCATEGORIZED
+from app.dependencies import get_current_user
+
+router = APIRouter(prefix="/reports", tags=["Reports"])
+
+# Both reports read the monthly_rollups table, so their cost grows with
+# months x categories rather than with the number of transactions.
+
+
+class ReportFilters:
+    def __init__(
+        self,
+        start_month: Optional[date] = Query(None, description="First month included (any day in it)"),
+        end_month: Optional[date] = Query(None, description="Last month included (any day in it)"),
+        account_id: Optional[int] = None,
+    ):
+        self.start_month = start_month.replace(day=1) if start_month else None
+        self.end_month = end_month.replace(day=1) if end_month else None
+        self.account_id = account_id
+
+    def apply(self, query, user_id: int):
+        query = query.filter(MonthlyRollup.user_id == user_id, MonthlyRollup.count != 0)
+        if self.start_month is not None:
+            query = query.filter(MonthlyRollup.month >= self.start_month)
+        if self.end_month is not None:
+            query = query.filter(MonthlyRollup.month <= self.end_month)
+        if self.account_id is not None:
+            query = query.filter(MonthlyRollup.account_id == self.account_id)
+        return query
+
+
+@router.get("/monthly", response_model=list[MonthlyReport])
+async def monthly_report(
+    filters: ReportFilters = Depends(),
+    db: DBSession = Depends(get_db),
+    current_user: str = Depends(get_current_user)
+):
+    return await run_db(db, _monthly_report, int(current_user), filters)
+
+def _monthly_report(db: Session, user_id: int, filters: ReportFilters):
+    rows = filters.apply(
+        db.query(
+            MonthlyRollup.month,
+            MonthlyRollup.type,
+            func.sum(MonthlyRollup.total),
+            func.sum(MonthlyRollup.count),
+        ),
+        user_id,
+    ).group_by(MonthlyRollup.month, MonthlyRollup.type).order_by(MonthlyRollup.month)
+
+    months = {}
+    for month, kind, total, count in rows:
+        report = months.setdefault(month, {"month": month, "income": 0.0, "expense": 0.0, "count": 0})
+        if kind in ("income", "expense"):
+            report[kind] += total
+        report["count"] += count
+    for report in months.values():
+        report["net"] = report["income"] - report["expense"]
+    return list(months.values())
+
+
+@router.get("/categories", response_model=list[CategoryReport])
+async def category_report(
+    type: Optional[str] = None,
+    filters: ReportFilters = Depends(),
+    db: DBSession = Depends(get_db),
+    current_user: str = Depends(get_current_user)
+):
+    return await run_db(db, _category_report, int(current_user), filters, type)
+
+def _category_report(db: Session, user_id: int, filters: ReportFilters, transaction_type: Optional[str]):
+    total = func.sum(MonthlyRollup.total)
+    query = filters.apply(
+        db.query(MonthlyRollup.category, MonthlyRollup.type, total, func.sum(MonthlyRollup.count)),
+        user_id,
+    )
+    if transaction_type is not None:
+        query = query.filter(MonthlyRollup.type == transaction_type.lower())
+    rows = query.group_by(MonthlyRollup.category, MonthlyRollup.type).order_by(total.desc())
+
+    return [
+        {
+            "category": category if category != UNCATEGORIZED else None,
+            "type": kind,
+            "total": category_total,
+            "count": count,
+        }
+        for category, kind, category_total, count in rows
+    ]
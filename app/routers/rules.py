@@ -0,0 +1,65 @@
+from fastapi import APIRouter, Depends, HTTPException, status
+from sqlalchemy import or_
+from sqlalchemy.orm import Session
+from app.database import DBSession, get_db, run_db
+from app.models import CategoryRule
+from app.schemas import CategoryRuleCreate, CategoryRuleRead
+from app.services import categorize
+from app.dependencies import get_current_user
+
+router = APIRouter(prefix="/rules", tags=["Rules"])
+
+@router.post("/", response_model=CategoryRuleRead, status_code=status.HTTP_201_CREATED)
+async def create_rule(
+    rule: CategoryRuleCreate,
+    db: DBSession = Depends(get_db),
+    current_user: str = Depends(get_current_user)
+):
+    try:
+        categorize.validate(rule.merchant, rule.pattern, rule.min_amount, rule.max_amount)
+    except ValueError as exc:
+        raise HTTPException(status_code=400, detail=str(exc))
+    return await run_db(db, _create_rule, int(current_user), rule)
+
+def _create_rule(db: Session, user_id: int, rule: CategoryRuleCreate):
+    new_rule = CategoryRule(user_id=user_id, **rule.model_dump())
+    db.add(new_rule)
+    db.commit()
+    db.refresh(new_rule)
+    return new_rule
+
+@router.get("/", response_model=list[CategoryRuleRead])
+async def list_rules(
+    db: DBSession = Depends(get_db),
+    current_user: str = Depends(get_current_user)
+):
+    """The user's own rules and the global ones, in the order they are applied."""
+    return await run_db(db, _list_rules, int(current_user))
+
+def _list_rules(db: Session, user_id: int):
+    rules = (
+        db.query(CategoryRule)
+        .filter(or_(CategoryRule.user_id == user_id, CategoryRule.user_id.is_(None)))
+        .all()
+    )
+    return sorted(rules, key=lambda rule: (rule.user_id is None, -rule.priority, rule.id))
+
+@router.delete("/{rule_id}", status_code=status.HTTP_204_NO_CONTENT)
+async def delete_rule(
+    rule_id: int,
+    db: DBSession = Depends(get_db),
+    current_user: str = Depends(get_current_user)
+):
+    """Delete one of the user's rules. Categories it already set are kept
+    until POST /transactions/recategorize."""
+    await run_db(db, _delete_rule, int(current_user), rule_id)
+
+def _delete_rule(db: Session, user_id: int, rule_id: int):
+    deleted = (
+        db.query(CategoryRule)
+        .filter(CategoryRule.id == rule_id, CategoryRule.user_id == user_id)
+        .delete(synchronize_session=False)
+    )
+    if not deleted:
+        raise HTTPException(status_code=404, detail="Rule not found")
+    db.commit()
@@ -1,23 +1,112 @@
-from fastapi import APIRouter, Depends, HTTPException, status
+import json
+from datetime import datetime
+from typing import Optional
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, Response, status
+from fastapi.responses import ORJSONResponse, StreamingResponse
+from sqlalchemy import func, select
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
-from app.database import get_db
-from app.models import Account, Transaction
-from app.schemas import TransactionCreate, TransactionRead
+from starlette.concurrency import run_in_threadpool
+from app import conditional, events, readcache, search
+from app.database import DBSession, get_db, run_db
+from app.models import Account, RecurringSeries, Transaction, merchant_key
+from app.pagination import before, decode_cursor, encode_cursor, newest_first, oldest_first
+from app.serialization import (
+    EXPORT_COLUMNS,
+    TRANSACTION_COLUMNS,
+    encode_export_batch,
+    export_header,
+    rows_to_dicts,
+    transaction_dict,
+)
+from app.schemas import (
+    BulkTransactionResult,
+    RecategorizeResult,
+    RecurringRead,
+    TransactionCreate,
+    TransactionRead,
+    TransactionPage,
+    TransactionSearchPage,
+)
+from app.services import budgets, categorize, imports, recurring, rollups, versions
+from app.services.ledger import adjust_balance, balance_delta
 from app.dependencies import get_current_user
 
 router = APIRouter(prefix="/transactions", tags=["Transactions"])
 
+MAX_PAGE_SIZE = 500
+MAX_BULK_ROWS = 10_000
+NDJSON_TYPES = ("application/x-ndjson", "application/ndjson", "application/jsonl")
+EXPORT_BATCH_SIZE = 1000
+
+
+
+class TransactionFilters:
+    """Query-string filters shared by the transaction list endpoints."""
+
+    def __init__(
+        self,
+        account_id: Optional[int] = None,
+        start_date: Optional[datetime] = Query(None, description="Inclusive lower bound on date"),
+        end_date: Optional[datetime] = Query(None, description="Exclusive upper bound on date"),
+        type: Optional[str] = None,
+        category: Optional[str] = None,
+        min_amount: Optional[float] = None,
+        max_amount: Optional[float] = None,
+    ):
+        self.account_id = account_id
+        self.start_date = start_date
+        self.end_date = end_date
+        self.type = type
+        self.category = category
+        self.min_amount = min_amount
+        self.max_amount = max_amount
+
+    def apply(self, query):
+        if self.account_id is not None:
+            query = query.filter(Transaction.account_id == self.account_id)
+        if self.start_date is not None:
+            query = query.filter(Transaction.date >= self.start_date)
+        if self.end_date is not None:
+            query = query.filter(Transaction.date < self.end_date)
+        if self.type is not None:
+            query = query.filter(func.lower(Transaction.type) == self.type.lower())
+        if self.category is not None:
+            query = query.filter(Transaction.category == self.category)
+        if self.min_amount is not None:
+            query = query.filter(Transaction.amount >= self.min_amount)
+        if self.max_amount is not None:
+            query = query.filter(Transaction.amount <= self.max_amount)
+        return query
+
+    def key(self) -> str:
+        """The filter values as a string, for read cache keys."""
+        return repr(tuple(vars(self).values()))
+
+    def scopes(self, user_id: int) -> list:
+        """Read cache scopes of a list with these filters."""
+        if self.account_id is None:
+            return [readcache.user_scope(user_id)]
+        return [readcache.accounts_scope(user_id), readcache.account_scope(self.account_id)]
+
+
 # CREATE
 @router.post("/", response_model=TransactionRead)
-def create_transaction(
+async def create_transaction(
     transaction: TransactionCreate,
-    db: Session = Depends(get_db),
+    db: DBSession = Depends(get_db),
     current_user: str = Depends(get_current_user)
 ):
+    new_transaction, balance = await run_db(db, _create_transaction, int(current_user), transaction)
+    await readcache.invalidate(int(current_user), [new_transaction.account_id])
+    events.transaction_changed(current_user, "created", new_transaction, balance)
+    return new_transaction
+
+def _create_transaction(db: Session, user_id: int, transaction: TransactionCreate):
     # Verify account belongs to user
-    account = db.query(Account).filter(
+    account = db.query(Account.id).filter(
         Account.id == transaction.account_id,
-        Account.user_id == int(current_user)
+        Account.user_id == user_id
     ).first()
     if not account:
         raise HTTPException(status_code=404, detail="Account not found or not owned by user")
@@ -25,61 +114,254 @@ def create_transaction(
     # Validate transaction data is positive
     if transaction.amount <= 0:
         raise HTTPException(status_code=400, detail="Transaction amount must be positive")
-
-
-    # new_transaction = Transaction(**transaction.dict())
+    try:
+        delta = balance_delta(transaction.type, transaction.amount)
+    except ValueError:
+        raise HTTPException(status_code=400, detail="Invalid transaction type")
 
     # Link transaction to user via account
     new_transaction = Transaction(
-        user_id=int(current_user),
+        user_id=user_id,
         account_id=transaction.account_id,
         amount=transaction.amount,
         type=transaction.type,
+        description=transaction.description,
         category=transaction.category,
-        date=transaction.date,
+        date=transaction.date or datetime.utcnow(),
         plaid_transaction_id=getattr(transaction, "plaid_transaction_id", None)  # optional Plaid field
     )
+    if new_transaction.category is None:
+        _apply_rules(db, user_id, new_transaction)
     db.add(new_transaction)
 
-    # Update account balance
-    if transaction.type.lower() == "income":
-        account.balance += transaction.amount
-    elif transaction.type.lower() == "expense":
-        account.balance -= transaction.amount
-    else:
-        raise HTTPException(status_code=400, detail="Invalid transaction type")
+    # Update account balance in SQL, in the same commit as the row
+    balance = adjust_balance(db, transaction.account_id, delta)
 
+    # Update monthly rollups and budget spend in the same commit
+    deltas = rollups.new_deltas()
+    rollups.track(deltas, user_id, new_transaction.account_id, new_transaction.date,
+                  new_transaction.category, new_transaction.type, new_transaction.amount)
+    rollups.apply_deltas(db, deltas)
+    spend = budgets.new_deltas()
+    budgets.track(spend, user_id, new_transaction.date, new_transaction.category,
+                  new_transaction.type, new_transaction.amount)
+    budgets.apply_deltas(db, spend)
+
+    # Re-detect the recurring series of this row's merchant
+    db.flush()
+    recurring.refresh(db, user_id, [new_transaction.merchant_key])
+
+    versions.bump(db, user_id)
     db.commit()
     db.refresh(new_transaction)
-    return new_transaction
+    return new_transaction, balance
+
+def _apply_rules(db: Session, user_id: int, transaction: Transaction):
+    rule = categorize.load(db, user_id).classify(transaction.description, transaction.amount)
+    transaction.category = rule.category if rule else None
+    transaction.category_rule_id = rule.id if rule else None
+
+# BULK CREATE
+async def read_bulk_rows(request: Request) -> list:
+    """Parse a bulk body given as a JSON array or as NDJSON (one object per line)."""
+    body = await request.body()
+    content_type = request.headers.get("content-type", "").split(";")[0].strip()
+    try:
+        if content_type in NDJSON_TYPES:
+            rows = [json.loads(line) for line in body.splitlines() if line.strip()]
+        else:
+            rows = json.loads(body)
+    except ValueError:
+        raise HTTPException(status_code=400, detail="Malformed request body")
 
-# READ ALL
-@router.get("/", response_model=list[TransactionRead])
-def get_transactions(
-    db: Session = Depends(get_db),
+    if not isinstance(rows, list):
+        raise HTTPException(status_code=400, detail="Expected a JSON array of transactions")
+    if len(rows) > MAX_BULK_ROWS:
+        raise HTTPException(
+            status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE,
+            detail=f"At most {MAX_BULK_ROWS} transactions per request",
+        )
+    return rows
+
+@router.post("/bulk", response_model=BulkTransactionResult)
+async def create_transactions_bulk(
+    rows: list = Depends(read_bulk_rows),
+    db: DBSession = Depends(get_db),
     current_user: str = Depends(get_current_user)
 ):
-    transactions = (
-        db.query(Transaction)
-        .join(Account)
-        .filter(Account.user_id == int(current_user))
+    # Validation is CPU-bound, so keep it off the event loop too
+    valid, errors = await run_in_threadpool(imports.validate_rows, rows)
+    created, balances = await run_db(db, _insert_bulk_rows, int(current_user), valid, errors)
+    if created:
+        await readcache.invalidate(int(current_user), list(balances))
+    events.balances_changed(current_user, balances)
+    errors.sort(key=lambda error: error["index"])
+    return {"created": created, "errors": errors}
+
+@router.post("/recategorize", response_model=RecategorizeResult)
+async def recategorize_transactions(
+    db: DBSession = Depends(get_db),
+    current_user: str = Depends(get_current_user)
+):
+    """Re-apply the current rules to uncategorized and rule-categorized rows."""
+    result = await run_db(db, categorize.recategorize, int(current_user))
+    if result["updated"]:
+        await readcache.invalidate(int(current_user))
+    events.transactions_recategorized(current_user, result["updated"])
+    return result
+
+def _insert_bulk_rows(db: Session, user_id: int, valid: list, errors: list) -> tuple[int, dict]:
+    created, balances = imports.insert_rows(db, user_id, valid, errors)
+    if created:
+        db.commit()
+    return created, balances
+
+# READ ALL (newest first, keyset-paginated on (date, id))
+@router.get("/", response_model=TransactionPage)
+async def get_transactions(
+    request: Request,
+    limit: int = Query(100, ge=1, le=MAX_PAGE_SIZE),
+    cursor: Optional[str] = None,
+    filters: TransactionFilters = Depends(),
+    db: DBSession = Depends(get_db),
+    current_user: str = Depends(get_current_user)
+):
+    position = None
+    if cursor is not None:
+        try:
+            position = decode_cursor(cursor)
+        except ValueError:
+            raise HTTPException(status_code=400, detail="Invalid cursor")
+    user_id = int(current_user)
+    # 304 when If-None-Match holds the current ETag; rows come straight
+    # from the table, so they skip response_model re-validation
+    return await conditional.respond(
+        request, db, user_id, _list_transactions, user_id, filters, limit, position,
+        cache_key=f"transactions:{user_id}:{limit}:{cursor}:{filters.key()}", scopes=filters.scopes(user_id),
+    )
+
+def _list_transactions(db: Session, user_id: int, filters: TransactionFilters, limit: int, position):
+    query = filters.apply(
+        db.query(*TRANSACTION_COLUMNS).filter(Transaction.user_id == user_id)
+    )
+
+    if position is not None:
+        query = query.filter(before(Transaction.date, Transaction.id, position))
+
+    # Fetch one extra row to learn whether another page exists
+    rows = (
+        query.order_by(*newest_first(Transaction.date, Transaction.id))
+        .limit(limit + 1)
         .all()
     )
-    return transactions
+    next_cursor = None
+    if len(rows) > limit:
+        rows = rows[:limit]
+        next_cursor = encode_cursor(rows[-1].date, rows[-1].id)
+
+    return {"items": rows_to_dicts(rows), "next_cursor": next_cursor}
+
+# SEARCH (ranked full-text match on description and category; registered before /{transaction_id})
+@router.get("/search", response_model=TransactionSearchPage)
+async def search_transactions(
+    q: str = Query(..., min_length=1, max_length=200, description="Words to match; each matches as a prefix"),
+    limit: int = Query(50, ge=1, le=MAX_PAGE_SIZE),
+    offset: int = Query(0, ge=0),
+    filters: TransactionFilters = Depends(),
+    db: DBSession = Depends(get_db),
+    current_user: str = Depends(get_current_user)
+):
+    page = await run_db(db, search.search_transactions, int(current_user), q, limit, offset, filters)
+    return ORJSONResponse(page)
+
+# RECURRING (detected series, soonest expected first; registered before /{transaction_id})
+@router.get("/recurring", response_model=list[RecurringRead])
+async def get_recurring(
+    type: Optional[str] = None,
+    period: Optional[str] = None,
+    db: DBSession = Depends(get_db),
+    current_user: str = Depends(get_current_user)
+):
+    return await run_db(db, _list_recurring, int(current_user), type, period)
+
+def _list_recurring(db: Session, user_id: int, type: Optional[str], period: Optional[str]):
+    query = db.query(RecurringSeries).filter(RecurringSeries.user_id == user_id)
+    if type:
+        query = query.filter(RecurringSeries.type == type.lower())
+    if period:
+        query = query.filter(RecurringSeries.period == period)
+    return query.order_by(RecurringSeries.next_date, RecurringSeries.id).all()
+
+# EXPORT (streamed oldest first; registered before /{transaction_id})
+def _export_sync(db: Session, statement, format: str):
+    # yield_per streams rows off the cursor in fixed-size batches, so memory
+    # stays flat whatever the history size. Starlette iterates this sync
+    # generator on the threadpool.
+    yield export_header(format)
+    result = db.execute(statement.execution_options(yield_per=EXPORT_BATCH_SIZE))
+    for rows in result.partitions():
+        yield encode_export_batch(rows, format)
+
+async def _export_async(db: AsyncSession, statement, format: str):
+    yield export_header(format)
+    result = await db.stream(statement.execution_options(yield_per=EXPORT_BATCH_SIZE))
+    async for rows in result.partitions():
+        yield encode_export_batch(rows, format)
+
+@router.get("/export")
+async def export_transactions(
+    format: str = Query("csv", pattern="^(csv|ndjson)$"),
+    filters: TransactionFilters = Depends(),
+    db: DBSession = Depends(get_db),
+    current_user: str = Depends(get_current_user)
+):
+    statement = filters.apply(
+        select(*EXPORT_COLUMNS).where(Transaction.user_id == int(current_user))
+    ).order_by(*oldest_first(Transaction.date, Transaction.id))
+
+    if isinstance(db, AsyncSession):
+        body = _export_async(db, statement, format)
+    else:
+        body = _export_sync(db, statement, format)
+
+    media_type = "text/csv" if format == "csv" else "application/x-ndjson"
+    return StreamingResponse(
+        body,
+        media_type=media_type,
+        headers={"Content-Disposition": f'attachment; filename="transactions.{format}"'},
+    )
 
 # READ ONE
 @router.get("/{transaction_id}", response_model=TransactionRead)
-def get_transaction(
+async def get_transaction(
     transaction_id: int,
-    db: Session = Depends(get_db),
+    db: DBSession = Depends(get_db),
     current_user: str = Depends(get_current_user)
 ):
+    user_id = int(current_user)
+    if readcache.cache is None:
+        return await run_db(db, _get_transaction, user_id, transaction_id)
+
+    async def fill():
+        account_id, body = await run_db(db, _encode_transaction, user_id, transaction_id)
+        return [readcache.accounts_scope(user_id), readcache.account_scope(account_id)], body
+
+    name = f"transaction:{user_id}:{transaction_id}"
+    if not readcache.cache.backend.shared:
+        # Writes in other workers only show up in the data version
+        name += f":v{await run_db(db, versions.current, user_id)}"
+    # Any write of the user may have changed the row, so one that lands
+    # during the fill keeps it out of the cache
+    body = await readcache.cache.fetch_guarded(name, readcache.user_scope(user_id), fill)
+    return Response(body, media_type="application/json")
+
+def _get_transaction(db: Session, user_id: int, transaction_id: int):
     transaction = (
         db.query(Transaction)
         .join(Account)
         .filter(
             Transaction.id == transaction_id,
-            Account.user_id == int(current_user)
+            Account.user_id == user_id
         )
         .first()
     )
@@ -89,85 +371,136 @@ def get_transaction(
 
     return transaction
 
+def _encode_transaction(db: Session, user_id: int, transaction_id: int) -> tuple[int, bytes]:
+    transaction = _get_transaction(db, user_id, transaction_id)
+    return transaction.account_id, ORJSONResponse(transaction_dict(transaction)).body
+
 # DELETE
 @router.delete("/{transaction_id}", status_code=status.HTTP_204_NO_CONTENT)
-def delete_transaction(
+async def delete_transaction(
     transaction_id: int,
-    db: Session = Depends(get_db),
+    db: DBSession = Depends(get_db),
     current_user: str = Depends(get_current_user)
 ):
-    transaction = (
+    account_id, balance = await run_db(db, _delete_transaction, int(current_user), transaction_id)
+    await readcache.invalidate(int(current_user), [account_id])
+    events.transaction_deleted(current_user, transaction_id, account_id, balance)
+
+def _locked_transaction(db: Session, user_id: int, transaction_id: int):
+    """Load a user's transaction and hold it locked until commit.
+
+    Postgres takes SELECT ... FOR UPDATE. SQLite has no row locks, so a no-op
+    UPDATE first takes the database write lock; the SELECT after it then sees
+    the latest committed row and no other writer can change it meanwhile.
+    """
+    query = (
         db.query(Transaction)
         .join(Account)
         .filter(
             Transaction.id == transaction_id,
-            Account.user_id == int(current_user)
+            Account.user_id == user_id
         )
-        .first()
     )
+    if db.get_bind().dialect.name == "sqlite":
+        db.query(Transaction).filter(Transaction.id == transaction_id).update(
+            {Transaction.id: Transaction.id}, synchronize_session=False
+        )
+    else:
+        query = query.with_for_update(of=Transaction)
+    return query.first()
 
+def _delete_transaction(db: Session, user_id: int, transaction_id: int):
+    transaction = _locked_transaction(db, user_id, transaction_id)
     if not transaction:
         raise HTTPException(status_code=404, detail="Transaction not found")
 
-    # Adjust balance before delete
-    if transaction.type.lower() == "income":
-        transaction.account.balance -= transaction.amount
-    elif transaction.type.lower() == "expense":
-        transaction.account.balance += transaction.amount
+    # Reverse its balance effect before delete
+    balance = adjust_balance(db, transaction.account_id, -balance_delta(transaction.type, transaction.amount))
+
+    deltas = rollups.new_deltas()
+    rollups.track(deltas, user_id, transaction.account_id, transaction.date,
+                  transaction.category, transaction.type, transaction.amount, sign=-1)
+    rollups.apply_deltas(db, deltas)
+    spend = budgets.new_deltas()
+    budgets.track(spend, user_id, transaction.date, transaction.category,
+                  transaction.type, transaction.amount, sign=-1)
+    budgets.apply_deltas(db, spend)
 
+    account_id = transaction.account_id
+    key = transaction.merchant_key
     db.delete(transaction)
+    db.flush()
+    recurring.refresh(db, user_id, [key])
+    versions.bump(db, user_id)
     db.commit()
-    return
+    return account_id, balance
 
 # UPDATE
 @router.put("/{transaction_id}", response_model=TransactionRead)
-def update_transaction(
+async def update_transaction(
     transaction_id: int,
     transaction_update: TransactionCreate,
-    db: Session = Depends(get_db),
+    db: DBSession = Depends(get_db),
     current_user: str = Depends(get_current_user)
 ):
+    transaction, balance = await run_db(db, _update_transaction, int(current_user), transaction_id, transaction_update)
+    await readcache.invalidate(int(current_user), [transaction.account_id])
+    events.transaction_changed(current_user, "updated", transaction, balance)
+    return transaction
+
+def _update_transaction(db: Session, user_id: int, transaction_id: int, transaction_update: TransactionCreate):
     # Fetch existing transaction and validate user owns it
-    transaction = (
-        db.query(Transaction)
-        .join(Account)
-        .filter(
-            Transaction.id == transaction_id,
-            Account.user_id == int(current_user)
-        )
-        .first()
-    )
+    transaction = _locked_transaction(db, user_id, transaction_id)
     if not transaction:
         raise HTTPException(status_code=404, detail="Transaction not found")
 
-    # Fetch account for balance adjustments
-    account = transaction.account
-
-    # Reverse previous balance
-    if transaction.type.lower() == "income":
-        account.balance -= transaction.amount
-    elif transaction.type.lower() == "expense":
-        account.balance += transaction.amount
-
-    # Validate new transaction amount
+    # Validate new transaction values
     if transaction_update.amount <= 0:
         raise HTTPException(status_code=400, detail="Transaction amount must be positive")
+    try:
+        new_delta = balance_delta(transaction_update.type, transaction_update.amount)
+    except ValueError:
+        raise HTTPException(status_code=400, detail="Invalid transaction type")
+
+    # Take the old values out of the rollups and budget spend; the new ones go back in below
+    deltas = rollups.new_deltas()
+    rollups.track(deltas, user_id, transaction.account_id, transaction.date,
+                  transaction.category, transaction.type, transaction.amount, sign=-1)
+    spend = budgets.new_deltas()
+    budgets.track(spend, user_id, transaction.date, transaction.category,
+                  transaction.type, transaction.amount, sign=-1)
+
+    # Reverse the previous effect and apply the new one as a single increment
+    balance = adjust_balance(db, transaction.account_id, new_delta - balance_delta(transaction.type, transaction.amount))
 
     # Apply updates
+    old_key = transaction.merchant_key
     transaction.amount = transaction_update.amount
     transaction.type = transaction_update.type
-    transaction.category = transaction_update.category
-    transaction.date = transaction_update.date
+    transaction.description = transaction_update.description
+    transaction.merchant_key = merchant_key(transaction.description)
+    if transaction_update.category is None:
+        transaction.category = None
+        _apply_rules(db, user_id, transaction)
+    elif transaction_update.category != transaction.category:
+        # A category chosen by the client is never overwritten by rules
+        transaction.category = transaction_update.category
+        transaction.category_rule_id = None
+    # Keep the stored date when the update leaves it out
+    transaction.date = transaction_update.date or transaction.date
     transaction.plaid_transaction_id = getattr(transaction_update, "plaid_transaction_id", None)
 
-    # Adjust balance with new values
-    if transaction.type.lower() == "income":
-        account.balance += transaction.amount
-    elif transaction.type.lower() == "expense":
-        account.balance -= transaction.amount
-    else:
-        raise HTTPException(status_code=400, detail="Invalid transaction type")
+    rollups.track(deltas, user_id, transaction.account_id, transaction.date,
+                  transaction.category, transaction.type, transaction.amount)
+    rollups.apply_deltas(db, deltas)
+    budgets.track(spend, user_id, transaction.date, transaction.category,
+                  transaction.type, transaction.amount)
+    budgets.apply_deltas(db, spend)
+
+    db.flush()
+    recurring.refresh(db, user_id, [old_key, transaction.merchant_key])
 
+    versions.bump(db, user_id)
     db.commit()
     db.refresh(transaction)
-    return transaction
\ No newline at end of file
+    return transaction, balance
@@ -1,6 +1,6 @@
-from pydantic import BaseModel
+from pydantic import BaseModel, ConfigDict
 from typing import Optional, List
-from datetime import datetime
+from datetime import date, datetime
 
 # ===== AUTH SCHEMAS =====
 class UserCreate(BaseModel):
@@ -24,12 +24,50 @@ class TransactionCreate(BaseModel):
     plaid_transaction_id: str | None = None
 
 class TransactionRead(TransactionCreate):
+    model_config = ConfigDict(from_attributes=True)
+
     id: int
     created_at: datetime
-
-    class Config:
-        orm_mode = True
     plaid_transaction_id: str | None = None
+    # Set when the category came from a categorization rule
+    category_rule_id: Optional[int] = None
+
+class TransactionPage(BaseModel):
+    items: List[TransactionRead]
+    next_cursor: Optional[str] = None
+
+class TransactionSearchPage(BaseModel):
+    items: List[TransactionRead]
+    next_offset: Optional[int] = None
+
+class RecurringRead(BaseModel):
+    model_config = ConfigDict(from_attributes=True)
+
+    id: int
+    merchant_key: str
+    description: Optional[str] = None
+    category: Optional[str] = None
+    type: str
+    period: str  # "weekly", "biweekly", "monthly" or "annual"
+    occurrences: int
+    amount: float  # latest occurrence
+    average_amount: float
+    first_date: date
+    last_date: date
+    next_date: date  # expected next occurrence
+    account_id: Optional[int] = None
+
+class BulkRowError(BaseModel):
+    index: int
+    detail: str
+
+class BulkTransactionResult(BaseModel):
+    created: int
+    errors: List[BulkRowError] = []
+
+class RecategorizeResult(BaseModel):
+    scanned: int
+    updated: int
 
 class AccountCreate(BaseModel):
     name: str
@@ -38,10 +76,129 @@ class AccountCreate(BaseModel):
     plaid_account_id: str | None = None
 
 class AccountRead(AccountCreate):
+    model_config = ConfigDict(from_attributes=True)
+
     id: int
     created_at: datetime
     transactions: List[TransactionRead] = []
     plaid_account_id: str | None = None
 
-    class Config:
-        orm_mode = True
\ No newline at end of file
+class AccountSummary(AccountCreate):
+    id: int
+    created_at: datetime
+    plaid_account_id: str | None = None
+    transaction_count: int = 0
+    last_activity: Optional[datetime] = None
+    # Only populated with ?include=transactions, newest first and capped
+    transactions: Optional[List[TransactionRead]] = None
+
+class AccountForecast(BaseModel):
+    account_id: int
+    name: str
+    balance: float  # current
+    daily_drift: float  # average non-recurring net flow per day
+    lowest_balance: float
+    lowest_date: date
+    balances: List[float]  # end of day, from the forecast's start
+
+class Forecast(BaseModel):
+    as_of: date
+    start: date  # the day after as_of
+    days: int
+    accounts: List[AccountForecast]
+
+
+# ===== CATEGORIZATION RULE SCHEMAS =====
+
+class CategoryRuleCreate(BaseModel):
+    category: str
+    # Case-insensitive substring of the description; or use pattern, a regex
+    merchant: Optional[str] = None
+    pattern: Optional[str] = None
+    min_amount: Optional[float] = None
+    max_amount: Optional[float] = None
+    priority: int = 0
+
+class CategoryRuleRead(CategoryRuleCreate):
+    model_config = ConfigDict(from_attributes=True)
+
+    id: int
+    user_id: Optional[int] = None  # None for global rules
+    created_at: datetime
+
+
+# ===== BUDGET SCHEMAS =====
+
+class BudgetCreate(BaseModel):
+    category: str
+    period: str = "monthly"  # "weekly" (weeks start on Monday) or "monthly"
+    amount: float
+
+class BudgetRead(BudgetCreate):
+    id: int
+    created_at: datetime
+    # Spend in the period containing the requested day (today by default)
+    period_start: date
+    spent: float = 0.0
+    remaining: float
+
+
+# ===== BANK (PLAID) SCHEMAS =====
+
+class PlaidItemCreate(BaseModel):
+    public_token: str
+
+class PlaidItemRead(BaseModel):
+    model_config = ConfigDict(from_attributes=True)
+
+    id: int
+    plaid_item_id: str
+    last_synced_at: Optional[datetime] = None
+    created_at: datetime
+
+class SyncResult(BaseModel):
+    item_id: int
+    added: int = 0
+    modified: int = 0
+    removed: int = 0
+    skipped: int = 0  # rows for unlinked accounts or with another user's plaid id
+    error: Optional[str] = None
+
+
+# ===== REPORT SCHEMAS =====
+
+class MonthlyReport(BaseModel):
+    month: date
+    income: float = 0.0
+    expense: float = 0.0
+    net: float = 0.0
+    count: int = 0
+
+class CategoryReport(BaseModel):
+    category: Optional[str] = None
+    type: str
+    total: float
+    count: int
+
+
+# ===== JOB SCHEMAS =====
+
+class JobCreate(BaseModel):
+    kind: str  # "import", "recategorize", "rebuild_rollups" or "export"
+    # import: {"rows": [transaction, ...]}; export: {"format": "csv" or "ndjson"}
+    params: dict = {}
+
+class JobRead(BaseModel):
+    model_config = ConfigDict(from_attributes=True)
+
+    id: int
+    kind: str
+    status: str  # "queued", "running", "succeeded" or "failed"
+    progress: int  # units done so far: rows for import, recategorize and export
+    total: Optional[int] = None
+    result: Optional[dict] = None
+    error: Optional[str] = None
+    attempts: int
+    created_at: datetime
+    started_at: Optional[datetime] = None
+    finished_at: Optional[datetime] = None
@@ -0,0 +1,122 @@
+"""Full-text search over transaction descriptions and categories.
+
+On SQLite the index is a contentless FTS5 table, transactions_fts, kept
+current by triggers on transactions, so every write path (bulk inserts and
+Plaid upserts included) updates it in the same statement. Its rowids are
+(user_id << 32) + id: one user's entries form a single rowid range, and
+FTS5 seeks straight into it rather than walking every user's postings for
+a common word. Postgres matches a generated tsvector column through a GIN
+index. The DDL for both lives next to the Transaction model.
+
+Every query word must match, as a word prefix ("starb" finds Starbucks).
+Results are ranked by where the query appears: descriptions starting with
+it first, then descriptions containing it, then the remaining matches
+(category only, or words apart), newest first within each tier. FTS5's
+bm25() is not used: it counts the documents holding each term across the
+whole table on every call, tens of milliseconds for a common word at a
+million rows.
+"""
+import re
+from sqlalchemy import case, func, literal_column, select
+from sqlalchemy.orm import Session
+from sqlalchemy.sql import column, table
+from app.models import SEARCH_ROWID_SHIFT, Transaction
+from app.serialization import TRANSACTION_COLUMNS, rows_to_dicts
+
+MAX_WORDS = 8
+
+# Longest prefix the FTS5 table indexes (its prefix= option). Longer words
+# are matched on this many characters, then checked against the row.
+MAX_INDEXED_PREFIX = 8
+
+SEARCH_TABLES = ("transactions_fts",)
+SEARCH_COLUMNS = ("search_vector",)
+SEARCH_INDEXES = ("ix_transactions_search_vector",)
+
+_fts = table("transactions_fts", column("rowid"))
+
+
+def words(q: str) -> list:
+    """Lower-cased letter/digit runs of q, at most MAX_WORDS of them."""
+    return re.findall(r"[^\W_]+", q.lower())[:MAX_WORDS]
+
+
+def include_name(name, type_, parent_names) -> bool:
+    """Alembic include_name hook: leave the search index out of autogenerate."""
+    if type_ == "table":
+        return not any(name == t or name.startswith(t + "_") for t in SEARCH_TABLES)
+    if type_ == "column":
+        return name not in SEARCH_COLUMNS
+    if type_ == "index":
+        return name not in SEARCH_INDEXES
+    return True
+
+
+def _sqlite_matches(db: Session, user_id: int, terms: list):
+    low = user_id << SEARCH_ROWID_SHIFT
+    expression = " ".join(f'"{term[:MAX_INDEXED_PREFIX]}"*' for term in terms)
+    # MATERIALIZED pins the plan: FTS5 first, then primary key lookups
+    hits = (
+        select(_fts.c.rowid)
+        .where(
+            literal_column("transactions_fts").op("MATCH")(expression),
+            _fts.c.rowid >= low,
+            _fts.c.rowid < low + (1 << SEARCH_ROWID_SHIFT),
+        )
+        .cte("hits")
+        .prefix_with("MATERIALIZED")
+    )
+    query = (
+        db.query(*TRANSACTION_COLUMNS)
+        .select_from(hits)
+        .join(Transaction, Transaction.id == hits.c.rowid - low)
+        .filter(Transaction.user_id == user_id)
+    )
+    long_terms = [term for term in terms if len(term) > MAX_INDEXED_PREFIX]
+    if long_terms:
+        text = func.lower(func.coalesce(Transaction.description, "") + " " + func.coalesce(Transaction.category, ""))
+        query = query.filter(*(text.contains(term) for term in long_terms))
+    return query
+
+
+def _postgres_matches(db: Session, user_id: int, terms: list):
+    tsquery = func.to_tsquery("simple", " & ".join(f"{term}:*" for term in terms))
+    return db.query(*TRANSACTION_COLUMNS).filter(
+        Transaction.user_id == user_id,
+        literal_column("transactions.search_vector").op("@@")(tsquery),
+    )
+
+
+def search_transactions(db: Session, user_id: int, q: str, limit: int, offset: int = 0, filters=None) -> dict:
+    """One page of a user's transactions matching q, best matches first.
+
+    filters is anything with an apply(query) method, such as the list
+    endpoints' TransactionFilters.
+    """
+    terms = words(q)
+    if not terms:
+        return {"items": [], "next_offset": None}
+
+    if db.get_bind().dialect.name == "sqlite":
+        query = _sqlite_matches(db, user_id, terms)
+    else:
+        query = _postgres_matches(db, user_id, terms)
+    if filters is not None:
+        query = filters.apply(query)
+
+    phrase = " ".join(terms)
+    description = func.lower(Transaction.description)
+    relevance = case((description.startswith(phrase), 0), (description.contains(phrase), 1), else_=2)
+
+    # Fetch one extra row to learn whether another page exists
+    rows = (
+        query.order_by(relevance, Transaction.date.desc(), Transaction.id.desc())
+        .offset(offset)
+        .limit(limit + 1)
+        .all()
+    )
+    next_offset = None
+    if len(rows) > limit:
+        rows = rows[:limit]
+        next_offset = offset + limit
+    return {"items": rows_to_dicts(rows), "next_offset": next_offset}
@@ -0,0 +1,64 @@
+"""Fast path for encoding large list responses.
+
+Going through response_model, FastAPI validates every row into a Pydantic
+model, dumps each one back to a dict and only then encodes JSON. For rows
+read straight from our own tables that work is redundant: the column
+types already match the schema. List endpoints therefore select exactly
+the schema's columns, turn each Row into a dict and hand the result to
+ORJSONResponse, which encodes it in one orjson call. tests/test_serialization.py
+checks the output stays identical to the response_model path.
+
+Exports (GET /transactions/export and export jobs) are encoded in
+batches as CSV or NDJSON by encode_export_batch.
+"""
+import csv
+import io
+import json
+from datetime import datetime
+from app.models import Transaction
+from app.schemas import TransactionRead
+
+TRANSACTION_FIELDS = tuple(TransactionRead.model_fields)
+
+# Transaction columns labelled and ordered like TransactionRead
+TRANSACTION_COLUMNS = tuple(getattr(Transaction, name).label(name) for name in TRANSACTION_FIELDS)
+
+
+def rows_to_dicts(rows) -> list:
+    """Dicts from Rows selected with TRANSACTION_COLUMNS (or any labelled select)."""
+    return [row._asdict() for row in rows]
+
+
+def transaction_dict(transaction: Transaction) -> dict:
+    """TransactionRead-shaped dict from an already loaded ORM row."""
+    return {name: getattr(transaction, name) for name in TRANSACTION_FIELDS}
+
+
+EXPORT_COLUMNS = (
+    Transaction.id,
+    Transaction.account_id,
+    Transaction.date,
+    Transaction.amount,
+    Transaction.type,
+    Transaction.category,
+    Transaction.description,
+    Transaction.plaid_transaction_id,
+    Transaction.created_at,
+)
+EXPORT_FIELDS = [column.key for column in EXPORT_COLUMNS]
+
+
+def encode_export_batch(rows, format: str) -> str:
+    """Rows selected with EXPORT_COLUMNS as CSV or NDJSON lines."""
+    if format == "ndjson":
+        return "".join(
+            json.dumps(dict(zip(EXPORT_FIELDS, row)), default=datetime.isoformat) + "\n"
+            for row in rows
+        )
+    buffer = io.StringIO()
+    csv.writer(buffer).writerows(rows)
+    return buffer.getvalue()
+
+
+def export_header(format: str) -> str:
+    return ",".join(EXPORT_FIELDS) + "\r\n" if format == "csv" else ""
@@ -0,0 +1,242 @@
+"""Budget spend counters.
+
+Every expense adds its amount to one budget_spend row per period: its
+week (starting Monday) and its month. Write paths collect signed deltas
+with track() and flush them with apply_deltas() before their commit, like
+the monthly rollups, so a budget's spend is read with a key lookup
+instead of a SUM over transactions.
+
+Counters can still drift, e.g. through rows written outside the app.
+reconcile() recomputes them from the transactions table and corrects the
+rows that disagree. It scans every user's expenses, so run it on a
+schedule from one place, e.g. cron:
+
+    python -m app.services.budgets [--check] [--user-id N]
+
+or set budget_reconcile_seconds on a single server process to have that
+process run it in the background.
+"""
+import argparse
+import asyncio
+import logging
+import sys
+from collections import defaultdict
+from datetime import date, datetime, timedelta
+from typing import Optional
+from sqlalchemy import and_, case, func
+from sqlalchemy.orm import Session
+from starlette.concurrency import run_in_threadpool
+from app.database import dialect_insert
+from app.models import Budget, BudgetSpend, Transaction
+from app.services.rollups import UNCATEGORIZED
+
+PERIODS = ("weekly", "monthly")
+KEY_COLUMNS = ("user_id", "category", "period", "period_start")
+
+logger = logging.getLogger("app.budgets")
+
+
+def period_start(period: str, when) -> date:
+    day = when.date() if isinstance(when, datetime) else when
+    if period == "weekly":
+        return day - timedelta(days=day.weekday())
+    return day.replace(day=1)
+
+
+def new_deltas() -> defaultdict:
+    """Map of counter key -> [spent delta, count delta]."""
+    return defaultdict(lambda: [0.0, 0])
+
+
+def track(deltas, user_id, when, category, transaction_type, amount, sign=1) -> None:
+    """Add (sign=1) or remove (sign=-1) one transaction's spend; only expenses count."""
+    if when is None or transaction_type.lower() != "expense":
+        return
+    for period in PERIODS:
+        entry = deltas[(user_id, category or UNCATEGORIZED, period, period_start(period, when))]
+        entry[0] += sign * amount
+        entry[1] += sign
+
+
+def apply_deltas(db: Session, deltas) -> None:
+    """Upsert the accumulated deltas in one executemany statement."""
+    rows = [
+        {**dict(zip(KEY_COLUMNS, key)), "spent": spent, "count": count}
+        for key, (spent, count) in deltas.items()
+        if spent or count
+    ]
+    if not rows:
+        return
+
+    stmt = dialect_insert(db, BudgetSpend)
+    stmt = stmt.on_conflict_do_update(
+        index_elements=list(KEY_COLUMNS),
+        set_={
+            "spent": BudgetSpend.spent + stmt.excluded.spent,
+            "count": BudgetSpend.count + stmt.excluded.count,
+        },
+    )
+    db.execute(stmt, rows)
+
+
+def status(db: Session, user_id: int, as_of: date, budget_id: Optional[int] = None) -> list:
+    """The user's budgets (or just budget_id) with spend and remaining
+    amount for the period holding as_of."""
+    start = case(
+        (Budget.period == "weekly", period_start("weekly", as_of)),
+        else_=period_start("monthly", as_of),
+    )
+    query = (
+        db.query(Budget, BudgetSpend.spent)
+        .outerjoin(BudgetSpend, and_(
+            BudgetSpend.user_id == Budget.user_id,
+            BudgetSpend.category == Budget.category,
+            BudgetSpend.period == Budget.period,
+            BudgetSpend.period_start == start,
+        ))
+        .filter(Budget.user_id == user_id)
+        .order_by(Budget.category, Budget.period)
+    )
+    if budget_id is not None:
+        query = query.filter(Budget.id == budget_id)
+    result = []
+    for budget, spent in query:
+        spent = round(spent or 0.0, 2)
+        result.append({
+            "id": budget.id,
+            "category": budget.category,
+            "period": budget.period,
+            "amount": budget.amount,
+            "created_at": budget.created_at,
+            "period_start": period_start(budget.period, as_of),
+            "spent": spent,
+            "remaining": round(budget.amount - spent, 2),
+        })
+    return result
+
+
+def compute(db: Session, user_id: Optional[int] = None) -> dict:
+    """Counters recomputed from the live transaction rows."""
+    # Daily totals come from SQL; folding days into weeks and months here
+    # keeps the query the same on every dialect
+    day = func.date(Transaction.date)
+    category = func.coalesce(Transaction.category, UNCATEGORIZED)
+    query = (
+        db.query(Transaction.user_id, category, day, func.sum(Transaction.amount), func.count(Transaction.id))
+        .filter(Transaction.date.isnot(None), func.lower(Transaction.type) == "expense")
+        .group_by(Transaction.user_id, category, day)
+    )
+    if user_id is not None:
+        query = query.filter(Transaction.user_id == user_id)
+
+    computed = new_deltas()
+    for uid, category_value, day_value, total, count in query:
+        if isinstance(day_value, str):
+            day_value = date.fromisoformat(day_value)
+        for period in PERIODS:
+            entry = computed[(uid, category_value, period, period_start(period, day_value))]
+            entry[0] += total
+            entry[1] += count
+    return {key: tuple(value) for key, value in computed.items()}
+
+
+def stored(db: Session, user_id: Optional[int] = None) -> dict:
+    query = db.query(BudgetSpend)
+    if user_id is not None:
+        query = query.filter(BudgetSpend.user_id == user_id)
+    return {
+        tuple(getattr(row, column) for column in KEY_COLUMNS): (row.spent, row.count)
+        for row in query
+    }
+
+
+def _mismatches(expected: dict, actual: dict, tolerance: float) -> list:
+    mismatches = []
+    for key in sorted(expected.keys() | actual.keys(), key=str):
+        want = expected.get(key, (0.0, 0))
+        have = actual.get(key, (0.0, 0))
+        if want[1] != have[1] or abs(want[0] - have[0]) > tolerance:
+            mismatches.append({"key": key, "expected": want, "stored": have})
+    return mismatches
+
+
+def verify(db: Session, user_id: Optional[int] = None, tolerance: float = 1e-6) -> list:
+    """Keys whose stored counter disagrees with the live rows, with both values."""
+    return _mismatches(compute(db, user_id), stored(db, user_id), tolerance)
+
+
+def reconcile(db: Session, user_id: Optional[int] = None, tolerance: float = 1e-6) -> list:
+    """Correct drifted counters; returns the mismatches that were fixed.
+
+    Safe to run while the app is writing, and from several processes at
+    once. The stored counters are read before the transactions, and each
+    correction is a compare-and-set on the value read. A counter that
+    changed in between (a concurrent write landed) is left alone; if it
+    really drifted, the next pass fixes it.
+    """
+    actual = stored(db, user_id)
+    mismatches = _mismatches(compute(db, user_id), actual, tolerance)
+    # End the read transaction; on SQLite writing from a stale snapshot fails
+    db.commit()
+    fixed = []
+    for mismatch in mismatches:
+        key = mismatch["key"]
+        spent, count = mismatch["expected"]
+        if key in actual:
+            stored_spent, stored_count = actual[key]
+            changed = (
+                db.query(BudgetSpend)
+                .filter(*(getattr(BudgetSpend, column) == value for column, value in zip(KEY_COLUMNS, key)))
+                .filter(BudgetSpend.spent == stored_spent, BudgetSpend.count == stored_count)
+                .update({"spent": spent, "count": count}, synchronize_session=False)
+            )
+        else:
+            stmt = dialect_insert(db, BudgetSpend).values(
+                **dict(zip(KEY_COLUMNS, key)), spent=spent, count=count,
+            ).on_conflict_do_nothing(index_elements=list(KEY_COLUMNS))
+            changed = db.execute(stmt).rowcount
+        if changed:
+            fixed.append(mismatch)
+    db.commit()
+    return fixed
+
+
+async def reconcile_periodically(session_factory, interval: float) -> None:
+    """Reconcile every user's counters each interval seconds until cancelled."""
+    while True:
+        await asyncio.sleep(interval)
+        try:
+            fixed = await run_in_threadpool(_reconcile_all, session_factory)
+        except Exception:
+            logger.exception("budget reconciliation failed")
+            continue
+        for mismatch in fixed:
+            logger.warning("fixed budget counter drift %s: expected %s, stored %s",
+                           mismatch["key"], mismatch["expected"], mismatch["stored"])
+
+
+def _reconcile_all(session_factory) -> list:
+    with session_factory() as db:
+        return reconcile(db)
+
+
+def main(argv=None) -> int:
+    from app.database import SessionLocal
+
+    parser = argparse.ArgumentParser(description="Reconcile or check the budget spend counters.")
+    parser.add_argument("--check", action="store_true", help="only report drift, do not fix it")
+    parser.add_argument("--user-id", type=int)
+    args = parser.parse_args(argv)
+
+    with SessionLocal() as db:
+        if not args.check:
+            print(f"fixed {len(reconcile(db, args.user_id))} budget counters")
+        mismatches = verify(db, args.user_id)
+    for mismatch in mismatches:
+        print(f"drift {mismatch['key']}: expected {mismatch['expected']}, stored {mismatch['stored']}")
+    print("budget counters match live rows" if not mismatches else f"{len(mismatches)} budget counters drifted")
+    return 1 if mismatches else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
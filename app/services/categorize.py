@@ -0,0 +1,398 @@
+"""Rule-based categories for transactions that arrive without one.
+
+A user's rules plus the global ones are compiled into one Categorizer.
+Merchant rules (case-insensitive substrings, the common kind) go into a
+single Aho-Corasick automaton, so one pass over a description finds every
+merchant it contains however many rules there are. Regex rules are
+compiled individually and only tried when they outrank the best merchant
+hit, after one alternation of them all has screened the description;
+amount ranges are checked on the candidates that remain. Within a
+batch each distinct description is scanned once.
+
+Precedence: the user's own rules before global ones, then higher
+priority, then older rules. The result is always the first rule in
+precedence order whose conditions all hold.
+
+Compiled Categorizers are cached on the exact rule set, so they are
+rebuilt only after a rule changes and shared by users with the same rules.
+"""
+import re
+import sys
+from collections import defaultdict, deque
+from dataclasses import dataclass
+from typing import Iterable, Optional, Sequence
+from sqlalchemy import or_, update
+from sqlalchemy.orm import Session
+from app.cache import LRUCache
+from app.models import CategoryRule, Transaction
+from app.services import budgets, recurring, rollups, versions
+
+if sys.version_info >= (3, 11):
+    import re._constants as sre
+    import re._parser as sre_parse
+else:
+    import sre_constants as sre
+    import sre_parse
+
+RECATEGORIZE_CHUNK = 1000
+MAX_PATTERN_LENGTH = 500
+
+
+@dataclass(frozen=True)
+class Rule:
+    id: int
+    user_id: Optional[int]
+    category: str
+    merchant: Optional[str] = None
+    pattern: Optional[str] = None
+    min_amount: Optional[float] = None
+    max_amount: Optional[float] = None
+    priority: int = 0
+
+    def precedence(self) -> tuple:
+        return (self.user_id is None, -self.priority, self.id)
+
+    def amount_matches(self, amount: float) -> bool:
+        return (self.min_amount is None or amount >= self.min_amount) and \
+            (self.max_amount is None or amount <= self.max_amount)
+
+
+def validate(merchant: Optional[str], pattern: Optional[str],
+             min_amount: Optional[float], max_amount: Optional[float]) -> None:
+    """Raise ValueError unless the conditions make a usable rule."""
+    if merchant is not None and not merchant.strip():
+        raise ValueError("merchant may not be blank")
+    if merchant and pattern:
+        raise ValueError("Give either merchant or pattern, not both")
+    if not (merchant or pattern) and min_amount is None and max_amount is None:
+        raise ValueError("A rule needs a merchant, a pattern or an amount range")
+    if min_amount is not None and max_amount is not None and min_amount > max_amount:
+        raise ValueError("min_amount is greater than max_amount")
+    if pattern:
+        if len(pattern) > MAX_PATTERN_LENGTH:
+            raise ValueError(f"Pattern longer than {MAX_PATTERN_LENGTH} characters")
+        try:
+            re.compile(pattern, re.IGNORECASE)
+        except re.error as exc:
+            raise ValueError(f"Invalid pattern: {exc}")
+        if backtracks(pattern):
+            raise ValueError("Pattern repeats a group that can itself repeat or branch, "
+                             "which can take exponential time to match")
+
+
+def backtracks(pattern: str) -> bool:
+    """Whether pattern nests a repeat or an alternation inside a repeat.
+
+    Those are the shapes, like (a+)+ or (a|ab)*, on which Python's
+    backtracking engine can take time exponential in the text's length.
+    Rules are matched inline on every write, so they are refused outright;
+    the check is conservative and also refuses some harmless patterns.
+    """
+    return _nested_repeat(sre_parse.parse(pattern, re.IGNORECASE), False)
+
+
+def _nested_repeat(parsed, repeated: bool) -> bool:
+    for op, av in parsed:
+        if op in (sre.MAX_REPEAT, sre.MIN_REPEAT):
+            low, high, body = av
+            repeats = high > 1
+            if repeats and repeated:
+                return True
+            if _nested_repeat(body, repeated or repeats):
+                return True
+        elif op is sre.BRANCH:
+            if repeated:
+                return True
+            if any(_nested_repeat(branch, repeated) for branch in av[1]):
+                return True
+        elif op is sre.GROUPREF_EXISTS:
+            if any(branch and _nested_repeat(branch, repeated) for branch in av[1:]):
+                return True
+        elif op in (sre.SUBPATTERN, sre.ASSERT, sre.ASSERT_NOT):
+            if _nested_repeat(av[-1], repeated):
+                return True
+        elif op is _ATOMIC_GROUP:
+            if _nested_repeat(av, repeated):
+                return True
+    # POSSESSIVE_REPEAT never backtracks into its body
+    return False
+
+
+_ATOMIC_GROUP = getattr(sre, "ATOMIC_GROUP", None)  # (?>...), Python 3.11+
+
+
+def _combinable(pattern: str) -> bool:
+    """Whether pattern means the same as one branch of a larger alternation.
+
+    Named groups could clash, backreferences would point at another
+    branch's groups and global flags like (?x) would apply to every branch.
+    """
+    parsed = sre_parse.parse(pattern, re.IGNORECASE)
+    if parsed.state.groupdict or parsed.state.flags & ~(re.IGNORECASE | re.UNICODE):
+        return False
+    if _refers_back(parsed):
+        return False
+    try:
+        re.compile(f"(?:{pattern})", re.IGNORECASE)
+    except re.error:  # (?i) anywhere but at the start
+        return False
+    return True
+
+
+def _refers_back(parsed) -> bool:
+    for op, av in parsed:
+        if op in (sre.GROUPREF, sre.GROUPREF_EXISTS):
+            return True
+        if op in (sre.MAX_REPEAT, sre.MIN_REPEAT, getattr(sre, "POSSESSIVE_REPEAT", None)):
+            if _refers_back(av[2]):
+                return True
+        elif op is sre.BRANCH:
+            if any(_refers_back(branch) for branch in av[1]):
+                return True
+        elif op in (sre.SUBPATTERN, sre.ASSERT, sre.ASSERT_NOT):
+            if _refers_back(av[-1]):
+                return True
+        elif op is _ATOMIC_GROUP:
+            if _refers_back(av):
+                return True
+    return False
+
+
+class Automaton:
+    """Aho-Corasick matcher: every key occurring in a text, in one pass."""
+
+    def __init__(self, keys: Sequence[str]):
+        self._goto = [{}]
+        self._outputs = [()]
+        for number, key in enumerate(keys):
+            state = 0
+            for char in key:
+                following = self._goto[state].get(char)
+                if following is None:
+                    following = len(self._goto)
+                    self._goto[state][char] = following
+                    self._goto.append({})
+                    self._outputs.append(())
+                state = following
+            self._outputs[state] += (number,)
+
+        self._fail = [0] * len(self._goto)
+        queue = deque(self._goto[0].values())
+        while queue:
+            state = queue.popleft()
+            for char, following in self._goto[state].items():
+                queue.append(following)
+                fallback = self._fail[state]
+                while fallback and char not in self._goto[fallback]:
+                    fallback = self._fail[fallback]
+                self._fail[following] = self._goto[fallback].get(char, 0)
+                self._outputs[following] += self._outputs[self._fail[following]]
+
+    def find(self, text: str) -> set:
+        """Numbers of the keys that occur in text."""
+        goto, fail, outputs = self._goto, self._fail, self._outputs
+        found = set()
+        state = 0
+        for char in text:
+            while state and char not in goto[state]:
+                state = fail[state]
+            state = goto[state].get(char, 0)
+            if outputs[state]:
+                found.update(outputs[state])
+        return found
+
+
+class Categorizer:
+    def __init__(self, rules: Iterable[Rule]):
+        self.rules = sorted(rules, key=Rule.precedence)
+        by_merchant = defaultdict(list)
+        for index, rule in enumerate(self.rules):
+            if rule.merchant:
+                by_merchant[rule.merchant.lower()].append(index)
+        self._merchants = list(by_merchant.values())
+        self._automaton = Automaton(list(by_merchant))
+        # Rules not found through the automaton, tried for every row
+        self._others = [index for index, rule in enumerate(self.rules) if not rule.merchant]
+        # Rules saved before backtracks() was checked may still hold such
+        # a pattern; they never match rather than stall the write
+        self._patterns = {
+            index: re.compile(rule.pattern, re.IGNORECASE) if not backtracks(rule.pattern) else None
+            for index, rule in enumerate(self.rules) if rule.pattern
+        }
+        # One alternation of the patterns that can share one screens each
+        # description, so a description none of them matches costs a
+        # single search instead of one per rule
+        self._prefiltered = frozenset(
+            index for index, compiled in self._patterns.items()
+            if compiled is not None and _combinable(compiled.pattern)
+        )
+        self._prefilter = re.compile(
+            "|".join(f"(?:{self._patterns[index].pattern})" for index in sorted(self._prefiltered)), re.IGNORECASE
+        ) if self._prefiltered else None
+
+    def __len__(self) -> int:
+        return len(self.rules)
+
+    def _candidates(self, text: str) -> list:
+        """Indexes of the rules whose merchant occurs in text, plus all other rules, in order."""
+        found = self._automaton.find(text.lower()) if self._merchants else ()
+        return sorted([index for number in found for index in self._merchants[number]] + self._others)
+
+    def classify(self, description: Optional[str], amount: float) -> Optional[Rule]:
+        return self.classify_many([(description, amount)])[0]
+
+    def classify_many(self, rows: Sequence[tuple]) -> list:
+        """The winning Rule (or None) for each (description, amount) pair."""
+        if not self.rules:
+            return [None] * len(rows)
+        candidates = {}  # description -> candidate rule indexes
+        pattern_hits = {}  # (description, rule index) -> regex matched
+        screened = {}  # description -> prefilter matched
+        results = []
+        for description, amount in rows:
+            text = description or ""
+            if text not in candidates:
+                candidates[text] = self._candidates(text)
+            winner = None
+            for index in candidates[text]:
+                rule = self.rules[index]
+                if not rule.amount_matches(amount):
+                    continue
+                if rule.pattern:
+                    key = (text, index)
+                    if key not in pattern_hits:
+                        compiled = self._patterns[index]
+                        if index in self._prefiltered:
+                            if text not in screened:
+                                screened[text] = self._prefilter.search(text) is not None
+                            if not screened[text]:
+                                compiled = None
+                        pattern_hits[key] = compiled is not None and compiled.search(text) is not None
+                    if not pattern_hits[key]:
+                        continue
+                winner = rule
+                break
+            results.append(winner)
+        return results
+
+
+_compiled = LRUCache(256)
+
+
+def load(db: Session, user_id: int) -> Categorizer:
+    """The Categorizer for a user's rules plus the global ones."""
+    rules = tuple(
+        Rule(*row) for row in db.query(
+            CategoryRule.id, CategoryRule.user_id, CategoryRule.category, CategoryRule.merchant,
+            CategoryRule.pattern, CategoryRule.min_amount, CategoryRule.max_amount, CategoryRule.priority,
+        )
+        .filter(or_(CategoryRule.user_id == user_id, CategoryRule.user_id.is_(None)))
+        .order_by(CategoryRule.id)
+    )
+    categorizer = _compiled.get(rules)
+    if categorizer is None:
+        categorizer = Categorizer(rules)
+        _compiled.set(rules, categorizer)
+    return categorizer
+
+
+def fill(db: Session, user_id: int, rows: list) -> None:
+    """Set category and category_rule_id on row dicts that have no category."""
+    for row in rows:
+        row.setdefault("category_rule_id", None)
+    pending = [row for row in rows if not row.get("category")]
+    if not pending:
+        return
+    categorizer = load(db, user_id)
+    if not len(categorizer):
+        return
+    for row, rule in zip(pending, categorizer.classify_many([(row["description"], row["amount"]) for row in pending])):
+        if rule is not None:
+            row["category"] = rule.category
+            row["category_rule_id"] = rule.id
+
+
+def candidates(db: Session, user_id: int, *columns):
+    """Query of columns over the user's rows that recategorize may change."""
+    return db.query(*columns).filter(
+        Transaction.user_id == user_id,
+        or_(Transaction.category.is_(None), Transaction.category_rule_id.isnot(None)),
+    )
+
+
+def recategorize(db: Session, user_id: int, chunk_size: int = RECATEGORIZE_CHUNK) -> dict:
+    """Re-apply the current rules to a user's uncategorized and rule-set rows.
+
+    Categories the client chose are left alone. Works through the history
+    in id order, committing each chunk with its rollup changes, so the
+    write lock is never held for the whole history.
+    """
+    categorizer = load(db, user_id)
+    scanned = updated = 0
+    last_id = 0
+    while True:
+        chunk_scanned, chunk_updated, last_id = recategorize_chunk(db, user_id, categorizer, last_id, chunk_size)
+        if last_id is None:
+            break
+        scanned += chunk_scanned
+        updated += chunk_updated
+        db.commit()
+    return {"scanned": scanned, "updated": updated}
+
+
+def recategorize_chunk(db: Session, user_id: int, categorizer: Categorizer, after_id: int,
+                       chunk_size: int = RECATEGORIZE_CHUNK) -> tuple[int, int, Optional[int]]:
+    """Re-apply categorizer to the next chunk of rows past after_id, without committing.
+
+    Returns how many rows were scanned and updated and the last id
+    scanned, which is None once no rows are left. Each UPDATE only
+    touches rows whose category is still the one classified, so a
+    concurrent edit is never overwritten.
+    """
+    rows = (
+        candidates(db, user_id, Transaction.id, Transaction.description, Transaction.amount,
+                   Transaction.category, Transaction.category_rule_id)
+        .filter(Transaction.id > after_id)
+        .order_by(Transaction.id)
+        .limit(chunk_size)
+        .all()
+    )
+    if not rows:
+        return 0, 0, None
+
+    changes = defaultdict(list)  # (old category, old rule, new category, new rule) -> ids
+    for row, rule in zip(rows, categorizer.classify_many([(row.description, row.amount) for row in rows])):
+        new = (rule.category, rule.id) if rule is not None else (None, None)
+        if new != (row.category, row.category_rule_id):
+            changes[(row.category, row.category_rule_id) + new].append(row.id)
+
+    deltas = rollups.new_deltas()
+    spend = budgets.new_deltas()
+    keys = set()  # merchants whose recurring series show a changed category
+    updated = 0
+    for (old_category, old_rule_id, category, rule_id), ids in changes.items():
+        changed = db.execute(
+            update(Transaction)
+            .where(
+                Transaction.id.in_(ids),
+                Transaction.category.is_not_distinct_from(old_category),
+                Transaction.category_rule_id.is_not_distinct_from(old_rule_id),
+            )
+            .values(category=category, category_rule_id=rule_id)
+            .returning(Transaction.account_id, Transaction.date, Transaction.type, Transaction.amount,
+                       Transaction.merchant_key)
+            .execution_options(synchronize_session=False)
+        ).all()
+        for account_id, when, transaction_type, amount, key in changed:
+            keys.add(key)
+            rollups.track(deltas, user_id, account_id, when, old_category, transaction_type, amount, sign=-1)
+            rollups.track(deltas, user_id, account_id, when, category, transaction_type, amount)
+            budgets.track(spend, user_id, when, old_category, transaction_type, amount, sign=-1)
+            budgets.track(spend, user_id, when, category, transaction_type, amount)
+        updated += len(changed)
+    rollups.apply_deltas(db, deltas)
+    budgets.apply_deltas(db, spend)
+    recurring.refresh(db, user_id, keys)
+    if changes:
+        versions.bump(db, user_id)
+    return len(rows), updated, rows[-1].id
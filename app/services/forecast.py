@@ -0,0 +1,164 @@
+"""Day-by-day balance forecasts for all of a user's accounts.
+
+Each account starts at its current balance and moves by two kinds of
+flows, as rows of one (accounts x days) array:
+
+- every expected occurrence of its recurring series (see recurring.py),
+  on the day it is due;
+- a steady daily drift: the account's income minus expenses per day over
+  the last HISTORY_MONTHS full months of monthly rollups, per category,
+  less what the recurring series already account for in that window.
+
+A cumulative sum along the days axis turns the flows into balances.
+Forecasts are cached keyed on the user's data version (see versions.py),
+so any committed write to their accounts or transactions retires them.
+"""
+import math
+from datetime import date, timedelta
+from sqlalchemy import func
+from sqlalchemy.orm import Session
+from app.cache import LRUCache
+from app.config import settings
+from app.models import Account, MonthlyRollup, RecurringSeries
+from app.services import versions
+from app.services.recurring import PERIODS, next_date
+from app.services.rollups import UNCATEGORIZED
+
+HISTORY_MONTHS = 3
+SIGNS = {"income": 1.0, "expense": -1.0}
+PERIOD_DAYS = {period.name: period.days for period in PERIODS}
+PERIOD_TOLERANCE = {period.name: period.tolerance for period in PERIODS}
+SERIES_COLUMNS = (
+    RecurringSeries.account_id,
+    RecurringSeries.category,
+    RecurringSeries.type,
+    RecurringSeries.period,
+    RecurringSeries.occurrences,
+    RecurringSeries.amount,
+    RecurringSeries.average_amount,
+    RecurringSeries.last_date,
+    RecurringSeries.next_date,
+)
+
+_cache = LRUCache(settings.forecast_cache_size)
+
+
+def forecast(db: Session, user_id: int, as_of: date, days: int) -> dict:
+    """Cached build() result for the days after as_of."""
+    # Forecasts of older versions are never asked for again and age out of
+    # the LRU. A write committed while building bumps the version, so a
+    # result read before it is stored under a key nobody asks for again.
+    key = (user_id, versions.current(db, user_id), as_of, days)
+    cached = _cache.get(key)
+    if cached is not None:
+        return cached
+    result = build(db, user_id, as_of, days)
+    _cache.set(key, result)
+    return result
+
+
+def _month_start(day: date, months_back: int = 0) -> date:
+    month = day.year * 12 + day.month - 1 - months_back
+    return date(month // 12, month % 12 + 1, 1)
+
+
+def _occurrences_between(series, start: date, end: date) -> int:
+    """About how many of the series' observed occurrences, one period apart
+    back from last_date, fall in [start, end)."""
+    step = PERIOD_DAYS[series.period]
+    newest = max(0, math.floor((series.last_date - end).days / step) + 1)
+    oldest = min(series.occurrences - 1, math.floor((series.last_date - start).days / step))
+    return max(0, oldest - newest + 1)
+
+
+def _upcoming(series, start: date, end: date) -> list:
+    """Expected due dates in [start, end); a series overdue by more than its
+    period's tolerance has lapsed and yields none."""
+    due = series.next_date
+    if (start - due).days > PERIOD_TOLERANCE[series.period]:
+        return []
+    due = max(due, start)
+    dates = []
+    while due < end:
+        dates.append(due)
+        due = next_date(series.period, due)
+    return dates
+
+
+def build(db: Session, user_id: int, as_of: date, days: int) -> dict:
+    """Projected end-of-day balances for the days after as_of."""
+    import numpy as np
+
+    accounts = (
+        db.query(Account.id, Account.name, Account.balance)
+        .filter(Account.user_id == user_id)
+        .order_by(Account.id)
+        .all()
+    )
+    start = as_of + timedelta(days=1)
+    end = start + timedelta(days=days)
+    result = {"as_of": as_of, "start": start, "days": days, "accounts": []}
+    if not accounts:
+        return result
+    row_of = {account.id: row for row, account in enumerate(accounts)}
+    series = db.query(*SERIES_COLUMNS).filter(RecurringSeries.user_id == user_id).all()
+
+    # Net flow per account, category and type over the history window
+    window_start, window_end = _month_start(as_of, HISTORY_MONTHS), _month_start(as_of)
+    history = (
+        db.query(MonthlyRollup.account_id, MonthlyRollup.category, MonthlyRollup.type,
+                 func.sum(MonthlyRollup.total), func.min(MonthlyRollup.month))
+        # Naming the accounts lets the rollups key index seek each
+        # account's months instead of scanning the user's whole history
+        .filter(MonthlyRollup.user_id == user_id, MonthlyRollup.account_id.in_(list(row_of)),
+                MonthlyRollup.month >= window_start, MonthlyRollup.month < window_end)
+        .group_by(MonthlyRollup.account_id, MonthlyRollup.category, MonthlyRollup.type)
+        .all()
+    )
+    totals = {}
+    first_month = window_end
+    for account_id, category, kind, total, month in history:
+        if account_id in row_of and kind in SIGNS:
+            totals[(account_id, category, kind)] = total
+            first_month = min(first_month, date.fromisoformat(month) if isinstance(month, str) else month)
+    # Recurring flows are forecast on their own days; take them out of the
+    # drift so they are not counted twice
+    for found in series:
+        key = (found.account_id, found.category or UNCATEGORIZED, found.type)
+        if key in totals:
+            totals[key] -= found.average_amount * _occurrences_between(found, window_start, window_end)
+
+    drift = np.zeros(len(accounts))
+    if totals:
+        keys = list(totals)
+        rows = np.fromiter((row_of[account_id] for account_id, _, _ in keys), dtype=np.int64, count=len(keys))
+        signs = np.fromiter((SIGNS[kind] for _, _, kind in keys), dtype=np.float64, count=len(keys))
+        # A category the recurring series more than cover contributes nothing
+        amounts = np.maximum(np.fromiter(totals.values(), dtype=np.float64, count=len(keys)), 0.0)
+        np.add.at(drift, rows, signs * amounts / (window_end - first_month).days)
+
+    flows = np.repeat(drift[:, None], days, axis=1)
+    due = [
+        (row_of[found.account_id], (when - start).days, SIGNS[found.type] * found.amount)
+        for found in series
+        if found.account_id in row_of and found.type in SIGNS
+        for when in _upcoming(found, start, end)
+    ]
+    if due:
+        rows, columns, amounts = (np.asarray(column) for column in zip(*due))
+        np.add.at(flows, (rows, columns), amounts)
+
+    opening = np.fromiter((account.balance for account in accounts), dtype=np.float64, count=len(accounts))
+    balances = np.round(opening[:, None] + np.cumsum(flows, axis=1), 2)
+    lowest = balances.argmin(axis=1)
+    for row, account in enumerate(accounts):
+        result["accounts"].append({
+            "account_id": account.id,
+            "name": account.name,
+            "balance": account.balance,
+            "daily_drift": round(float(drift[row]), 2),
+            "lowest_balance": float(balances[row, lowest[row]]),
+            "lowest_date": start + timedelta(days=int(lowest[row])),
+            "balances": balances[row].tolist(),
+        })
+    return result
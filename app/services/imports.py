@@ -0,0 +1,118 @@
+"""Validation and insertion of transactions in bulk.
+
+Shared by POST /transactions/bulk, which commits each request's rows at
+once, and import jobs (app/jobs.py), which commit them chunk by chunk
+together with their checkpoint.
+"""
+from collections import defaultdict
+from datetime import datetime
+from pydantic import ValidationError
+from sqlalchemy import insert
+from sqlalchemy.orm import Session
+from app.models import Account, Transaction
+from app.schemas import TransactionCreate
+from app.services import budgets, categorize, recurring, rollups, versions
+from app.services.ledger import adjust_balance, balance_delta
+
+
+def validate_rows(rows: list, start: int = 0):
+    """Validate every row in one pass, keeping the index for error reporting.
+
+    Indexes count from start, for callers validating a slice of a larger
+    batch. Needs no database, so it can run in another process.
+    """
+    errors = []
+    valid = []
+    for index, row in enumerate(rows, start):
+        try:
+            transaction = TransactionCreate.model_validate(row)
+            if transaction.amount <= 0:
+                raise ValueError("Transaction amount must be positive")
+            delta = balance_delta(transaction.type, transaction.amount)
+        except ValidationError as exc:
+            detail = "; ".join(
+                f"{'.'.join(str(part) for part in err['loc'])}: {err['msg']}" for err in exc.errors()
+            )
+            errors.append({"index": index, "detail": detail})
+            continue
+        except ValueError as exc:
+            errors.append({"index": index, "detail": str(exc)})
+            continue
+        valid.append((index, transaction, delta))
+    return valid, errors
+
+
+def insert_rows(db: Session, user_id: int, valid: list, errors: list) -> tuple[int, dict]:
+    """Insert the rows validate_rows accepted, without committing.
+
+    Rows for accounts the user does not own or with a Plaid id already
+    stored are added to errors instead. Returns the number inserted and the
+    new balance of each account they went to.
+    """
+    # One ownership query for every account referenced by the batch
+    account_ids = {transaction.account_id for _, transaction, _ in valid}
+    owned = set()
+    if account_ids:
+        owned = {
+            account_id for (account_id,) in db.query(Account.id)
+            .filter(Account.user_id == user_id, Account.id.in_(account_ids))
+        }
+
+    # Plaid ids are unique; reject repeats within the batch and against stored rows
+    plaid_ids = [t.plaid_transaction_id for _, t, _ in valid if t.plaid_transaction_id]
+    taken = set()
+    if plaid_ids:
+        taken = {
+            plaid_id for (plaid_id,) in db.query(Transaction.plaid_transaction_id)
+            .filter(Transaction.plaid_transaction_id.in_(plaid_ids))
+        }
+
+    now = datetime.utcnow()
+    values = []
+    deltas = defaultdict(float)
+    rollup_deltas = rollups.new_deltas()
+    spend = budgets.new_deltas()
+    for index, transaction, delta in valid:
+        if transaction.account_id not in owned:
+            errors.append({"index": index, "detail": "Account not found or not owned by user"})
+            continue
+        plaid_id = transaction.plaid_transaction_id
+        if plaid_id:
+            if plaid_id in taken:
+                errors.append({"index": index, "detail": "Duplicate plaid_transaction_id"})
+                continue
+            taken.add(plaid_id)
+        values.append({
+            "user_id": user_id,
+            "account_id": transaction.account_id,
+            "amount": transaction.amount,
+            "type": transaction.type,
+            "date": transaction.date or now,
+            "description": transaction.description,
+            "category": transaction.category,
+            "plaid_transaction_id": plaid_id,
+            "created_at": now,
+        })
+        deltas[transaction.account_id] += delta
+
+    # Categorize the uncategorized rows as one batch
+    categorize.fill(db, user_id, values)
+    for row in values:
+        rollups.track(rollup_deltas, user_id, row["account_id"], row["date"],
+                      row["category"], row["type"], row["amount"])
+        budgets.track(spend, user_id, row["date"], row["category"], row["type"], row["amount"])
+
+    balances = {}
+    if values:
+        # RETURNING makes SQLAlchemy send multi-row INSERTs ("insertmanyvalues")
+        # instead of one statement per row; on SQLite each statement also
+        # flushes the search index triggers. The merchant keys it returns
+        # pick the recurring series to re-detect. Then one balance update per account.
+        keys = db.execute(insert(Transaction).returning(Transaction.merchant_key), values).scalars().all()
+        for account_id, delta in deltas.items():
+            balances[account_id] = adjust_balance(db, account_id, delta)
+        rollups.apply_deltas(db, rollup_deltas)
+        budgets.apply_deltas(db, spend)
+        recurring.refresh(db, user_id, keys)
+        versions.bump(db, user_id)
+    return len(values), balances
@@ -0,0 +1,31 @@
+from sqlalchemy import update
+from sqlalchemy.orm import Session
+from app.models import Account
+
+
+def balance_delta(transaction_type: str, amount: float) -> float:
+    """Signed effect of a transaction on its account balance.
+
+    Raises ValueError for a type other than income or expense.
+    """
+    kind = transaction_type.lower()
+    if kind == "income":
+        return amount
+    if kind == "expense":
+        return -amount
+    raise ValueError("Invalid transaction type")
+
+
+def adjust_balance(db: Session, account_id: int, delta: float) -> float:
+    """Add delta to an account balance with one UPDATE in the current transaction.
+
+    The increment is evaluated by the database, so concurrent writers to the
+    same account cannot overwrite each other's change the way a Python
+    read-modify-write of Account.balance does. Returns the new balance.
+    """
+    return db.execute(
+        update(Account)
+        .where(Account.id == account_id)
+        .values(balance=Account.balance + delta)
+        .returning(Account.balance)
+    ).scalar_one()
@@ -0,0 +1,314 @@
+"""Incremental transaction sync against Plaid's /transactions/sync.
+
+Each PlaidItem stores the cursor returned by its last successful sync, so a
+sync only pulls the added/modified/removed deltas since then. Fetching is
+network-bound and runs for several items at once on a bounded thread pool;
+apply_changes() then writes one item's deltas in a single database
+transaction: one upsert keyed on plaid_transaction_id, one delete, one
+balance UPDATE per touched account and the matching rollup deltas.
+"""
+import json
+from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
+from datetime import date, datetime, time
+from typing import TYPE_CHECKING, Optional
+from sqlalchemy.orm import Session
+from app.config import settings
+from app.database import dialect_insert
+from app.models import Account, PlaidItem, Transaction
+from app.services import budgets, categorize, recurring, rollups, versions
+from app.services.ledger import adjust_balance, balance_delta
+
+# The Plaid SDK takes about half a second to import, so it is only loaded
+# when a client is built or a request is made, not when the app starts.
+if TYPE_CHECKING:
+    from plaid.api.plaid_api import PlaidApi
+
+MUTATION_DURING_PAGINATION = "TRANSACTIONS_SYNC_MUTATION_DURING_PAGINATION"
+MAX_PAGINATION_RESTARTS = 3
+SYNC_CONFLICT = "SYNC_CONFLICT"
+IN_CHUNK = 500  # plaid ids per IN (...) clause
+
+SYNCED_COLUMNS = (
+    "account_id", "amount", "type", "date", "description", "category", "category_rule_id", "merchant_key",
+)
+
+
+class PlaidSyncError(Exception):
+    def __init__(self, code: str, message: str = ""):
+        super().__init__(f"{code}: {message}" if message else code)
+        self.code = code
+
+
+@dataclass
+class ItemChanges:
+    added: list = field(default_factory=list)
+    modified: list = field(default_factory=list)
+    removed: list = field(default_factory=list)  # plaid transaction ids
+    cursor: Optional[str] = None  # the cursor the changes were fetched from
+    next_cursor: Optional[str] = None
+
+
+def make_client(config=settings) -> "PlaidApi":
+    import plaid
+    from plaid.api import plaid_api
+
+    configuration = plaid.Configuration(
+        host=config.plaid_host,
+        api_key={"clientId": config.plaid_client_id, "secret": config.plaid_secret},
+    )
+    return plaid_api.PlaidApi(plaid.ApiClient(configuration))
+
+
+def _call(endpoint, request) -> dict:
+    """Call a Plaid endpoint and return its JSON body.
+
+    Responses are decoded as plain dicts rather than the SDK's model objects,
+    which are slow to build and validate for thousands of transactions.
+    """
+    import plaid
+    import urllib3
+
+    try:
+        response = endpoint(request, _preload_content=False)
+    except plaid.ApiException as exc:
+        try:
+            body = json.loads(exc.body or "{}")
+        except ValueError:
+            body = {}
+        raise PlaidSyncError(
+            body.get("error_code") or f"HTTP_{exc.status}",
+            body.get("error_message") or exc.reason or "",
+        ) from exc
+    except urllib3.exceptions.HTTPError as exc:
+        raise PlaidSyncError("NETWORK_ERROR", str(exc)) from exc
+    return json.loads(response.data)
+
+
+def exchange_public_token(client: "PlaidApi", public_token: str) -> tuple[str, str]:
+    """Swap a Link public token for (item_id, access_token)."""
+    from plaid.model.item_public_token_exchange_request import ItemPublicTokenExchangeRequest
+
+    body = _call(client.item_public_token_exchange, ItemPublicTokenExchangeRequest(public_token=public_token))
+    return body["item_id"], body["access_token"]
+
+
+def fetch_changes(client: "PlaidApi", access_token: str, cursor: Optional[str], page_size: int) -> ItemChanges:
+    """Page through /transactions/sync from cursor until has_more is false.
+
+    If the item changes mid-pagination Plaid asks for the whole run to be
+    restarted from the original cursor; that is retried a few times.
+    """
+    from plaid.model.transactions_sync_request import TransactionsSyncRequest
+
+    restarts = 0
+    while True:
+        changes = ItemChanges(cursor=cursor)
+        page_cursor = cursor
+        try:
+            while True:
+                request = TransactionsSyncRequest(access_token=access_token, count=page_size)
+                if page_cursor:
+                    request.cursor = page_cursor
+                page = _call(client.transactions_sync, request)
+                changes.added.extend(page["added"])
+                changes.modified.extend(page["modified"])
+                changes.removed.extend(row["transaction_id"] for row in page["removed"])
+                page_cursor = page["next_cursor"]
+                if not page["has_more"]:
+                    changes.next_cursor = page_cursor
+                    return changes
+        except PlaidSyncError as exc:
+            if exc.code != MUTATION_DURING_PAGINATION or restarts >= MAX_PAGINATION_RESTARTS:
+                raise
+            restarts += 1
+
+
+def fetch_all(client: "PlaidApi", items, page_size: int, workers: int) -> dict:
+    """Fetch changes for (item_id, access_token, cursor) triples concurrently.
+
+    Returns item_id -> ItemChanges, or the PlaidSyncError that item failed
+    with, so one broken item does not stop the others.
+    """
+    with ThreadPoolExecutor(max_workers=max(1, workers)) as pool:
+        futures = {
+            item_id: pool.submit(fetch_changes, client, access_token, cursor, page_size)
+            for item_id, access_token, cursor in items
+        }
+    results = {}
+    for item_id, future in futures.items():
+        try:
+            results[item_id] = future.result()
+        except PlaidSyncError as exc:
+            results[item_id] = exc
+    return results
+
+
+def _category(txn: dict) -> Optional[str]:
+    personal = txn.get("personal_finance_category") or {}
+    if personal.get("primary"):
+        return personal["primary"]
+    legacy = txn.get("category") or []
+    return legacy[0] if legacy else None
+
+
+def _to_row(txn: dict, user_id: int, account_id: int) -> Optional[dict]:
+    amount = float(txn["amount"])
+    if amount == 0:
+        return None
+    return {
+        "user_id": user_id,
+        "account_id": account_id,
+        "plaid_transaction_id": txn["transaction_id"],
+        "amount": abs(amount),
+        # Plaid amounts are positive when money leaves the account
+        "type": "expense" if amount > 0 else "income",
+        "date": datetime.combine(date.fromisoformat(txn["date"]), time()),
+        "description": txn.get("merchant_name") or txn.get("name"),
+        "category": _category(txn),
+    }
+
+
+def _chunks(values: list, size: int = IN_CHUNK):
+    for start in range(0, len(values), size):
+        yield values[start:start + size]
+
+
+def apply_changes(db: Session, item: PlaidItem, changes: ItemChanges) -> dict:
+    """Write one item's changes and advance its cursor, committing once.
+
+    Returns the counts of a SyncResult plus "balances", the new balance
+    of every account the changes touched.
+
+    The cursor moves only if it still is the one the changes were fetched
+    from. Otherwise a concurrent sync of the item already applied them,
+    and this one writes nothing and reports the conflict.
+    Rows for Plaid accounts that are not linked to one of the user's
+    accounts via plaid_account_id are skipped and counted, as are rows
+    whose plaid_transaction_id another user's transaction already holds.
+    """
+    user_id = item.user_id
+    # Compare-and-set first: on Postgres the row lock holds a concurrent
+    # sync of the item back until this one commits, and it then matches
+    # nothing
+    advanced = (
+        db.query(PlaidItem)
+        .filter(PlaidItem.id == item.id, PlaidItem.cursor.is_not_distinct_from(changes.cursor))
+        .update({PlaidItem.cursor: changes.next_cursor, PlaidItem.last_synced_at: datetime.utcnow()},
+                synchronize_session=False)
+    )
+    if not advanced:
+        db.rollback()
+        return {"item_id": item.id, "error": f"{SYNC_CONFLICT}: item was synced concurrently"}
+
+    linked = dict(
+        db.query(Account.plaid_account_id, Account.id)
+        .filter(Account.user_id == user_id, Account.plaid_account_id.isnot(None))
+        .all()
+    )
+
+    rows = {}
+    kinds = {}
+    counts = {"item_id": item.id, "added": 0, "modified": 0, "removed": 0, "skipped": 0}
+    removed_ids = set(changes.removed)
+    for kind, batch in (("added", changes.added), ("modified", changes.modified)):
+        for txn in batch:
+            account_id = linked.get(txn["account_id"])
+            row = _to_row(txn, user_id, account_id) if account_id is not None else None
+            if row is None or row["plaid_transaction_id"] in removed_ids:
+                counts["skipped"] += 1
+                continue
+            rows[row["plaid_transaction_id"]] = row
+            kinds[row["plaid_transaction_id"]] = kind
+
+    # Stored versions of every touched row, to reverse their old effect
+    touched = list(rows.keys() | removed_ids)
+    existing = []
+    for chunk in _chunks(touched):
+        existing.extend(
+            db.query(Transaction.account_id, Transaction.amount, Transaction.type, Transaction.date,
+                     Transaction.category, Transaction.merchant_key)
+            .filter(Transaction.user_id == user_id, Transaction.plaid_transaction_id.in_(chunk))
+            .all()
+        )
+
+    # Rows Plaid sent without a category go through the user's rules
+    categorize.fill(db, user_id, list(rows.values()))
+
+    # Merchants whose recurring series change: old and new versions of every row
+    keys = {old.merchant_key for old in existing}
+    if rows:
+        stmt = dialect_insert(db, Transaction)
+        stmt = stmt.on_conflict_do_update(
+            index_elements=["plaid_transaction_id"],
+            set_={column: stmt.excluded[column] for column in SYNCED_COLUMNS},
+            # Never rewrite another user's row that happens to share the id
+            where=Transaction.user_id == stmt.excluded.user_id,
+        )
+        now = datetime.utcnow()
+        # RETURNING lets SQLAlchemy batch the rows into multi-row statements;
+        # SQLite's search index triggers flush once per statement
+        written = db.execute(
+            stmt.returning(Transaction.plaid_transaction_id, Transaction.merchant_key),
+            [{**row, "created_at": now} for row in rows.values()],
+        ).all()
+        keys.update(merchant_key for _, merchant_key in written)
+        # Ids held by another user's row were left alone, and so are their deltas
+        for plaid_id in rows.keys() - {plaid_id for plaid_id, _ in written}:
+            del rows[plaid_id]
+            counts["skipped"] += 1
+    for plaid_id in rows:
+        counts[kinds[plaid_id]] += 1
+
+    balances = defaultdict(float)
+    deltas = rollups.new_deltas()
+    spend = budgets.new_deltas()
+    for old in existing:
+        balances[old.account_id] -= balance_delta(old.type, old.amount)
+        rollups.track(deltas, user_id, old.account_id, old.date, old.category, old.type, old.amount, sign=-1)
+        budgets.track(spend, user_id, old.date, old.category, old.type, old.amount, sign=-1)
+    for row in rows.values():
+        balances[row["account_id"]] += balance_delta(row["type"], row["amount"])
+        rollups.track(deltas, user_id, row["account_id"], row["date"], row["category"], row["type"], row["amount"])
+        budgets.track(spend, user_id, row["date"], row["category"], row["type"], row["amount"])
+
+    if removed_ids:
+        ids = list(removed_ids)
+        for chunk in _chunks(ids):
+            counts["removed"] += (
+                db.query(Transaction)
+                .filter(Transaction.user_id == user_id, Transaction.plaid_transaction_id.in_(chunk))
+                .delete(synchronize_session=False)
+            )
+
+    # New balances of the touched accounts, for the caller's events
+    counts["balances"] = {account_id: adjust_balance(db, account_id, delta) for account_id, delta in balances.items()}
+    rollups.apply_deltas(db, deltas)
+    budgets.apply_deltas(db, spend)
+    recurring.refresh(db, user_id, keys)
+
+    versions.bump(db, user_id)
+    db.commit()
+    return counts
+
+
+def sync_items(db: Session, client: "PlaidApi", user_id: Optional[int] = None) -> list[dict]:
+    """Fetch and apply changes for every item (or one user's items)."""
+    query = db.query(PlaidItem).order_by(PlaidItem.id)
+    if user_id is not None:
+        query = query.filter(PlaidItem.user_id == user_id)
+    items = query.all()
+    fetched = fetch_all(
+        client,
+        [(item.id, item.access_token, item.cursor) for item in items],
+        settings.plaid_sync_page_size,
+        settings.plaid_sync_workers,
+    )
+    return [apply_outcome(db, item, fetched[item.id]) for item in items]
+
+
+def apply_outcome(db: Session, item: PlaidItem, outcome) -> dict:
+    if isinstance(outcome, PlaidSyncError):
+        return {"item_id": item.id, "error": str(outcome)}
+    return apply_changes(db, item, outcome)
@@ -0,0 +1,250 @@
+"""Recurring transactions: subscriptions, bills and paychecks.
+
+A user's transactions are grouped by merchant_key (the normalized
+description, see app/models.py) and type. detect() takes the rows of any
+number of groups as NumPy columns sorted by group and day. In one
+vectorized pass per period (weekly, biweekly, monthly, annual) it finds,
+for every group at once, the run of occurrences ending at the group's
+latest row whose gaps fit the period and whose consecutive amounts stay
+within tolerance. Groups with a long enough run become rows of the
+recurring table.
+
+Write paths call refresh() with the merchant keys they touched, in the
+same commit, so only those groups' rows are read again. rebuild()
+re-detects whole histories and fills in missing merchant keys, for
+backfills:
+
+    python -m app.services.recurring [--user-id N]
+
+NumPy takes a few hundred milliseconds to import, so it is only loaded
+when detection first runs.
+"""
+import argparse
+import calendar
+import sys
+from dataclasses import dataclass
+from datetime import date, timedelta
+from typing import Iterable, Optional
+from sqlalchemy import bindparam, func
+from sqlalchemy.orm import Session
+from app.models import RecurringSeries, Transaction, merchant_key
+
+IN_CHUNK = 500
+BACKFILL_BATCH = 5000
+
+# Consecutive amounts match when within AMOUNT_TOLERANCE of the larger
+# one, or within AMOUNT_SLACK for small amounts
+AMOUNT_TOLERANCE = 0.15
+AMOUNT_SLACK = 1.0
+
+
+@dataclass(frozen=True)
+class Period:
+    name: str
+    days: float
+    tolerance: float  # allowed deviation of a gap, in days
+    min_occurrences: int
+
+
+# A group with runs for several periods gets the longest run, the shorter
+# period on a tie
+PERIODS = (
+    Period("weekly", 7, 1, 4),
+    Period("biweekly", 14, 1, 3),
+    Period("monthly", 30.44, 3, 3),
+    Period("annual", 365.25, 6, 2),
+)
+
+# What detect() and refresh() read per transaction
+COLUMNS = (
+    Transaction.merchant_key,
+    Transaction.type,
+    Transaction.date,
+    Transaction.amount,
+    Transaction.description,
+    Transaction.category,
+    Transaction.account_id,
+)
+
+
+def next_date(period: str, last: date) -> date:
+    if period == "weekly":
+        return last + timedelta(days=7)
+    if period == "biweekly":
+        return last + timedelta(days=14)
+    if period == "monthly":
+        year, month = (last.year + 1, 1) if last.month == 12 else (last.year, last.month + 1)
+        return last.replace(year=year, month=month, day=min(last.day, calendar.monthrange(year, month)[1]))
+    year = last.year + 1
+    return last.replace(year=year, day=min(last.day, calendar.monthrange(year, last.month)[1]))
+
+
+def detect(rows: list) -> list:
+    """Recurring series among rows selected with COLUMNS, as recurring row dicts."""
+    import numpy as np
+
+    rows = [row for row in rows if row[0] and row[2] is not None]
+    if len(rows) < 2:
+        return []
+
+    # Columnar form: group number, day number and amount per row, sorted by
+    # group then day. Columns are filled one at a time; transposing the
+    # rows first costs more than the detection itself.
+    numbers = {}
+    group = np.fromiter(
+        (numbers.setdefault((row[0], row[1].lower()), len(numbers)) for row in rows), dtype=np.int64, count=len(rows),
+    )
+    groups = list(numbers)
+    day = np.fromiter((row[2].toordinal() for row in rows), dtype=np.int64, count=len(rows))
+    amount = np.fromiter((row[3] for row in rows), dtype=np.float64, count=len(rows))
+    order = np.lexsort((day, group))
+    group, day, amount = group[order], day[order], amount[order]
+
+    # Pair i joins row i and row i + 1
+    same_group = group[1:] == group[:-1]
+    gap = np.diff(day)
+    steady = np.abs(np.diff(amount)) <= np.maximum(AMOUNT_SLACK, AMOUNT_TOLERANCE * np.maximum(amount[1:], amount[:-1]))
+    pair = np.arange(len(gap))
+
+    last = np.flatnonzero(np.r_[~same_group, True])  # each group's latest row
+    end_pair = last - 1  # the pair ending there; -1 for a group starting at row 0
+    has_pair = end_pair >= 0
+    runs = np.ones((len(PERIODS), len(last)), dtype=np.int64)
+    for index, period in enumerate(PERIODS):
+        fits = same_group & steady & (np.abs(gap - period.days) <= period.tolerance)
+        # Latest pair at or before each pair that breaks the series
+        last_break = np.maximum.accumulate(np.where(fits, -1, pair))
+        runs[index, has_pair] += end_pair[has_pair] - last_break[end_pair[has_pair]]
+
+    minimums = np.array([period.min_occurrences for period in PERIODS])[:, None]
+    scores = np.where(runs >= minimums, runs, 0)
+    best = scores.argmax(axis=0)
+    totals = np.r_[0.0, np.cumsum(amount)]
+
+    series = []
+    for found in np.flatnonzero(scores.max(axis=0)):
+        period = PERIODS[best[found]]
+        occurrences = int(runs[best[found], found])
+        end = int(last[found])
+        start = end - occurrences + 1
+        latest = rows[int(order[end])]
+        merchant, kind = groups[found]
+        last_date = date.fromordinal(int(day[end]))
+        series.append({
+            "merchant_key": merchant,
+            "type": kind,
+            "period": period.name,
+            "occurrences": occurrences,
+            "amount": float(amount[end]),
+            "average_amount": round(float(totals[end + 1] - totals[start]) / occurrences, 2),
+            "first_date": date.fromordinal(int(day[start])),
+            "last_date": last_date,
+            "next_date": next_date(period.name, last_date),
+            "description": latest[4],
+            "category": latest[5],
+            "account_id": latest[6],
+        })
+    return series
+
+
+def _chunks(values: list, size: int = IN_CHUNK):
+    for start in range(0, len(values), size):
+        yield values[start:start + size]
+
+
+def _replace(db: Session, user_id: int, series: list, keys: Optional[list] = None) -> None:
+    """Swap the user's stored series (or those for keys) for series."""
+    if keys is None:
+        db.query(RecurringSeries).filter(RecurringSeries.user_id == user_id).delete(synchronize_session=False)
+    else:
+        for chunk in _chunks(keys):
+            db.query(RecurringSeries).filter(
+                RecurringSeries.user_id == user_id, RecurringSeries.merchant_key.in_(chunk),
+            ).delete(synchronize_session=False)
+    if series:
+        db.execute(RecurringSeries.__table__.insert(), [{**row, "user_id": user_id} for row in series])
+
+
+def refresh(db: Session, user_id: int, keys: Iterable[Optional[str]]) -> None:
+    """Re-detect the user's series for these merchant keys; the caller commits.
+
+    Pending changes must be flushed first so the re-read sees them.
+    """
+    keys = sorted({key for key in keys if key})
+    if not keys:
+        return
+    rows = []
+    for chunk in _chunks(keys):
+        rows.extend(
+            db.query(*COLUMNS)
+            .filter(Transaction.user_id == user_id, Transaction.merchant_key.in_(chunk))
+            .all()
+        )
+    _replace(db, user_id, detect(rows), keys)
+
+
+def backfill_merchant_keys(db: Session) -> int:
+    """Fill merchant_key on rows written before it existed, in id order."""
+    statement = (
+        Transaction.__table__.update()
+        .where(Transaction.id == bindparam("row_id"))
+        .values(merchant_key=bindparam("key"))
+    )
+    filled = 0
+    last_id = 0
+    while True:
+        rows = (
+            db.query(Transaction.id, Transaction.description)
+            .filter(Transaction.id > last_id, Transaction.merchant_key.is_(None), Transaction.description.isnot(None))
+            .order_by(Transaction.id)
+            .limit(BACKFILL_BATCH)
+            .all()
+        )
+        if not rows:
+            return filled
+        last_id = rows[-1].id
+        updates = [{"row_id": row.id, "key": merchant_key(row.description)} for row in rows]
+        updates = [update for update in updates if update["key"]]
+        if updates:
+            db.execute(statement, updates)
+            filled += len(updates)
+        db.commit()
+
+
+def rebuild(db: Session, user_id: Optional[int] = None) -> int:
+    """Re-detect every series of one user, or of all users; returns how many were found."""
+    backfill_merchant_keys(db)
+    if user_id is not None:
+        user_ids = [user_id]
+    else:
+        # Users with stored series but no rows left still need theirs cleared
+        user_ids = sorted(
+            {uid for (uid,) in db.query(Transaction.user_id).distinct()}
+            | {uid for (uid,) in db.query(RecurringSeries.user_id).distinct()}
+        )
+    found = 0
+    for uid in user_ids:
+        rows = db.query(*COLUMNS).filter(Transaction.user_id == uid, Transaction.merchant_key.isnot(None)).all()
+        series = detect(rows)
+        _replace(db, uid, series)
+        db.commit()
+        found += len(series)
+    return found
+
+
+def main(argv=None) -> int:
+    from app.database import SessionLocal
+
+    parser = argparse.ArgumentParser(description="Re-detect recurring transaction series.")
+    parser.add_argument("--user-id", type=int)
+    args = parser.parse_args(argv)
+
+    with SessionLocal() as db:
+        found = rebuild(db, args.user_id)
+        users = db.query(func.count(func.distinct(RecurringSeries.user_id))).scalar()
+    print(f"{found} recurring series across {users} users")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,162 @@
+"""Monthly per-category rollups of transaction totals.
+
+Write paths collect signed deltas with track() and flush them with
+apply_deltas() before their commit, so the rollups change in the same
+database transaction as the rows they summarize. rebuild() and verify()
+recompute everything from the transactions table; run them with
+
+    python -m app.services.rollups [--check] [--user-id N]
+"""
+import argparse
+import sys
+from collections import defaultdict
+from datetime import date, datetime
+from typing import Optional
+from sqlalchemy import func
+from sqlalchemy.orm import Session
+from app.database import dialect_insert
+from app.models import MonthlyRollup, Transaction
+
+UNCATEGORIZED = ""
+KEY_COLUMNS = ("user_id", "account_id", "month", "category", "type")
+
+
+def new_deltas() -> defaultdict:
+    """Map of rollup key -> [total delta, count delta]."""
+    return defaultdict(lambda: [0.0, 0])
+
+
+def rollup_key(user_id: int, account_id: int, when: datetime, category: Optional[str], transaction_type: str) -> tuple:
+    return (user_id, account_id, date(when.year, when.month, 1), category or UNCATEGORIZED, transaction_type.lower())
+
+
+def track(deltas, user_id, account_id, when, category, transaction_type, amount, sign=1) -> None:
+    """Add (sign=1) or remove (sign=-1) one transaction's contribution."""
+    if when is None:
+        return  # undated legacy rows are not rolled up
+    entry = deltas[rollup_key(user_id, account_id, when, category, transaction_type)]
+    entry[0] += sign * amount
+    entry[1] += sign
+
+
+def apply_deltas(db: Session, deltas) -> None:
+    """Upsert the accumulated deltas in one executemany statement."""
+    rows = [
+        {**dict(zip(KEY_COLUMNS, key)), "total": total, "count": count}
+        for key, (total, count) in deltas.items()
+        if total or count
+    ]
+    if not rows:
+        return
+
+    stmt = dialect_insert(db, MonthlyRollup)
+    stmt = stmt.on_conflict_do_update(
+        index_elements=list(KEY_COLUMNS),
+        set_={
+            "total": MonthlyRollup.total + stmt.excluded.total,
+            "count": MonthlyRollup.count + stmt.excluded.count,
+        },
+    )
+    db.execute(stmt, rows)
+
+
+def _month_start(db: Session, column):
+    if db.get_bind().dialect.name == "postgresql":
+        return func.date_trunc("month", column)
+    return func.strftime("%Y-%m-01", column)
+
+
+def compute(db: Session, user_id: Optional[int] = None) -> dict:
+    """Rollups recomputed from the live transaction rows."""
+    month = _month_start(db, Transaction.date)
+    query = (
+        db.query(
+            Transaction.user_id,
+            Transaction.account_id,
+            month,
+            func.coalesce(Transaction.category, UNCATEGORIZED),
+            func.lower(Transaction.type),
+            func.sum(Transaction.amount),
+            func.count(Transaction.id),
+        )
+        .filter(Transaction.date.isnot(None))
+        .group_by(Transaction.user_id, Transaction.account_id, month,
+                  func.coalesce(Transaction.category, UNCATEGORIZED), func.lower(Transaction.type))
+    )
+    if user_id is not None:
+        query = query.filter(Transaction.user_id == user_id)
+
+    computed = {}
+    for uid, account_id, month_value, category, kind, total, count in query:
+        if isinstance(month_value, str):
+            month_value = date.fromisoformat(month_value)
+        elif isinstance(month_value, datetime):
+            month_value = month_value.date()
+        computed[(uid, account_id, month_value, category, kind)] = (total, count)
+    return computed
+
+
+def stored(db: Session, user_id: Optional[int] = None) -> dict:
+    query = db.query(MonthlyRollup).filter(MonthlyRollup.count != 0)
+    if user_id is not None:
+        query = query.filter(MonthlyRollup.user_id == user_id)
+    return {
+        tuple(getattr(row, column) for column in KEY_COLUMNS): (row.total, row.count)
+        for row in query
+    }
+
+
+def verify(db: Session, user_id: Optional[int] = None, tolerance: float = 1e-6) -> list:
+    """Keys whose stored rollup disagrees with the live rows, with both values."""
+    expected = compute(db, user_id)
+    actual = stored(db, user_id)
+    mismatches = []
+    for key in sorted(expected.keys() | actual.keys(), key=str):
+        want = expected.get(key, (0.0, 0))
+        have = actual.get(key, (0.0, 0))
+        if want[1] != have[1] or abs(want[0] - have[0]) > tolerance:
+            mismatches.append({"key": key, "expected": want, "stored": have})
+    return mismatches
+
+
+def rebuild(db: Session, user_id: Optional[int] = None) -> int:
+    """Replace the stored rollups with ones recomputed from scratch."""
+    count = recompute(db, user_id)
+    db.commit()
+    return count
+
+
+def recompute(db: Session, user_id: Optional[int] = None) -> int:
+    """rebuild() within the current transaction, leaving the commit to the caller."""
+    query = db.query(MonthlyRollup)
+    if user_id is not None:
+        query = query.filter(MonthlyRollup.user_id == user_id)
+    query.delete(synchronize_session=False)
+
+    deltas = new_deltas()
+    for key, (total, count) in compute(db, user_id).items():
+        deltas[key] = [total, count]
+    apply_deltas(db, deltas)
+    return len(deltas)
+
+
+def main(argv=None) -> int:
+    from app.database import SessionLocal
+
+    parser = argparse.ArgumentParser(description="Rebuild or check the monthly rollups.")
+    parser.add_argument("--check", action="store_true", help="only report drift, do not rebuild")
+    parser.add_argument("--user-id", type=int)
+    args = parser.parse_args(argv)
+
+    with SessionLocal() as db:
+        if not args.check:
+            print(f"rebuilt {rebuild(db, args.user_id)} rollup rows")
+        mismatches = verify(db, args.user_id)
+    for mismatch in mismatches:
+        print(f"drift {mismatch['key']}: expected {mismatch['expected']}, stored {mismatch['stored']}")
+    print("rollups match live rows" if not mismatches else f"{len(mismatches)} rollup rows drifted")
+    return 1 if mismatches else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
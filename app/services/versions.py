@@ -0,0 +1,26 @@
+"""Per-user data version.
+
+users.data_version counts the commits that changed a user's accounts or
+transactions. Write paths call bump() just before their commit, so the
+new version becomes visible together with the rows. Readers compare it
+with the version their copy was built from: app.conditional turns it into
+ETags, and app.services.forecast keys its cache on it. Being a column
+rather than process state, it stays correct across worker processes.
+"""
+from sqlalchemy.orm import Session
+from app.models import User
+
+
+def bump(db: Session, user_id: int) -> None:
+    """Advance the user's version in the current transaction.
+
+    On Postgres this locks the user's row until commit, so call it last,
+    right before committing.
+    """
+    db.query(User).filter(User.id == user_id).update(
+        {User.data_version: User.data_version + 1}, synchronize_session=False
+    )
+
+
+def current(db: Session, user_id: int) -> int:
+    return db.query(User.data_version).filter(User.id == user_id).scalar() or 0
@@ -0,0 +1,263 @@
+"""End-to-end latency, throughput and memory for the main API operations.
+
+Generates a seeded dataset (see benchmarks.datagen), starts uvicorn on it
+and sends a fixed number of requests per scenario at each concurrency
+level, using the generated users:
+
+    python -m benchmarks.bench_api --transactions 100000 --concurrency 1 10 50 \\
+        --output results.json --baseline benchmarks/baselines/sqlite-10k.json
+
+Scenarios run in order (signup, login, list_accounts, list_transactions,
+create, update, delete); delete removes rows made by create, so neither
+skews the data the reads see. Per scenario and level the JSON holds
+p50/p95/p99 latency in ms, requests per second, failures and the server's
+peak RSS. With --baseline the run is compared via benchmarks.compare and
+the exit status is 1 on a regression.
+
+Pass --database-url to run against Postgres; its tables are dropped and
+recreated.
+"""
+import argparse
+import asyncio
+import itertools
+import json
+import os
+import platform
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from collections import defaultdict, deque
+from datetime import timedelta
+
+import httpx
+from sqlalchemy import create_engine, text
+from sqlalchemy.engine import make_url
+
+from app.auth_utils import create_access_token
+from benchmarks import compare
+from benchmarks.common import free_port, percentiles, start_server
+from benchmarks.datagen import PASSWORD, generate
+
+SCENARIOS = [
+    "signup",
+    "login",
+    "list_accounts",
+    "list_transactions",
+    "create_transaction",
+    "update_transaction",
+    "delete_transaction",
+]
+
+
+class MemorySampler:
+    """Peak resident set size of a process, polled from /proc (Linux only)."""
+
+    def __init__(self, pid: int, interval: float = 0.05):
+        self.pid = pid
+        self.interval = interval
+        self.peak_kb = None
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, daemon=True)
+
+    def _rss_kb(self):
+        try:
+            with open(f"/proc/{self.pid}/status") as f:
+                for line in f:
+                    if line.startswith("VmRSS:"):
+                        return int(line.split()[1])
+        except OSError:
+            return None
+
+    def _run(self):
+        while not self._stop.is_set():
+            rss = self._rss_kb()
+            if rss is not None:
+                self.peak_kb = max(self.peak_kb or 0, rss)
+            self._stop.wait(self.interval)
+
+    def __enter__(self):
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc):
+        self._stop.set()
+        self._thread.join()
+
+    @property
+    def peak_mb(self):
+        return None if self.peak_kb is None else round(self.peak_kb / 1024, 1)
+
+
+class Workload:
+    """The generated users plus the row ids the write scenarios work on."""
+
+    def __init__(self, url: str, users: int, run_id: str):
+        self.run_id = run_id
+        self.users = list(range(users))
+        self.headers = {}
+        self.accounts = {}
+        self.existing = {}
+        self.created = defaultdict(deque)
+        self._signups = itertools.count()
+
+        engine = create_engine(url)
+        with engine.connect() as conn:
+            user_ids = [row[0] for row in conn.execute(text("SELECT id FROM users ORDER BY id"))]
+            for user, user_id in zip(self.users, user_ids):
+                token = create_access_token({"sub": str(user_id)}, timedelta(hours=6))
+                self.headers[user] = {"Authorization": f"Bearer {token}"}
+                self.accounts[user] = [row[0] for row in conn.execute(
+                    text("SELECT id FROM accounts WHERE user_id = :u ORDER BY id"), {"u": user_id})]
+                self.existing[user] = itertools.cycle([row[0] for row in conn.execute(
+                    text("SELECT id FROM transactions WHERE user_id = :u ORDER BY id LIMIT 200"), {"u": user_id})])
+        engine.dispose()
+
+    async def request(self, client: httpx.AsyncClient, scenario: str, user: int, i: int):
+        headers = self.headers[user]
+        if scenario == "signup":
+            email = f"signup-{self.run_id}-{next(self._signups)}@bench.example"
+            return await client.post("/auth/signup", json={"email": email, "password": PASSWORD})
+        if scenario == "login":
+            return await client.post("/auth/login", data={"username": f"user{user}@bench.example", "password": PASSWORD})
+        if scenario == "list_accounts":
+            return await client.get("/accounts/", headers=headers)
+        if scenario == "list_transactions":
+            return await client.get("/transactions/", params={"limit": 50}, headers=headers)
+
+        payload = {
+            "account_id": self.accounts[user][i % len(self.accounts[user])],
+            "amount": round(5 + (i % 200) * 0.37, 2),
+            "type": "expense",
+            "category": "Groceries",
+            "description": "Benchmark",
+        }
+        if scenario == "create_transaction":
+            response = await client.post("/transactions/", json=payload, headers=headers)
+            if response.status_code == 200:
+                self.created[user].append(response.json()["id"])
+            return response
+        if scenario == "update_transaction":
+            return await client.put(f"/transactions/{next(self.existing[user])}", json=payload, headers=headers)
+        if scenario == "delete_transaction":
+            if not self.created[user]:
+                return None
+            return await client.delete(f"/transactions/{self.created[user].popleft()}", headers=headers)
+        raise ValueError(scenario)
+
+
+async def drive(base_url: str, workload: Workload, scenario: str, concurrency: int, requests: int) -> dict:
+    samples = []
+    failed = 0
+    skipped = 0
+    issued = itertools.count()
+    limits = httpx.Limits(max_connections=concurrency, max_keepalive_connections=concurrency)
+
+    async with httpx.AsyncClient(base_url=base_url, limits=limits, timeout=120) as client:
+        async def worker(n: int):
+            nonlocal failed, skipped
+            user = workload.users[n % len(workload.users)]
+            while (i := next(issued)) < requests:
+                started = time.perf_counter()
+                try:
+                    response = await workload.request(client, scenario, user, i)
+                except httpx.HTTPError:
+                    failed += 1
+                    continue
+                if response is None:
+                    skipped += 1
+                elif response.status_code < 400:
+                    samples.append(time.perf_counter() - started)
+                else:
+                    failed += 1
+
+        started = time.monotonic()
+        await asyncio.gather(*(worker(n) for n in range(concurrency)))
+        elapsed = time.monotonic() - started
+
+    return {
+        **percentiles(samples),
+        "rps": round(len(samples) / elapsed, 1) if elapsed else None,
+        "completed": len(samples),
+        "failed": failed,
+        "skipped": skipped,
+    }
+
+
+def git_commit():
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--transactions", type=int, default=10_000, help="rows generated before the run")
+    parser.add_argument("--users", type=int, help="defaults to one user per 2,000 transactions")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--concurrency", type=int, nargs="+", default=[1, 10, 50])
+    parser.add_argument("--requests", type=int, default=500, help="requests per scenario and concurrency level")
+    parser.add_argument("--scenarios", nargs="+", choices=SCENARIOS, default=SCENARIOS)
+    parser.add_argument("--bcrypt-rounds", type=int, default=4, help="server and generated hash cost")
+    parser.add_argument("--async-db", action="store_true", help="serve with ASYNC_DB=1")
+    parser.add_argument("--database-url", help="defaults to a temporary SQLite file")
+    parser.add_argument("--output", help="write the results to this JSON file")
+    parser.add_argument("--baseline", help="compare against this results file")
+    parser.add_argument("--threshold", type=float, default=compare.DEFAULT_THRESHOLD)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        url = args.database_url or f"sqlite:///{tmp}/bench.db"
+        dataset = generate(url, args.transactions, args.users, args.seed, bcrypt_rounds=args.bcrypt_rounds)
+        print(f"generated {dataset.users} users, {dataset.accounts} accounts, "
+              f"{dataset.transactions} transactions in {dataset.seconds}s")
+        workload = Workload(url, dataset.users, run_id=str(os.getpid()))
+
+        port = free_port()
+        server = start_server(url, port, async_db=int(args.async_db), bcrypt_rounds=args.bcrypt_rounds)
+        results = {}
+        try:
+            for scenario in args.scenarios:
+                for concurrency in args.concurrency:
+                    with MemorySampler(server.pid) as memory:
+                        result = asyncio.run(drive(f"http://127.0.0.1:{port}", workload, scenario, concurrency, args.requests))
+                    result["peak_rss_mb"] = memory.peak_mb
+                    results.setdefault(scenario, {})[str(concurrency)] = result
+                    print(f"{scenario:>20} {concurrency:>4} clients  p50 {result['p50']:>8} ms  "
+                          f"p95 {result['p95']:>8} ms  p99 {result['p99']:>8} ms  {result['rps']:>8} req/s  "
+                          f"rss {result['peak_rss_mb']} MB  ({result['failed']} failed)")
+        finally:
+            server.terminate()
+            server.wait()
+
+    report = {
+        "meta": {
+            "database": make_url(url).get_backend_name(),
+            "async_db": args.async_db,
+            "transactions": dataset.transactions,
+            "users": dataset.users,
+            "seed": args.seed,
+            "requests": args.requests,
+            "bcrypt_rounds": args.bcrypt_rounds,
+            "python": platform.python_version(),
+            "cpus": os.cpu_count(),
+            "commit": git_commit(),
+        },
+        "results": results,
+    }
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(report, f, indent=2)
+
+    if args.baseline:
+        with open(args.baseline) as f:
+            baseline = json.load(f)
+        regressions = compare.compare(baseline, report, args.threshold)
+        compare.print_report(regressions)
+        sys.exit(1 if regressions else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,87 @@
+"""Requests per second for the sync and async database paths.
+
+Starts uvicorn once per mode against a fresh SQLite file, seeds one user
+with a few accounts and transactions, then drives GET /transactions/ and
+GET /accounts/ from each concurrency level in turn:
+
+    python -m benchmarks.bench_async --duration 10 --concurrency 10 100 1000
+
+Pass --database-url to benchmark against Postgres instead; the schema is
+created (and left behind) in that database.
+"""
+import argparse
+import asyncio
+import json
+import tempfile
+import time
+
+import httpx
+
+from benchmarks.common import free_port, seed, start_server
+
+ENDPOINTS = ["/transactions/?limit=50", "/accounts/"]
+
+
+async def drive(base_url: str, token: str, concurrency: int, duration: float) -> dict:
+    completed = 0
+    failed = 0
+    limits = httpx.Limits(max_connections=concurrency, max_keepalive_connections=concurrency)
+    headers = {"Authorization": f"Bearer {token}"}
+
+    async with httpx.AsyncClient(base_url=base_url, headers=headers, limits=limits, timeout=60) as client:
+        deadline = time.monotonic() + duration
+
+        async def worker(n: int):
+            nonlocal completed, failed
+            i = n
+            while time.monotonic() < deadline:
+                try:
+                    response = await client.get(ENDPOINTS[i % len(ENDPOINTS)])
+                    if response.status_code == 200:
+                        completed += 1
+                    else:
+                        failed += 1
+                except httpx.HTTPError:
+                    failed += 1
+                i += 1
+
+        started = time.monotonic()
+        await asyncio.gather(*(worker(n) for n in range(concurrency)))
+        elapsed = time.monotonic() - started
+
+    return {"rps": round(completed / elapsed, 1), "completed": completed, "failed": failed}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--duration", type=float, default=10.0, help="seconds per concurrency level")
+    parser.add_argument("--concurrency", type=int, nargs="+", default=[10, 100, 1000])
+    parser.add_argument("--transactions", type=int, default=5000, help="rows seeded for the user")
+    parser.add_argument("--database-url", help="defaults to a temporary SQLite file")
+    parser.add_argument("--output", help="also write the results to this JSON file")
+    args = parser.parse_args()
+
+    results = {}
+    with tempfile.TemporaryDirectory() as tmp:
+        url = args.database_url or f"sqlite:///{tmp}/bench.db"
+        for mode, async_db in (("sync", False), ("async", True)):
+            token = seed(url, args.transactions)
+            port = free_port()
+            server = start_server(url, port, async_db=async_db)
+            try:
+                for concurrency in args.concurrency:
+                    result = asyncio.run(drive(f"http://127.0.0.1:{port}", token, concurrency, args.duration))
+                    results.setdefault(mode, {})[concurrency] = result
+                    print(f"{mode:>5}  {concurrency:>5} clients  {result['rps']:>9} req/s  "
+                          f"({result['failed']} failed)")
+            finally:
+                server.terminate()
+                server.wait()
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(results, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
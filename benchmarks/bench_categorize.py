@@ -0,0 +1,108 @@
+"""Per-row cost of categorizing a bulk batch against a growing rule set.
+
+Builds merchant rules for datagen's merchants plus filler merchants (and a
+few regex and amount-range rules), then classifies Plaid-style descriptions
+("POS 4821 STARBUCKS #17") two ways:
+
+  categorizer   app.services.categorize.Categorizer.classify_many: one
+                automaton pass per distinct description
+  rule_by_rule  every rule tested against every row in precedence order
+
+    python -m benchmarks.bench_categorize --rows 10000 --rules 50 200 1000
+
+Both must agree on every row; the run stops if they do not.
+"""
+import argparse
+import json
+import random
+import re
+import statistics
+import time
+
+from app.services.categorize import Categorizer, Rule
+from benchmarks.datagen import SPENDING, SUBSCRIPTIONS
+
+MERCHANTS = [(merchant, category) for category, (*_, merchants) in SPENDING.items() for merchant in merchants]
+MERCHANTS += [(name, "Subscriptions") for name, _ in SUBSCRIPTIONS]
+
+
+def make_rules(count: int, rng: random.Random) -> list:
+    rules = [Rule(1, None, "Transfers", pattern=r"\b(?:zelle|venmo)\b"), Rule(2, 1, "Large", min_amount=1000)]
+    for merchant, category in MERCHANTS:
+        rules.append(Rule(len(rules) + 1, rng.choice([None, 1]), category, merchant=merchant.lower()))
+    while len(rules) < count:
+        filler = "".join(rng.choice("abcdefghijklmnopqrstuvwxyz") for _ in range(rng.randint(4, 10)))
+        rules.append(Rule(len(rules) + 1, rng.choice([None, 1]), "Other", merchant=filler, priority=rng.randint(0, 2)))
+    return rules
+
+
+def make_rows(count: int, rng: random.Random) -> list:
+    rows = []
+    for _ in range(count):
+        merchant, _ = rng.choice(MERCHANTS)
+        description = f"POS {rng.randint(1000, 9999)} {merchant.upper()} #{rng.randint(1, 99)}"
+        rows.append((description, round(rng.lognormvariate(3.5, 1.0), 2)))
+    return rows
+
+
+def rule_by_rule(rules: list, rows: list) -> list:
+    ordered = sorted(rules, key=Rule.precedence)
+    compiled = {rule.id: re.compile(rule.pattern, re.IGNORECASE) for rule in ordered if rule.pattern}
+    results = []
+    for description, amount in rows:
+        lowered = description.lower()
+        winner = None
+        for rule in ordered:
+            if not rule.amount_matches(amount):
+                continue
+            if rule.merchant and rule.merchant.lower() not in lowered:
+                continue
+            if rule.pattern and not compiled[rule.id].search(description):
+                continue
+            winner = rule
+            break
+        results.append(winner)
+    return results
+
+
+def timed(function, repeat: int, rows: int):
+    samples = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        result = function()
+        samples.append((time.perf_counter() - started) * 1e6 / rows)
+    return round(statistics.median(samples), 2), result
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--rows", type=int, default=10_000)
+    parser.add_argument("--rules", type=int, nargs="+", default=[50, 200, 1000])
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--output", help="also write the results to this JSON file")
+    args = parser.parse_args()
+
+    rng = random.Random(args.seed)
+    rows = make_rows(args.rows, rng)
+    results = {}
+    for count in args.rules:
+        rules = make_rules(count, rng)
+        compile_started = time.perf_counter()
+        categorizer = Categorizer(rules)
+        compile_ms = round((time.perf_counter() - compile_started) * 1000, 2)
+        fast_us, fast = timed(lambda: categorizer.classify_many(rows), args.repeat, args.rows)
+        slow_us, slow = timed(lambda: rule_by_rule(rules, rows), args.repeat, args.rows)
+        if fast != slow:
+            raise SystemExit(f"categorizer and rule_by_rule disagree with {count} rules")
+        results[count] = {"compile_ms": compile_ms, "categorizer_us_per_row": fast_us, "rule_by_rule_us_per_row": slow_us}
+        print(f"{count:>6} rules  compile {compile_ms:>7} ms  categorizer {fast_us:>7} us/row  "
+              f"rule_by_rule {slow_us:>8} us/row")
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump({"rows": args.rows, "results": results}, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
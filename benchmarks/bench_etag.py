@@ -0,0 +1,81 @@
+"""Cost of a conditional GET answered 304 versus the full response.
+
+Seeds one user (see benchmarks.common.seed), starts uvicorn and, for each
+list endpoint, sends --requests sequential requests two ways:
+
+  full          no If-None-Match: queries run and the body is encoded
+  not_modified  If-None-Match with the current ETag: one version lookup,
+                empty 304
+
+    python -m benchmarks.bench_etag --transactions 10000 --requests 500
+
+Pass --database-url to run against Postgres; its tables are dropped and
+recreated.
+"""
+import argparse
+import json
+import tempfile
+import time
+from pathlib import Path
+
+import httpx
+
+from benchmarks.common import free_port, percentiles, seed, start_server
+
+ENDPOINTS = {
+    "list_accounts": ("/accounts/", {"include": "transactions"}),
+    "list_transactions": ("/transactions/", {"limit": 100}),
+}
+
+
+def measure(client: httpx.Client, path: str, params: dict, headers: dict, requests: int, status: int) -> dict:
+    samples = []
+    size = 0
+    for _ in range(requests):
+        started = time.perf_counter()
+        response = client.get(path, params=params, headers=headers)
+        samples.append(time.perf_counter() - started)
+        if response.status_code != status:
+            raise SystemExit(f"{path} answered {response.status_code}, expected {status}")
+        size = len(response.content)
+    return {**percentiles(samples), "bytes": size}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--database-url", help="defaults to a temporary SQLite file")
+    parser.add_argument("--transactions", type=int, default=10_000)
+    parser.add_argument("--requests", type=int, default=500)
+    parser.add_argument("--output", help="also write the results to this JSON file")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as directory:
+        url = args.database_url or f"sqlite:///{Path(directory) / 'etag.db'}"
+        token = seed(url, args.transactions)
+        port = free_port()
+        server = start_server(url, port, password_hash_workers=0, read_cache_backend="none")
+        results = {}
+        try:
+            with httpx.Client(base_url=f"http://127.0.0.1:{port}", timeout=30) as client:
+                auth = {"Authorization": f"Bearer {token}"}
+                for name, (path, params) in ENDPOINTS.items():
+                    tag = client.get(path, params=params, headers=auth).headers["etag"]
+                    results[name] = {
+                        "full": measure(client, path, params, auth, args.requests, 200),
+                        "not_modified": measure(client, path, params, {**auth, "If-None-Match": tag},
+                                                args.requests, 304),
+                    }
+                    full, cached = results[name]["full"], results[name]["not_modified"]
+                    print(f"{name:<18} full p50 {full['p50']:>7} ms  p95 {full['p95']:>7} ms  {full['bytes']:>7} B   "
+                          f"304 p50 {cached['p50']:>7} ms  p95 {cached['p95']:>7} ms")
+        finally:
+            server.terminate()
+            server.wait()
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump({"transactions": args.transactions, "results": results}, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
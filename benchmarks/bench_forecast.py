@@ -0,0 +1,103 @@
+"""Latency of GET /accounts/forecast's computation for one user with many accounts.
+
+Builds a SQLite database holding a single user whose accounts come in
+checking + card pairs, each pair with its own datagen history (salary,
+rent, subscriptions and card spending), then times per account count:
+
+  cold    app.services.forecast.build: three queries and the array math
+  cached  app.services.forecast.forecast on a warm cache
+
+    python -m benchmarks.bench_forecast --accounts 2 12 48 --days 90
+"""
+import argparse
+import json
+import random
+import statistics
+import tempfile
+import time
+from datetime import timedelta
+from pathlib import Path
+
+from sqlalchemy import case, create_engine, func, insert, select, update
+from sqlalchemy.orm import sessionmaker
+
+from app.models import Account, Transaction, User
+from app.services import forecast, recurring, rollups
+from benchmarks.datagen import END, migrate, user_rows
+
+
+def build_user(url: str, accounts: int, rows_per_pair: int, history_days: int, seed: int) -> int:
+    rng = random.Random(seed)
+    migrate(url, True)
+    engine = create_engine(url)
+    with sessionmaker(bind=engine)() as db:
+        user_id = db.execute(insert(User).values(email="many@bench.example", hashed_password="x").returning(User.id)).scalar_one()
+        for pair in range(0, accounts, 2):
+            ids = [
+                db.execute(
+                    insert(Account)
+                    .values(user_id=user_id, name=f"{kind} {pair // 2}", account_type=kind.lower(), balance=0.0)
+                    .returning(Account.id)
+                ).scalar_one()
+                for kind in ("Checking", "Credit")[:accounts - pair]
+            ]
+            # A distinct merchant suffix per pair keeps each pair's salary,
+            # rent and subscriptions their own recurring series
+            suffix = chr(ord("a") + pair // 52) + chr(ord("a") + pair // 2 % 26)
+            db.execute(insert(Transaction).returning(Transaction.id), [
+                {**row, "description": f"{row['description']} {suffix}"}
+                for row in user_rows(rng, user_id, ids, rows_per_pair, history_days)
+            ])
+        signed = case((Transaction.type == "income", Transaction.amount), else_=-Transaction.amount)
+        db.execute(update(Account).values(
+            balance=select(func.coalesce(func.sum(signed), 0.0)).where(Transaction.account_id == Account.id).scalar_subquery()
+        ))
+        db.commit()
+        rollups.rebuild(db)
+        recurring.rebuild(db)
+    engine.dispose()
+    return user_id
+
+
+def timed(function, repeat: int) -> float:
+    samples = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        function()
+        samples.append((time.perf_counter() - started) * 1000)
+    return round(statistics.median(samples), 3)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--accounts", type=int, nargs="+", default=[2, 12, 48])
+    parser.add_argument("--rows-per-pair", type=int, default=3000)
+    parser.add_argument("--history-days", type=int, default=1095)
+    parser.add_argument("--days", type=int, default=90, help="forecast horizon")
+    parser.add_argument("--repeat", type=int, default=50)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--output", help="also write the results to this JSON file")
+    args = parser.parse_args()
+
+    as_of = END.date() - timedelta(days=1)
+    results = {}
+    with tempfile.TemporaryDirectory() as directory:
+        for count in args.accounts:
+            url = f"sqlite:///{Path(directory) / f'forecast_{count}.db'}"
+            user_id = build_user(url, count, args.rows_per_pair, args.history_days, args.seed)
+            engine = create_engine(url)
+            with sessionmaker(bind=engine)() as db:
+                forecast.build(db, user_id, as_of, args.days)  # NumPy import and statement caches
+                cold_ms = timed(lambda: forecast.build(db, user_id, as_of, args.days), args.repeat)
+                cached_ms = timed(lambda: forecast.forecast(db, user_id, as_of, args.days), args.repeat)
+            engine.dispose()
+            results[count] = {"cold_ms": cold_ms, "cached_ms": cached_ms}
+            print(f"{count:>4} accounts  cold {cold_ms:>7} ms  cached {cached_ms:>7} ms")
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump({"days": args.days, "results": results}, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,105 @@
+"""Transaction-endpoint latency while a burst of logins is being hashed.
+
+Runs the server twice: once hashing on the request threadpool
+(PASSWORD_HASH_WORKERS=0, how signup/login used to behave) and once on
+the bounded process pool. For each it samples GET /transactions/ latency
+while idle and again during a login storm:
+
+    python -m benchmarks.bench_login_storm --duration 10 --logins 50
+
+Logins that are shed with 503 while the hashing queue is full are
+counted separately; they are the intended back-pressure, not errors.
+"""
+import argparse
+import asyncio
+import json
+import tempfile
+import time
+
+import httpx
+
+from app.security import hash_password
+from benchmarks.common import free_port, percentiles, seed, start_server
+
+
+async def sample_reads(client: httpx.AsyncClient, readers: int, deadline: float) -> list[float]:
+    samples = []
+
+    async def reader():
+        while time.monotonic() < deadline:
+            started = time.perf_counter()
+            response = await client.get("/transactions/?limit=50")
+            if response.status_code == 200:
+                samples.append(time.perf_counter() - started)
+
+    await asyncio.gather(*(reader() for _ in range(readers)))
+    return samples
+
+
+async def storm(client: httpx.AsyncClient, logins: int, deadline: float) -> dict:
+    counts = {"ok": 0, "shed": 0, "failed": 0}
+    form = {"username": "bench@example.com", "password": "bench-password"}
+
+    async def login():
+        while time.monotonic() < deadline:
+            response = await client.post("/auth/login", data=form)
+            if response.status_code == 200:
+                counts["ok"] += 1
+            elif response.status_code == 503:
+                counts["shed"] += 1
+                await asyncio.sleep(float(response.headers.get("Retry-After", 1)))
+            else:
+                counts["failed"] += 1
+
+    await asyncio.gather(*(login() for _ in range(logins)))
+    return counts
+
+
+async def run_phases(base_url: str, token: str, args) -> dict:
+    headers = {"Authorization": f"Bearer {token}"}
+    limits = httpx.Limits(max_connections=args.readers + args.logins)
+    async with httpx.AsyncClient(base_url=base_url, headers=headers, limits=limits, timeout=120) as client:
+        idle = await sample_reads(client, args.readers, time.monotonic() + args.duration)
+        deadline = time.monotonic() + args.duration
+        busy, logins = await asyncio.gather(
+            sample_reads(client, args.readers, deadline),
+            storm(client, args.logins, deadline),
+        )
+    return {"idle": percentiles(idle), "storm": percentiles(busy), "logins": logins}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--duration", type=float, default=10.0, help="seconds per phase")
+    parser.add_argument("--readers", type=int, default=10, help="concurrent transaction readers")
+    parser.add_argument("--logins", type=int, default=50, help="concurrent login clients")
+    parser.add_argument("--transactions", type=int, default=5000)
+    parser.add_argument("--output", help="also write the results to this JSON file")
+    args = parser.parse_args()
+
+    hashed = hash_password("bench-password")
+    results = {}
+    with tempfile.TemporaryDirectory() as tmp:
+        url = f"sqlite:///{tmp}/bench.db"
+        for mode, workers in (("threadpool", 0), ("process-pool", None)):
+            token = seed(url, args.transactions, hashed_password=hashed)
+            port = free_port()
+            env = {} if workers is None else {"password_hash_workers": workers}
+            server = start_server(url, port, **env)
+            try:
+                result = asyncio.run(run_phases(f"http://127.0.0.1:{port}", token, args))
+            finally:
+                server.terminate()
+                server.wait()
+            results[mode] = result
+            print(f"{mode:>12}  idle p50/p99 {result['idle']['p50']}/{result['idle']['p99']} ms  "
+                  f"storm p50/p99 {result['storm']['p50']}/{result['storm']['p99']} ms  "
+                  f"logins {result['logins']}")
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(results, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,89 @@
+"""Read endpoint latency with the read-through cache off and on.
+
+Seeds one user (see benchmarks.common.seed) and, for each cache backend,
+starts uvicorn and sends --requests sequential requests to every read
+endpoint. With a backend, the first request fills the entry and the rest
+are hits: no queries and no encoding. The server's hit ratio is read from
+/metrics at the end of each run.
+
+    python -m benchmarks.bench_readcache --transactions 10000 --requests 500
+    python -m benchmarks.bench_readcache --redis-url redis://localhost:6379/0
+
+Pass --database-url to run against Postgres; its tables are dropped and
+recreated.
+"""
+import argparse
+import json
+import re
+import tempfile
+import time
+from pathlib import Path
+
+import httpx
+
+from benchmarks.common import free_port, percentiles, seed, start_server
+
+ENDPOINTS = {
+    "list_accounts": ("/accounts/", {"include": "transactions"}),
+    "list_transactions": ("/transactions/", {"limit": 100}),
+    "account_transactions": ("/transactions/", {"limit": 100, "account_id": 1}),
+    "get_transaction": ("/transactions/1", {}),
+}
+
+
+def measure(client: httpx.Client, path: str, params: dict, headers: dict, requests: int) -> dict:
+    samples = []
+    for _ in range(requests):
+        started = time.perf_counter()
+        response = client.get(path, params=params, headers=headers)
+        samples.append(time.perf_counter() - started)
+        if response.status_code != 200:
+            raise SystemExit(f"{path} answered {response.status_code}")
+    return percentiles(samples)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--database-url", help="defaults to a temporary SQLite file")
+    parser.add_argument("--redis-url", help="also run with the redis backend against this server")
+    parser.add_argument("--transactions", type=int, default=10_000)
+    parser.add_argument("--requests", type=int, default=500)
+    parser.add_argument("--output", help="also write the results to this JSON file")
+    args = parser.parse_args()
+
+    backends = ["none", "memory"] + (["redis"] if args.redis_url else [])
+    results = {}
+    with tempfile.TemporaryDirectory() as directory:
+        url = args.database_url or f"sqlite:///{Path(directory) / 'readcache.db'}"
+        token = seed(url, args.transactions)
+        auth = {"Authorization": f"Bearer {token}"}
+        for backend in backends:
+            port = free_port()
+            env = {"read_cache_backend": backend}
+            if args.redis_url:
+                env["read_cache_url"] = args.redis_url
+            server = start_server(url, port, password_hash_workers=0, **env)
+            results[backend] = {}
+            try:
+                with httpx.Client(base_url=f"http://127.0.0.1:{port}", timeout=30) as client:
+                    for name, (path, params) in ENDPOINTS.items():
+                        results[backend][name] = measure(client, path, params, auth, args.requests)
+                    ratio = re.search(r"^read_cache_hit_ratio (\S+)$", client.get("/metrics").text, re.MULTILINE)
+                    results[backend]["hit_ratio"] = float(ratio.group(1)) if ratio else None
+            finally:
+                server.terminate()
+                server.wait()
+
+    for name in ENDPOINTS:
+        print(f"{name:<22}" + "".join(
+            f"  {backend} p50 {results[backend][name]['p50']:>7} ms p95 {results[backend][name]['p95']:>7} ms"
+            for backend in backends
+        ))
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump({"transactions": args.transactions, "results": results}, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
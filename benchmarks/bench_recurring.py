@@ -0,0 +1,118 @@
+"""Cost of detecting recurring series over whole user histories.
+
+Generates datagen histories (salary, rent and subscriptions among
+card spending) and runs detection per user two ways:
+
+  vectorized  app.services.recurring.detect: NumPy columns, one pass per
+              period over all merchants at once
+  per_group   a dict of merchants, each history sorted and walked back
+              from its latest row in Python
+
+    python -m benchmarks.bench_recurring --users 20 --rows 500 5000
+
+Both must find the same series; the run stops if they do not. per_group
+is the tuned row-wise baseline: it stops at each history's first break.
+Turning the fetched rows into columns is most of detect()'s cost; the
+interval and amount analysis itself stays flat per merchant.
+"""
+import argparse
+import json
+import random
+import statistics
+import time
+from collections import defaultdict
+
+from app.models import merchant_key
+from app.services import recurring
+from benchmarks.datagen import user_rows
+
+
+def make_histories(users: int, rows: int, seed: int) -> list:
+    rng = random.Random(seed)
+    histories = []
+    for user_id in range(1, users + 1):
+        histories.append([
+            (merchant_key(row["description"]), row["type"], row["date"], row["amount"],
+             row["description"], row["category"], row["account_id"])
+            for row in user_rows(rng, user_id, [1, 2], rows, 730)
+        ])
+    return histories
+
+
+def steady(a: float, b: float) -> bool:
+    return abs(a - b) <= max(recurring.AMOUNT_SLACK, recurring.AMOUNT_TOLERANCE * max(a, b))
+
+
+def per_group(rows: list) -> list:
+    groups = defaultdict(list)
+    for row in rows:
+        if row[0] and row[2] is not None:
+            groups[(row[0], row[1].lower())].append(row)
+    series = []
+    for (merchant, kind), history in groups.items():
+        history.sort(key=lambda row: row[2].toordinal())
+        best = None
+        for period in recurring.PERIODS:
+            run = 1
+            for later, earlier in zip(history[::-1], history[-2::-1]):
+                gap = later[2].toordinal() - earlier[2].toordinal()
+                if abs(gap - period.days) > period.tolerance or not steady(later[3], earlier[3]):
+                    break
+                run += 1
+            if run >= period.min_occurrences and (best is None or run > best[1]):
+                best = (period, run)
+        if best:
+            period, run = best
+            latest = history[-1]
+            last_date = latest[2].date()
+            series.append({
+                "merchant_key": merchant, "type": kind, "period": period.name, "occurrences": run,
+                "amount": latest[3], "first_date": history[-run][2].date(), "last_date": last_date,
+                "next_date": recurring.next_date(period.name, last_date),
+            })
+    return series
+
+
+def summary(series: list) -> list:
+    keys = ("merchant_key", "type", "period", "occurrences", "amount", "first_date", "last_date", "next_date")
+    return sorted(tuple(found[key] for key in keys) for found in series)
+
+
+def timed(function, histories: list, repeat: int):
+    samples = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        result = [function(rows) for rows in histories]
+        samples.append((time.perf_counter() - started) * 1000 / len(histories))
+    return round(statistics.median(samples), 3), result
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--users", type=int, default=20)
+    parser.add_argument("--rows", type=int, nargs="+", default=[500, 5000], help="transactions per user")
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--output", help="also write the results to this JSON file")
+    args = parser.parse_args()
+
+    recurring.detect([])  # pay for the NumPy import outside the timings
+    results = {}
+    for rows in args.rows:
+        histories = make_histories(args.users, rows, args.seed)
+        fast_ms, fast = timed(recurring.detect, histories, args.repeat)
+        slow_ms, slow = timed(per_group, histories, args.repeat)
+        if [summary(found) for found in fast] != [summary(found) for found in slow]:
+            raise SystemExit(f"vectorized and per_group disagree with {rows} rows per user")
+        found = sum(len(series) for series in fast) / args.users
+        results[rows] = {"vectorized_ms_per_user": fast_ms, "per_group_ms_per_user": slow_ms, "series_per_user": found}
+        print(f"{rows:>6} rows/user  vectorized {fast_ms:>8} ms/user  per_group {slow_ms:>8} ms/user  "
+              f"{found:.1f} series/user")
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump({"users": args.users, "results": results}, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,89 @@
+"""Latency of GET /transactions/search's query at datagen scale.
+
+Runs search_transactions() in-process (SQL, row fetch and dict building,
+no HTTP) for a fixed mix of queries against random users of a datagen
+database: common and rare words, short and long prefixes, several words,
+and a miss. Reports p50/p95/p99 per query.
+
+    python -m benchmarks.datagen --database-url sqlite:///bench.db --transactions 1000000
+    python -m benchmarks.bench_search --database-url sqlite:///bench.db
+
+On SQLite a million rows (500 users) stays within TARGET_MS at p95 for
+every query in the mix; without the per-user rowid ranges the common
+words take 30-100 ms.
+"""
+import argparse
+import json
+import random
+import time
+
+from sqlalchemy import create_engine, select
+from sqlalchemy.orm import sessionmaker
+
+from app.models import User
+from app.search import search_transactions
+from benchmarks.common import percentiles
+from benchmarks.datagen import generate
+
+TARGET_MS = 10.0
+
+# name -> query; covers datagen's merchants and categories
+QUERIES = {
+    "common_word": "groceries",
+    "common_prefix": "groc",
+    "one_letter": "s",
+    "rare_word": "sushi",
+    "two_words": "trader jo",
+    "long_word": "subscriptions",
+    "no_match": "zzzz",
+}
+
+
+def measure(Session, user_ids: list, q: str, iterations: int, limit: int, rng: random.Random) -> dict:
+    samples = []
+    with Session() as db:
+        search_transactions(db, user_ids[0], q, limit)  # warm the statement cache
+        for _ in range(iterations):
+            user_id = rng.choice(user_ids)
+            started = time.perf_counter()
+            search_transactions(db, user_id, q, limit)
+            samples.append(time.perf_counter() - started)
+    return percentiles(samples)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--database-url", required=True)
+    parser.add_argument("--transactions", type=int,
+                        help="generate this many rows first (replaces the database's contents)")
+    parser.add_argument("--iterations", type=int, default=200)
+    parser.add_argument("--limit", type=int, default=50)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--output", help="also write the results to this JSON file")
+    args = parser.parse_args()
+
+    if args.transactions:
+        dataset = generate(args.database_url, args.transactions, seed=args.seed)
+        print(f"generated {dataset.transactions} transactions for {dataset.users} users in {dataset.seconds}s")
+
+    engine = create_engine(args.database_url)
+    Session = sessionmaker(bind=engine)
+    with Session() as db:
+        user_ids = db.execute(select(User.id)).scalars().all()
+
+    rng = random.Random(args.seed)
+    results = {}
+    for name, q in QUERIES.items():
+        results[name] = result = measure(Session, user_ids, q, args.iterations, args.limit, rng)
+        flag = "" if result["p95"] <= TARGET_MS else f"  over {TARGET_MS} ms"
+        print(f"{name:>14} {q!r:>16}  p50 {result['p50']:>6} ms  p95 {result['p95']:>6} ms  "
+              f"p99 {result['p99']:>6} ms{flag}")
+    engine.dispose()
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump({"database_url": args.database_url, "limit": args.limit, "results": results}, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
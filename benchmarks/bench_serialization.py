@@ -0,0 +1,107 @@
+"""Per-row cost of turning transaction rows into a JSON response body.
+
+Seeds an in-memory SQLite database and times, for the same rows:
+
+  response_model  ORM objects validated into TransactionRead, dumped to
+                  JSON-ready dicts, then json.dumps (what FastAPI and
+                  JSONResponse do for a response_model endpoint)
+  type_adapter    Rows validated by TypeAdapter(list[TransactionRead])
+                  with from_attributes, dumped by pydantic-core
+  trusted_orjson  Rows -> dicts -> orjson, no validation (the list
+                  endpoints' path)
+
+    python -m benchmarks.bench_serialization --rows 10000 --repeat 5
+
+Query time is reported separately so it can be compared with encoding.
+"""
+import argparse
+import json
+import random
+import statistics
+import time
+
+import orjson
+from pydantic import TypeAdapter
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+
+from app.models import Base, Transaction
+from app.schemas import TransactionRead
+from app.serialization import TRANSACTION_COLUMNS, rows_to_dicts
+from benchmarks.datagen import user_rows
+
+adapter = TypeAdapter(list[TransactionRead])
+
+
+def seed(rows: int):
+    engine = create_engine("sqlite://")
+    Base.metadata.create_all(bind=engine)
+    Session = sessionmaker(bind=engine)
+    with Session() as db:
+        db.execute(Transaction.__table__.insert(), list(user_rows(random.Random(0), 1, [1, 2], rows, 730)))
+        db.commit()
+    return Session
+
+
+def response_model(db):
+    objects = db.query(Transaction).all()
+    started = time.perf_counter()
+    content = adapter.dump_python(adapter.validate_python(objects), mode="json")
+    body = json.dumps(content, ensure_ascii=False, allow_nan=False, separators=(",", ":")).encode()
+    return started, body
+
+
+def type_adapter(db):
+    rows = db.query(*TRANSACTION_COLUMNS).all()
+    started = time.perf_counter()
+    body = adapter.dump_json(adapter.validate_python(rows, from_attributes=True))
+    return started, body
+
+
+def trusted_orjson(db):
+    rows = db.query(*TRANSACTION_COLUMNS).all()
+    started = time.perf_counter()
+    body = orjson.dumps(rows_to_dicts(rows))
+    return started, body
+
+
+STRATEGIES = {"response_model": response_model, "type_adapter": type_adapter, "trusted_orjson": trusted_orjson}
+
+
+def measure(Session, strategy, rows: int, repeat: int) -> dict:
+    query_us, encode_us = [], []
+    for _ in range(repeat):
+        with Session() as db:
+            began = time.perf_counter()
+            started, body = strategy(db)
+            finished = time.perf_counter()
+        query_us.append((started - began) * 1e6 / rows)
+        encode_us.append((finished - started) * 1e6 / rows)
+    return {
+        "query_us_per_row": round(statistics.median(query_us), 2),
+        "encode_us_per_row": round(statistics.median(encode_us), 2),
+        "bytes": len(body),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--rows", type=int, default=10_000)
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--output", help="also write the results to this JSON file")
+    args = parser.parse_args()
+
+    Session = seed(args.rows)
+    results = {}
+    for name, strategy in STRATEGIES.items():
+        results[name] = result = measure(Session, strategy, args.rows, args.repeat)
+        print(f"{name:>15}  query {result['query_us_per_row']:>6} us/row  "
+              f"encode {result['encode_us_per_row']:>6} us/row  ({result['bytes']} bytes)")
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump({"rows": args.rows, "results": results}, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
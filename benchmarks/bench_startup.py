@@ -0,0 +1,100 @@
+"""Cold-start cost of one API worker.
+
+Two measurements, each taken in fresh interpreters so nothing is cached
+in-process:
+
+  import   `python -X importtime -c "import app.main"`; reports the total
+           import time and the top-level packages that account for it
+  ready    uvicorn started against a migrated SQLite database until the
+           first response to GET /, i.e. imports plus lifespan startup
+
+    python -m benchmarks.bench_startup --repeat 5 --output startup.json
+
+Run it before and after touching module-level imports: every worker (and
+every autoscaled replica) pays this before serving its first request.
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from collections import defaultdict
+from pathlib import Path
+
+from benchmarks.common import free_port, migrate, start_server
+
+
+def parse_importtime(stderr: str) -> dict:
+    """Total and per-top-level-package import time from -X importtime output.
+
+    Packages are charged their modules' self time, so the per-package
+    figures add up to the total instead of double counting nested imports.
+    """
+    packages = defaultdict(int)
+    for line in stderr.splitlines():
+        if not line.startswith("import time:"):
+            continue
+        self_us, _, name = line[len("import time:"):].split("|", 2)
+        if not self_us.strip().isdigit():
+            continue  # the column header
+        packages[name.strip().split(".")[0]] += int(self_us)
+    return {"total_us": sum(packages.values()), "packages": dict(packages)}
+
+
+def measure_import(repeat: int) -> dict:
+    totals, packages = [], defaultdict(list)
+    for _ in range(repeat):
+        result = subprocess.run(
+            [sys.executable, "-X", "importtime", "-c", "import app.main"],
+            capture_output=True, text=True, check=True,
+            env={**os.environ, "SCHEMA_CHECK": "0"},
+        )
+        parsed = parse_importtime(result.stderr)
+        totals.append(parsed["total_us"])
+        for package, us in parsed["packages"].items():
+            packages[package].append(us)
+    return {
+        "median_ms": round(statistics.median(totals) / 1000, 1),
+        "top_packages_ms": {
+            package: round(statistics.median(samples) / 1000, 1)
+            for package, samples in sorted(packages.items(), key=lambda item: -statistics.median(item[1]))[:10]
+        },
+    }
+
+
+def measure_ready(repeat: int) -> dict:
+    samples = []
+    with tempfile.TemporaryDirectory() as tmp:
+        url = f"sqlite:///{Path(tmp) / 'startup.db'}"
+        migrate(url)
+        for _ in range(repeat):
+            started = time.perf_counter()
+            server = start_server(url, free_port())
+            samples.append(time.perf_counter() - started)
+            server.terminate()
+            server.wait()
+    return {"median_ms": round(statistics.median(samples) * 1000, 1), "max_ms": round(max(samples) * 1000, 1)}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--output", help="also write the results to this JSON file")
+    args = parser.parse_args()
+
+    results = {"import": measure_import(args.repeat), "ready": measure_ready(args.repeat)}
+    print(f"import app.main  {results['import']['median_ms']:>8} ms")
+    for package, ms in results["import"]["top_packages_ms"].items():
+        print(f"  {package:<20} {ms:>8} ms")
+    print(f"first response   {results['ready']['median_ms']:>8} ms (max {results['ready']['max_ms']} ms)")
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump({"repeat": args.repeat, "results": results}, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,36 @@
+"""Cost of the get_current_user dependency with the token cache on and off.
+
+Resolves the same bearer token repeatedly, as a dashboard load does:
+
+    python -m benchmarks.bench_token_cache --calls 100000
+"""
+import argparse
+import asyncio
+import time
+
+from app import dependencies
+from app.auth_utils import create_access_token
+from app.cache import LRUCache
+
+
+async def resolve(token: str, calls: int) -> float:
+    started = time.perf_counter()
+    for _ in range(calls):
+        await dependencies.get_current_user(token)
+    return time.perf_counter() - started
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--calls", type=int, default=100_000)
+    args = parser.parse_args()
+
+    token = create_access_token({"sub": "1"})
+    for label, size in (("cache off", 0), ("cache on", 10_000)):
+        dependencies.token_cache = LRUCache(size)
+        elapsed = asyncio.run(resolve(token, args.calls))
+        print(f"{label:>9}: {elapsed / args.calls * 1e6:8.2f} us/call  {dependencies.token_cache.stats()}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,99 @@
+"""Helpers shared by the benchmark scripts."""
+import os
+import socket
+import subprocess
+import sys
+import time
+from datetime import datetime, timedelta
+
+import httpx
+from sqlalchemy import create_engine, text
+from sqlalchemy.orm import sessionmaker
+
+from app.auth_utils import create_access_token
+from app.database import ALEMBIC_INI
+from app.models import Account, Base, Transaction, User
+
+
+def migrate(url: str, fresh: bool = True, revision: str = "head") -> None:
+    """Upgrade the database at url to revision, dropping everything first if fresh."""
+    if fresh:
+        engine = create_engine(url)
+        Base.metadata.drop_all(bind=engine)
+        with engine.begin() as conn:
+            conn.execute(text("DROP TABLE IF EXISTS alembic_version"))
+        engine.dispose()
+    subprocess.run(
+        [sys.executable, "-m", "alembic", "-c", str(ALEMBIC_INI), "upgrade", revision],
+        env={**os.environ, "DATABASE_URL": url},
+        check=True,
+        capture_output=True,
+    )
+
+
+def seed(url: str, transactions: int, hashed_password: str = "unused") -> str:
+    """Create one user with three accounts and return a bearer token."""
+    migrate(url)
+    engine = create_engine(url)
+    with sessionmaker(bind=engine)() as db:
+        user = User(email="bench@example.com", hashed_password=hashed_password)
+        db.add(user)
+        db.flush()
+        accounts = [
+            Account(user_id=user.id, name=f"Account {n}", account_type="checking", balance=0.0)
+            for n in range(3)
+        ]
+        db.add_all(accounts)
+        db.flush()
+        start = datetime(2020, 1, 1)
+        db.add_all(
+            Transaction(
+                user_id=user.id,
+                account_id=accounts[i % 3].id,
+                amount=float(i % 100 + 1),
+                type="expense",
+                category="Food",
+                date=start + timedelta(hours=i),
+            )
+            for i in range(transactions)
+        )
+        db.commit()
+        token = create_access_token({"sub": str(user.id)}, timedelta(hours=1))
+    engine.dispose()
+    return token
+
+
+def free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def start_server(url: str, port: int, **env) -> subprocess.Popen:
+    """Run uvicorn on app.main:app with DATABASE_URL and extra env vars set."""
+    env = {**os.environ, "DATABASE_URL": url, **{k.upper(): str(v) for k, v in env.items()}}
+    server = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "app.main:app", "--port", str(port), "--log-level", "warning"],
+        env=env,
+    )
+    deadline = time.monotonic() + 30
+    while time.monotonic() < deadline:
+        try:
+            httpx.get(f"http://127.0.0.1:{port}/", timeout=1)
+            return server
+        except httpx.TransportError:
+            time.sleep(0.2)
+    server.kill()
+    raise RuntimeError("server did not start")
+
+
+def percentiles(samples: list[float]) -> dict:
+    """p50/p95/p99 of latency samples given in seconds, reported in ms."""
+    if not samples:
+        return {"p50": None, "p95": None, "p99": None}
+    ordered = sorted(samples)
+
+    def pick(q):
+        return round(ordered[min(len(ordered) - 1, int(q * len(ordered)))] * 1000, 2)
+
+    return {"p50": pick(0.50), "p95": pick(0.95), "p99": pick(0.99)}
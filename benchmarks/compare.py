@@ -0,0 +1,74 @@
+"""Compare a bench_api results file against a stored baseline.
+
+    python -m benchmarks.compare benchmarks/baselines/sqlite-10k.json results.json --threshold 0.2
+
+A metric regresses when it is worse than the baseline by more than the
+threshold (a fraction): latency percentiles and peak RSS going up, or
+throughput going down. Scenarios or concurrency levels missing from
+either file are ignored. Exits 1 when anything regressed.
+
+Baselines are only comparable on similar hardware; record a new one with
+bench_api --output when the machine changes.
+"""
+import argparse
+import json
+import sys
+
+DEFAULT_THRESHOLD = 0.2
+
+# metric -> True when larger is worse
+METRICS = {"p50": True, "p95": True, "p99": True, "rps": False, "peak_rss_mb": True}
+
+
+def compare(baseline: dict, current: dict, threshold: float = DEFAULT_THRESHOLD) -> list:
+    """List of regressions as dicts with scenario, concurrency, metric, both values and the change."""
+    regressions = []
+    for scenario, levels in current["results"].items():
+        for concurrency, result in levels.items():
+            base = baseline["results"].get(scenario, {}).get(concurrency)
+            if base is None:
+                continue
+            for metric, larger_is_worse in METRICS.items():
+                old, new = base.get(metric), result.get(metric)
+                if not old or new is None:
+                    continue
+                change = (new - old) / old
+                if (change if larger_is_worse else -change) > threshold:
+                    regressions.append({
+                        "scenario": scenario,
+                        "concurrency": concurrency,
+                        "metric": metric,
+                        "baseline": old,
+                        "current": new,
+                        "change": round(change, 3),
+                    })
+    return regressions
+
+
+def print_report(regressions: list) -> None:
+    if not regressions:
+        print("no regressions against the baseline")
+        return
+    for r in regressions:
+        print(f"REGRESSION {r['scenario']} @ {r['concurrency']} clients: {r['metric']} "
+              f"{r['baseline']} -> {r['current']} ({r['change']:+.0%})")
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("baseline")
+    parser.add_argument("current")
+    parser.add_argument("--threshold", type=float, default=DEFAULT_THRESHOLD)
+    args = parser.parse_args(argv)
+
+    with open(args.baseline) as f:
+        baseline = json.load(f)
+    with open(args.current) as f:
+        current = json.load(f)
+    regressions = compare(baseline, current, args.threshold)
+    print_report(regressions)
+    return 1 if regressions else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,194 @@
+"""Seeded synthetic users, accounts and transactions at any scale.
+
+The same --seed and sizes always produce the same rows, so runs against
+different commits compare like for like. Each user gets one to three
+accounts, a monthly salary, rent and a few subscriptions on fixed days,
+plus day-to-day spending with per-category amount distributions. Rows are
+generated and inserted in batches, so memory stays flat from 1k to 10M
+rows; balances, monthly rollups, budget spend counters and recurring
+series are computed afterwards.
+
+    python -m benchmarks.datagen --database-url sqlite:///bench.db --transactions 1000000
+
+Every user's password is PASSWORD, so the data also serves login
+benchmarks.
+"""
+import argparse
+import random
+import time
+from dataclasses import dataclass
+from datetime import datetime, timedelta
+
+from passlib.context import CryptContext
+from sqlalchemy import case, create_engine, func, insert, select, update
+from sqlalchemy.orm import sessionmaker
+
+from app.models import Account, Transaction, User
+from app.services import budgets, recurring, rollups
+from benchmarks.common import migrate
+
+PASSWORD = "bench-password"
+END = datetime(2025, 1, 1)
+
+ACCOUNT_TYPES = [("Checking", "checking"), ("Savings", "savings"), ("Credit Card", "credit")]
+
+# category -> (weight, lognormal mu, sigma, merchants)
+SPENDING = {
+    "Groceries": (30, 3.6, 0.6, ["Trader Joe's", "Safeway", "Whole Foods", "Aldi"]),
+    "Dining": (25, 3.0, 0.7, ["Chipotle", "Starbucks", "Local Diner", "Sushi Bar"]),
+    "Transport": (12, 3.2, 0.5, ["Shell", "Uber", "Metro Card", "Chevron"]),
+    "Shopping": (12, 3.9, 0.9, ["Amazon", "Target", "IKEA", "Best Buy"]),
+    "Entertainment": (7, 3.3, 0.6, ["Cinema", "Steam", "Concert Hall"]),
+    "Health": (5, 3.8, 0.8, ["CVS Pharmacy", "Dentist", "Gym"]),
+    "Utilities": (5, 4.3, 0.3, ["Electric Co", "Water Utility", "ISP"]),
+    "Travel": (4, 5.5, 0.7, ["Airline", "Hotel", "Car Rental"]),
+}
+SUBSCRIPTIONS = [("Netflix", 15.49), ("Spotify", 10.99), ("Cloud Storage", 2.99), ("News", 8.0)]
+
+
+@dataclass
+class Dataset:
+    users: int
+    accounts: int
+    transactions: int
+    seconds: float
+
+
+def _months(days: int):
+    month = datetime(END.year, END.month, 1)
+    start = END - timedelta(days=days)
+    while month > start:
+        month = (month - timedelta(days=1)).replace(day=1)
+        yield month
+
+
+def user_rows(rng: random.Random, user_id: int, account_ids: list, count: int, days: int):
+    """About count transaction dicts for one user, recurring ones first."""
+    checking = account_ids[0]
+    spend_accounts = account_ids[-1:] + account_ids[:1]  # the card if any, then checking
+    salary = round(rng.uniform(2500, 7000), 2)
+    rent = round(rng.uniform(800, 2500), 2)
+    subscriptions = rng.sample(SUBSCRIPTIONS, rng.randint(1, len(SUBSCRIPTIONS)))
+    emitted = 0
+
+    for month in _months(days):
+        recurring = [
+            (month.replace(day=1), "income", salary, "Salary", "Employer Payroll", checking),
+            (month.replace(day=3), "expense", rent, "Rent", "Landlord", checking),
+        ] + [
+            (month.replace(day=5 + n), "expense", price, "Subscriptions", name, spend_accounts[0])
+            for n, (name, price) in enumerate(subscriptions)
+        ]
+        for when, kind, amount, category, description, account_id in recurring:
+            if emitted >= count:
+                return
+            yield {
+                "user_id": user_id, "account_id": account_id, "amount": amount, "type": kind,
+                "date": when + timedelta(hours=9), "category": category, "description": description,
+                "created_at": when,
+            }
+            emitted += 1
+
+    categories = list(SPENDING)
+    weights = [SPENDING[c][0] for c in categories]
+    span = days * 86400
+    while emitted < count:
+        category = rng.choices(categories, weights)[0]
+        _, mu, sigma, merchants = SPENDING[category]
+        when = END - timedelta(seconds=rng.randrange(span))
+        yield {
+            "user_id": user_id,
+            "account_id": rng.choice(spend_accounts),
+            "amount": round(rng.lognormvariate(mu, sigma), 2) or 0.01,
+            "type": "expense",
+            "date": when,
+            "category": category,
+            "description": rng.choice(merchants),
+            "created_at": when,
+        }
+        emitted += 1
+
+
+def generate(url: str, transactions: int, users: int = None, seed: int = 0, days: int = 730,
+             bcrypt_rounds: int = 4, batch_size: int = 10_000, fresh: bool = True) -> Dataset:
+    """Create the schema and fill it; users default to one per 2,000 rows."""
+    started = time.perf_counter()
+    rng = random.Random(seed)
+    users = users or max(1, transactions // 2000)
+    hashed = CryptContext(schemes=["bcrypt"], bcrypt__rounds=bcrypt_rounds).hash(PASSWORD)
+
+    migrate(url, fresh)
+    engine = create_engine(url)
+    with sessionmaker(bind=engine)() as db:
+        user_ids = [
+            db.execute(insert(User).values(email=f"user{n}@bench.example", hashed_password=hashed).returning(User.id)).scalar_one()
+            for n in range(users)
+        ]
+        accounts = {}
+        for user_id in user_ids:
+            kinds = ACCOUNT_TYPES[:rng.randint(1, len(ACCOUNT_TYPES))]
+            accounts[user_id] = [
+                db.execute(
+                    insert(Account)
+                    .values(user_id=user_id, name=name, account_type=kind, balance=0.0, created_at=END - timedelta(days=days))
+                    .returning(Account.id)
+                ).scalar_one()
+                for name, kind in kinds
+            ]
+        db.commit()
+
+        # RETURNING makes SQLAlchemy send multi-row INSERTs rather than one
+        # statement per row, which SQLite's search index triggers need to be fast
+        batch = []
+        for n, user_id in enumerate(user_ids):
+            # Spread the remainder over the first users
+            count = transactions // users + (1 if n < transactions % users else 0)
+            for row in user_rows(rng, user_id, accounts[user_id], count, days):
+                batch.append(row)
+                if len(batch) >= batch_size:
+                    db.execute(insert(Transaction).returning(Transaction.id), batch)
+                    db.commit()
+                    batch = []
+        if batch:
+            db.execute(insert(Transaction).returning(Transaction.id), batch)
+            db.commit()
+
+        signed = case((Transaction.type == "income", Transaction.amount), else_=-Transaction.amount)
+        db.execute(
+            update(Account).values(
+                balance=select(func.coalesce(func.sum(signed), 0.0))
+                .where(Transaction.account_id == Account.id)
+                .scalar_subquery()
+            )
+        )
+        db.commit()
+        rollups.rebuild(db)
+        budgets.reconcile(db)
+        recurring.rebuild(db)
+
+    engine.dispose()
+    return Dataset(
+        users=users,
+        accounts=sum(len(ids) for ids in accounts.values()),
+        transactions=transactions,
+        seconds=round(time.perf_counter() - started, 2),
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--database-url", required=True)
+    parser.add_argument("--transactions", type=int, default=10_000)
+    parser.add_argument("--users", type=int, help="defaults to one user per 2,000 transactions")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--days", type=int, default=730, help="history length ending 2025-01-01")
+    parser.add_argument("--bcrypt-rounds", type=int, default=4, help="cost of the shared password hash")
+    args = parser.parse_args()
+
+    dataset = generate(args.database_url, args.transactions, args.users, args.seed, args.days, args.bcrypt_rounds)
+    print(f"{dataset.users} users, {dataset.accounts} accounts, {dataset.transactions} transactions "
+          f"in {dataset.seconds}s")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,13 +1,39 @@
+import os
 import pytest
+from passlib.context import CryptContext
 from sqlalchemy import create_engine
 from sqlalchemy.orm import sessionmaker
-from app.models import Base
+from sqlalchemy.pool import StaticPool
+
+# Hash on the threadpool in tests rather than spawning worker processes
+os.environ.setdefault("PASSWORD_HASH_WORKERS", "0")
+# Tests build their schemas with create_all rather than migrations
+os.environ.setdefault("SCHEMA_CHECK", "0")
+# Fixtures write rows behind the API's back, which no cache would see;
+# tests/test_readcache.py turns the read cache on itself
+os.environ.setdefault("READ_CACHE_BACKEND", "none")
+# The app's job runner would poll the configured database; tests/test_jobs.py
+# runs jobs against the test one itself
+os.environ.setdefault("JOBS_THREADS", "0")
+
+from app.models import Base, User
 from app.database import get_db
+from app.metrics import install_query_metrics
+from app.auth_utils import create_access_token
 from app.main import app
+from app import security
+from app.routers import auth as auth_router
 from fastapi.testclient import TestClient
 
 SQLALCHEMY_DATABASE_URL = "sqlite:///:memory:"  # in-memory DB for tests
-engine = create_engine(SQLALCHEMY_DATABASE_URL, connect_args={"check_same_thread": False})
+# StaticPool keeps a single connection so the threadpool workers serving
+# requests see the same in-memory database as the fixtures.
+engine = create_engine(
+    SQLALCHEMY_DATABASE_URL,
+    connect_args={"check_same_thread": False},
+    poolclass=StaticPool,
+)
+install_query_metrics(engine)
 TestingSessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 
 @pytest.fixture(scope="module")
@@ -18,15 +44,43 @@ def test_db():
         yield db
     finally:
         db.close()
+        Base.metadata.drop_all(bind=engine)
 
 @pytest.fixture(scope="module")
 def client(test_db):
     def override_get_db():
+        db = TestingSessionLocal()
         try:
-            yield test_db
+            yield db
         finally:
-            test_db.close()
+            db.close()
 
+    previous = app.dependency_overrides.get(get_db)
     app.dependency_overrides[get_db] = override_get_db
     with TestClient(app) as c:
-        yield c
\ No newline at end of file
+        yield c
+    if previous is not None:
+        app.dependency_overrides[get_db] = previous
+    else:
+        app.dependency_overrides.pop(get_db, None)
+
+@pytest.fixture(scope="module")
+def test_user(test_db):
+    user = User(email="owner@example.com", hashed_password="fakehashedpassword")
+    test_db.add(user)
+    test_db.commit()
+    test_db.refresh(user)
+    return user
+
+@pytest.fixture(scope="module")
+def auth_headers(test_user):
+    token = create_access_token({"sub": str(test_user.id)})
+    return {"Authorization": f"Bearer {token}"}
+
+@pytest.fixture
+def fast_hasher(monkeypatch):
+    """Hash in-process at the minimum bcrypt cost instead of on the process pool."""
+    monkeypatch.setattr(security, "pwd_context", CryptContext(schemes=["bcrypt"], bcrypt__rounds=4))
+    hasher = security.PasswordHasher(workers=0, max_pending=8)
+    monkeypatch.setattr(auth_router, "password_hasher", hasher)
+    return hasher
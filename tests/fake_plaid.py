@@ -0,0 +1,116 @@
+"""A small in-process stand-in for the Plaid endpoints the sync engine calls.
+
+Each access token has an append-only change log; a cursor is the number of
+log entries already delivered, so /transactions/sync pages through exactly
+what was pushed since the caller's last cursor.
+"""
+import json
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from app.config import Settings
+from app.services import plaid_service
+
+
+class FakePlaid:
+    def __init__(self, latency: float = 0.0):
+        self.latency = latency
+        self.logs = {}  # access_token -> [(kind, payload)]
+        self.fail_next = {}  # access_token -> [error_code, ...]
+        self.calls = 0
+        self.in_flight = 0
+        self.max_in_flight = 0
+        self._lock = threading.Lock()
+        self._server = ThreadingHTTPServer(("127.0.0.1", 0), self._handler())
+        self._server.daemon_threads = True
+        self._thread = threading.Thread(target=self._server.serve_forever, daemon=True)
+
+    @property
+    def url(self) -> str:
+        return f"http://127.0.0.1:{self._server.server_address[1]}"
+
+    def client(self):
+        return plaid_service.make_client(
+            Settings(plaid_client_id="test-client", plaid_secret="test-secret", plaid_host=self.url)
+        )
+
+    def start(self) -> "FakePlaid":
+        self._thread.start()
+        return self
+
+    def stop(self) -> None:
+        self._server.shutdown()
+        self._server.server_close()
+
+    def push(self, access_token: str, kind: str, payload) -> None:
+        """Record an added/modified transaction dict or a removed transaction id."""
+        self.logs.setdefault(access_token, []).append((kind, payload))
+
+    def _sync(self, body: dict) -> tuple[int, dict]:
+        token = body["access_token"]
+        failures = self.fail_next.get(token)
+        if failures:
+            code = failures.pop(0)
+            return 400, {"error_type": "TRANSACTIONS_ERROR", "error_code": code, "error_message": "injected"}
+        log = self.logs.get(token, [])
+        start = int(body.get("cursor") or 0)
+        end = min(len(log), start + body.get("count", 100))
+        page = {"added": [], "modified": [], "removed": []}
+        for kind, payload in log[start:end]:
+            page[kind].append({"transaction_id": payload} if kind == "removed" else payload)
+        return 200, {
+            **page,
+            "accounts": [],
+            "next_cursor": str(end),
+            "has_more": end < len(log),
+            "request_id": "fake",
+        }
+
+    def _exchange(self, body: dict) -> tuple[int, dict]:
+        public = body["public_token"]
+        return 200, {"access_token": f"access-{public}", "item_id": f"item-{public}", "request_id": "fake"}
+
+    def _handler(self):
+        fake = self
+        routes = {"/transactions/sync": self._sync, "/item/public_token/exchange": self._exchange}
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_POST(self):
+                with fake._lock:
+                    fake.calls += 1
+                    fake.in_flight += 1
+                    fake.max_in_flight = max(fake.max_in_flight, fake.in_flight)
+                try:
+                    if fake.latency:
+                        time.sleep(fake.latency)
+                    body = json.loads(self.rfile.read(int(self.headers["Content-Length"])))
+                    code, payload = routes[self.path](body)
+                finally:
+                    with fake._lock:
+                        fake.in_flight -= 1
+                data = json.dumps(payload).encode()
+                self.send_response(code)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(data)))
+                self.end_headers()
+                self.wfile.write(data)
+
+            def log_message(self, *args):
+                pass
+
+        return Handler
+
+
+def plaid_txn(transaction_id: str, amount: float, account_id: str = "plaid-checking", day: str = "2024-03-05", **extra) -> dict:
+    return {
+        "transaction_id": transaction_id,
+        "account_id": account_id,
+        "amount": amount,
+        "date": day,
+        "name": extra.pop("name", f"Txn {transaction_id}"),
+        "merchant_name": extra.pop("merchant_name", None),
+        "iso_currency_code": "USD",
+        "pending": False,
+        **extra,
+    }
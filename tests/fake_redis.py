@@ -0,0 +1,109 @@
+"""A small in-process stand-in for the Redis commands the read cache sends.
+
+Speaks RESP2 over TCP, so tests drive it with the real redis client. Keys
+expire like Redis's SET ... PX; setting `down` makes every command fail
+with an error reply, as a server that is out of memory or failing over would.
+"""
+import socketserver
+import threading
+import time
+
+
+class FakeRedis:
+    def __init__(self):
+        self.data = {}  # key -> (value, expires_at or None)
+        self.commands = []  # command names in arrival order
+        self.down = False
+        self._lock = threading.Lock()
+        self._server = socketserver.ThreadingTCPServer(("127.0.0.1", 0), self._handler())
+        self._server.daemon_threads = True
+        self._thread = threading.Thread(target=self._server.serve_forever, daemon=True)
+
+    @property
+    def url(self) -> str:
+        return f"redis://127.0.0.1:{self._server.server_address[1]}/0"
+
+    def start(self) -> "FakeRedis":
+        self._thread.start()
+        return self
+
+    def stop(self) -> None:
+        self._server.shutdown()
+        self._server.server_close()
+
+    def _get(self, key: bytes):
+        entry = self.data.get(key)
+        if entry is None:
+            return None
+        value, expires_at = entry
+        if expires_at is not None and time.monotonic() >= expires_at:
+            del self.data[key]
+            return None
+        return value
+
+    def execute(self, args: list):
+        """The reply to one command: bytes, int, None, list, or an Exception."""
+        name = args[0].upper().decode()
+        with self._lock:
+            self.commands.append(name)
+            if self.down:
+                return Exception("ERR fake server is down")
+            if name == "PING":
+                return "PONG"
+            if name in ("CLIENT", "SELECT"):
+                return "OK"
+            if name == "GET":
+                return self._get(args[1])
+            if name == "MGET":
+                return [self._get(key) for key in args[1:]]
+            if name == "SET":
+                key, value, options = args[1], args[2], [arg.upper() for arg in args[3:]]
+                if b"NX" in options and self._get(key) is not None:
+                    return None
+                expires_at = None
+                if b"PX" in options:
+                    expires_at = time.monotonic() + int(options[options.index(b"PX") + 1]) / 1000
+                self.data[key] = (value, expires_at)
+                return "OK"
+            if name == "DEL":
+                return sum(self.data.pop(key, None) is not None for key in args[1:])
+            return Exception(f"ERR unknown command '{name}'")
+
+    def _handler(self):
+        fake = self
+
+        class Handler(socketserver.StreamRequestHandler):
+            def handle(self):
+                while True:
+                    args = self._read_command()
+                    if args is None:
+                        return
+                    self.wfile.write(_encode(fake.execute(args)))
+                    self.wfile.flush()
+
+            def _read_command(self):
+                line = self.rfile.readline()
+                if not line:
+                    return None
+                count = int(line[1:])
+                args = []
+                for _ in range(count):
+                    length = int(self.rfile.readline()[1:])
+                    args.append(self.rfile.read(length + 2)[:-2])
+                return args
+
+        return Handler
+
+
+def _encode(reply) -> bytes:
+    if reply is None:
+        return b"$-1\r\n"
+    if isinstance(reply, Exception):
+        return f"-{reply}\r\n".encode()
+    if isinstance(reply, str):
+        return f"+{reply}\r\n".encode()
+    if isinstance(reply, int):
+        return f":{reply}\r\n".encode()
+    if isinstance(reply, list):
+        return f"*{len(reply)}\r\n".encode() + b"".join(_encode(item) for item in reply)
+    return b"$%d\r\n%s\r\n" % (len(reply), reply)
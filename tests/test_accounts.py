@@ -0,0 +1,91 @@
+import pytest
+from datetime import datetime, timedelta
+from sqlalchemy import event
+from app.models import Account, Transaction
+from tests.conftest import engine
+
+# ----------------------------
+# Helpers
+# ----------------------------
+def add_accounts(db, user_id, count, transactions_each):
+    start = datetime(2025, 1, 1)
+    for n in range(count):
+        account = Account(user_id=user_id, name=f"Account {n}", account_type="checking", balance=0.0)
+        db.add(account)
+        db.flush()
+        for i in range(transactions_each):
+            db.add(Transaction(
+                user_id=user_id,
+                account_id=account.id,
+                amount=1.0,
+                type="expense",
+                date=start + timedelta(days=i),
+            ))
+    db.commit()
+
+def count_statements(client, url, headers, params=None):
+    statements = []
+
+    def before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        statements.append(statement)
+
+    event.listen(engine, "before_cursor_execute", before_cursor_execute)
+    try:
+        response = client.get(url, params=params, headers=headers)
+    finally:
+        event.remove(engine, "before_cursor_execute", before_cursor_execute)
+    assert response.status_code == 200
+    return len(statements), response.json()
+
+# ----------------------------
+# Tests
+# ----------------------------
+def test_summary_fields(client, auth_headers, test_db, test_user):
+    add_accounts(test_db, test_user.id, 2, 3)
+    response = client.get("/accounts/", headers=auth_headers)
+    assert response.status_code == 200
+    accounts = response.json()
+    assert len(accounts) == 2
+    for account in accounts:
+        assert account["transaction_count"] == 3
+        assert account["last_activity"].startswith("2025-01-03")
+        assert account["transactions"] is None
+
+def test_include_transactions_is_capped(client, auth_headers):
+    params = {"include": "transactions", "transactions_limit": 2}
+    response = client.get("/accounts/", params=params, headers=auth_headers)
+    assert response.status_code == 200
+    for account in response.json():
+        dates = [t["date"] for t in account["transactions"]]
+        assert len(dates) == 2
+        assert dates == sorted(dates, reverse=True)
+        assert dates[0].startswith("2025-01-03")
+
+    response = client.get("/accounts/", params={"include": "everything"}, headers=auth_headers)
+    assert response.status_code == 422
+
+@pytest.mark.parametrize("params", [None, {"include": "transactions"}])
+def test_statement_count_is_constant(client, auth_headers, test_db, test_user, params):
+    before, _ = count_statements(client, "/accounts/", auth_headers, params)
+    add_accounts(test_db, test_user.id, 10, 2)
+    after, accounts = count_statements(client, "/accounts/", auth_headers, params)
+    assert len(accounts) >= 12
+    assert after == before
+
+def test_include_transactions_lists_undated_rows_last(client, auth_headers, test_db, test_user):
+    account = Account(user_id=test_user.id, name="Legacy", account_type="checking", balance=0.0)
+    test_db.add(account)
+    test_db.flush()
+    dated = Transaction(user_id=test_user.id, account_id=account.id, amount=1.0, type="expense",
+                        date=datetime(2025, 2, 1))
+    undated = Transaction(user_id=test_user.id, account_id=account.id, amount=2.0, type="expense")
+    test_db.add_all([dated, undated])
+    test_db.flush()
+    # The column default fills in a missing date, so clear it afterwards
+    test_db.query(Transaction).filter(Transaction.id == undated.id).update({Transaction.date: None})
+    test_db.commit()
+
+    response = client.get("/accounts/", params={"include": "transactions"}, headers=auth_headers)
+    assert response.status_code == 200
+    legacy = next(a for a in response.json() if a["id"] == account.id)
+    assert [t["id"] for t in legacy["transactions"]] == [dated.id, undated.id]
@@ -0,0 +1,83 @@
+import pytest
+from fastapi.testclient import TestClient
+from sqlalchemy import create_engine
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
+from sqlalchemy.orm import sessionmaker
+from app.auth_utils import create_access_token
+from app.database import async_url, get_db
+from app.main import app
+from app.models import Base, User
+
+pytest.importorskip("aiosqlite")
+
+# ----------------------------
+# Fixtures
+# ----------------------------
+@pytest.fixture(scope="module")
+def async_client(tmp_path_factory):
+    url = f"sqlite:///{tmp_path_factory.mktemp('async') / 'async.db'}"
+    sync_engine = create_engine(url)
+    Base.metadata.create_all(bind=sync_engine)
+    with sessionmaker(bind=sync_engine)() as db:
+        user = User(email="async@example.com", hashed_password="fakehashedpassword")
+        db.add(user)
+        db.commit()
+        token = create_access_token({"sub": str(user.id)})
+
+    async_engine = create_async_engine(async_url(url))
+    AsyncTestingSessionLocal = async_sessionmaker(async_engine, autoflush=False, expire_on_commit=False)
+
+    async def override_get_db():
+        async with AsyncTestingSessionLocal() as session:
+            assert isinstance(session, AsyncSession)
+            yield session
+
+    previous = app.dependency_overrides.get(get_db)
+    app.dependency_overrides[get_db] = override_get_db
+    with TestClient(app) as c:
+        c.headers["Authorization"] = f"Bearer {token}"
+        yield c
+        c.portal.call(async_engine.dispose)
+    if previous is not None:
+        app.dependency_overrides[get_db] = previous
+    else:
+        app.dependency_overrides.pop(get_db, None)
+    sync_engine.dispose()
+
+# ----------------------------
+# Tests
+# ----------------------------
+def test_async_round_trip(async_client):
+    response = async_client.post("/accounts/", json={"name": "Checking", "account_type": "checking", "balance": 10.0})
+    assert response.status_code == 200
+    assert response.json()["transactions"] == []
+    account_id = response.json()["id"]
+
+    payload = {"account_id": account_id, "amount": 4, "type": "expense", "category": "Food"}
+    response = async_client.post("/transactions/", json=payload)
+    assert response.status_code == 200
+    transaction_id = response.json()["id"]
+
+    response = async_client.post("/transactions/bulk", json=[{**payload, "amount": 1}, {**payload, "amount": 0}])
+    assert response.json()["created"] == 1
+
+    response = async_client.put(f"/transactions/{transaction_id}", json={**payload, "amount": 3})
+    assert response.status_code == 200
+
+    response = async_client.get("/transactions/", params={"limit": 1})
+    assert len(response.json()["items"]) == 1
+    assert response.json()["next_cursor"]
+
+    response = async_client.get("/accounts/", params={"include": "transactions"})
+    account = response.json()[0]
+    assert account["balance"] == 6.0
+    assert account["transaction_count"] == 2
+    assert len(account["transactions"]) == 2
+
+    response = async_client.get("/transactions/export", params={"format": "ndjson"})
+    assert response.status_code == 200
+    assert len(response.text.splitlines()) == 2
+
+    assert async_client.delete(f"/transactions/{transaction_id}").status_code == 204
+    assert async_client.get(f"/transactions/{transaction_id}").status_code == 404
+    assert async_client.get("/accounts/").json()[0]["balance"] == 9.0
@@ -0,0 +1,59 @@
+import asyncio
+from passlib.context import CryptContext
+from app import security
+from app.models import User
+
+# ----------------------------
+# Tests
+# ----------------------------
+def test_signup_and_login(client, fast_hasher):
+    response = client.post("/auth/signup", json={"email": "new@example.com", "password": "s3cret"})
+    assert response.status_code == 200
+    assert response.json()["access_token"]
+
+    response = client.post("/auth/signup", json={"email": "new@example.com", "password": "s3cret"})
+    assert response.status_code == 400
+
+    response = client.post("/auth/login", data={"username": "new@example.com", "password": "s3cret"})
+    assert response.status_code == 200
+    token = response.json()["access_token"]
+    assert client.get("/accounts/", headers={"Authorization": f"Bearer {token}"}).status_code == 200
+
+    response = client.post("/auth/login", data={"username": "new@example.com", "password": "wrong"})
+    assert response.status_code == 401
+
+def test_login_rehashes_outdated_cost(client, test_db, fast_hasher, monkeypatch):
+    old_hash = CryptContext(schemes=["bcrypt"], bcrypt__rounds=4).hash("s3cret")
+    user = User(email="legacy@example.com", hashed_password=old_hash)
+    test_db.add(user)
+    test_db.commit()
+
+    # Raise the configured cost above the stored hash's
+    upgraded = CryptContext(schemes=["bcrypt"], bcrypt__default_rounds=5, bcrypt__min_rounds=5)
+    monkeypatch.setattr(security, "pwd_context", upgraded)
+
+    response = client.post("/auth/login", data={"username": "legacy@example.com", "password": "s3cret"})
+    assert response.status_code == 200
+    test_db.refresh(user)
+    assert user.hashed_password != old_hash
+    assert user.hashed_password.startswith("$2b$05$")
+    assert upgraded.verify("s3cret", user.hashed_password)
+
+def test_saturated_hasher_returns_503(client, fast_hasher):
+    fast_hasher.max_pending = 0
+    response = client.post("/auth/signup", json={"email": "busy@example.com", "password": "s3cret"})
+    assert response.status_code == 503
+    assert response.headers["Retry-After"] == "1"
+
+def test_process_pool_round_trip():
+    hasher = security.PasswordHasher(workers=1, max_pending=4)
+    try:
+        async def round_trip():
+            hashed = await hasher.hash("s3cret")
+            return await hasher.verify_and_update("s3cret", hashed)
+
+        verified, new_hash = asyncio.run(round_trip())
+    finally:
+        hasher.shutdown()
+    assert verified is True
+    assert new_hash is None
@@ -0,0 +1,43 @@
+from sqlalchemy import case, create_engine, func, select
+from sqlalchemy.orm import Session
+from app.models import Account, Transaction
+from app.services import budgets, rollups
+from benchmarks import compare
+from benchmarks.datagen import generate
+
+# ----------------------------
+# Tests
+# ----------------------------
+def test_datagen_is_seeded_and_consistent(tmp_path):
+    def build(name, seed):
+        url = f"sqlite:///{tmp_path / name}"
+        dataset = generate(url, 3000, users=3, seed=seed)
+        engine = create_engine(url)
+        with Session(engine) as db:
+            rows = db.execute(select(Transaction.user_id, Transaction.account_id, Transaction.amount,
+                                     Transaction.date, Transaction.category).order_by(Transaction.id)).all()
+            balances = dict(db.execute(select(Account.id, Account.balance)).all())
+            signed = func.sum(case((Transaction.type == "income", Transaction.amount), else_=-Transaction.amount))
+            expected = dict(db.execute(select(Transaction.account_id, signed).group_by(Transaction.account_id)).all())
+            mismatches = rollups.verify(db) + budgets.verify(db)
+        engine.dispose()
+        return dataset, rows, balances, expected, mismatches
+
+    dataset, rows, balances, expected, mismatches = build("a.db", seed=1)
+    assert (dataset.users, dataset.transactions, len(rows)) == (3, 3000, 3000)
+    assert {account_id: round(b, 6) for account_id, b in balances.items() if account_id in expected} == \
+        {account_id: round(b, 6) for account_id, b in expected.items()}
+    assert mismatches == []
+
+    assert build("b.db", seed=1)[1] == rows
+    assert build("c.db", seed=2)[1] != rows
+
+def test_compare_flags_regressions_beyond_threshold():
+    baseline = {"results": {"list_accounts": {"10": {"p95": 100.0, "rps": 200.0, "peak_rss_mb": 100.0}}}}
+    current = {"results": {
+        "list_accounts": {"10": {"p95": 115.0, "rps": 150.0, "peak_rss_mb": 90.0}, "50": {"p95": 999.0}},
+        "signup": {"10": {"p95": 999.0}},
+    }}
+
+    regressions = compare.compare(baseline, current, threshold=0.2)
+    assert [(r["metric"], r["change"]) for r in regressions] == [("rps", -0.25)]
@@ -0,0 +1,130 @@
+import asyncio
+from datetime import date, datetime
+import pytest
+from app.models import Account, BudgetSpend, Transaction
+from app.services import budgets
+from tests.conftest import TestingSessionLocal
+
+# ----------------------------
+# Fixtures
+# ----------------------------
+@pytest.fixture(scope="module")
+def account(test_db, test_user):
+    checking = Account(user_id=test_user.id, name="Checking", account_type="checking", balance=0.0)
+    test_db.add(checking)
+    test_db.commit()
+    return checking.id
+
+def transaction(account, amount, when, category="Food", type="expense"):
+    return {"account_id": account, "amount": amount, "type": type, "category": category, "date": when}
+
+def spent(client, auth_headers, as_of):
+    response = client.get("/budgets/", params={"as_of": as_of}, headers=auth_headers)
+    assert response.status_code == 200
+    return {(b["category"], b["period"]): (b["spent"], b["remaining"]) for b in response.json()}
+
+# ----------------------------
+# Tests
+# ----------------------------
+def test_period_start():
+    assert budgets.period_start("weekly", datetime(2025, 3, 16, 23, 59)) == date(2025, 3, 10)  # Sunday
+    assert budgets.period_start("weekly", date(2025, 3, 10)) == date(2025, 3, 10)  # Monday
+    assert budgets.period_start("monthly", datetime(2025, 3, 31, 12)) == date(2025, 3, 1)
+
+def test_budget_validation(client, auth_headers, account):
+    for body in (
+        {"category": "Food", "period": "daily", "amount": 10},
+        {"category": "Food", "amount": 0},
+        {"category": " ", "amount": 10},
+    ):
+        assert client.post("/budgets/", json=body, headers=auth_headers).status_code == 400
+
+def test_spend_follows_writes(client, auth_headers, account, test_db):
+    weekly = client.post("/budgets/", json={"category": "Food", "period": "weekly", "amount": 100}, headers=auth_headers)
+    assert weekly.status_code == 201
+    assert client.post("/budgets/", json={"category": "Food", "amount": 400}, headers=auth_headers).status_code == 201
+    duplicate = client.post("/budgets/", json={"category": "Food", "amount": 1}, headers=auth_headers)
+    assert duplicate.status_code == 400
+
+    first = client.post("/transactions/", json=transaction(account, 30, "2025-03-04T10:00:00"), headers=auth_headers).json()
+    second = client.post("/transactions/", json=transaction(account, 12.5, "2025-03-12T10:00:00"), headers=auth_headers).json()
+    client.post("/transactions/", json=transaction(account, 99, "2025-03-12T11:00:00", type="income"), headers=auth_headers)
+    client.post("/transactions/", json=transaction(account, 7, "2025-03-12T12:00:00", category="Fun"), headers=auth_headers)
+    assert spent(client, auth_headers, "2025-03-13") == {("Food", "monthly"): (42.5, 357.5), ("Food", "weekly"): (12.5, 87.5)}
+
+    # Moving a row to another category, week and type
+    moved = transaction(account, 20, "2025-03-11T09:00:00")
+    client.put(f"/transactions/{first['id']}", json=moved, headers=auth_headers)
+    assert spent(client, auth_headers, "2025-03-13") == {("Food", "monthly"): (32.5, 367.5), ("Food", "weekly"): (32.5, 67.5)}
+    client.put(f"/transactions/{first['id']}", json={**moved, "type": "income"}, headers=auth_headers)
+    client.delete(f"/transactions/{second['id']}", headers=auth_headers)
+    assert spent(client, auth_headers, "2025-03-13") == {("Food", "monthly"): (0.0, 400.0), ("Food", "weekly"): (0.0, 100.0)}
+
+    rows = [transaction(account, 5, "2025-03-14T08:00:00") for _ in range(3)]
+    client.post("/transactions/bulk", json=rows, headers=auth_headers)
+    assert spent(client, auth_headers, "2025-03-13")[("Food", "weekly")] == (15.0, 85.0)
+    assert budgets.verify(test_db) == []
+
+def test_update_and_delete_budget(client, auth_headers, account):
+    created = client.post("/budgets/", json={"category": "Fun", "period": "weekly", "amount": 20}, headers=auth_headers).json()
+    assert (created["spent"], created["remaining"]) == (0.0, 20.0)  # this week has no spend
+    updated = client.put(f"/budgets/{created['id']}", json={"category": "Fun", "period": "monthly", "amount": 30}, headers=auth_headers)
+    assert updated.json()["period"] == "monthly"
+    clash = client.put(f"/budgets/{created['id']}", json={"category": "Food", "period": "weekly", "amount": 30}, headers=auth_headers)
+    assert clash.status_code == 400
+    assert client.delete(f"/budgets/{created['id']}", headers=auth_headers).status_code == 204
+    assert client.delete(f"/budgets/{created['id']}", headers=auth_headers).status_code == 404
+
+def test_reconcile_fixes_drift(test_db, test_user, account):
+    # Rows written behind the app's back, and a corrupted counter
+    test_db.add(Transaction(user_id=test_user.id, account_id=account, amount=8.0, type="expense",
+                            category="Books", date=datetime(2025, 5, 2)))
+    counter = test_db.query(BudgetSpend).filter(BudgetSpend.category == "Food", BudgetSpend.period == "weekly").first()
+    counter.spent += 100
+    test_db.commit()
+    drifted = budgets.verify(test_db)
+    assert len(drifted) == 3  # Books week and month, the corrupted Food week
+
+    assert budgets.reconcile(test_db) == drifted
+    assert budgets.verify(test_db) == []
+    assert budgets.reconcile(test_db) == []
+
+def test_reconcile_skips_counters_written_meanwhile(test_db, test_user, account, monkeypatch):
+    counter = test_db.query(BudgetSpend).filter(BudgetSpend.category == "Food", BudgetSpend.period == "monthly").first()
+    counter.spent += 1
+    test_db.commit()
+    compute = budgets.compute
+
+    def concurrent_write(db, user_id=None):
+        # A write lands between reading the counters and reading the transactions
+        when = datetime(2025, 3, 20)
+        db.add(Transaction(user_id=test_user.id, account_id=account, amount=2.0, type="expense", category="Food", date=when))
+        spend = budgets.new_deltas()
+        budgets.track(spend, test_user.id, when, "Food", "expense", 2.0)
+        budgets.apply_deltas(db, spend)
+        db.flush()
+        return compute(db, user_id)
+
+    monkeypatch.setattr(budgets, "compute", concurrent_write)
+    # Both counters it touched changed since they were read, so neither is corrected
+    assert budgets.reconcile(test_db) == []
+    monkeypatch.undo()
+    assert [m["key"][2] for m in budgets.reconcile(test_db)] == ["monthly"]
+    assert budgets.verify(test_db) == []
+
+def test_reconcile_periodically(test_db, test_user, account):
+    counter = test_db.query(BudgetSpend).first()
+    counter.count += 1
+    test_db.commit()
+
+    async def run_once():
+        task = asyncio.create_task(budgets.reconcile_periodically(TestingSessionLocal, 0.01))
+        for _ in range(200):
+            await asyncio.sleep(0.01)
+            if not budgets.verify(test_db):
+                break
+        task.cancel()
+
+    asyncio.run(run_once())
+    test_db.expire_all()
+    assert budgets.verify(test_db) == []
@@ -0,0 +1,72 @@
+import json
+import pytest
+from app.models import Account, Transaction
+
+# ----------------------------
+# Fixtures
+# ----------------------------
+@pytest.fixture(scope="module")
+def accounts(test_db, test_user):
+    checking = Account(user_id=test_user.id, name="Checking", account_type="checking", balance=100.0)
+    savings = Account(user_id=test_user.id, name="Savings", account_type="savings", balance=0.0)
+    test_db.add_all([checking, savings])
+    test_db.commit()
+    return checking.id, savings.id
+
+# ----------------------------
+# Tests
+# ----------------------------
+def test_bulk_json_array(client, auth_headers, accounts, test_db):
+    checking, savings = accounts
+    rows = [
+        {"account_id": checking, "amount": 50, "type": "income", "description": "Paycheck"},
+        {"account_id": checking, "amount": 20, "type": "expense", "category": "Food"},
+        {"account_id": savings, "amount": 5, "type": "Income"},
+        {"account_id": checking, "amount": -1, "type": "expense"},
+        {"account_id": checking, "amount": 1, "type": "transfer"},
+        {"account_id": 9999, "amount": 1, "type": "expense"},
+        {"account_id": checking, "type": "expense"},
+    ]
+    response = client.post("/transactions/bulk", json=rows, headers=auth_headers)
+    assert response.status_code == 200
+    data = response.json()
+    assert data["created"] == 3
+    assert [e["index"] for e in data["errors"]] == [3, 4, 5, 6]
+
+    test_db.expire_all()
+    assert test_db.get(Account, checking).balance == 130.0
+    assert test_db.get(Account, savings).balance == 5.0
+    assert test_db.query(Transaction).filter_by(description="Paycheck").count() == 1
+
+def test_bulk_ndjson_and_plaid_duplicates(client, auth_headers, accounts, test_db):
+    checking, _ = accounts
+    rows = [
+        {"account_id": checking, "amount": 1, "type": "expense", "plaid_transaction_id": "p-1"},
+        {"account_id": checking, "amount": 2, "type": "expense", "plaid_transaction_id": "p-1"},
+        {"account_id": checking, "amount": 3, "type": "expense", "plaid_transaction_id": "p-2"},
+    ]
+    body = "\n".join(json.dumps(row) for row in rows) + "\n"
+    headers = {**auth_headers, "Content-Type": "application/x-ndjson"}
+    response = client.post("/transactions/bulk", content=body, headers=headers)
+    assert response.status_code == 200
+    data = response.json()
+    assert data["created"] == 2
+    assert data["errors"] == [{"index": 1, "detail": "Duplicate plaid_transaction_id"}]
+
+    # Resending is rejected row by row rather than failing the batch
+    response = client.post("/transactions/bulk", content=body, headers=headers)
+    assert response.json()["created"] == 0
+    assert len(response.json()["errors"]) == 3
+
+    test_db.expire_all()
+    assert test_db.get(Account, checking).balance == 126.0
+
+def test_bulk_malformed_body(client, auth_headers, accounts):
+    response = client.post(
+        "/transactions/bulk",
+        content="{not json",
+        headers={**auth_headers, "Content-Type": "application/json"},
+    )
+    assert response.status_code == 400
+    response = client.post("/transactions/bulk", json={"amount": 1}, headers=auth_headers)
+    assert response.status_code == 400
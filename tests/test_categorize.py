@@ -0,0 +1,177 @@
+import random
+import re
+import sys
+import pytest
+from app.models import Account, CategoryRule, Transaction
+from app.services import categorize, rollups
+from app.services.categorize import Categorizer, Rule
+
+# ----------------------------
+# Fixtures
+# ----------------------------
+@pytest.fixture(scope="module")
+def account(test_db, test_user):
+    checking = Account(user_id=test_user.id, name="Checking", account_type="checking", balance=0.0)
+    test_db.add(checking)
+    test_db.add(CategoryRule(user_id=None, category="Transport", merchant="uber"))
+    test_db.commit()
+    return checking.id
+
+def add_rule(client, auth_headers, **body):
+    response = client.post("/rules/", json=body, headers=auth_headers)
+    assert response.status_code == 201, response.text
+    return response.json()
+
+def create(client, auth_headers, account, description, amount=10.0, **extra):
+    body = {"account_id": account, "amount": amount, "type": "expense", "description": description, **extra}
+    response = client.post("/transactions/", json=body, headers=auth_headers)
+    assert response.status_code == 200
+    return response.json()
+
+def naive(rules, description, amount):
+    for rule in sorted(rules, key=Rule.precedence):
+        text = description or ""
+        if not rule.amount_matches(amount):
+            continue
+        if rule.merchant and rule.merchant.lower() not in text.lower():
+            continue
+        if rule.pattern and not re.search(rule.pattern, text, re.IGNORECASE):
+            continue
+        return rule
+    return None
+
+# ----------------------------
+# Tests
+# ----------------------------
+def test_precedence_and_amount_ranges():
+    categorizer = Categorizer([
+        Rule(1, None, "Global", merchant="coffee"),
+        Rule(2, 5, "Small", merchant="coffee", max_amount=10),
+        Rule(3, 5, "Beans", pattern=r"\bbeans?\b", priority=1),
+        Rule(4, 5, "Big", min_amount=500),
+    ])
+    assert categorizer.classify("Corner COFFEE", 4).category == "Small"
+    assert categorizer.classify("Corner coffee", 40).category == "Global"
+    assert categorizer.classify("coffee beans", 4).category == "Beans"
+    assert categorizer.classify("coffee beanstalk", 4).category == "Small"
+    assert categorizer.classify(None, 900).category == "Big"
+    assert categorizer.classify("Rent", 40) is None
+
+def test_batch_matches_rule_by_rule_evaluation():
+    rng = random.Random(7)
+    words = ["uber", "uber eats", "star", "starbucks", "amzn mktp", "shell", "rent", "air", "airline", "Café"]
+    rules = []
+    for rule_id in range(1, 80):
+        word = rng.choice(words)
+        bounds = {"min_amount": rng.choice([None, 20.0]), "max_amount": rng.choice([None, 200.0])}
+        kind = rng.random()
+        if kind < 0.6:
+            rules.append(Rule(rule_id, rng.choice([None, 1]), f"c{rule_id}", merchant=word, priority=rng.randint(0, 2), **bounds))
+        elif kind < 0.9:
+            rules.append(Rule(rule_id, rng.choice([None, 1]), f"c{rule_id}", pattern=rf"\b{re.escape(word)}\b", **bounds))
+        else:
+            rules.append(Rule(rule_id, None, f"c{rule_id}", min_amount=150.0, max_amount=rng.choice([None, 300.0])))
+    rows = [
+        (" ".join(rng.choice(words + ["pos", "#42", "\n"]) for _ in range(rng.randint(0, 4))) or None, rng.uniform(1, 400))
+        for _ in range(2000)
+    ]
+    assert Categorizer(rules).classify_many(rows) == [naive(rules, *row) for row in rows]
+
+def test_rule_validation(client, auth_headers, account):
+    bad = [
+        {"category": "X"},
+        {"category": "X", "merchant": "a", "pattern": "b"},
+        {"category": "X", "merchant": "  "},
+        {"category": "X", "pattern": "(unclosed"},
+        {"category": "X", "pattern": "(a+)+$"},
+        {"category": "X", "pattern": "^(uber|lyft)*$"},
+        {"category": "X", "min_amount": 10, "max_amount": 5},
+    ]
+    for body in bad:
+        assert client.post("/rules/", json=body, headers=auth_headers).status_code == 400
+
+def test_backtracking_patterns_are_refused():
+    for pattern in [r"(a+)+$", r"(\w*\s?)*x", r"(a|ab)*c", r"((ab){2,})+", r"(?:x{1,5})*y"]:
+        assert categorize.backtracks(pattern), pattern
+    harmless = [r"^uber\b", r"(uber|lyft) \d+", r"[a-z]+ store #\d*", r"(pos )?coffee"]
+    if sys.version_info >= (3, 11):
+        harmless.append(r"a*+b*+")  # possessive repeats are new in 3.11
+    for pattern in harmless:
+        assert not categorize.backtracks(pattern), pattern
+
+    # One stored before the check never matches instead of stalling
+    rule = Rule(1, None, "X", pattern=r"(a+)+$")
+    assert Categorizer([rule]).classify("a" * 40 + "!", 1.0) is None
+
+def test_pattern_rules_share_a_prefilter():
+    categorizer = Categorizer([
+        Rule(1, None, "Ride", pattern=r"(uber|lyft) \d+"),
+        Rule(2, None, "Twice", pattern=r"(\w+) \1"),
+        Rule(3, None, "Spaced", pattern=r"(?x) coffee \s shop"),
+        Rule(4, None, "Named", pattern=r"(?P<drink>tea|mate)\b"),
+        Rule(5, None, "Store", pattern=r"store #\d+"),
+    ])
+    # Backreferences, named groups and global flags keep their own search
+    assert categorizer._prefiltered == {0, 4}
+    rows = [("UBER 12", 1), ("bye bye", 1), ("coffee shop", 1), ("green tea", 1), ("store #9", 1), ("lyft", 1)]
+    assert [rule and rule.category for rule in categorizer.classify_many(rows)] == \
+        ["Ride", "Twice", "Spaced", "Named", "Store", None]
+
+def test_rules_api_lists_own_and_global_rules(client, auth_headers, account):
+    rule = add_rule(client, auth_headers, category="Coffee", merchant="bean", priority=3)
+    listed = client.get("/rules/", headers=auth_headers).json()
+    assert [(r["category"], r["user_id"] is None) for r in listed][:1] == [("Coffee", False)]
+    assert any(r["category"] == "Transport" and r["user_id"] is None for r in listed)
+
+    global_id = next(r["id"] for r in listed if r["user_id"] is None)
+    assert client.delete(f"/rules/{global_id}", headers=auth_headers).status_code == 404
+    assert client.delete(f"/rules/{rule['id']}", headers=auth_headers).status_code == 204
+    assert client.delete(f"/rules/{rule['id']}", headers=auth_headers).status_code == 404
+
+def test_create_update_and_bulk_apply_rules(client, auth_headers, account):
+    created = create(client, auth_headers, account, "UBER *TRIP")
+    assert created["category"] == "Transport" and created["category_rule_id"] is not None
+    # A category given by the client wins
+    assert create(client, auth_headers, account, "Uber", category="Work")["category_rule_id"] is None
+
+    body = {"account_id": account, "amount": 10.0, "type": "expense", "description": "Uber Eats", "category": "Dining"}
+    updated = client.put(f"/transactions/{created['id']}", json=body, headers=auth_headers).json()
+    assert (updated["category"], updated["category_rule_id"]) == ("Dining", None)
+
+    rows = [{"account_id": account, "amount": 5.0, "type": "expense", "description": d} for d in ("uber pool", "Bakery")]
+    rows.append({**rows[0], "category": "Manual"})
+    assert client.post("/transactions/bulk", json=rows, headers=auth_headers).json()["created"] == 3
+    listed = client.get("/transactions/", params={"limit": 3}, headers=auth_headers).json()["items"]
+    assert sorted((t["description"], t["category"]) for t in listed) == [
+        ("Bakery", None), ("uber pool", "Manual"), ("uber pool", "Transport"),
+    ]
+
+def test_recategorize_keeps_manual_categories(client, auth_headers, account, test_db, test_user):
+    bakery = create(client, auth_headers, account, "Bakery on Main")
+    manual = create(client, auth_headers, account, "Bakery again", category="Treats")
+    add_rule(client, auth_headers, category="Food", merchant="bakery")
+
+    first = client.post("/transactions/recategorize", headers=auth_headers).json()
+    assert first["updated"] >= 1
+    again = client.post("/transactions/recategorize", headers=auth_headers).json()
+    assert again["updated"] == 0 and again["scanned"] == first["scanned"]
+
+    by_id = {t["id"]: t for t in client.get("/transactions/", params={"limit": 500}, headers=auth_headers).json()["items"]}
+    assert by_id[bakery["id"]]["category"] == "Food"
+    assert by_id[manual["id"]]["category"] == "Treats"
+    assert rollups.verify(test_db) == []
+
+def test_recategorize_in_chunks_clears_stale_rule_categories(client, auth_headers, test_db, test_user, account):
+    rows = [{"account_id": account, "amount": 30.0, "type": "expense", "description": f"Fitness {n}"} for n in range(5)]
+    assert client.post("/transactions/bulk", json=rows, headers=auth_headers).json()["created"] == 5
+    rule = CategoryRule(user_id=test_user.id, category="Gym", merchant="fitness", priority=9)
+    test_db.add(rule)
+    test_db.commit()
+    assert categorize.recategorize(test_db, test_user.id, chunk_size=2)["updated"] == 5
+    assert test_db.query(Transaction).filter(Transaction.category == "Gym").count() == 5
+
+    test_db.delete(rule)
+    test_db.commit()
+    categorize.recategorize(test_db, test_user.id, chunk_size=2)
+    assert test_db.query(Transaction).filter(Transaction.category == "Gym").count() == 0
+    assert rollups.verify(test_db) == []
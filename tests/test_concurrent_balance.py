@@ -0,0 +1,98 @@
+from concurrent.futures import ThreadPoolExecutor
+import pytest
+from fastapi.testclient import TestClient
+from sqlalchemy import case, func
+from sqlalchemy.orm import sessionmaker
+from app.auth_utils import create_access_token
+from app.config import Settings
+from app.database import get_db, make_engine
+from app.main import app
+from app.models import Account, Base, Transaction, User
+from app.services import rollups
+
+CREATES = 2000
+WORKERS = 16
+
+# ----------------------------
+# Fixtures
+# ----------------------------
+@pytest.fixture(scope="module")
+def file_db(tmp_path_factory):
+    """A file-backed SQLite database with a real pool, so writers actually contend."""
+    url = f"sqlite:///{tmp_path_factory.mktemp('concurrency') / 'balance.db'}"
+    engine = make_engine(Settings(database_url=url, db_pool_size=WORKERS, sqlite_busy_timeout_ms=60000))
+    Base.metadata.create_all(bind=engine)
+    yield engine, sessionmaker(autocommit=False, autoflush=False, bind=engine)
+    engine.dispose()
+
+@pytest.fixture(scope="module")
+def stress_client(file_db):
+    _, FileSessionLocal = file_db
+    with FileSessionLocal() as db:
+        user = User(email="stress@example.com", hashed_password="fakehashedpassword")
+        db.add(user)
+        db.commit()
+        token = create_access_token({"sub": str(user.id)})
+
+    def override_get_db():
+        db = FileSessionLocal()
+        try:
+            yield db
+        finally:
+            db.close()
+
+    previous = app.dependency_overrides.get(get_db)
+    app.dependency_overrides[get_db] = override_get_db
+    with TestClient(app) as c:
+        c.headers["Authorization"] = f"Bearer {token}"
+        yield c
+    if previous is not None:
+        app.dependency_overrides[get_db] = previous
+    else:
+        app.dependency_overrides.pop(get_db, None)
+
+# ----------------------------
+# Tests
+# ----------------------------
+def test_concurrent_writes_keep_balance_consistent(stress_client, file_db):
+    response = stress_client.post("/accounts/", json={"name": "Shared", "account_type": "checking", "balance": 0.0})
+    account_id = response.json()["id"]
+
+    def create(n):
+        kind = "income" if n % 2 else "expense"
+        payload = {"account_id": account_id, "amount": n % 97 + 1, "type": kind, "category": f"c{n % 5}"}
+        response = stress_client.post("/transactions/", json=payload)
+        assert response.status_code == 200, response.text
+        transaction_id = response.json()["id"]
+        if n % 3 == 0:
+            assert stress_client.delete(f"/transactions/{transaction_id}").status_code == 204
+        elif n % 3 == 1:
+            response = stress_client.put(f"/transactions/{transaction_id}", json={**payload, "amount": 1})
+            assert response.status_code == 200, response.text
+
+    with ThreadPoolExecutor(WORKERS) as pool:
+        list(pool.map(create, range(CREATES)))
+
+    _, FileSessionLocal = file_db
+    with FileSessionLocal() as db:
+        signed = func.sum(case((Transaction.type == "income", Transaction.amount), else_=-Transaction.amount))
+        expected, remaining = db.query(signed, func.count(Transaction.id)).filter(
+            Transaction.account_id == account_id
+        ).one()
+        assert remaining == CREATES - len(range(0, CREATES, 3))
+        assert db.get(Account, account_id).balance == pytest.approx(expected)
+        assert rollups.verify(db, db.get(Account, account_id).user_id) == []
+
+def test_concurrent_deletes_reverse_once(stress_client, file_db):
+    response = stress_client.post("/accounts/", json={"name": "Race", "account_type": "checking", "balance": 0.0})
+    account_id = response.json()["id"]
+    payload = {"account_id": account_id, "amount": 10, "type": "expense"}
+    transaction_id = stress_client.post("/transactions/", json=payload).json()["id"]
+
+    with ThreadPoolExecutor(WORKERS) as pool:
+        codes = list(pool.map(lambda _: stress_client.delete(f"/transactions/{transaction_id}").status_code, range(WORKERS)))
+
+    assert sorted(codes) == [204] + [404] * (WORKERS - 1)
+    _, FileSessionLocal = file_db
+    with FileSessionLocal() as db:
+        assert db.get(Account, account_id).balance == 0.0
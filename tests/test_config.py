@@ -0,0 +1,58 @@
+import asyncio
+import pytest
+from sqlalchemy import text
+from app.config import Settings
+from app.database import engine_options, make_async_engine, make_engine
+
+# ----------------------------
+# Tests
+# ----------------------------
+def test_settings_from_env(monkeypatch):
+    monkeypatch.setenv("DATABASE_URL", "postgresql://app:pw@db/budget")
+    monkeypatch.setenv("ASYNC_DB", "true")
+    monkeypatch.setenv("DB_POOL_SIZE", "20")
+    monkeypatch.setenv("DB_STATEMENT_TIMEOUT_MS", "1500")
+    settings = Settings.from_env()
+    assert settings.database_url == "postgresql://app:pw@db/budget"
+    assert settings.async_db is True
+    assert settings.db_pool_size == 20
+    assert settings.db_statement_timeout_ms == 1500
+
+def test_postgres_engine_options():
+    settings = Settings(db_pool_size=12, db_max_overflow=3, db_statement_timeout_ms=2000)
+    options = engine_options("postgresql://app:pw@db/budget", settings)
+    assert options["pool_size"] == 12
+    assert options["max_overflow"] == 3
+    assert options["connect_args"] == {"options": "-c statement_timeout=2000"}
+
+    options = engine_options("postgresql+asyncpg://app:pw@db/budget", settings, is_async=True)
+    assert options["connect_args"] == {"server_settings": {"statement_timeout": "2000"}}
+
+def sqlite_pragmas(conn):
+    return {
+        name: conn.execute(text(f"PRAGMA {name}")).scalar()
+        for name in ("journal_mode", "synchronous", "mmap_size", "cache_size")
+    }
+
+def test_sqlite_pragmas(tmp_path):
+    settings = Settings(database_url=f"sqlite:///{tmp_path / 'app.db'}", sqlite_mmap_size=1 << 20)
+    engine = make_engine(settings)
+    with engine.connect() as conn:
+        pragmas = sqlite_pragmas(conn)
+    engine.dispose()
+    assert pragmas == {"journal_mode": "wal", "synchronous": 1, "mmap_size": 1 << 20, "cache_size": -64000}
+
+def test_async_sqlite_pragmas(tmp_path):
+    pytest.importorskip("aiosqlite")
+    settings = Settings(database_url=f"sqlite:///{tmp_path / 'app.db'}")
+
+    async def read_pragmas():
+        engine = make_async_engine(settings)
+        async with engine.connect() as conn:
+            pragmas = await conn.run_sync(sqlite_pragmas)
+        await engine.dispose()
+        return pragmas
+
+    pragmas = asyncio.run(read_pragmas())
+    assert pragmas["journal_mode"] == "wal"
+    assert pragmas["synchronous"] == 1
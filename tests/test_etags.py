@@ -0,0 +1,98 @@
+import pytest
+from sqlalchemy import event
+from app.auth_utils import create_access_token
+from app.conditional import matches
+from app.models import User
+from tests.conftest import engine
+
+# ----------------------------
+# Helpers
+# ----------------------------
+@pytest.fixture
+def statements(client):
+    seen = []
+
+    def before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        seen.append(statement)
+
+    event.listen(engine, "before_cursor_execute", before_cursor_execute)
+    yield seen
+    event.remove(engine, "before_cursor_execute", before_cursor_execute)
+
+@pytest.fixture(scope="module")
+def account_id(client, auth_headers):
+    response = client.post("/accounts/", json={"name": "Checking", "account_type": "checking", "balance": 100},
+                           headers=auth_headers)
+    return response.json()["id"]
+
+def tag_of(client, headers, path, **params):
+    response = client.get(path, params=params, headers=headers)
+    assert response.status_code == 200
+    assert response.headers["cache-control"] == "private, no-cache"
+    return response.headers["etag"]
+
+def revalidate(client, headers, path, tag, **params):
+    return client.get(path, params=params, headers={**headers, "If-None-Match": tag})
+
+# ----------------------------
+# Tests
+# ----------------------------
+@pytest.mark.parametrize("path", ["/accounts/", "/transactions/"])
+def test_unchanged_data_answers_304_without_reading_tables(client, auth_headers, account_id, statements, path):
+    tag = tag_of(client, auth_headers, path)
+    statements.clear()
+
+    response = revalidate(client, auth_headers, path, tag)
+    assert response.status_code == 304
+    assert response.content == b""
+    assert response.headers["etag"] == tag
+    # Only the users row holding the version is read
+    assert statements and all("transactions" not in sql and "accounts" not in sql for sql in statements)
+
+    # Weak comparison, lists and * all match; another tag does not
+    assert revalidate(client, auth_headers, path, f'"x", {tag.removeprefix("W/")}').status_code == 304
+    assert revalidate(client, auth_headers, path, "*").status_code == 304
+    assert revalidate(client, auth_headers, path, 'W/"1-999"').status_code == 200
+
+def test_every_write_changes_the_tag(client, auth_headers, account_id):
+    body = {"account_id": account_id, "amount": 10, "type": "expense", "description": "Cafe"}
+    tags = [tag_of(client, auth_headers, "/transactions/")]
+    created = client.post("/transactions/", json=body, headers=auth_headers).json()
+    tags.append(tag_of(client, auth_headers, "/transactions/"))
+    client.post("/transactions/bulk", json=[body, body], headers=auth_headers)
+    tags.append(tag_of(client, auth_headers, "/transactions/"))
+    # Creating a rule changes no rows, so it keeps the tag; recategorize applies it
+    client.post("/rules/", json={"category": "Coffee", "merchant": "cafe"}, headers=auth_headers)
+    tags.append(tag_of(client, auth_headers, "/transactions/"))
+    client.post("/transactions/recategorize", headers=auth_headers)
+    tags.append(tag_of(client, auth_headers, "/transactions/"))
+    client.post("/accounts/", json={"name": "Card", "account_type": "credit", "balance": 0}, headers=auth_headers)
+    tags.append(tag_of(client, auth_headers, "/transactions/"))
+    assert [old != new for old, new in zip(tags, tags[1:])] == [True, True, False, True, True]
+
+    before = tag_of(client, auth_headers, "/accounts/")
+    client.put(f"/transactions/{created['id']}", json={**body, "amount": 12}, headers=auth_headers)
+    after_update = tag_of(client, auth_headers, "/accounts/")
+    client.delete(f"/transactions/{created['id']}", headers=auth_headers)
+    assert len({before, after_update, tag_of(client, auth_headers, "/accounts/")}) == 3
+    # The stale tag now gets the full, current body
+    assert revalidate(client, auth_headers, "/accounts/", before).status_code == 200
+
+def test_failed_writes_and_other_users_keep_tags_apart(client, auth_headers, test_db, account_id):
+    tag = tag_of(client, auth_headers, "/transactions/")
+    response = client.post("/transactions/", json={"account_id": account_id, "amount": -5, "type": "expense"},
+                           headers=auth_headers)
+    assert response.status_code == 400
+    assert revalidate(client, auth_headers, "/transactions/", tag).status_code == 304
+
+    other = User(email="other@example.com", hashed_password="x")
+    test_db.add(other)
+    test_db.commit()
+    other_headers = {"Authorization": f"Bearer {create_access_token({'sub': str(other.id)})}"}
+    assert revalidate(client, other_headers, "/transactions/", tag).status_code == 200
+
+def test_matches_parses_if_none_match():
+    assert matches('W/"1-2"', 'W/"1-2"')
+    assert matches(' "0-0" , "1-2"', 'W/"1-2"')
+    assert not matches(None, 'W/"1-2"')
+    assert not matches('"1-20"', 'W/"1-2"')
@@ -0,0 +1,80 @@
+import pytest
+from app.services import forecast
+
+# ----------------------------
+# Fixtures
+# ----------------------------
+@pytest.fixture(autouse=True)
+def empty_cache():
+    # User ids restart in every test module's fresh database
+    forecast._cache.clear()
+
+@pytest.fixture(scope="module")
+def account(client, auth_headers):
+    response = client.post("/accounts/", json={"name": "Checking", "account_type": "checking", "balance": 0},
+                           headers=auth_headers)
+    account_id = response.json()["id"]
+    rows = [
+        {"account_id": account_id, "amount": 3000, "type": "income", "category": "Salary",
+         "description": "Employer Payroll", "date": f"2025-{month:02d}-01T09:00:00"}
+        for month in (3, 4, 5, 6)
+    ] + [
+        # A weekly class that lapsed in March
+        {"account_id": account_id, "amount": 25, "type": "expense", "category": "Fitness",
+         "description": "Yoga Studio", "date": f"2025-03-{day:02d}T18:00:00"}
+        for day in (3, 10, 17, 24)
+    ] + [
+        {"account_id": account_id, "amount": amount, "type": "expense", "category": "Groceries",
+         "description": f"Market {name}", "date": when}
+        for amount, name, when in ((400, "North", "2025-03-15T12:00:00"), (300, "South", "2025-04-20T12:00:00"),
+                                   (220, "East", "2025-05-09T12:00:00"))
+    ]
+    assert client.post("/transactions/bulk", json=rows, headers=auth_headers).json()["created"] == len(rows)
+    return account_id
+
+def get_forecast(client, auth_headers, account_id, **params):
+    response = client.get("/accounts/forecast", params={"as_of": "2025-06-10", "days": 30, **params},
+                          headers=auth_headers)
+    assert response.status_code == 200
+    body = response.json()
+    return body, next(a for a in body["accounts"] if a["account_id"] == account_id)
+
+# ----------------------------
+# Tests
+# ----------------------------
+def test_forecast_combines_recurring_and_category_averages(client, auth_headers, account):
+    body, projected = get_forecast(client, auth_headers, account)
+    assert (body["start"], body["days"]) == ("2025-06-11", 30)
+
+    # Mar-May hold 9000 of salary and 100 of yoga, all of it recurring, and
+    # 920 of groceries over 92 days: -10/day of drift
+    opening = 12000 - 920 - 100
+    assert projected["balance"] == opening
+    assert projected["daily_drift"] == -10.0
+    balances = projected["balances"]
+    assert len(balances) == 30
+    assert balances[0] == opening - 10
+    # Payday on July 1st, day 20; the lapsed yoga series is not scheduled
+    assert balances[19] == opening - 10 * 20
+    assert balances[20] == opening - 10 * 21 + 3000
+    assert (projected["lowest_balance"], projected["lowest_date"]) == (opening - 10 * 20, "2025-06-30")
+
+def test_forecast_is_cached_until_a_write(client, auth_headers, account, monkeypatch):
+    builds = []
+    build = forecast.build
+    monkeypatch.setattr(forecast, "build", lambda *args: builds.append(args) or build(*args))
+
+    first = get_forecast(client, auth_headers, account)[1]
+    assert get_forecast(client, auth_headers, account)[1] == first
+    assert get_forecast(client, auth_headers, account, days=10)[1]["balances"] == first["balances"][:10]
+    assert len(builds) == 2
+
+    client.post("/transactions/", json={"account_id": account, "amount": 50, "type": "expense",
+                                        "description": "Hardware store", "date": "2025-06-09T10:00:00"},
+                headers=auth_headers)
+    assert get_forecast(client, auth_headers, account)[1]["balance"] == first["balance"] - 50
+    assert len(builds) == 3
+
+def test_forecast_validates_horizon(client, auth_headers):
+    assert client.get("/accounts/forecast", params={"days": 0}, headers=auth_headers).status_code == 422
+    assert client.get("/accounts/forecast", params={"days": 400}, headers=auth_headers).status_code == 422
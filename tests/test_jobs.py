@@ -0,0 +1,180 @@
+import pytest
+from app import jobs
+from app.auth_utils import create_access_token
+from app.jobs import JobRunner, LeaseLost
+from app.models import Account, Job, Transaction, User
+from tests.conftest import TestingSessionLocal
+
+# ----------------------------
+# Fixtures
+# ----------------------------
+@pytest.fixture(scope="module")
+def account_id(client, auth_headers):
+    response = client.post("/accounts/", json={"name": "Checking", "account_type": "checking", "balance": 0},
+                           headers=auth_headers)
+    return response.json()["id"]
+
+@pytest.fixture
+def small_chunks(monkeypatch):
+    monkeypatch.setattr(jobs, "IMPORT_CHUNK", 3)
+    monkeypatch.setattr(jobs, "EXPORT_CHUNK", 4)
+
+@pytest.fixture(scope="module")
+def undated(test_db):
+    # Legacy rows without a date, more than one export chunk of them
+    stopped = test_db.query(Transaction.id).filter(Transaction.description.like("Stopped %"))
+    test_db.query(Transaction).filter(Transaction.id.in_(stopped.scalar_subquery())).update(
+        {Transaction.date: None}, synchronize_session=False
+    )
+    test_db.commit()
+
+def make_runner(**options):
+    return JobRunner(TestingSessionLocal, threads=1, processes=options.pop("processes", 0), **options)
+
+def drain(client, runner):
+    """Run every queued job on the app's event loop, then stop the runner."""
+    client.portal.call(runner.drain)
+    client.portal.call(runner.stop)
+
+def submit(client, headers, kind, **params):
+    response = client.post("/jobs/", json={"kind": kind, "params": params}, headers=headers)
+    assert response.status_code == 202
+    assert response.json()["status"] == "queued"
+    return response.json()["id"]
+
+def fetch(client, headers, job_id):
+    response = client.get(f"/jobs/{job_id}", headers=headers)
+    assert response.status_code == 200
+    return response.json()
+
+def import_rows(account_id, count, prefix="Row"):
+    return [{"account_id": account_id, "amount": n + 1, "type": "expense", "description": f"{prefix} {n}"}
+            for n in range(count)]
+
+# ----------------------------
+# Tests
+# ----------------------------
+def test_import_runs_in_chunks_and_reports_progress(client, auth_headers, account_id, test_db, small_chunks):
+    rows = import_rows(account_id, 7, "Import") + [{"account_id": account_id, "amount": -1, "type": "expense"}]
+    job_id = submit(client, auth_headers, "import", rows=rows)
+    drain(client, make_runner())
+
+    job = fetch(client, auth_headers, job_id)
+    assert (job["status"], job["progress"], job["total"], job["attempts"]) == ("succeeded", 8, 8, 1)
+    assert job["result"]["created"] == 7
+    assert [error["index"] for error in job["result"]["errors"]] == [7]
+    assert test_db.query(Transaction).filter(Transaction.description.like("Import %")).count() == 7
+    test_db.expire_all()
+    assert test_db.get(Account, account_id).balance == -sum(range(1, 8))
+
+def test_import_validation_runs_on_the_process_pool(client, auth_headers, account_id, test_db):
+    job_id = submit(client, auth_headers, "import", rows=import_rows(account_id, 3, "Pooled"))
+    drain(client, make_runner(processes=1))
+    assert fetch(client, auth_headers, job_id)["result"]["created"] == 3
+
+def test_restarted_worker_resumes_from_the_checkpoint(client, auth_headers, account_id, test_db, small_chunks):
+    job_id = submit(client, auth_headers, "import", rows=import_rows(account_id, 8, "Resumed"))
+
+    # The first runner commits one chunk, then dies without a word
+    crashed = make_runner()
+    job = crashed._claim()
+    assert not crashed._step(job)
+    assert fetch(client, auth_headers, job_id)["progress"] == 3
+
+    # Its lease has not run out yet, so the job is not up for grabs
+    drain(client, make_runner())
+    assert fetch(client, auth_headers, job_id)["status"] == "running"
+
+    drain(client, make_runner(lease_seconds=0))
+    job_row = fetch(client, auth_headers, job_id)
+    assert (job_row["status"], job_row["attempts"], job_row["result"]["created"]) == ("succeeded", 2, 8)
+    assert test_db.query(Transaction).filter(Transaction.description.like("Resumed %")).count() == 8
+
+    # The first runner waking up again cannot commit over the new owner
+    with pytest.raises(LeaseLost):
+        crashed._step(job)
+    assert test_db.query(Transaction).filter(Transaction.description.like("Resumed %")).count() == 8
+
+def test_stopping_requeues_the_running_job(client, auth_headers, account_id, small_chunks):
+    job_id = submit(client, auth_headers, "import", rows=import_rows(account_id, 5, "Stopped"))
+    runner = make_runner()
+    job = runner._claim()
+    runner._stopping = True
+    client.portal.call(runner.run, job)
+    job_row = fetch(client, auth_headers, job_id)
+    assert (job_row["status"], job_row["attempts"]) == ("queued", 0)
+
+    # Rolling restarts requeue it again and again without using up attempts
+    for _ in range(3):
+        job = runner._claim()
+        client.portal.call(runner.run, job)
+    drain(client, make_runner(max_attempts=1))
+    job_row = fetch(client, auth_headers, job_id)
+    assert (job_row["status"], job_row["attempts"]) == ("succeeded", 1)
+    assert (job_row["progress"], job_row["result"]["created"]) == (5, 5)
+
+def test_recategorize_and_rollup_jobs(client, auth_headers, account_id, test_db):
+    client.post("/rules/", json={"category": "Imported", "merchant": "import"}, headers=auth_headers)
+    recategorize_id = submit(client, auth_headers, "recategorize")
+    rebuild_id = submit(client, auth_headers, "rebuild_rollups")
+    drain(client, make_runner())
+
+    job = fetch(client, auth_headers, recategorize_id)
+    assert job["status"] == "succeeded"
+    assert job["result"]["updated"] == 7
+    assert job["progress"] == job["total"] == job["result"]["scanned"]
+    assert test_db.query(Transaction).filter(Transaction.category == "Imported").count() == 7
+
+    job = fetch(client, auth_headers, rebuild_id)
+    assert job["status"] == "succeeded"
+    assert job["result"]["rollup_rows"] > 0
+
+@pytest.mark.parametrize("format", ["csv", "ndjson"])
+def test_export_job_matches_the_streamed_export(client, auth_headers, account_id, small_chunks, undated, tmp_path,
+                                                monkeypatch, format):
+    monkeypatch.setattr(jobs.settings, "jobs_dir", str(tmp_path))
+    job_id = submit(client, auth_headers, "export", format=format)
+    assert client.get(f"/jobs/{job_id}/file", headers=auth_headers).status_code == 404
+    drain(client, make_runner())
+
+    job = fetch(client, auth_headers, job_id)
+    assert job["status"] == "succeeded"
+    assert job["progress"] == job["total"] == job["result"]["rows"]
+    downloaded = client.get(f"/jobs/{job_id}/file", headers=auth_headers)
+    assert downloaded.status_code == 200
+    streamed = client.get("/transactions/export", params={"format": format}, headers=auth_headers)
+    assert downloaded.content == streamed.content
+
+def test_failing_job_records_its_error(client, auth_headers, monkeypatch):
+    def broken(db, user_id):
+        raise RuntimeError("disk full")
+
+    monkeypatch.setattr(jobs.rollups, "recompute", broken)
+    job_id = submit(client, auth_headers, "rebuild_rollups")
+    drain(client, make_runner())
+    job = fetch(client, auth_headers, job_id)
+    assert (job["status"], job["error"]) == ("failed", "RuntimeError: disk full")
+    assert job["finished_at"] is not None
+
+def test_jobs_validate_params_and_stay_private(client, auth_headers, test_db):
+    for body in ({"kind": "defragment"}, {"kind": "import", "params": {"rows": []}},
+                 {"kind": "export", "params": {"format": "xml"}}, {"kind": "recategorize", "params": {"x": 1}}):
+        assert client.post("/jobs/", json=body, headers=auth_headers).status_code == 400
+
+    job_id = submit(client, auth_headers, "rebuild_rollups")
+    assert [job["id"] for job in client.get("/jobs/", headers=auth_headers).json()][0] == job_id
+
+    other = User(email="jobs-other@example.com", hashed_password="x")
+    test_db.add(other)
+    test_db.commit()
+    other_headers = {"Authorization": f"Bearer {create_access_token({'sub': str(other.id)})}"}
+    assert client.get(f"/jobs/{job_id}", headers=other_headers).status_code == 404
+    assert client.get("/jobs/", headers=other_headers).json() == []
+
+def test_jobs_past_their_attempts_fail(client, auth_headers, test_db):
+    job_id = submit(client, auth_headers, "rebuild_rollups")
+    test_db.query(Job).filter(Job.id == job_id).update({Job.attempts: 3})
+    test_db.commit()
+    drain(client, make_runner(max_attempts=3))
+    job = fetch(client, auth_headers, job_id)
+    assert (job["status"], job["error"]) == ("failed", "Gave up after 3 attempts")
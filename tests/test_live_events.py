@@ -0,0 +1,84 @@
+import asyncio
+import json
+import pytest
+from starlette.websockets import WebSocketDisconnect
+from app.auth_utils import create_access_token
+from app.events import EventBroker, broker
+
+# ----------------------------
+# Fixtures
+# ----------------------------
+@pytest.fixture(scope="module")
+def token(test_user):
+    return create_access_token({"sub": str(test_user.id)})
+
+# ----------------------------
+# Tests
+# ----------------------------
+def test_ws_requires_token(client):
+    with pytest.raises(WebSocketDisconnect) as exc:
+        with client.websocket_connect("/ws") as ws:
+            ws.receive_text()
+    assert exc.value.code == 1008
+
+    with pytest.raises(WebSocketDisconnect):
+        with client.websocket_connect("/ws?token=not-a-jwt") as ws:
+            ws.receive_text()
+
+def test_ws_pushes_changes(client, auth_headers, token):
+    with client.websocket_connect(f"/ws?token={token}") as ws:
+        response = client.post("/accounts/", json={"name": "Live", "account_type": "checking", "balance": 100.0}, headers=auth_headers)
+        account_id = response.json()["id"]
+        event = ws.receive_json()
+        assert event["type"] == "account.created"
+        assert event["account"] == {"id": account_id, "name": "Live", "account_type": "checking", "balance": 100.0}
+
+        payload = {"account_id": account_id, "amount": 30, "type": "expense", "category": "Food"}
+        transaction_id = client.post("/transactions/", json=payload, headers=auth_headers).json()["id"]
+        event = ws.receive_json()
+        assert event["type"] == "transaction.created"
+        assert event["transaction"]["id"] == transaction_id
+        assert event["account"] == {"id": account_id, "balance": 70.0}
+
+        client.put(f"/transactions/{transaction_id}", json={**payload, "amount": 50}, headers=auth_headers)
+        event = ws.receive_json()
+        assert (event["type"], event["transaction"]["amount"], event["account"]["balance"]) == ("transaction.updated", 50.0, 50.0)
+
+        client.post("/transactions/bulk", json=[{**payload, "type": "income", "amount": 5}] * 2, headers=auth_headers)
+        assert ws.receive_json() == {"type": "account.balance", "accounts": [{"id": account_id, "balance": 60.0}]}
+
+        client.delete(f"/transactions/{transaction_id}", headers=auth_headers)
+        assert ws.receive_json() == {
+            "type": "transaction.deleted",
+            "transaction": {"id": transaction_id, "account_id": account_id},
+            "account": {"id": account_id, "balance": 110.0},
+        }
+    assert broker.connections() == 0
+
+def test_ws_accepts_bearer_header(client, auth_headers):
+    with client.websocket_connect("/ws", headers=auth_headers) as ws:
+        client.post("/accounts/", json={"name": "Header", "account_type": "savings"}, headers=auth_headers)
+        assert ws.receive_json()["type"] == "account.created"
+
+def test_slow_subscriber_gets_resync():
+    async def scenario():
+        events = EventBroker(queue_size=3)
+        queue = events.subscribe("1")
+        for n in range(5):
+            events.publish("1", {"type": "tick", "n": n})
+        return [json.loads(queue.get_nowait()) for _ in range(queue.qsize())]
+
+    # The first overflow collapses the backlog; later events queue behind it
+    assert asyncio.run(scenario()) == [{"type": "resync"}, {"type": "tick", "n": 4}]
+
+def test_fan_out_to_many_idle_connections():
+    async def scenario():
+        events = EventBroker()
+        queues = [events.subscribe(str(n % 10)) for n in range(5000)]
+        delivered = events.publish("3", {"type": "tick"})
+        pending = sum(queue.qsize() for queue in queues)
+        for n, queue in enumerate(queues):
+            events.unsubscribe(str(n % 10), queue)
+        return delivered, pending, events.connections()
+
+    assert asyncio.run(scenario()) == (500, 500, 0)
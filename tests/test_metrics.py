@@ -0,0 +1,83 @@
+import logging
+import re
+import pytest
+from app import metrics
+from app.models import Account
+
+# ----------------------------
+# Fixtures
+# ----------------------------
+@pytest.fixture(scope="module")
+def account_id(test_db, test_user):
+    account = Account(user_id=test_user.id, name="Checking", account_type="checking", balance=0.0)
+    test_db.add(account)
+    test_db.commit()
+    return account.id
+
+@pytest.fixture(autouse=True)
+def fresh_metrics():
+    for metric in metrics.REGISTRY:
+        metric.clear()
+
+def sample(text, name, **labels):
+    """Value of one series in the Prometheus text output."""
+    wanted = ",".join(f'{key}="{value}"' for key, value in labels.items())
+    match = re.search(rf"^{re.escape(name)}\{{{re.escape(wanted)}\}} (\S+)$", text, re.MULTILINE)
+    assert match, f"{name}{{{wanted}}} not found"
+    return float(match.group(1))
+
+# ----------------------------
+# Tests
+# ----------------------------
+def test_metrics_by_route_template(client, auth_headers, account_id):
+    payload = {"account_id": account_id, "amount": 5, "type": "expense"}
+    ids = [client.post("/transactions/", json=payload, headers=auth_headers).json()["id"] for _ in range(2)]
+    for transaction_id in ids:
+        assert client.get(f"/transactions/{transaction_id}", headers=auth_headers).status_code == 200
+    assert client.get("/transactions/999999", headers=auth_headers).status_code == 404
+
+    response = client.get("/metrics")
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("text/plain")
+    text = response.text
+
+    route = "/transactions/{transaction_id}"
+    assert sample(text, "http_request_duration_seconds_count", method="GET", route=route, status="200") == 2
+    assert sample(text, "http_request_duration_seconds_count", method="GET", route=route, status="404") == 1
+    assert sample(text, "http_request_duration_seconds_bucket", method="GET", route=route, status="200", le="+Inf") == 2
+
+    # Every request issued SQL and it was attributed to the matched route
+    assert sample(text, "http_request_db_queries_bucket", method="POST", route="/transactions/", le="0") == 0
+    assert sample(text, "http_request_db_queries_count", method="POST", route="/transactions/") == 2
+    assert sample(text, "db_query_duration_seconds_count", route="/transactions/") >= 2 * 3
+
+def test_query_count_per_request(client, auth_headers, account_id):
+    client.get("/accounts/", headers=auth_headers)
+    text = client.get("/metrics").text
+    # The ETag's version lookup, then counts and last activity from one
+    # aggregate query, no lazy loads
+    assert sample(text, "http_request_db_queries_sum", method="GET", route="/accounts/") == 2
+
+def test_slow_query_log(client, auth_headers, account_id, monkeypatch, caplog):
+    monkeypatch.setattr(metrics.settings, "slow_query_ms", 0.0)
+    with caplog.at_level(logging.WARNING, logger="app.slow_query"):
+        client.get("/accounts/", headers=auth_headers)
+    messages = [record.getMessage() for record in caplog.records if record.name == "app.slow_query"]
+    assert messages
+    assert all(" on /accounts/: " in message for message in messages)
+    assert any("FROM accounts" in message for message in messages)
+
+def test_token_cache_stats(client, auth_headers, account_id):
+    def value(text, name):
+        match = re.search(rf"^token_cache_{name} (\S+)$", text, re.MULTILINE)
+        assert match, f"token_cache_{name} not found"
+        return float(match.group(1))
+
+    client.get("/accounts/", headers=auth_headers)
+    before = client.get("/metrics").text
+    client.get("/accounts/", headers=auth_headers)
+    after = client.get("/metrics").text
+    assert value(after, "hits_total") == value(before, "hits_total") + 1
+    assert value(after, "misses_total") == value(before, "misses_total")
+    assert value(after, "entries") >= 1
+    assert "# TYPE token_cache_evictions_total counter" in after
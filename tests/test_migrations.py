@@ -0,0 +1,128 @@
+import subprocess
+import sys
+import pytest
+from alembic.autogenerate import compare_metadata
+from alembic.runtime.migration import MigrationContext
+from sqlalchemy import create_engine, text
+from sqlalchemy.orm import Session
+from app.database import check_schema
+from app.models import Base
+from app.search import include_name, search_transactions
+from app.services import budgets, rollups
+from benchmarks.common import migrate
+
+# ----------------------------
+# Fixtures
+# ----------------------------
+@pytest.fixture
+def migrated(tmp_path):
+    url = f"sqlite:///{tmp_path / 'migrated.db'}"
+    migrate(url)
+    engine = create_engine(url)
+    yield engine
+    engine.dispose()
+
+# ----------------------------
+# Tests
+# ----------------------------
+def test_migrations_build_the_models_schema(migrated):
+    with migrated.connect() as connection:
+        context = MigrationContext.configure(connection, opts={"include_name": include_name})
+        assert compare_metadata(context, Base.metadata) == []
+
+def test_check_schema_passes_at_head(migrated):
+    check_schema(migrated)
+
+def test_check_schema_rejects_unmigrated_and_stale_databases(tmp_path, migrated):
+    empty = create_engine(f"sqlite:///{tmp_path / 'empty.db'}")
+    with pytest.raises(RuntimeError, match="no revision"):
+        check_schema(empty)
+    empty.dispose()
+
+    with migrated.begin() as connection:
+        connection.execute(text("UPDATE alembic_version SET version_num = '3ef05acc6607'"))
+    with pytest.raises(RuntimeError, match="alembic upgrade head"):
+        check_schema(migrated)
+
+def test_search_migration_indexes_existing_rows(tmp_path):
+    url = f"sqlite:///{tmp_path / 'search.db'}"
+    migrate(url, revision="5e8d03b6f1a2")
+    engine = create_engine(url)
+    with engine.begin() as connection:
+        connection.execute(text("INSERT INTO users (id, email, hashed_password) VALUES (3, 'a@example.com', 'x')"))
+        connection.execute(text("INSERT INTO accounts (id, user_id, name, account_type, balance) VALUES (1, 3, 'A', 'checking', 0)"))
+        connection.execute(text(
+            "INSERT INTO transactions (id, user_id, account_id, amount, type, description, category) "
+            "VALUES (7, 3, 1, 4.5, 'expense', 'Corner coffee', 'Dining')"
+        ))
+    migrate(url, fresh=False)
+    with Session(engine) as db:
+        assert [row["id"] for row in search_transactions(db, 3, "coff", 10)["items"]] == [7]
+    engine.dispose()
+
+def test_rollups_migration_rolls_up_existing_rows(tmp_path):
+    url = f"sqlite:///{tmp_path / 'rollups.db'}"
+    migrate(url, revision="9b1f4c2e7a3d")
+    engine = create_engine(url)
+    with engine.begin() as connection:
+        connection.execute(text("INSERT INTO users (id, email, hashed_password) VALUES (3, 'a@example.com', 'x')"))
+        connection.execute(text("INSERT INTO accounts (id, user_id, name, account_type, balance) VALUES (1, 3, 'A', 'checking', 0)"))
+        connection.execute(text(
+            "INSERT INTO transactions (user_id, account_id, amount, type, category, date) VALUES "
+            "(3, 1, 4.5, 'expense', 'Dining', '2025-03-02 09:00:00.000000'), "
+            "(3, 1, 10, 'Expense', 'Dining', '2025-03-31 12:00:00.000000'), "
+            "(3, 1, 7, 'expense', NULL, '2025-02-26 00:00:00.000000'), "
+            "(3, 1, 99, 'income', 'Salary', '2025-03-03 00:00:00.000000'), "
+            "(3, 1, 1, 'expense', 'Dining', NULL)"
+        ))
+    migrate(url, fresh=False)
+    with Session(engine) as db:
+        assert len(rollups.stored(db)) == 3
+        assert rollups.verify(db) == []
+    engine.dispose()
+
+def test_budgets_migration_fills_spend_counters(tmp_path):
+    url = f"sqlite:///{tmp_path / 'budgets.db'}"
+    migrate(url, revision="7c3d9e4f2b61")
+    engine = create_engine(url)
+    with engine.begin() as connection:
+        connection.execute(text("INSERT INTO users (id, email, hashed_password) VALUES (3, 'a@example.com', 'x')"))
+        connection.execute(text("INSERT INTO accounts (id, user_id, name, account_type, balance) VALUES (1, 3, 'A', 'checking', 0)"))
+        connection.execute(text(
+            "INSERT INTO transactions (user_id, account_id, amount, type, category, date) VALUES "
+            "(3, 1, 4.5, 'expense', 'Dining', '2025-03-02 09:00:00.000000'), "
+            "(3, 1, 10, 'Expense', 'Dining', '2025-03-03 12:00:00.000000'), "
+            "(3, 1, 7, 'expense', NULL, '2025-02-26 00:00:00.000000'), "
+            "(3, 1, 99, 'income', 'Salary', '2025-03-03 00:00:00.000000'), "
+            "(3, 1, 1, 'expense', 'Dining', NULL)"
+        ))
+    migrate(url, fresh=False)
+    with Session(engine) as db:
+        assert len(budgets.stored(db)) == 5
+        assert budgets.verify(db) == []
+    engine.dispose()
+
+def test_recurring_migration_detects_existing_series(tmp_path):
+    url = f"sqlite:///{tmp_path / 'recurring.db'}"
+    migrate(url, revision="4a9e1d7c3b52")
+    engine = create_engine(url)
+    with engine.begin() as connection:
+        connection.execute(text("INSERT INTO users (id, email, hashed_password) VALUES (3, 'a@example.com', 'x')"))
+        connection.execute(text("INSERT INTO accounts (id, user_id, name, account_type, balance) VALUES (1, 3, 'A', 'checking', 0)"))
+        for month in (1, 2, 3, 4):
+            connection.execute(text(
+                "INSERT INTO transactions (user_id, account_id, amount, type, description, date) "
+                f"VALUES (3, 1, 15.99, 'expense', 'NETFLIX.COM 4432', '2025-0{month}-05 00:00:00.000000')"
+            ))
+    migrate(url, fresh=False)
+    with engine.connect() as connection:
+        keys = connection.execute(text("SELECT DISTINCT merchant_key FROM transactions")).scalars().all()
+        series = connection.execute(text("SELECT user_id, merchant_key, period, occurrences FROM recurring")).all()
+    assert keys == ["netflix"]
+    assert [tuple(row) for row in series] == [(3, "netflix", "monthly", 4)]
+    engine.dispose()
+
+def test_app_import_does_not_load_optional_heavy_modules():
+    code = "import sys, app.main; print(sorted(m for m in ('plaid', 'alembic', 'numpy') if m in sys.modules))"
+    result = subprocess.run([sys.executable, "-c", code], capture_output=True, text=True, check=True)
+    assert result.stdout.strip() == "[]"
@@ -0,0 +1,187 @@
+import pytest
+from app.main import app
+from app.models import Account, PlaidItem, Transaction, User
+from app.routers.bank import get_plaid_client
+from app.services import plaid_service, rollups
+from tests.fake_plaid import FakePlaid, plaid_txn
+
+# ----------------------------
+# Fixtures
+# ----------------------------
+@pytest.fixture(scope="module")
+def fake_plaid():
+    fake = FakePlaid().start()
+    yield fake
+    fake.stop()
+
+@pytest.fixture(scope="module")
+def bank_client(client, fake_plaid):
+    plaid_client = fake_plaid.client()
+    app.dependency_overrides[get_plaid_client] = lambda: plaid_client
+    yield client
+    app.dependency_overrides.pop(get_plaid_client, None)
+
+@pytest.fixture(scope="module")
+def account_id(test_db, test_user):
+    account = Account(
+        user_id=test_user.id, name="Checking", account_type="checking",
+        balance=0.0, plaid_account_id="plaid-checking",
+    )
+    test_db.add(account)
+    test_db.commit()
+    return account.id
+
+@pytest.fixture(scope="module")
+def item(bank_client, auth_headers, account_id):
+    response = bank_client.post("/bank/items", json={"public_token": "public-1"}, headers=auth_headers)
+    assert response.status_code == 201
+    return response.json()
+
+@pytest.fixture(autouse=True)
+def small_pages(monkeypatch):
+    monkeypatch.setattr(plaid_service.settings, "plaid_sync_page_size", 2)
+
+def sync(bank_client, auth_headers):
+    response = bank_client.post("/bank/sync", headers=auth_headers)
+    assert response.status_code == 200
+    return response.json()
+
+def balance(test_db, account_id):
+    test_db.expire_all()
+    return test_db.get(Account, account_id).balance
+
+# ----------------------------
+# Tests
+# ----------------------------
+def test_link_item(bank_client, auth_headers, item):
+    assert item["plaid_item_id"] == "item-public-1"
+    assert item["last_synced_at"] is None
+
+    response = bank_client.post("/bank/items", json={"public_token": "public-1"}, headers=auth_headers)
+    assert response.status_code == 409
+
+    response = bank_client.get("/bank/items", headers=auth_headers)
+    assert [i["id"] for i in response.json()] == [item["id"]]
+
+def test_initial_sync_pages_through_everything(bank_client, auth_headers, fake_plaid, test_db, account_id, item):
+    token = "access-public-1"
+    fake_plaid.push(token, "added", plaid_txn("t1", 25.0, merchant_name="Grocer",
+                                              personal_finance_category={"primary": "FOOD_AND_DRINK"}))
+    fake_plaid.push(token, "added", plaid_txn("t2", -1000.0, name="Payroll", category=["Transfer", "Payroll"]))
+    fake_plaid.push(token, "added", plaid_txn("t3", 10.0, account_id="plaid-unlinked"))
+
+    assert sync(bank_client, auth_headers) == [
+        {"item_id": item["id"], "added": 2, "modified": 0, "removed": 0, "skipped": 1, "error": None},
+    ]
+    assert balance(test_db, account_id) == 975.0
+
+    rows = {t.plaid_transaction_id: t for t in test_db.query(Transaction).filter(Transaction.account_id == account_id)}
+    assert set(rows) == {"t1", "t2"}
+    assert (rows["t1"].type, rows["t1"].amount, rows["t1"].description, rows["t1"].category) == \
+        ("expense", 25.0, "Grocer", "FOOD_AND_DRINK")
+    assert (rows["t2"].type, rows["t2"].amount, rows["t2"].description, rows["t2"].category) == \
+        ("income", 1000.0, "Payroll", "Transfer")
+
+    stored = test_db.get(PlaidItem, item["id"])
+    assert stored.cursor == "3"
+    assert stored.last_synced_at is not None
+
+def test_incremental_sync_applies_modifications_and_removals(bank_client, auth_headers, fake_plaid, test_db, test_user, account_id, item):
+    token = "access-public-1"
+    fake_plaid.push(token, "modified", plaid_txn("t1", 30.0, day="2024-04-01"))
+    fake_plaid.push(token, "removed", "t2")
+    calls = fake_plaid.calls
+
+    result = sync(bank_client, auth_headers)[0]
+    assert (result["added"], result["modified"], result["removed"]) == (0, 1, 1)
+    assert fake_plaid.calls == calls + 1  # only the new page was fetched
+    assert balance(test_db, account_id) == -30.0
+    assert [t.plaid_transaction_id for t in test_db.query(Transaction).filter(Transaction.account_id == account_id)] == ["t1"]
+    assert rollups.verify(test_db, test_user.id) == []
+
+    # Nothing new: no writes, cursor unchanged
+    result = sync(bank_client, auth_headers)[0]
+    assert (result["added"], result["modified"], result["removed"]) == (0, 0, 0)
+    assert balance(test_db, account_id) == -30.0
+
+def test_sync_restarts_after_mutation_during_pagination(bank_client, auth_headers, fake_plaid, test_db, account_id, item):
+    token = "access-public-1"
+    fake_plaid.push(token, "added", plaid_txn("t4", 5.0))
+    fake_plaid.fail_next[token] = [plaid_service.MUTATION_DURING_PAGINATION]
+
+    result = sync(bank_client, auth_headers)[0]
+    assert result["error"] is None
+    assert result["added"] == 1
+    assert balance(test_db, account_id) == -35.0
+
+def test_failed_item_keeps_its_cursor(bank_client, auth_headers, fake_plaid, test_db, account_id, item):
+    token = "access-public-1"
+    fake_plaid.push(token, "added", plaid_txn("t5", 5.0))
+    fake_plaid.fail_next[token] = ["ITEM_LOGIN_REQUIRED"]
+
+    result = sync(bank_client, auth_headers)[0]
+    assert result["error"].startswith("ITEM_LOGIN_REQUIRED")
+    test_db.expire_all()
+    assert test_db.get(PlaidItem, item["id"]).cursor == "6"
+
+    assert sync(bank_client, auth_headers)[0]["added"] == 1
+    assert balance(test_db, account_id) == -40.0
+
+def test_sync_leaves_ids_held_by_another_user_alone(bank_client, auth_headers, fake_plaid, test_db, test_user, account_id, item):
+    # Clients may set plaid_transaction_id themselves, so another user can hold one first
+    owner = User(email="plaid-other@example.com", hashed_password="x")
+    test_db.add(owner)
+    test_db.flush()
+    other = Account(user_id=owner.id, name="Other", account_type="checking", balance=0.0)
+    test_db.add(other)
+    test_db.flush()
+    test_db.add(Transaction(user_id=owner.id, account_id=other.id, amount=3.0, type="expense",
+                            description="Planted", plaid_transaction_id="t-planted"))
+    test_db.commit()
+    before = balance(test_db, account_id)
+
+    fake_plaid.push("access-public-1", "added", plaid_txn("t-planted", 50.0))
+    result = sync(bank_client, auth_headers)[0]
+    assert (result["added"], result["skipped"]) == (0, 1)
+    assert balance(test_db, account_id) == before
+    assert balance(test_db, other.id) == 0.0
+    planted = test_db.query(Transaction).filter(Transaction.plaid_transaction_id == "t-planted").one()
+    assert (planted.account_id, planted.amount) == (other.id, 3.0)
+    assert rollups.verify(test_db, test_user.id) == []
+
+def test_concurrent_syncs_of_an_item_apply_once(fake_plaid, test_db, account_id, item):
+    token = "access-public-1"
+    fake_plaid.push(token, "added", plaid_txn("t-race", 8.0))
+    stored = test_db.get(PlaidItem, item["id"])
+    # Both syncs fetch from the same cursor before either applies
+    first, second = (plaid_service.fetch_changes(fake_plaid.client(), token, stored.cursor, 10) for _ in range(2))
+    before = balance(test_db, account_id)
+
+    assert plaid_service.apply_changes(test_db, stored, first)["added"] == 1
+    result = plaid_service.apply_changes(test_db, test_db.get(PlaidItem, item["id"]), second)
+    assert result["error"].startswith(plaid_service.SYNC_CONFLICT)
+    assert balance(test_db, account_id) == before - 8.0
+    assert test_db.get(PlaidItem, item["id"]).cursor == first.next_cursor
+
+def test_sync_publishes_live_events(bank_client, auth_headers, fake_plaid, test_db, account_id, item):
+    fake_plaid.push("access-public-1", "added", plaid_txn("t-live", 12.0))
+    with bank_client.websocket_connect("/ws", headers=auth_headers) as ws:
+        assert sync(bank_client, auth_headers)[0]["added"] == 1
+        assert ws.receive_json() == {"type": "transactions.synced", "added": 1, "modified": 0, "removed": 0}
+        assert ws.receive_json() == {
+            "type": "account.balance", "accounts": [{"id": account_id, "balance": balance(test_db, account_id)}],
+        }
+
+def test_fetch_all_bounds_concurrency():
+    fake = FakePlaid(latency=0.05).start()
+    try:
+        for n in range(6):
+            fake.push(f"access-{n}", "added", plaid_txn(f"c{n}", 1.0))
+        items = [(n, f"access-{n}", None) for n in range(6)]
+
+        results = plaid_service.fetch_all(fake.client(), items, page_size=10, workers=2)
+    finally:
+        fake.stop()
+
+    assert all(len(results[n].added) == 1 for n in range(6))
+    assert fake.max_in_flight == 2
@@ -0,0 +1,144 @@
+import pytest
+from sqlalchemy import event, text
+from app.models import Base
+from tests.conftest import engine
+
+# ----------------------------
+# Helpers
+# ----------------------------
+@pytest.fixture
+def captured(client):
+    statements = []
+
+    def before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        if statement.lstrip().upper().startswith(("SELECT", "WITH", "UPDATE", "DELETE")):
+            statements.append((statement, parameters))
+
+    event.listen(engine, "before_cursor_execute", before_cursor_execute)
+    yield statements
+    event.remove(engine, "before_cursor_execute", before_cursor_execute)
+
+def table_scans(statements):
+    """Return the EXPLAIN QUERY PLAN lines that read a whole table."""
+    scans = []
+    with engine.connect() as conn:
+        for statement, parameters in statements:
+            plan = conn.exec_driver_sql("EXPLAIN QUERY PLAN " + statement, parameters).fetchall()
+            for row in plan:
+                detail = row[-1]
+                # "SCAN <table>" is a full scan; "SEARCH ... USING INDEX" is
+                # not, and scanning a materialized subquery is fine
+                words = detail.split()
+                if words[0] == "SCAN" and words[1] in Base.metadata.tables:
+                    scans.append((statement, detail))
+    return scans
+
+def assert_no_table_scans(statements):
+    assert statements, "no queries were captured"
+    scans = table_scans(statements)
+    assert not scans, "\n".join(f"{detail}\n  {sql}" for sql, detail in scans)
+
+# ----------------------------
+# Tests
+# ----------------------------
+@pytest.fixture(scope="module")
+def account_id(client, auth_headers):
+    response = client.post(
+        "/accounts/",
+        json={"name": "Checking", "account_type": "checking", "balance": 100.0},
+        headers=auth_headers,
+    )
+    return response.json()["id"]
+
+@pytest.fixture(scope="module")
+def transaction_id(client, auth_headers, account_id):
+    payload = {"account_id": account_id, "amount": 10, "type": "expense", "category": "Food"}
+    response = client.post("/transactions/", json=payload, headers=auth_headers)
+    return response.json()["id"]
+
+def test_auth_queries(client, captured, fast_hasher):
+    client.post("/auth/signup", json={"email": "plans@example.com", "password": "pw"})
+    client.post("/auth/login", data={"username": "plans@example.com", "password": "pw"})
+    assert_no_table_scans(captured)
+
+def test_account_queries(client, auth_headers, account_id, captured):
+    client.get("/accounts/", headers=auth_headers)
+    assert_no_table_scans(captured)
+
+def test_create_transaction_queries(client, auth_headers, account_id, captured):
+    payload = {"account_id": account_id, "amount": 5, "type": "income"}
+    client.post("/transactions/", json=payload, headers=auth_headers)
+    assert_no_table_scans(captured)
+
+@pytest.mark.parametrize("params", [
+    {},
+    {"limit": 1},
+    {"start_date": "2020-01-01T00:00:00", "end_date": "2100-01-01T00:00:00"},
+    {"type": "expense", "category": "Food", "min_amount": 1, "max_amount": 100},
+])
+def test_list_transaction_queries(client, auth_headers, transaction_id, account_id, captured, params):
+    response = client.get("/transactions/", params=params, headers=auth_headers)
+    next_cursor = response.json()["next_cursor"]
+    if next_cursor:
+        client.get("/transactions/", params={**params, "cursor": next_cursor}, headers=auth_headers)
+    client.get("/transactions/", params={**params, "account_id": account_id}, headers=auth_headers)
+    assert_no_table_scans(captured)
+
+def test_single_transaction_queries(client, auth_headers, transaction_id, account_id, captured):
+    client.get(f"/transactions/{transaction_id}", headers=auth_headers)
+    payload = {"account_id": account_id, "amount": 12, "type": "expense"}
+    client.put(f"/transactions/{transaction_id}", json=payload, headers=auth_headers)
+    client.delete(f"/transactions/{transaction_id}", headers=auth_headers)
+    assert_no_table_scans(captured)
+
+def test_bulk_transaction_queries(client, auth_headers, account_id, captured):
+    rows = [
+        {"account_id": account_id, "amount": 1, "type": "expense", "plaid_transaction_id": f"plan-{i}"}
+        for i in range(3)
+    ]
+    client.post("/transactions/bulk", json=rows, headers=auth_headers)
+    assert_no_table_scans(captured)
+
+def test_account_include_transactions_queries(client, auth_headers, transaction_id, captured):
+    client.get("/accounts/", params={"include": "transactions"}, headers=auth_headers)
+    assert_no_table_scans(captured)
+
+def test_report_queries(client, auth_headers, transaction_id, captured):
+    client.get("/reports/monthly", params={"start_month": "2020-01-01"}, headers=auth_headers)
+    client.get("/reports/categories", params={"type": "expense"}, headers=auth_headers)
+    assert_no_table_scans(captured)
+
+def test_budget_queries(client, auth_headers, transaction_id, captured):
+    client.post("/budgets/", json={"category": "Food", "period": "weekly", "amount": 50}, headers=auth_headers)
+    client.get("/budgets/", headers=auth_headers)
+    assert_no_table_scans(captured)
+
+def test_forecast_queries(client, auth_headers, transaction_id, captured):
+    client.get("/accounts/forecast", params={"days": 30}, headers=auth_headers)
+    assert_no_table_scans(captured)
+
+def test_search_queries(client, auth_headers, transaction_id, captured):
+    client.get("/transactions/search", params={"q": "food"}, headers=auth_headers)
+    assert_no_table_scans(captured)
+
+def test_rule_queries(client, auth_headers, transaction_id, captured):
+    rule = client.post("/rules/", json={"category": "Groceries", "merchant": "market"}, headers=auth_headers).json()
+    client.get("/rules/", headers=auth_headers)
+    client.post("/transactions/recategorize", headers=auth_headers)
+    client.delete(f"/rules/{rule['id']}", headers=auth_headers)
+    assert_no_table_scans(captured)
+
+def test_recurring_queries(client, auth_headers, transaction_id, captured):
+    client.get("/transactions/recurring", headers=auth_headers)
+    assert_no_table_scans(captured)
+
+@pytest.mark.parametrize("format", ["csv", "ndjson"])
+def test_export_queries(client, auth_headers, transaction_id, captured, format):
+    client.get("/transactions/export", params={"format": format}, headers=auth_headers)
+    assert_no_table_scans(captured)
+
+def test_job_queries(client, auth_headers, captured):
+    job = client.post("/jobs/", json={"kind": "rebuild_rollups"}, headers=auth_headers).json()
+    client.get("/jobs/", headers=auth_headers)
+    client.get(f"/jobs/{job['id']}", headers=auth_headers)
+    assert_no_table_scans(captured)
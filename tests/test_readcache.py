@@ -0,0 +1,256 @@
+import asyncio
+import re
+import pytest
+from sqlalchemy import event
+from app import readcache
+from app.readcache import MemoryBackend, ReadCache, RedisBackend
+from tests.conftest import engine
+from tests.fake_redis import FakeRedis
+
+# ----------------------------
+# Fixtures
+# ----------------------------
+@pytest.fixture(scope="module")
+def fake_redis():
+    server = FakeRedis().start()
+    yield server
+    server.stop()
+
+@pytest.fixture(scope="module", params=["memory", "redis"])
+def kind(request):
+    return request.param
+
+@pytest.fixture(scope="module")
+def cache(kind, client, fake_redis):
+    if kind == "memory":
+        backend = MemoryBackend(1000)
+    else:
+        backend = RedisBackend(fake_redis.url)
+    readcache.cache = ReadCache(backend, ttl=60, lease_seconds=1)
+    yield readcache.cache
+    readcache.cache = None
+    # The redis client belongs to the test client's event loop
+    client.portal.call(backend.close)
+
+@pytest.fixture(scope="module")
+def accounts(client, auth_headers, kind, cache):
+    ids = []
+    for name in ("Checking", "Card"):
+        response = client.post("/accounts/", json={"name": name, "account_type": "checking", "balance": 0},
+                               headers=auth_headers)
+        ids.append(response.json()["id"])
+    for account_id in ids:
+        # Each backend's run gets its own merchant for the recategorize rule
+        body = {"account_id": account_id, "amount": 10, "type": "expense", "description": f"{kind} cafe"}
+        client.post("/transactions/", json=body, headers=auth_headers)
+    return ids
+
+@pytest.fixture
+def statements():
+    seen = []
+
+    def before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        # With the memory backend every read looks up the data version first
+        if "users.data_version" not in statement:
+            seen.append(statement)
+
+    event.listen(engine, "before_cursor_execute", before_cursor_execute)
+    yield seen
+    event.remove(engine, "before_cursor_execute", before_cursor_execute)
+
+def reads(accounts):
+    checking, card = accounts
+    return {
+        "accounts": ("/accounts/", {"include": "transactions"}),
+        "all": ("/transactions/", {}),
+        "checking": ("/transactions/", {"account_id": checking}),
+        "card": ("/transactions/", {"account_id": card}),
+    }
+
+def refreshed(client, headers, accounts, statements):
+    """Names of the reads that had to query the database."""
+    queried = set()
+    for name, (path, params) in reads(accounts).items():
+        statements.clear()
+        assert client.get(path, params=params, headers=headers).status_code == 200
+        # The user lookup for the bearer token is cached; any statement is a miss
+        if statements:
+            queried.add(name)
+    return queried
+
+# ----------------------------
+# Tests
+# ----------------------------
+def test_hits_answer_without_queries(client, auth_headers, accounts, statements):
+    transaction = client.get("/transactions/", params={"account_id": accounts[1]}, headers=auth_headers).json()
+    transaction_path = f"/transactions/{transaction['items'][0]['id']}"
+    for path, params in [*reads(accounts).values(), (transaction_path, {})]:
+        first = client.get(path, params=params, headers=auth_headers)
+        statements.clear()
+        second = client.get(path, params=params, headers=auth_headers)
+        assert not statements
+        assert second.content == first.content
+        assert second.headers["content-type"] == "application/json"
+        if "etag" in first.headers:
+            assert second.headers["etag"] == first.headers["etag"]
+            revalidated = client.get(path, params=params, headers={**auth_headers, "If-None-Match": first.headers["etag"]})
+            assert revalidated.status_code == 304
+            assert not statements
+
+    assert client.get("/transactions/999999", headers=auth_headers).status_code == 404
+
+def test_writes_invalidate_only_what_they_touch(client, auth_headers, kind, accounts, statements):
+    checking, card = accounts
+
+    def touched(*names):
+        # Memory entries are keyed on the user's data version, which every write moves
+        return set(reads(accounts)) if kind == "memory" else set(names)
+
+    assert refreshed(client, auth_headers, accounts, statements) <= set(reads(accounts))
+    assert refreshed(client, auth_headers, accounts, statements) == set()
+
+    body = {"account_id": checking, "amount": 4, "type": "expense", "description": "Bakery"}
+    created = client.post("/transactions/", json=body, headers=auth_headers).json()
+    assert refreshed(client, auth_headers, accounts, statements) == touched("accounts", "all", "checking")
+
+    transaction_path = f"/transactions/{created['id']}"
+    client.get(transaction_path, headers=auth_headers)
+    client.post("/transactions/bulk", json=[{**body, "account_id": card}], headers=auth_headers)
+    assert refreshed(client, auth_headers, accounts, statements) == touched("accounts", "all", "card")
+    statements.clear()
+    assert client.get(transaction_path, headers=auth_headers).json()["amount"] == 4
+    assert bool(statements) == (kind == "memory")
+
+    client.put(transaction_path, json={**body, "amount": 6}, headers=auth_headers)
+    assert refreshed(client, auth_headers, accounts, statements) == touched("accounts", "all", "checking")
+    assert client.get(transaction_path, headers=auth_headers).json()["amount"] == 6
+
+    client.post("/rules/", json={"category": "Coffee", "merchant": f"{kind} cafe"}, headers=auth_headers)
+    client.post("/transactions/recategorize", headers=auth_headers)
+    assert refreshed(client, auth_headers, accounts, statements) == set(reads(accounts))
+    items = client.get("/transactions/", params={"account_id": card}, headers=auth_headers).json()["items"]
+    assert "Coffee" in {item["category"] for item in items}
+
+    client.delete(transaction_path, headers=auth_headers)
+    assert refreshed(client, auth_headers, accounts, statements) == touched("accounts", "all", "checking")
+    assert client.get(transaction_path, headers=auth_headers).status_code == 404
+
+    client.post("/accounts/", json={"name": "Savings", "account_type": "savings", "balance": 0}, headers=auth_headers)
+    assert refreshed(client, auth_headers, accounts, statements) == touched("accounts", "all")
+
+def test_stats_are_exported(client, auth_headers, accounts, cache):
+    hits = cache.hits
+    client.get("/accounts/", headers=auth_headers)
+    client.get("/accounts/", headers=auth_headers)
+    assert cache.hits > hits
+    assert 0 < cache.stats()["hit_ratio"] < 1
+
+    text = client.get("/metrics").text
+    for name in ("hits_total", "misses_total", "coalesced_total", "errors_total", "hit_ratio"):
+        assert re.search(rf"^read_cache_{name} \S+$", text, re.MULTILINE)
+    if isinstance(cache.backend, MemoryBackend):
+        assert re.search(r"^read_cache_entries [1-9]", text, re.MULTILINE)
+
+def test_backend_outage_falls_back_to_the_database(client, auth_headers, accounts, cache, fake_redis):
+    if not isinstance(cache.backend, RedisBackend):
+        pytest.skip("only the redis backend can fail")
+    expected = client.get("/transactions/", headers=auth_headers).json()
+    errors = cache.errors
+    fake_redis.down = True
+    try:
+        response = client.get("/transactions/", headers=auth_headers)
+        assert response.status_code == 200
+        assert response.json() == expected
+        body = {"account_id": accounts[0], "amount": 1, "type": "expense"}
+        assert client.post("/transactions/", json=body, headers=auth_headers).status_code == 200
+    finally:
+        fake_redis.down = False
+    assert cache.errors > errors
+
+def test_memory_backends_see_other_workers_writes(client, auth_headers, monkeypatch):
+    # Two caches stand in for two worker processes, each with its own memory
+    workers = [ReadCache(MemoryBackend(100), ttl=60, lease_seconds=1) for _ in range(2)]
+
+    def on(worker, method, path, **kwargs):
+        monkeypatch.setattr(readcache, "cache", workers[worker])
+        return client.request(method, path, headers={**auth_headers, **kwargs.pop("headers", {})}, **kwargs)
+
+    account = {"name": "Shared", "account_type": "checking", "balance": 0}
+    account_id = on(0, "POST", "/accounts/", json=account).json()["id"]
+    body = {"account_id": account_id, "amount": 5, "type": "expense", "description": "Two workers"}
+    transaction_id = on(0, "POST", "/transactions/", json=body).json()["id"]
+    paths = ["/accounts/", f"/transactions/?account_id={account_id}", f"/transactions/{transaction_id}"]
+    before = {path: on(0, "GET", path) for path in paths}
+    for path in paths:
+        on(1, "GET", path)
+
+    on(1, "PUT", f"/transactions/{transaction_id}", json={**body, "amount": 7})
+    assert on(0, "GET", paths[2]).json()["amount"] == 7
+    assert on(0, "GET", paths[1]).json()["items"][0]["amount"] == 7
+    for path in paths[:2]:
+        stale = on(0, "GET", path, headers={"If-None-Match": before[path].headers["etag"]})
+        assert stale.status_code == 200
+        assert stale.headers["etag"] != before[path].headers["etag"]
+        assert stale.content != before[path].content
+        assert on(0, "GET", path, headers={"If-None-Match": stale.headers["etag"]}).status_code == 304
+    assert workers[0].hits > 0
+
+def test_concurrent_misses_fill_once(fake_redis):
+    fills = []
+
+    async def fill():
+        fills.append(1)
+        await asyncio.sleep(0.05)
+        return b"value"
+
+    async def run(caches):
+        results = await asyncio.gather(*(
+            caches[n % len(caches)].fetch(f"stampede:{len(caches)}", ["user:1"], fill) for n in range(8)
+        ))
+        for cache in caches:
+            await cache.backend.close()
+        return results
+
+    # One process: the first miss fills, the rest await it
+    cache = ReadCache(MemoryBackend(100), ttl=60, lease_seconds=1)
+    assert asyncio.run(run([cache])) == [b"value"] * 8
+    assert (len(fills), cache.misses, cache.coalesced) == (1, 8, 7)
+
+    # Two processes sharing redis: the fill lease holds the other one off
+    fills.clear()
+    caches = [ReadCache(RedisBackend(fake_redis.url), ttl=60, lease_seconds=1) for _ in range(2)]
+    assert asyncio.run(run(caches)) == [b"value"] * 8
+    assert len(fills) == 1
+    # A lookup landing after the fill was stored is a plain hit
+    assert sum(cache.coalesced + cache.hits for cache in caches) == 7
+
+def test_failed_fill_is_not_cached():
+    calls = []
+
+    async def fill():
+        calls.append(1)
+        if len(calls) == 1:
+            raise RuntimeError("database went away")
+        return b"value"
+
+    async def run():
+        cache = ReadCache(MemoryBackend(100), ttl=60, lease_seconds=1)
+        with pytest.raises(RuntimeError):
+            await cache.fetch("flaky", ["user:1"], fill)
+        return await cache.fetch("flaky", ["user:1"], fill)
+
+    assert asyncio.run(run()) == b"value"
+
+def test_memory_backend_evicts_and_expires():
+    now = [0.0]
+    backend = MemoryBackend(2, clock=lambda: now[0])
+
+    async def run():
+        for key in ("a", "b", "c"):
+            await backend.set(key, b"1", ttl=10)
+        assert await backend.get_many(["a", "b", "c"]) == [None, b"1", b"1"]
+        now[0] = 11
+        assert await backend.get_many(["b"]) == [None]
+
+    asyncio.run(run())
+    assert backend.stats()["evictions_total"] == 2
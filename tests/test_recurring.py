@@ -0,0 +1,101 @@
+from datetime import date, datetime, timedelta
+import pytest
+from sqlalchemy import text
+from app.models import Account, RecurringSeries, Transaction, merchant_key
+from app.services import recurring
+
+# ----------------------------
+# Fixtures
+# ----------------------------
+@pytest.fixture(scope="module")
+def account(test_db, test_user):
+    checking = Account(user_id=test_user.id, name="Checking", account_type="checking", balance=0.0)
+    test_db.add(checking)
+    test_db.commit()
+    return checking.id
+
+def row(description, when, amount, type="expense"):
+    return (merchant_key(description), type, when, amount, description, None, 1)
+
+def monthly(description, start, count, amount):
+    return [row(description, datetime(start.year + (start.month + n - 1) // 12, (start.month + n - 1) % 12 + 1, start.day), amount)
+            for n in range(count)]
+
+def listed(client, auth_headers, **params):
+    response = client.get("/transactions/recurring", params=params, headers=auth_headers)
+    assert response.status_code == 200
+    return {series["merchant_key"]: series for series in response.json()}
+
+# ----------------------------
+# Tests
+# ----------------------------
+def test_detects_periods_with_jitter():
+    rows = monthly("NETFLIX.COM", date(2024, 1, 15), 6, 15.49)
+    rows[2] = row("POS 4411 NETFLIX.COM #12", datetime(2024, 3, 17), 15.49)  # two days late
+    rows += [row("Yoga Studio", datetime(2024, 1, 1) + timedelta(days=7 * n + n % 2), 12.0 + n % 3 * 0.5) for n in range(5)]
+    rows += [row("Domain renewal", datetime(2022 + n, 6, 1), 20.0) for n in range(2)]
+    rows += [row("Employer Payroll", datetime(2024, 1, 5) + timedelta(days=14 * n), 2100.0, "income") for n in range(4)]
+    # Irregular days and amounts never form a series
+    rows += [row("Corner Cafe", datetime(2024, 1, 1) + timedelta(days=d), a) for d, a in ((0, 4.5), (3, 12.0), (11, 7.25), (30, 3.0))]
+
+    found = {(s["merchant_key"], s["type"]): s for s in recurring.detect(rows)}
+    assert {key: (s["period"], s["occurrences"]) for key, s in found.items()} == {
+        ("netflix", "expense"): ("monthly", 6),
+        ("yoga studio", "expense"): ("weekly", 5),
+        ("domain renewal", "expense"): ("annual", 2),
+        ("employer payroll", "income"): ("biweekly", 4),
+    }
+    netflix = found[("netflix", "expense")]
+    assert (netflix["first_date"], netflix["last_date"], netflix["next_date"]) == (date(2024, 1, 15), date(2024, 6, 15), date(2024, 7, 15))
+
+def test_series_restarts_after_a_break():
+    rows = monthly("Streaming", date(2024, 1, 3), 4, 10.0) + monthly("Streaming", date(2024, 5, 3), 3, 18.0)
+    # A price rise starts a new run; the older one is history
+    [series] = recurring.detect(rows)
+    assert (series["occurrences"], series["amount"], series["first_date"]) == (3, 18.0, date(2024, 5, 3))
+    assert recurring.detect(monthly("Streaming", date(2024, 1, 3), 2, 10.0)) == []
+
+def test_next_date_clamps_to_month_end():
+    assert recurring.next_date("monthly", date(2024, 1, 31)) == date(2024, 2, 29)
+    assert recurring.next_date("monthly", date(2024, 12, 31)) == date(2025, 1, 31)
+    assert recurring.next_date("annual", date(2024, 2, 29)) == date(2025, 2, 28)
+
+def test_series_follow_writes(client, auth_headers, account):
+    body = {"account_id": account, "amount": 9.99, "type": "expense", "description": "Spotify P0A1"}
+    dates = ["2025-01-04T08:00:00", "2025-02-04T08:00:00", "2025-03-05T08:00:00"]
+    assert client.post("/transactions/bulk", json=[{**body, "date": d} for d in dates], headers=auth_headers).json()["created"] == 3
+    spotify = listed(client, auth_headers)["spotify"]
+    assert (spotify["period"], spotify["occurrences"], spotify["next_date"]) == ("monthly", 3, "2025-04-05")
+
+    fourth = client.post("/transactions/", json={**body, "date": "2025-04-04T08:00:00"}, headers=auth_headers).json()
+    assert listed(client, auth_headers)["spotify"]["occurrences"] == 4
+    assert listed(client, auth_headers, period="weekly") == {}
+
+    # Renaming a row moves it to another merchant and breaks the series
+    client.put(f"/transactions/{fourth['id']}", json={**body, "description": "Tidal", "date": "2025-04-04T08:00:00"},
+               headers=auth_headers)
+    assert listed(client, auth_headers)["spotify"]["occurrences"] == 3
+    middle = [t for t in client.get("/transactions/", params={"limit": 500}, headers=auth_headers).json()["items"]
+              if t["description"] == "Spotify P0A1" and t["date"].startswith("2025-02")][0]
+    client.delete(f"/transactions/{middle['id']}", headers=auth_headers)
+    assert "spotify" not in listed(client, auth_headers)
+
+def test_refresh_reads_only_touched_merchants_and_rebuild_backfills(client, auth_headers, test_db, test_user, account):
+    # Rows written behind the app's back: no series yet, one without a merchant key
+    for n in range(3):
+        test_db.add(Transaction(user_id=test_user.id, account_id=account, amount=40.0, type="expense",
+                                description="City Gym", date=datetime(2024, 1 + n, 2)))
+    test_db.commit()
+    test_db.execute(text("UPDATE transactions SET merchant_key = NULL WHERE description = 'City Gym' AND date < '2024-02-01'"))
+    test_db.commit()
+
+    body = {"account_id": account, "amount": 5.0, "type": "expense", "description": "Bakery", "date": "2024-06-01T00:00:00"}
+    client.post("/transactions/", json=body, headers=auth_headers)
+    assert "city gym" not in listed(client, auth_headers)
+
+    recurring.rebuild(test_db, test_user.id)
+    assert listed(client, auth_headers)["city gym"]["occurrences"] == 3
+    assert test_db.query(Transaction).filter(Transaction.merchant_key.is_(None), Transaction.description == "City Gym").count() == 0
+    # rebuild() replaces rather than duplicates
+    recurring.rebuild(test_db)
+    assert test_db.query(RecurringSeries).filter(RecurringSeries.merchant_key == "city gym").count() == 1
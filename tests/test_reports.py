@@ -0,0 +1,72 @@
+import pytest
+from app.models import Account, MonthlyRollup
+from app.services import rollups
+
+# ----------------------------
+# Fixtures
+# ----------------------------
+@pytest.fixture(scope="module")
+def account_id(test_db, test_user):
+    account = Account(user_id=test_user.id, name="Checking", account_type="checking", balance=0.0)
+    test_db.add(account)
+    test_db.commit()
+    return account.id
+
+@pytest.fixture(scope="module")
+def history(client, auth_headers, account_id):
+    def post(amount, type, category, date):
+        payload = {"account_id": account_id, "amount": amount, "type": type, "category": category, "date": date}
+        response = client.post("/transactions/", json=payload, headers=auth_headers)
+        assert response.status_code == 200
+        return response.json()["id"]
+
+    post(1000, "income", "Salary", "2025-01-05T00:00:00")
+    rent = post(500, "expense", "Rent", "2025-01-06T00:00:00")
+    groceries = post(40, "expense", "Food", "2025-01-20T00:00:00")
+    post(60, "expense", None, "2025-02-02T00:00:00")
+    client.post("/transactions/bulk", json=[
+        {"account_id": account_id, "amount": 1000, "type": "income", "category": "Salary", "date": "2025-02-05T00:00:00"},
+        {"account_id": account_id, "amount": 25, "type": "expense", "category": "Food", "date": "2025-02-10T00:00:00"},
+    ], headers=auth_headers)
+
+    # Move groceries to February and drop the rent
+    payload = {"account_id": account_id, "amount": 45, "type": "expense", "category": "Food", "date": "2025-02-20T00:00:00"}
+    assert client.put(f"/transactions/{groceries}", json=payload, headers=auth_headers).status_code == 200
+    assert client.delete(f"/transactions/{rent}", headers=auth_headers).status_code == 204
+
+# ----------------------------
+# Tests
+# ----------------------------
+def test_monthly_report(client, auth_headers, history):
+    response = client.get("/reports/monthly", headers=auth_headers)
+    assert response.status_code == 200
+    assert response.json() == [
+        {"month": "2025-01-01", "income": 1000.0, "expense": 0.0, "net": 1000.0, "count": 1},
+        {"month": "2025-02-01", "income": 1000.0, "expense": 130.0, "net": 870.0, "count": 4},
+    ]
+
+    response = client.get("/reports/monthly", params={"start_month": "2025-02-14"}, headers=auth_headers)
+    assert [r["month"] for r in response.json()] == ["2025-02-01"]
+
+def test_category_report(client, auth_headers, history):
+    response = client.get("/reports/categories", params={"type": "expense"}, headers=auth_headers)
+    assert response.status_code == 200
+    assert response.json() == [
+        {"category": "Food", "type": "expense", "total": 70.0, "count": 2},
+        {"category": None, "type": "expense", "total": 60.0, "count": 1},
+    ]
+
+def test_rollups_match_live_rows(test_db, test_user, history):
+    assert rollups.verify(test_db, test_user.id) == []
+
+def test_rebuild_repairs_drift(test_db, test_user, history):
+    row = test_db.query(MonthlyRollup).filter_by(category="Salary").first()
+    row.total += 1
+    test_db.commit()
+
+    drift = rollups.verify(test_db, test_user.id)
+    assert len(drift) == 1
+    assert drift[0]["key"][3] == "Salary"
+
+    rollups.rebuild(test_db, test_user.id)
+    assert rollups.verify(test_db, test_user.id) == []
@@ -0,0 +1,105 @@
+from datetime import datetime, timedelta
+import pytest
+from app.models import Account, Transaction, User
+
+# ----------------------------
+# Fixtures
+# ----------------------------
+@pytest.fixture(scope="module")
+def account(test_db, test_user):
+    checking = Account(user_id=test_user.id, name="Checking", account_type="checking", balance=0.0)
+    test_db.add(checking)
+    test_db.commit()
+    return checking.id
+
+@pytest.fixture(scope="module")
+def seeded(test_db, test_user, account):
+    start = datetime(2025, 1, 1)
+    rows = [
+        ("Starbucks Reserve", "Dining"),
+        ("Morning coffee at Starbucks", "Dining"),
+        ("Trader Joe's", "Groceries"),
+        ("Café Crème", "Dining"),
+        ("Rent", "Housing"),
+        ("Grocery outlet", "Shopping"),
+    ]
+    for day, (description, category) in enumerate(rows):
+        test_db.add(Transaction(
+            user_id=test_user.id, account_id=account, amount=10.0, type="expense",
+            description=description, category=category, date=start + timedelta(days=day),
+        ))
+
+    # Another user's rows with the same words must never show up
+    stranger = User(email="stranger@example.com", hashed_password="x")
+    test_db.add(stranger)
+    test_db.flush()
+    other = Account(user_id=stranger.id, name="Other", account_type="checking", balance=0.0)
+    test_db.add(other)
+    test_db.flush()
+    test_db.add(Transaction(
+        user_id=stranger.id, account_id=other.id, amount=5.0, type="expense",
+        description="Starbucks", category="Dining", date=start,
+    ))
+    test_db.commit()
+
+def search(client, auth_headers, q, **params):
+    response = client.get("/transactions/search", params={"q": q, **params}, headers=auth_headers)
+    assert response.status_code == 200
+    return response.json()
+
+# ----------------------------
+# Tests
+# ----------------------------
+def test_prefix_match_ranked_and_scoped(client, auth_headers, seeded):
+    page = search(client, auth_headers, "starb")
+    # Description starting with the query first, then containing it
+    assert [t["description"] for t in page["items"]] == ["Starbucks Reserve", "Morning coffee at Starbucks"]
+    assert page["next_offset"] is None
+
+def test_matches_category_and_all_words(client, auth_headers, seeded):
+    assert [t["description"] for t in search(client, auth_headers, "groceries")["items"]] == ["Trader Joe's"]
+    assert [t["description"] for t in search(client, auth_headers, "joe TRADER")["items"]] == ["Trader Joe's"]
+    assert search(client, auth_headers, "trader rent")["items"] == []
+    # Accents are folded on both sides
+    assert [t["description"] for t in search(client, auth_headers, "cafe creme")["items"]] == ["Café Crème"]
+
+def test_words_longer_than_the_prefix_index(client, auth_headers, seeded):
+    # "groceries" is matched on "grocerie*" in the index, then checked whole
+    assert [t["description"] for t in search(client, auth_headers, "groceries")["items"]] == ["Trader Joe's"]
+    assert [t["description"] for t in search(client, auth_headers, "grocery")["items"]] == ["Grocery outlet"]
+    assert search(client, auth_headers, "groceriesx")["items"] == []
+
+def test_pagination_and_filters(client, auth_headers, seeded):
+    first = search(client, auth_headers, "dining", limit=2)
+    assert len(first["items"]) == 2 and first["next_offset"] == 2
+    second = search(client, auth_headers, "dining", limit=2, offset=2)
+    assert second["next_offset"] is None
+    ids = [t["id"] for t in first["items"] + second["items"]]
+    assert len(ids) == len(set(ids)) == 3
+
+    dated = search(client, auth_headers, "dining", start_date="2025-01-02T00:00:00")
+    assert [t["description"] for t in dated["items"]] == ["Café Crème", "Morning coffee at Starbucks"]
+
+def test_queries_without_words(client, auth_headers, seeded):
+    assert search(client, auth_headers, "!!! ...") == {"items": [], "next_offset": None}
+    assert client.get("/transactions/search", params={"q": ""}, headers=auth_headers).status_code == 422
+
+def test_index_follows_create_update_delete(client, auth_headers, account, seeded):
+    body = {"account_id": account, "amount": 12.5, "type": "expense", "description": "Zanzibar Books", "category": "Hobbies"}
+    created = client.post("/transactions/", json=body, headers=auth_headers).json()
+    assert [t["id"] for t in search(client, auth_headers, "zanzi")["items"]] == [created["id"]]
+
+    updated = {**body, "description": "Quokka Bookshop"}
+    assert client.put(f"/transactions/{created['id']}", json=updated, headers=auth_headers).status_code == 200
+    assert search(client, auth_headers, "zanzi")["items"] == []
+    assert [t["id"] for t in search(client, auth_headers, "quokka")["items"]] == [created["id"]]
+    # Untouched columns still match after the update
+    assert [t["id"] for t in search(client, auth_headers, "hobbies")["items"]] == [created["id"]]
+
+    assert client.delete(f"/transactions/{created['id']}", headers=auth_headers).status_code == 204
+    assert search(client, auth_headers, "quokka")["items"] == []
+    assert search(client, auth_headers, "hobbies")["items"] == []
+
+    rows = [{**body, "description": f"Yurt rental {n}"} for n in range(3)]
+    assert client.post("/transactions/bulk", json=rows, headers=auth_headers).json()["created"] == 3
+    assert len(search(client, auth_headers, "yurt")["items"]) == 3
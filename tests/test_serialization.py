@@ -0,0 +1,47 @@
+from datetime import datetime
+import pytest
+from app.models import Account, Transaction
+from app.schemas import AccountSummary, TransactionRead
+
+# ----------------------------
+# Fixtures
+# ----------------------------
+@pytest.fixture(scope="module")
+def account_id(test_db, test_user):
+    account = Account(user_id=test_user.id, name="Checking", account_type="checking", balance=12.5)
+    test_db.add(account)
+    test_db.flush()
+    test_db.add_all([
+        Transaction(user_id=test_user.id, account_id=account.id, amount=1000, type="income",
+                    date=datetime(2025, 1, 5, 8, 30, 0, 123456), category="Salary", plaid_transaction_id="p-1"),
+        Transaction(user_id=test_user.id, account_id=account.id, amount=0.1 + 0.2, type="expense",
+                    date=datetime(2025, 1, 6), description="Café ☕ \"quoted\""),
+        Transaction(user_id=test_user.id, account_id=account.id, amount=7, type="Expense", date=datetime(2024, 12, 31)),
+    ])
+    test_db.commit()
+    return account.id
+
+# ----------------------------
+# Tests
+# ----------------------------
+def test_transaction_list_matches_response_model(client, auth_headers, test_db, account_id):
+    response = client.get("/transactions/", params={"account_id": account_id}, headers=auth_headers)
+    assert response.status_code == 200
+
+    rows = test_db.query(Transaction).filter(Transaction.account_id == account_id)
+    expected = {t.id: TransactionRead.model_validate(t).model_dump(mode="json") for t in rows}
+    assert {item["id"]: item for item in response.json()["items"]} == expected
+
+def test_account_list_matches_response_model(client, auth_headers, test_db, account_id):
+    response = client.get("/accounts/", params={"include": "transactions"}, headers=auth_headers)
+    account = next(a for a in response.json() if a["id"] == account_id)
+
+    rows = test_db.query(Transaction).filter(Transaction.account_id == account_id)
+    stored = test_db.get(Account, account_id)
+    expected = AccountSummary.model_validate({
+        "id": stored.id, "name": stored.name, "account_type": stored.account_type, "balance": stored.balance,
+        "plaid_account_id": None, "created_at": stored.created_at, "transaction_count": 3,
+        "last_activity": datetime(2025, 1, 6),
+        "transactions": sorted(rows, key=lambda t: (t.date, t.id), reverse=True),
+    }, from_attributes=True).model_dump(mode="json")
+    assert account == expected
@@ -0,0 +1,74 @@
+import asyncio
+import hashlib
+from datetime import timedelta
+import pytest
+from fastapi import HTTPException
+from jose import jwt
+from app import dependencies
+from app.auth_utils import create_access_token
+from app.cache import LRUCache
+
+# ----------------------------
+# Fixtures
+# ----------------------------
+class FakeClock:
+    def __init__(self, now: float):
+        self.now = now
+
+    def __call__(self) -> float:
+        return self.now
+
+@pytest.fixture
+def cache(monkeypatch):
+    cache = LRUCache(maxsize=2)
+    monkeypatch.setattr(dependencies, "token_cache", cache)
+    return cache
+
+def current_user(token):
+    return asyncio.run(dependencies.get_current_user(token))
+
+# ----------------------------
+# Tests
+# ----------------------------
+def test_hits_after_first_decode(cache):
+    token = create_access_token({"sub": "7"})
+    assert current_user(token) == "7"
+    assert current_user(token) == "7"
+    assert (cache.hits, cache.misses) == (1, 1)
+
+def test_tampered_token_is_never_served(cache):
+    token = create_access_token({"sub": "7"})
+    assert current_user(token) == "7"
+
+    header, payload, signature = token.split(".")
+    tampered = ".".join([header, payload, signature[:-2] + ("AA" if signature[-2:] != "AA" else "BB")])
+    with pytest.raises(HTTPException) as exc:
+        current_user(tampered)
+    assert exc.value.status_code == 401
+
+def test_expired_token_is_never_served(cache):
+    token = create_access_token({"sub": "7"}, expires_delta=timedelta(seconds=-1))
+    # As if it had been cached while still valid
+    key = hashlib.sha256(token.encode()).digest()
+    cache.set(key, "7", expires_at=float(jwt.get_unverified_claims(token)["exp"]))
+
+    with pytest.raises(HTTPException) as exc:
+        current_user(token)
+    assert exc.value.status_code == 401
+    assert cache.hits == 0
+    assert len(cache) == 0
+
+def test_lru_limit():
+    cache = LRUCache(maxsize=2, clock=FakeClock(0))
+    cache.set("a", 1, expires_at=10)
+    cache.set("b", 2, expires_at=10)
+    assert cache.get("a") == 1
+    cache.set("c", 3, expires_at=10)
+    assert cache.get("b") is None
+    assert cache.get("a") == 1
+    assert cache.get("c") == 3
+    assert cache.evictions == 1
+
+    cache.clock.now = 10
+    assert cache.get("a") is None
+    assert cache.stats()["evictions"] == 2
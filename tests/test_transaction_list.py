@@ -0,0 +1,107 @@
+import pytest
+from datetime import datetime, timedelta
+from app.models import Account, Transaction
+
+# ----------------------------
+# Fixtures
+# ----------------------------
+@pytest.fixture(scope="module")
+def seeded(test_db, test_user):
+    checking = Account(user_id=test_user.id, name="Checking", account_type="checking", balance=0.0)
+    savings = Account(user_id=test_user.id, name="Savings", account_type="savings", balance=0.0)
+    test_db.add_all([checking, savings])
+    test_db.commit()
+
+    start = datetime(2025, 1, 1)
+    for i in range(25):
+        test_db.add(Transaction(
+            user_id=test_user.id,
+            account_id=checking.id if i % 2 == 0 else savings.id,
+            amount=float(i + 1),
+            type="income" if i % 3 == 0 else "expense",
+            category="Food" if i % 5 == 0 else "Rent",
+            # Two rows per day so the id tiebreaker is exercised
+            date=start + timedelta(days=i // 2),
+        ))
+    test_db.commit()
+    return {"checking": checking.id, "savings": savings.id}
+
+# ----------------------------
+# Tests
+# ----------------------------
+def test_walk_all_pages(client, auth_headers, seeded):
+    seen = []
+    cursor = None
+    while True:
+        params = {"limit": 7}
+        if cursor:
+            params["cursor"] = cursor
+        response = client.get("/transactions/", params=params, headers=auth_headers)
+        assert response.status_code == 200
+        page = response.json()
+        assert len(page["items"]) <= 7
+        seen.extend(page["items"])
+        cursor = page["next_cursor"]
+        if cursor is None:
+            break
+
+    assert len(seen) == 25
+    assert len({t["id"] for t in seen}) == 25
+    keys = [(t["date"], t["id"]) for t in seen]
+    assert keys == sorted(keys, reverse=True)
+
+def test_filters(client, auth_headers, seeded):
+    params = {
+        "account_id": seeded["checking"],
+        "type": "EXPENSE",
+        "min_amount": 5,
+        "max_amount": 20,
+        "start_date": "2025-01-03T00:00:00",
+        "end_date": "2025-01-10T00:00:00",
+    }
+    response = client.get("/transactions/", params=params, headers=auth_headers)
+    assert response.status_code == 200
+    items = response.json()["items"]
+    assert items
+    for t in items:
+        assert t["account_id"] == seeded["checking"]
+        assert t["type"] == "expense"
+        assert 5 <= t["amount"] <= 20
+        assert "2025-01-03" <= t["date"] < "2025-01-10"
+
+    response = client.get("/transactions/", params={"category": "Food"}, headers=auth_headers)
+    assert {t["category"] for t in response.json()["items"]} == {"Food"}
+
+def test_invalid_cursor(client, auth_headers, seeded):
+    response = client.get("/transactions/", params={"cursor": "not-a-cursor"}, headers=auth_headers)
+    assert response.status_code == 400
+
+def test_undated_rows_come_last(client, auth_headers, test_db, test_user, seeded):
+    # Legacy rows without a date; the page boundaries fall on and among them
+    undated = [
+        Transaction(user_id=test_user.id, account_id=seeded["checking"], amount=1.0, type="expense")
+        for _ in range(5)
+    ]
+    test_db.add_all(undated)
+    test_db.flush()
+    # The column default fills in a missing date, so clear it afterwards
+    ids = [t.id for t in undated]
+    test_db.query(Transaction).filter(Transaction.id.in_(ids)).update({Transaction.date: None})
+    test_db.commit()
+
+    seen = []
+    params = {"limit": 4}
+    while True:
+        response = client.get("/transactions/", params=params, headers=auth_headers)
+        assert response.status_code == 200
+        page = response.json()
+        seen.extend(page["items"])
+        if page["next_cursor"] is None:
+            break
+        params["cursor"] = page["next_cursor"]
+
+    assert len(seen) == 30
+    assert [t["id"] for t in seen[25:]] == sorted(ids, reverse=True)
+    assert all(t["date"] is None for t in seen[25:])
+    dated = [(t["date"], t["id"]) for t in seen[:25]]
+    assert dated == sorted(dated, reverse=True)
@@ -4,6 +4,8 @@ from app.main import app
 from app.database import get_db
 from sqlalchemy import create_engine
 from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import StaticPool
+from app.auth_utils import create_access_token
 from app.models import Base, User, Account, Transaction
 from datetime import date
 
@@ -11,7 +13,11 @@ from datetime import date
 # Setup test database
 # ----------------------------
 SQLALCHEMY_DATABASE_URL = "sqlite:///:memory:"
-engine = create_engine(SQLALCHEMY_DATABASE_URL, connect_args={"check_same_thread": False})
+engine = create_engine(
+    SQLALCHEMY_DATABASE_URL,
+    connect_args={"check_same_thread": False},
+    poolclass=StaticPool,
+)
 TestingSessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 Base.metadata.create_all(bind=engine)
 
@@ -41,7 +47,7 @@ def test_user():
 @pytest.fixture(scope="module")
 def test_account(test_user):
     db = TestingSessionLocal()
-    account = Account(user_id=test_user.id, name="Checking", balance=1000.0)
+    account = Account(user_id=test_user.id, name="Checking", account_type="checking", balance=1000.0)
     db.add(account)
     db.commit()
     db.refresh(account)
@@ -50,8 +56,8 @@ def test_account(test_user):
 
 @pytest.fixture(scope="module")
 def auth_headers(test_user):
-    # Here, adjust if you have JWT auth, for simplicity we’ll fake it
-    return {"Authorization": f"Bearer {test_user.id}"}
+    token = create_access_token({"sub": str(test_user.id)})
+    return {"Authorization": f"Bearer {token}"}
 
 # ----------------------------
 # Tests
@@ -74,7 +80,7 @@ def test_create_transaction(test_account, auth_headers):
 def test_get_transactions(auth_headers):
     response = client.get("/transactions/", headers=auth_headers)
     assert response.status_code == 200
-    assert len(response.json()) > 0
+    assert len(response.json()["items"]) > 0
 
 def test_get_transaction(auth_headers):
     response = client.get("/transactions/1", headers=auth_headers)